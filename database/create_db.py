@@ -75,7 +75,73 @@ def create_database():
         graph_charge_ring BLOB
     );
     """)
-    
+
+    # Métricas de grafo materializadas (ver tools/populate_graph_metrics.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS graph_metrics (
+        structure_hash TEXT NOT NULL,
+        granularity TEXT NOT NULL,
+        threshold REAL NOT NULL,
+        metric_version TEXT NOT NULL,
+        properties_json TEXT NOT NULL,
+        node_ids BLOB NOT NULL,
+        metric_names TEXT NOT NULL,
+        metrics_blob BLOB NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (structure_hash, granularity, threshold, metric_version)
+    );
+    """)
+
+    # Modos GNM del grafo CA por estructura (ver gnm_repository_sqlite.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS gnm_results (
+        structure_hash TEXT NOT NULL,
+        threshold REAL NOT NULL,
+        n_modes INTEGER NOT NULL,
+        gnm_version TEXT NOT NULL,
+        node_ids BLOB NOT NULL,
+        eigenvalues BLOB NOT NULL,
+        eigenvectors BLOB NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (structure_hash, threshold, n_modes, gnm_version)
+    );
+    """)
+
+    # Dipolos por péptido (ver tools/populate_peptide_dipoles.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS peptide_dipoles (
+        peptide_id INTEGER NOT NULL,
+        pdb_hash TEXT NOT NULL,
+        psf_hash TEXT NOT NULL DEFAULT '',
+        source TEXT,
+        dipole_version TEXT NOT NULL,
+        magnitude REAL,
+        vector_x REAL, vector_y REAL, vector_z REAL,
+        com_x REAL, com_y REAL, com_z REAL,
+        angle_x_deg REAL, angle_y_deg REAL, angle_z_deg REAL,
+        method TEXT,
+        dipole_json TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (peptide_id, pdb_hash, psf_hash)
+    );
+    """)
+
+    # Rotaciones Kabsch estructura → referencia (ver superposition_repository_sqlite.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS superpositions (
+        structure_hash TEXT NOT NULL,
+        reference_hash TEXT NOT NULL,
+        superposition_version TEXT NOT NULL,
+        rotation BLOB NOT NULL,
+        translation BLOB NOT NULL,
+        rmsd REAL,
+        n_anchor_cysteines INTEGER,
+        n_anchor_atoms INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (structure_hash, reference_hash, superposition_version)
+    );
+    """)
+
     conn.commit()
     conn.close()
     print(f"[✓] Base de datos creada en: {DB_PATH}")
@@ -7,12 +7,26 @@ reintenta los fallidos al final mostrando el tail del log para depurar.
 Extensión: permite generar PSF/PDB directamente desde un archivo PDB arbitrario
 pasado por CLI, útil para procesar proteínas sueltas (ej. wild type) y dejar la
 salida en una carpeta `generated` junto al archivo original.
+
+Motores: "native" (por defecto) construye el PSF en Python desde el RTF
+(src/infrastructure/pdb/psf_writer.py); "vmd" ejecuta resources/psf_gen.tcl
+con VMD/psfgen en una sesión persistente (src/infrastructure/pdb/vmd_session.py):
+VMD arranca una vez y procesa todos los péptidos del lote.
+
+Modo batch (--input-dir): un pool de --workers trabajadores persistentes
+(src/infrastructure/pdb/psf_worker.py) con timeout por trabajo; un manifiesto
+JSON en la carpeta de salida registra las salidas completadas por hash de la
+entrada, de modo que una ejecución interrumpida se reanuda sin rehacer PSFs.
 """
 import argparse
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import shutil
 import sqlite3
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
@@ -37,6 +51,36 @@ def create_temp_pdb_file(content: str) -> str:
         f.write(content)
     return tmp
 
+MANIFEST_NAME = "psf_manifest.json"
+# Cambiar invalida los manifiestos existentes (todas las entradas se regeneran)
+MANIFEST_VERSION = 2
+
+
+def batch_job_key(pdb_bytes: bytes, stem: str, engine: str, chain: str, cutoff: float) -> str:
+    # El stem forma parte de la clave: dos PDB con el mismo contenido escriben salidas distintas
+    h = hashlib.sha256(pdb_bytes)
+    h.update(f"|{stem}|{engine}|{chain}|{float(cutoff)!r}|v{MANIFEST_VERSION}".encode())
+    return h.hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, object]]:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return dict(data.get("completed") or {})
+
+
+def save_manifest(path: Path, completed: Dict[str, Dict[str, object]]) -> None:
+    # Escritura atómica: nunca queda un manifiesto a medias
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "completed": completed}, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
 def tail_text(text: str, n: int = 60) -> str:
     lines = text.strip().splitlines()
     return "\n".join(lines[-n:]) if len(lines) > n else text
@@ -48,7 +92,11 @@ class FilteredPSFGenerator:
                  topology_files=None,
                  output_base="tools/filtered",
                  default_chain="PROA",
-                 disulfide_cutoff=2.3):
+                 disulfide_cutoff=2.3,
+                 engine="native",
+                 job_timeout=300.0,
+                 workers=1,
+                 worker_command=None):
         # Rutas absolutas
         self.db_path = (root_dir / db_path).resolve()
         self.tcl_script_path = (root_dir / tcl_script_path).resolve()
@@ -56,6 +104,15 @@ class FilteredPSFGenerator:
         self.logs_dir = self.output_base / "logs"
         self.default_chain = default_chain
         self.disulfide_cutoff = disulfide_cutoff
+        if engine not in ("native", "vmd"):
+            raise ValueError(f"Motor PSF no soportado: {engine} (use 'native' o 'vmd')")
+        self.engine = engine
+        # Timeout por trabajo (s) de las sesiones VMD/trabajadores; al superarlo se mata el proceso
+        self.job_timeout = job_timeout
+        self.workers = max(1, int(workers))
+        # Ejecutable alternativo que habla el protocolo de psf_worker (p. ej. un stub en tests)
+        self.worker_command = list(worker_command) if worker_command else None
+        self._vmd_session = None
 
         if topology_files is None:
             topology_files = ["resources/top_all36_prot.rtf"]
@@ -71,11 +128,13 @@ class FilteredPSFGenerator:
     def _verify_files(self):
         if not self.db_path.exists():
             raise FileNotFoundError(f"No existe la base de datos: {self.db_path}")
-        if not self.tcl_script_path.exists():
-            raise FileNotFoundError(f"No existe el script Tcl: {self.tcl_script_path}")
         for top in self.topology_files:
             if not top.exists():
                 raise FileNotFoundError(f"No existe topología: {top}")
+        if self.engine != "vmd":
+            return
+        if not self.tcl_script_path.exists():
+            raise FileNotFoundError(f"No existe el script Tcl: {self.tcl_script_path}")
         if not shutil.which("vmd"):
             print("Advertencia: no se encontró 'vmd' en PATH. Asegúrate de tener VMD instalado.")
 
@@ -109,47 +168,62 @@ class FilteredPSFGenerator:
         finally:
             conn.close()
 
-    def _run_vmd_subprocess(
+    def _get_vmd_session(self):
+        # Una sola sesión VMD por generador; se reinicia sola si VMD cae
+        if self._vmd_session is None:
+            self._vmd_session = self._new_session()
+        return self._vmd_session
+
+    def _new_session(self):
+        # Sesión persistente del motor configurado (una por hilo del pool)
+        from src.infrastructure.pdb.psf_worker import PSFWorkerSession, native_session
+        from src.infrastructure.pdb.vmd_session import VMDSession
+
+        if self.engine == "vmd":
+            return VMDSession(
+                self.tcl_script_path,
+                self.topology_files,
+                vmd_command=self.worker_command or ("vmd",),
+                job_timeout=self.job_timeout,
+            )
+        if self.worker_command:
+            return PSFWorkerSession(self.worker_command, job_timeout=self.job_timeout)
+        return native_session(self.topology_files[0], job_timeout=self.job_timeout)
+
+    def _run_vmd(
         self,
         pdb_path: Path,
         out_prefix: Path,
         chain: Optional[str] = None,
         disulfide_cutoff: Optional[float] = None,
     ) -> Tuple[bool, str]:
-        # Script TCL por peptide
-        tops_tcl = "{" + " ".join(f'"{t}"' for t in self.topology_files) + "}"
         chain_id = chain or self.default_chain
         cutoff = disulfide_cutoff or self.disulfide_cutoff
-        tcl_body = f"""
-package require psfgen
-source "{self.tcl_script_path}"
-set res [build_psf_with_disulfides "{pdb_path}" {tops_tcl} "{out_prefix}" "{chain_id}" {cutoff}]
-puts "PSF_OUT:[lindex $res 0]"
-puts "PDB_OUT:[lindex $res 1]"
-exit
-"""
-        # Archivo TCL temporal
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".tcl", delete=False) as tmp_tcl:
-            tmp_tcl.write(tcl_body)
-            tcl_path = Path(tmp_tcl.name)
+        return self._get_vmd_session().run(pdb_path, out_prefix, chain_id, cutoff)
 
-        try:
-            # Ejecutar VMD capturando stdout/err
-            completed = subprocess.run(
-                ["vmd", "-dispdev", "text", "-e", str(tcl_path)],
-                capture_output=True,
-                text=True,
-            )
-            stdout = completed.stdout
-            stderr = completed.stderr
-            ok = completed.returncode == 0
-            # Retornar estado y stdout+stderr
-            return ok, stdout + ("\n" + stderr if stderr else "")
-        finally:
-            try:
-                tcl_path.unlink(missing_ok=True)
-            except Exception:
-                pass
+    def close(self):
+        if self._vmd_session is not None:
+            self._vmd_session.close()
+            self._vmd_session = None
+
+    def _run_native(
+        self,
+        pdb_path: Path,
+        out_prefix: Path,
+        chain: Optional[str] = None,
+        disulfide_cutoff: Optional[float] = None,
+    ) -> Tuple[bool, str]:
+        # Mismo contrato que _run_vmd: (ok, log)
+        from src.infrastructure.pdb.psf_worker import run_native_job
+
+        chain_id = chain or self.default_chain
+        cutoff = disulfide_cutoff or self.disulfide_cutoff
+        return run_native_job(pdb_path, out_prefix, chain_id, cutoff, rtf_path=self.topology_files[0])
+
+    def _run_engine(self, pdb_path: Path, out_prefix: Path, **kwargs) -> Tuple[bool, str]:
+        if self.engine == "vmd":
+            return self._run_vmd(pdb_path, out_prefix, **kwargs)
+        return self._run_native(pdb_path, out_prefix, **kwargs)
 
     def generate_psf_for_peptide_subprocess(self, peptide_data, verbose=False):
         accession = peptide_data["accession_number"]
@@ -174,7 +248,7 @@ exit
                 created_temp = True
 
             out_prefix = (self.output_base / accession).resolve()
-            ok, out_text = self._run_vmd_subprocess(tmp_pdb, out_prefix)
+            ok, out_text = self._run_engine(tmp_pdb, out_prefix)
 
             # Guardar log
             log_path = self.logs_dir / f"{accession}.log"
@@ -223,7 +297,7 @@ exit
         logs_dir.mkdir(parents=True, exist_ok=True)
 
         out_prefix = (output_base / pdb_path.stem).resolve()
-        ok, out_text = self._run_vmd_subprocess(
+        ok, out_text = self._run_engine(
             pdb_path,
             out_prefix,
             chain=chain,
@@ -255,51 +329,115 @@ exit
         chain: Optional[str] = None,
         disulfide_cutoff: Optional[float] = None,
         verbose: bool = False,
+        workers: Optional[int] = None,
+        resume: bool = True,
     ) -> Tuple[int, int]:
         """Procesa todos los archivos .pdb en input_dir y genera PSFs/PDBs en output_dir.
 
-        Retorna (procesados_ok, total_procesados).
+        Usa un pool de ``workers`` trabajadores persistentes con timeout por
+        trabajo. Con ``resume`` se saltan las entradas cuyo hash (contenido,
+        stem, motor, cadena y cutoff) ya figura en el manifiesto y cuyas
+        salidas ``{stem}.psf``/``{stem}.pdb`` existen en output_dir.
+
+        Retorna (procesados_ok, total_procesados); los saltados cuentan como OK.
         """
         input_dir = Path(input_dir).expanduser().resolve()
         output_dir = Path(output_dir).expanduser().resolve()
         output_dir.mkdir(parents=True, exist_ok=True)
+        logs_dir = output_dir / "logs"
+        logs_dir.mkdir(parents=True, exist_ok=True)
 
-        pdb_files = list(input_dir.glob("*.pdb"))
+        pdb_files = sorted(input_dir.glob("*.pdb"))
         if not pdb_files:
             print(f"No se encontraron archivos .pdb en {input_dir}")
             return 0, 0
 
-        total = len(pdb_files)
-        ok_count = 0
-        print(f"Procesando {total} PDBs de {input_dir} a {output_dir}")
+        chain_id = chain or self.default_chain
+        cutoff = disulfide_cutoff or self.disulfide_cutoff
+        workers = max(1, int(workers or self.workers))
+        manifest_path = output_dir / MANIFEST_NAME
+        manifest = load_manifest(manifest_path) if resume else {}
 
-        for i, pdb_file in enumerate(pdb_files, 1):
+        total = len(pdb_files)
+        pending = []
+        skipped = 0
+        for pdb_file in pdb_files:
             stem = pdb_file.stem
-            print(f"[{i}/{total}] {stem}: procesando...", end="", flush=True)
-            try:
-                result = self.generate_psf_from_local_pdb(
-                    pdb_file,
-                    output_dir,
-                    chain=chain,
-                    disulfide_cutoff=disulfide_cutoff,
-                    verbose=False,  # Evitar output duplicado
-                )
-                if result["ok"]:
+            key = batch_job_key(pdb_file.read_bytes(), stem, self.engine, chain_id, cutoff)
+            if key in manifest and all((output_dir / f"{stem}{ext}").exists() for ext in (".psf", ".pdb")):
+                skipped += 1
+                continue
+            pending.append((key, pdb_file))
+        print(f"Procesando {total} PDBs de {input_dir} a {output_dir} "
+              f"(pendientes={len(pending)}, ya completados={skipped}, workers={workers})")
+
+        local = threading.local()
+        sessions = []
+        sessions_lock = threading.Lock()
+
+        def run_job(pdb_file: Path) -> Tuple[bool, str, float]:
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = self._new_session()
+                with sessions_lock:
+                    sessions.append(session)
+            out_prefix = output_dir / pdb_file.stem
+            t0 = time.perf_counter()
+            ok, log = session.run(pdb_file, out_prefix, chain_id, cutoff)
+            elapsed = time.perf_counter() - t0
+            (logs_dir / f"{pdb_file.stem}.log").write_text(log, encoding="utf-8")
+            ok = ok and out_prefix.with_suffix(".psf").exists() and out_prefix.with_suffix(".pdb").exists()
+            return ok, log, elapsed
+
+        ok_count = 0
+        failures: List[Tuple[str, str]] = []
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(run_job, pdb_file): (key, pdb_file) for key, pdb_file in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                key, pdb_file = futures[future]
+                stem = pdb_file.stem
+                try:
+                    ok, log, elapsed = future.result()
+                except Exception as e:
+                    ok, log, elapsed = False, f"ERROR: {e}", 0.0
+                if ok:
                     ok_count += 1
-                    print(" OK")
-                    if verbose:
-                        print(f"  PSF: {result['psf']}")
-                        print(f"  PDB: {result['pdb']}")
-                        print(f"  Log: {result['log']}")
+                    manifest[key] = {
+                        "input": str(pdb_file),
+                        "engine": self.engine,
+                        "chain": chain_id,
+                        "cutoff": cutoff,
+                        "psf": f"{stem}.psf",
+                        "pdb": f"{stem}.pdb",
+                        "seconds": round(elapsed, 3),
+                    }
+                    # Guardar tras cada éxito: una interrupción conserva el progreso
+                    save_manifest(manifest_path, manifest)
+                    print(f"[{done}/{len(pending)}] {stem}: OK ({elapsed:.2f}s)")
                 else:
-                    print(" FAIL")
+                    failures.append((stem, log))
+                    print(f"[{done}/{len(pending)}] {stem}: FAIL")
                     if verbose:
-                        print(tail_text(result["stdout"], 20))
-            except Exception as e:
-                print(f" ERROR: {e}")
-
-        print(f"\nResumen batch: OK={ok_count}/{total}")
-        return ok_count, total
+                        print(tail_text(log, 20))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            with sessions_lock:
+                for session in sessions:
+                    session.close()
+            executor.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - started
+        rate = ok_count / elapsed if elapsed > 0 else 0.0
+        print(f"\nResumen batch: OK={ok_count + skipped}/{total} "
+              f"(generados={ok_count}, saltados={skipped}, fallidos={len(failures)}) "
+              f"en {elapsed:.1f}s, {rate:.2f} PDB/s con {workers} workers")
+        for stem, log in failures:
+            last = log.strip().splitlines()[-1] if log.strip() else "sin salida"
+            print(f"  FAIL {stem}: {last}")
+        print(f"Manifiesto: {manifest_path}")
+        return ok_count + skipped, total
 
     def process_all_filtered(self, gap_min=3, gap_max=6, require_pair=False):
         hits = self.get_filtered_peptides(gap_min, gap_max, require_pair)
@@ -376,14 +514,31 @@ def main(argv: Optional[List[str]] = None) -> int:
     parser.add_argument("--require-pair", action="store_true", help="Requiere par hidrofóbico en el filtro.")
     parser.add_argument("--skip-reference", action="store_true", help="Omitir impresión de toxina de referencia.")
     parser.add_argument("--verbose", action="store_true", help="Mostrar tail de logs en consola.")
+    parser.add_argument("--engine", choices=("native", "vmd"), default="native",
+                        help="Generador de PSF: 'native' (Python, desde el RTF) o 'vmd' (psfgen vía VMD).")
+    parser.add_argument("--job-timeout", type=float, default=300.0,
+                        help="Timeout por péptido (s); al superarlo se mata y reinicia el trabajador/VMD.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Trabajadores paralelos en modo --input-dir (default: 1).")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignorar el manifiesto de --input-dir y regenerar todos los PSF.")
 
     args = parser.parse_args(argv)
 
     gen = FilteredPSFGenerator(
         default_chain=args.chain,
         disulfide_cutoff=args.disulfide_cutoff,
+        engine=args.engine,
+        job_timeout=args.job_timeout,
+        workers=args.workers,
     )
+    try:
+        return _run_mode(gen, args)
+    finally:
+        gen.close()
+
 
+def _run_mode(gen: "FilteredPSFGenerator", args: argparse.Namespace) -> int:
     if args.input_dir:
         # Modo batch: procesar todos los PDBs en input_dir
         output_dir = args.output_dir or (root_dir / "pdbs/filtered_psfs")
@@ -393,6 +548,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             chain=args.chain,
             disulfide_cutoff=args.disulfide_cutoff,
             verbose=args.verbose,
+            resume=not args.no_resume,
         )
         return 0 if ok_count == total else 1
 
@@ -0,0 +1,400 @@
+"""Small motif language compiled into one multi-pattern automaton.
+
+Syntax (PROSITE-like, elements joined by ``-``):
+
+- ``C``, ``WCK``: literal residues (several letters = consecutive residues).
+- ``X`` / ``x``: any residue; ``X3`` exactly 3, ``X3-7`` or ``x(3,7)`` 3 to 7.
+- ``[FWY]``: one of the residues; ``{P}``: any residue except those.
+  A count may follow any element: ``[FWY]2``, ``[FWY](1,2)``.
+- ``$hydro``: named class (see ``RESIDUE_CLASSES``), e.g. ``WCK-$hydro``.
+- ``name=element``: named anchor; its start position is reported per match.
+- ``<`` / ``>`` at the ends: match only at the N / C terminus.
+
+Example, the ICK framework: ``C-X3-7-C-X3-8-CC``.
+
+Each motif contributes its longest run of fixed residues as a seed; all
+seeds go into a single Aho–Corasick automaton, so every sequence is read
+once for any number of motifs. A seed occurrence is then verified by
+walking the elements to its left and right, shortest gaps first. Failed
+``(element, position)`` states are remembered for the whole sequence, so the
+walk costs at most elements x length x gap however many gaps are chained.
+Motifs without any fixed residue fall back to trying every start position.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict, deque, namedtuple
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from extractors.toxins_filter import HYDRO
+
+AMINO = frozenset("ACDEFGHIKLMNPQRSTVWY")
+ANY = None  # element matching any residue
+
+RESIDUE_CLASSES: Dict[str, FrozenSet[str]] = {
+    "hydro": frozenset(HYDRO),
+    "aromatic": frozenset("FWYH"),
+    "basic": frozenset("KRH"),
+    "acidic": frozenset("DE"),
+    "polar": frozenset("STNQ"),
+    "small": frozenset("AGSCT"),
+}
+
+MAX_GAP = 50
+# Bounds on one motif: number of elements and total variable width (sum of max - min)
+MAX_ELEMENTS = 40
+MAX_VARIABLE_WIDTH = 150
+MAX_PATTERNS = 16
+COMPILED_CACHE_SIZE = 64
+
+# residues (None = any), min, max, anchor name
+Element = namedtuple("Element", "residues min max name")
+
+
+class MotifSyntaxError(ValueError):
+    pass
+
+
+_COUNT_RE = re.compile(r"^(?:\((\d+)(?:,(\d+))?\)|(\d+))$")
+_NAME_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=(.+)$")
+
+
+def _split(pattern: str) -> List[str]:
+    # "-" separates elements except inside brackets/parentheses
+    tokens, depth, current = [], 0, ""
+    for ch in pattern.replace(" ", ""):
+        if ch in "[{(":
+            depth += 1
+        elif ch in "]})":
+            depth -= 1
+        if ch == "-" and depth == 0:
+            tokens.append(current)
+            current = ""
+        else:
+            current += ch
+    tokens.append(current)
+    if depth != 0 or any(t == "" for t in tokens):
+        raise MotifSyntaxError(f"Motivo mal formado: {pattern!r}")
+    return tokens
+
+
+def _count(text: str, token: str) -> Tuple[int, int]:
+    if not text:
+        return 1, 1
+    m = _COUNT_RE.match(text)
+    if not m:
+        raise MotifSyntaxError(f"Repetición inválida en {token!r}")
+    lo = int(m.group(1) or m.group(3))
+    hi = int(m.group(2)) if m.group(2) else lo
+    if lo > hi or hi > MAX_GAP:
+        raise MotifSyntaxError(f"Rango {lo}-{hi} inválido en {token!r} (máximo {MAX_GAP})")
+    return lo, hi
+
+
+def parse_motif(pattern: str) -> Tuple[List[Element], bool, bool]:
+    """Elements of ``pattern`` plus (anchored at N-terminus, anchored at C-terminus)."""
+    text = (pattern or "").strip()
+    if not text:
+        raise MotifSyntaxError("Motivo vacío")
+    at_start = text.startswith("<")
+    at_end = text.endswith(">")
+    text = text[1 if at_start else 0: -1 if at_end else None]
+    if at_start and text.startswith("-"):
+        text = text[1:]
+    if at_end and text.endswith("-"):
+        text = text[:-1]
+    tokens = _split(text)
+    elements: List[Element] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        name = None
+        m = _NAME_RE.match(token)
+        if m:
+            name, token = m.group(1), m.group(2)
+        if token[0] in "Xx":
+            rest = token[1:]
+            # X3-7: the upper bound arrives as the next token
+            if rest.isdigit() and i + 1 < len(tokens) and tokens[i + 1].isdigit():
+                rest = f"({rest},{tokens[i + 1]})"
+                i += 1
+            lo, hi = _count(rest, token)
+            elements.append(Element(ANY, lo, hi, name))
+        elif token[0] in "[{":
+            close = token.find("]" if token[0] == "[" else "}")
+            letters = frozenset(token[1:close].upper())
+            if close < 0 or not letters or not letters <= AMINO:
+                raise MotifSyntaxError(f"Clase de residuos inválida: {token!r}")
+            lo, hi = _count(token[close + 1:], token)
+            elements.append(Element(letters if token[0] == "[" else AMINO - letters, lo, hi, name))
+        elif token[0] == "$":
+            m = re.match(r"^\$([a-z]+)(.*)$", token)
+            if not m or m.group(1) not in RESIDUE_CLASSES:
+                raise MotifSyntaxError(f"Clase desconocida {token!r}; disponibles: {sorted(RESIDUE_CLASSES)}")
+            lo, hi = _count(m.group(2), token)
+            elements.append(Element(RESIDUE_CLASSES[m.group(1)], lo, hi, name))
+        else:
+            m = re.match(r"^([A-Za-z]+)(.*)$", token)
+            letters = m.group(1).upper() if m else ""
+            if not letters or not set(letters) <= AMINO:
+                raise MotifSyntaxError(f"Residuo desconocido en {token!r}")
+            if m.group(2):
+                if len(letters) != 1:
+                    raise MotifSyntaxError(f"La repetición sólo aplica a un residuo: {token!r}")
+                lo, hi = _count(m.group(2), token)
+                elements.append(Element(frozenset(letters), lo, hi, name))
+            else:
+                for k, aa in enumerate(letters):
+                    elements.append(Element(frozenset(aa), 1, 1, name if k == 0 else None))
+        i += 1
+    if len(elements) > MAX_ELEMENTS:
+        raise MotifSyntaxError(f"Motivo demasiado largo: {len(elements)} elementos (máximo {MAX_ELEMENTS})")
+    width = sum(e.max - e.min for e in elements)
+    if width > MAX_VARIABLE_WIDTH:
+        raise MotifSyntaxError(f"Huecos variables demasiado anchos: {width} en total (máximo {MAX_VARIABLE_WIDTH})")
+    return elements, at_start, at_end
+
+
+class Motif:
+    """One parsed motif with its seed (longest run of fixed residues)."""
+
+    def __init__(self, name: str, pattern: str) -> None:
+        self.name = name
+        self.pattern = pattern
+        self.elements, self.at_start, self.at_end = parse_motif(pattern)
+        best = (0, 0)  # (length, first element index)
+        run = 0
+        for i, e in enumerate(self.elements):
+            fixed = e.residues is not ANY and len(e.residues) == 1 and e.min == e.max == 1
+            run = run + 1 if fixed else 0
+            if run > best[0]:
+                best = (run, i - run + 1)
+        self.seed_len, self.seed_at = best
+        self.seed = "".join(next(iter(self.elements[k].residues)) for k in range(self.seed_at, self.seed_at + self.seed_len))
+        self.min_length = sum(e.min for e in self.elements)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pattern": self.pattern,
+            "seed": self.seed or None,
+            "min_length": self.min_length,
+            "max_length": sum(e.max for e in self.elements),
+            "anchors": [e.name for e in self.elements if e.name],
+        }
+
+    # ---- verification around a seed occurrence ----
+    # ``failed`` holds the (direction, element, position) states known to fail on
+    # ``seq``; their outcome does not depend on the seed, so it can be shared
+    # between all the calls for one sequence.
+    def match_at_seed(self, seq: str, seed_start: int, failed: Optional[set] = None) -> Optional[Dict[str, Any]]:
+        failed = set() if failed is None else failed
+        starts: Dict[int, int] = {}
+        for k in range(self.seed_len):
+            starts[self.seed_at + k] = seed_start + k
+        right = self._forward(seq, self.seed_at + self.seed_len, seed_start + self.seed_len, starts, failed)
+        if right is None:
+            return None
+        left = self._backward(seq, self.seed_at - 1, seed_start, starts, failed)
+        if left is None:
+            return None
+        return self._result(seq, left, right, starts)
+
+    def match_from(self, seq: str, start: int, failed: Optional[set] = None) -> Optional[Dict[str, Any]]:
+        failed = set() if failed is None else failed
+        starts: Dict[int, int] = {}
+        end = self._forward(seq, 0, start, starts, failed)
+        return None if end is None else self._result(seq, start, end, starts)
+
+    def _result(self, seq: str, start: int, end: int, starts: Dict[int, int]) -> Dict[str, Any]:
+        return {
+            "motif": self.name,
+            "start": start,
+            "end": end,
+            "matched": seq[start:end],
+            "anchors": {e.name: starts[i] for i, e in enumerate(self.elements) if e.name},
+        }
+
+    def _forward(self, seq: str, i: int, pos: int, starts: Dict[int, int], failed: set) -> Optional[int]:
+        if i == len(self.elements):
+            return pos if (not self.at_end or pos == len(seq)) else None
+        state = (1, i, pos)
+        if state in failed:
+            return None
+        e = self.elements[i]
+        for k in range(e.min):
+            if pos + k >= len(seq) or not _accepts(e, seq[pos + k]):
+                failed.add(state)
+                return None
+        for n in range(e.min, e.max + 1):
+            if n > e.min and (pos + n - 1 >= len(seq) or not _accepts(e, seq[pos + n - 1])):
+                break
+            starts[i] = pos
+            end = self._forward(seq, i + 1, pos + n, starts, failed)
+            if end is not None:
+                return end
+        failed.add(state)
+        return None
+
+    def _backward(self, seq: str, i: int, pos: int, starts: Dict[int, int], failed: set) -> Optional[int]:
+        # pos = first residue already matched by element i + 1
+        if i < 0:
+            return pos if (not self.at_start or pos == 0) else None
+        state = (-1, i, pos)
+        if state in failed:
+            return None
+        e = self.elements[i]
+        for k in range(1, e.min + 1):
+            if pos - k < 0 or not _accepts(e, seq[pos - k]):
+                failed.add(state)
+                return None
+        for n in range(e.min, e.max + 1):
+            if n > e.min and (pos - n < 0 or not _accepts(e, seq[pos - n])):
+                break
+            starts[i] = pos - n
+            begin = self._backward(seq, i - 1, pos - n, starts, failed)
+            if begin is not None:
+                return begin
+        failed.add(state)
+        return None
+
+
+def _accepts(e: Element, aa: str) -> bool:
+    return e.residues is ANY or aa in e.residues
+
+
+class AhoCorasick:
+    """Classic Aho–Corasick automaton over seed strings (goto dicts + failure links)."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.words: List[str] = []
+        for w in words:
+            self._add(w)
+        self._link()
+
+    def _add(self, word: str) -> None:
+        state = 0
+        for ch in word:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(len(self.words))
+        self.words.append(word)
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text: str) -> Iterable[Tuple[int, int]]:
+        """(word index, start position) of every occurrence, overlaps included."""
+        state = 0
+        goto, fail, out, words = self.goto, self.fail, self.out, self.words
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for w in out[state]:
+                yield w, pos - len(words[w]) + 1
+
+
+class CompiledMotifs:
+    """Several motifs sharing one automaton; `search` reads each sequence once."""
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]]) -> None:
+        if not patterns:
+            raise MotifSyntaxError("Se requiere al menos un motivo")
+        if len(patterns) > MAX_PATTERNS:
+            raise MotifSyntaxError(f"Máximo {MAX_PATTERNS} motivos por consulta")
+        self.motifs = [Motif(name, pattern) for name, pattern in patterns]
+        seeds = sorted({m.seed for m in self.motifs if m.seed})
+        self.automaton = AhoCorasick(seeds)
+        self._by_seed: Dict[int, List[Motif]] = {
+            k: [m for m in self.motifs if m.seed == s] for k, s in enumerate(seeds)
+        }
+        self._unseeded = [m for m in self.motifs if not m.seed]
+
+    def search(self, sequence: str) -> List[Dict[str, Any]]:
+        """Matches of every motif (one per distinct span), ordered by start position."""
+        seq = sequence.upper()
+        found: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+        failed: Dict[Motif, set] = {}
+        for word, seed_start in self.automaton.iter(seq):
+            for motif in self._by_seed[word]:
+                hit = motif.match_at_seed(seq, seed_start, failed.setdefault(motif, set()))
+                if hit:
+                    found.setdefault((motif.name, hit["start"], hit["end"]), hit)
+        for motif in self._unseeded:
+            last = len(seq) - motif.min_length
+            memo = failed.setdefault(motif, set())
+            for start in ([0] if motif.at_start else range(last + 1)):
+                hit = motif.match_from(seq, start, memo)
+                if hit:
+                    found.setdefault((motif.name, hit["start"], hit["end"]), hit)
+        return sorted(found.values(), key=lambda h: (h["start"], h["motif"], h["end"]))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [m.describe() for m in self.motifs]
+
+
+_COMPILED: "OrderedDict[Tuple[Tuple[str, str], ...], CompiledMotifs]" = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+
+
+def compile_motifs(patterns: Sequence[Tuple[str, str]]) -> CompiledMotifs:
+    """Compiled automaton for ``[(name, pattern), ...]``, cached per pattern set (LRU)."""
+    key = tuple((str(n), str(p)) for n, p in patterns)
+    with _COMPILED_LOCK:
+        hit = _COMPILED.get(key)
+        if hit is not None:
+            _COMPILED.move_to_end(key)
+            return hit
+    compiled = CompiledMotifs(key)
+    with _COMPILED_LOCK:
+        _COMPILED[key] = compiled
+        while len(_COMPILED) > COMPILED_CACHE_SIZE:
+            _COMPILED.popitem(last=False)
+    return compiled
+
+
+def search_motif_rows(rows: Iterable[Any], compiled: CompiledMotifs) -> List[Dict[str, Any]]:
+    """Rows (``toxins_filter.Row``) with at least one match, each with its matches."""
+    results = []
+    for r in rows:
+        matches = compiled.search(r.seq)
+        if matches:
+            results.append({
+                "peptide_id": r.id,
+                "name": r.name,
+                "sequence": r.seq,
+                "length": len(r.seq),
+                "motifs": sorted({m["motif"] for m in matches}),
+                "matches": matches,
+            })
+    return results
+
+
+__all__ = [
+    "MotifSyntaxError",
+    "RESIDUE_CLASSES",
+    "parse_motif",
+    "compile_motifs",
+    "search_motif_rows",
+]
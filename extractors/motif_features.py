@@ -0,0 +1,301 @@
+"""Precomputed motif features for the NaSpTx-like search in `toxins_filter`.
+
+Everything `search_toxins` derives from a sequence is independent of the
+query except the S→WCK gap, so it is computed once per peptide and stored:
+
+- `peptide_motif_features`: cysteine positions, C5 index, the S after C5
+  (NULL when no hit is possible), the best hydrophobic pair before S.
+- `peptide_wck_sites`: every WCKX3 site (X3 hydrophobic) with its gap to S.
+
+A query then becomes SQL range predicates over indexed integer columns
+(`query_motif_hits`, `count_motif_hits`) and never reads the sequence text;
+results come ordered by score desc, peptide_id, and can resume after a
+given sort key (keyset pagination). Rows are kept in
+sync with `Peptides` by `sync_motif_features`, which is cheap when nothing
+changed: it compares the peptides version token from `toxins_filter`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from extractors.toxins_filter import (
+    DB_PATH,
+    HYDRO,
+    PAT_S_BEFORE_WCKX3,
+    PAT_WCKX3,
+    SEQ_COL,
+    TABLE,
+    best_hydrophobic_pair_before_S,
+    database_version,
+    pick_name_column,
+)
+
+# Bump when the extraction below changes; stale rows are recomputed
+FEATURES_VERSION = 1
+SYNC_KEY = "motif_features_synced"
+
+MOTIF_FEATURES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS peptide_motif_features (
+    peptide_id INTEGER PRIMARY KEY,
+    seq_hash TEXT NOT NULL,
+    features_version INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    n_cys INTEGER NOT NULL,
+    cys_positions TEXT NOT NULL,  -- JSON array of 0-based indices
+    i_c5 INTEGER,
+    i_s INTEGER,                  -- S right after C5; NULL if no hit is possible
+    pair TEXT,
+    pair_start INTEGER,
+    pair_score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_motif_features_candidates
+    ON peptide_motif_features (n_cys, i_s) WHERE i_s IS NOT NULL;
+CREATE TABLE IF NOT EXISTS peptide_wck_sites (
+    peptide_id INTEGER NOT NULL,
+    i_w INTEGER NOT NULL,
+    gap INTEGER NOT NULL,         -- i_w - i_s
+    x3 TEXT NOT NULL,
+    PRIMARY KEY (peptide_id, i_w)
+);
+CREATE INDEX IF NOT EXISTS idx_wck_sites_gap ON peptide_wck_sites (gap, peptide_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_RX_CORE = re.compile(PAT_WCKX3)
+_RX_S_BEFORE = re.compile(PAT_S_BEFORE_WCKX3)
+# Lookahead so adjacent sites (e.g. WCKWCKL) are all reported
+_RX_SITES = re.compile(rf"(?=WCK[{HYDRO}])")
+
+
+def sequence_hash(seq: str) -> str:
+    return hashlib.sha1(seq.encode("utf-8")).hexdigest()
+
+
+def extract_features(seq: str) -> Dict[str, Any]:
+    """Query-independent motif features of one sequence (same rules as the scan)."""
+    s = seq.upper()
+    cys = [i for i, a in enumerate(s) if a == "C"]
+    i_c5 = cys[4] if len(cys) >= 5 else None
+    i_s = None
+    if (
+        i_c5 is not None
+        and i_c5 + 1 < len(s)
+        and s[i_c5 + 1] == "S"
+        and _RX_CORE.search(s)
+        and _RX_S_BEFORE.search(s)
+    ):
+        i_s = i_c5 + 1
+    sites: List[tuple] = []
+    pair, pair_start, pair_score = None, None, None
+    if i_s is not None:
+        sites = [(m.start(), m.start() - i_s, s[m.start() + 3]) for m in _RX_SITES.finditer(s)]
+        _, pair, pair_start, pair_score = best_hydrophobic_pair_before_S(s, i_s)
+    return {
+        "length": len(s),
+        "n_cys": len(cys),
+        "cys_positions": cys,
+        "i_c5": i_c5,
+        "i_s": i_s,
+        "pair": pair,
+        "pair_start": pair_start,
+        "pair_score": pair_score,
+        "sites": sites,
+    }
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(MOTIF_FEATURES_SCHEMA)
+
+
+def _sync_token(db_path: str) -> Optional[str]:
+    version = database_version(db_path)
+    # Only the trigger-maintained counter is exact; stat tokens always resync
+    if version[0] != "meta":
+        return None
+    return json.dumps([version[1], version[2], FEATURES_VERSION])
+
+
+def sync_motif_features(db_path: str = DB_PATH, force: bool = False) -> int:
+    """Bring the feature tables in line with `Peptides`; returns rows (re)computed.
+
+    Skips all work when the peptides version token is the one recorded at the
+    last sync. Otherwise only new, edited or stale-version rows are recomputed
+    and rows of deleted peptides are dropped. Raises sqlite3.Error when the
+    database cannot be written.
+    """
+    token = _sync_token(db_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        _ensure_schema(conn)
+        if token is not None and not force:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (SYNC_KEY,)).fetchone()
+            if row and row[0] == token:
+                return 0
+        known = {
+            pid: (h, v)
+            for pid, h, v in conn.execute(
+                "SELECT peptide_id, seq_hash, features_version FROM peptide_motif_features"
+            )
+        }
+        seen = set()
+        changed = []
+        for pid, seq in conn.execute(
+            f"SELECT peptide_id, {SEQ_COL} FROM {TABLE} WHERE {SEQ_COL} IS NOT NULL"
+        ):
+            seen.add(pid)
+            h = sequence_hash(seq)
+            if force or known.get(pid) != (h, FEATURES_VERSION):
+                changed.append((pid, h, extract_features(seq)))
+        gone = [pid for pid in known if pid not in seen]
+
+        conn.execute("BEGIN IMMEDIATE")
+        _delete(conn, gone + [pid for pid, _, _ in changed])
+        conn.executemany(
+            """
+            INSERT INTO peptide_motif_features (
+                peptide_id, seq_hash, features_version, length, n_cys, cys_positions,
+                i_c5, i_s, pair, pair_start, pair_score
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (pid, h, FEATURES_VERSION, f["length"], f["n_cys"], json.dumps(f["cys_positions"]),
+                 f["i_c5"], f["i_s"], f["pair"], f["pair_start"], f["pair_score"])
+                for pid, h, f in changed
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO peptide_wck_sites (peptide_id, i_w, gap, x3) VALUES (?, ?, ?, ?)",
+            [(pid, i_w, gap, x3) for pid, _, f in changed for i_w, gap, x3 in f["sites"]],
+        )
+        if token is not None:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (SYNC_KEY, token))
+        conn.commit()
+        return len(changed)
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _delete(conn: sqlite3.Connection, ids: Iterable[int], chunk: int = 500) -> None:
+    ids = list(ids)
+    for i in range(0, len(ids), chunk):
+        part = ids[i:i + chunk]
+        marks = ",".join("?" * len(part))
+        conn.execute(f"DELETE FROM peptide_motif_features WHERE peptide_id IN ({marks})", part)
+        conn.execute(f"DELETE FROM peptide_wck_sites WHERE peptide_id IN ({marks})", part)
+
+
+# Same score as the scan (+8 for the motif, +1 with a hydrophobic pair)
+_SCORE_SQL = "(8 + (f.pair IS NOT NULL))"
+
+
+def _hit_filter(require_pair: bool, exclude_ids: Iterable[int]) -> Tuple[str, List[Any]]:
+    exclude = sorted({int(i) for i in exclude_ids})
+    sql = "f.i_s IS NOT NULL AND f.n_cys >= 6"
+    if require_pair:
+        sql += " AND f.pair IS NOT NULL"
+    if exclude:
+        sql += f" AND f.peptide_id NOT IN ({','.join('?' * len(exclude))})"
+    return sql, exclude
+
+
+def query_motif_hits(
+    conn: sqlite3.Connection,
+    gap_min: int = 3,
+    gap_max: int = 6,
+    require_pair: bool = False,
+    after: Optional[Sequence[Any]] = None,
+    limit: Optional[int] = None,
+    exclude_ids: Iterable[int] = (),
+) -> List[Dict[str, Any]]:
+    """Hits for a gap range straight from the feature tables, by score desc then peptide_id.
+
+    The chosen site is the first WCKX3 inside the range, as in the scan; SQLite
+    takes the bare columns of a MIN() aggregate from the row holding the minimum.
+    `after` is a `toxins_filter.hit_order` key: only hits sorting after it are
+    returned, at most `limit` of them.
+    """
+    name_col = pick_name_column(conn.cursor())
+    where, params = _hit_filter(require_pair, exclude_ids)
+    if after is not None:
+        where += f" AND (-{_SCORE_SQL}, f.peptide_id) > (?, ?)"
+        params += [int(after[0]), int(after[1])]
+    rows = conn.execute(
+        f"""
+        SELECT f.peptide_id, p.{name_col}, p.{SEQ_COL}, f.length, f.i_c5, f.i_s, MIN(w.i_w), w.x3,
+               f.pair, f.pair_start, f.pair_score
+        FROM peptide_motif_features f
+        JOIN peptide_wck_sites w ON w.peptide_id = f.peptide_id
+        JOIN {TABLE} p ON p.peptide_id = f.peptide_id
+        WHERE {where} AND w.gap BETWEEN ? AND ?
+        GROUP BY f.peptide_id
+        ORDER BY -{_SCORE_SQL}, f.peptide_id
+        {"LIMIT ?" if limit is not None else ""}
+        """,
+        params + [int(gap_min), int(gap_max)] + ([int(limit)] if limit is not None else []),
+    ).fetchall()
+    hits: List[Dict[str, Any]] = []
+    for pid, name, seq, length, i_c5, i_s, i_w, x3, pair, pair_start, pair_score in rows:
+        pair_flag = pair is not None
+        hits.append({
+            "peptide_id": pid,
+            "name": name,
+            "sequence": seq,
+            "score": 2 + 2 + 2 + 2 + (1 if pair_flag else 0),
+            "iC5": i_c5,
+            "iS": i_s,
+            "iW": i_w,
+            "iK": i_w + 2,
+            "iX3": i_w + 3,
+            "X3": x3,
+            "has_hydrophobic_pair": pair_flag,
+            "hydrophobic_pair": pair,
+            "hydrophobic_pair_start": pair_start,
+            "hydrophobic_pair_score": pair_score,
+            "iHP1": pair_start,
+            "iHP2": (pair_start + 1) if pair_start is not None else None,
+            "gap": i_w - i_s,
+            "length": length,
+        })
+    return hits
+
+
+def count_motif_hits(
+    conn: sqlite3.Connection,
+    gap_min: int = 3,
+    gap_max: int = 6,
+    require_pair: bool = False,
+    exclude_ids: Iterable[int] = (),
+) -> int:
+    """Number of hits `query_motif_hits` would return, from the indexes alone."""
+    where, params = _hit_filter(require_pair, exclude_ids)
+    return conn.execute(
+        f"""
+        SELECT COUNT(*) FROM peptide_motif_features f
+        WHERE {where} AND EXISTS (
+            SELECT 1 FROM peptide_wck_sites w
+            WHERE w.peptide_id = f.peptide_id AND w.gap BETWEEN ? AND ?
+        )
+        AND EXISTS (SELECT 1 FROM {TABLE} p WHERE p.peptide_id = f.peptide_id)
+        """,
+        params + [int(gap_min), int(gap_max)],
+    ).fetchone()[0]
+
+
+__all__ = [
+    "FEATURES_VERSION",
+    "extract_features",
+    "sync_motif_features",
+    "query_motif_hits",
+    "count_motif_hits",
+]
@@ -0,0 +1,291 @@
+"""Vectorized NaSpTx-like motif scanner for large sequence sets.
+
+Same rules as `toxins_filter.link_c5_S_to_WCK_gap` and
+`best_hydrophobic_pair_before_S`, evaluated for many sequences at once:
+sequences are encoded into a zero-padded uint8 matrix (rows sorted by length
+and processed in blocks, so padding and memory stay bounded) and every
+predicate becomes a column-wise comparison:
+
+- cysteines: cumulative count per row; C5 is the first column where it hits 5.
+- WCKX3 sites: four shifted comparisons against the W, C, K and hydrophobic masks.
+- gap window: the first site at or after `iS + gap_min` comes from a reversed
+  running minimum of site positions, then is checked against the window end.
+- hydrophobic pair: Kyte-Doolittle lookup of adjacent residues; `argmax`
+  keeps the leftmost pair on ties, as the loop does.
+
+Rows without a WCK triplet leave after the first comparison. The scanner
+pays for encoding every row, so it only wins when most rows are candidates,
+e.g. the point-mutant variants of one toxin (`scan_point_mutants`). On sparse
+sets such as a proteome the regex-prefiltered `toxins_filter.scan_rows` is
+about twice as fast, so `scan_table` and `toxins_filter.scan_toxins` use it:
+
+    python -m extractors.motif_scan --table Proteins --gap-min 3 --gap-max 6
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from extractors.toxins_filter import DB_PATH, HYDRO, KYTE_DOOLITTLE, Row, check_gap_range, scan_rows
+
+# Cells (rows x padded length) per block; bounds the temporary arrays
+DEFAULT_BLOCK_CELLS = 1 << 21
+
+MotifScan = namedtuple("MotifScan", "ok n_cys i_c5 i_s i_w pair_start pair_score")
+
+_C, _S, _W, _K = (ord(ch) for ch in "CSWK")
+_HYDRO_LUT = np.zeros(256, dtype=bool)
+_HYDRO_LUT[np.frombuffer(HYDRO.encode(), dtype=np.uint8)] = True
+_ALPHA_LUT = np.zeros(256, dtype=bool)
+_ALPHA_LUT[ord("A"):ord("Z") + 1] = True
+_KD_LUT = np.zeros(256, dtype=np.float64)
+for _aa, _v in KYTE_DOOLITTLE.items():
+    _KD_LUT[ord(_aa)] = _v
+_PAD = 3  # room for the WCKX3 lookahead past the last residue
+
+
+def encode_sequences(seqs: Sequence[str], pad: int = _PAD) -> Tuple[np.ndarray, np.ndarray]:
+    """Upper-cased sequences as a (n, max_len + pad) uint8 matrix plus their lengths.
+
+    Non-ASCII characters become "?" so column indices match the string indices.
+    """
+    lengths = np.fromiter((len(s) for s in seqs), dtype=np.int64, count=len(seqs))
+    return _fill(_ascii_upper("".join(seqs)), lengths, pad), lengths
+
+
+def _ascii_upper(text: str) -> np.ndarray:
+    # One C-level pass for the whole set; bytes.upper only touches a-z
+    return np.frombuffer(text.encode("ascii", "replace").upper(), dtype=np.uint8)
+
+
+def _fill(buf: np.ndarray, lengths: np.ndarray, pad: int = _PAD) -> np.ndarray:
+    width = int(lengths.max()) if len(lengths) else 0
+    matrix = np.zeros((len(lengths), width + pad), dtype=np.uint8)
+    if width:
+        matrix[np.arange(width + pad) < lengths[:, None]] = buf
+    return matrix
+
+
+def _scan_block(matrix: np.ndarray, lengths: np.ndarray, gap_min: int, gap_max: int) -> MotifScan:
+    n, total = matrix.shape
+    width = total - _PAD
+    out = _empty_scan(n)
+    if width == 0:
+        return out
+
+    # Cheapest filter first: rows without any WCK triplet are done
+    wck = (matrix[:, :width] == _W) & (matrix[:, 1:width + 1] == _C) & (matrix[:, 2:width + 2] == _K)
+    keep = np.flatnonzero(wck.any(axis=1))
+    m, lengths, wck = matrix[keep], lengths[keep], wck[keep]
+    rows, cols = np.arange(len(keep)), np.arange(width)
+    body = m[:, :width]
+
+    cum_c = np.cumsum(body == _C, axis=1, dtype=np.int32)
+    n_cys = cum_c[:, -1]
+    i_c5 = np.argmax(cum_c >= 5, axis=1)
+    i_s = i_c5 + 1
+    s_ok = (n_cys >= 6) & (i_s < lengths) & (m[rows, np.minimum(i_s, total - 1)] == _S)
+    site = wck & _HYDRO_LUT[m[:, 3:width + 3]]
+    ok = s_ok & site.any(axis=1)
+
+    # Prefilter S[A-Z]*WCK[hydro]: some S earlier in the same run of letters
+    last_s = np.maximum.accumulate(np.where(body == _S, cols, -1), axis=1)
+    last_other = np.maximum.accumulate(np.where(_ALPHA_LUT[body], -1, cols), axis=1)
+    s_run_before = np.zeros_like(site)
+    s_run_before[:, 1:] = last_s[:, :-1] > last_other[:, :-1]
+    ok &= (site & s_run_before).any(axis=1)
+
+    # First site at or after each column (gap_min >= 0, see check_gap_range)
+    next_site = np.minimum.accumulate(np.where(site, cols, width)[:, ::-1], axis=1)[:, ::-1]
+    w_start = np.maximum(i_s + gap_min, 0)
+    w_end = np.minimum(i_s + gap_max, lengths - 3)
+    i_w = np.full(len(keep), width)
+    in_range = w_start < width
+    i_w[in_range] = next_site[rows[in_range], w_start[in_range]]
+    ok &= (w_start <= w_end) & (i_w <= w_end)
+
+    # Best hydrophobic pair strictly before S, only for hits
+    hit = np.flatnonzero(ok)
+    hb = body[hit]
+    hydro = _HYDRO_LUT[m[hit, :width + 1]]
+    pairs = hydro[:, :width] & hydro[:, 1:] & (cols <= (i_s[hit] - 2)[:, None])
+    scores = np.where(pairs, _KD_LUT[hb] + _KD_LUT[m[hit, 1:width + 1]], -np.inf)
+    best = np.argmax(scores, axis=1) if len(hit) else np.zeros(0, dtype=np.int64)
+    found = pairs.any(axis=1)
+
+    out.ok[keep] = ok
+    for field, values in ((out.n_cys, n_cys), (out.i_c5, i_c5), (out.i_s, i_s), (out.i_w, i_w)):
+        field[keep] = values
+    out.pair_start[keep[hit[found]]] = best[found]
+    out.pair_score[keep[hit[found]]] = scores[found, best[found]]
+    return out
+
+
+def _empty_scan(n: int) -> MotifScan:
+    return MotifScan(
+        np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64),
+        np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64), np.full(n, -1, dtype=np.int64),
+        np.full(n, np.nan),
+    )
+
+
+def scan_motifs(
+    seqs: Sequence[str], gap_min: int = 3, gap_max: int = 6, block_cells: int = DEFAULT_BLOCK_CELLS
+) -> MotifScan:
+    """Motif positions for every sequence, aligned with the input order.
+
+    `ok` marks hits; the other fields are only meaningful where `ok` is true
+    (`pair_start` is -1 and `pair_score` NaN when there is no pair).
+    Raises ValueError unless 0 <= gap_min <= gap_max.
+    """
+    check_gap_range(gap_min, gap_max)
+    n = len(seqs)
+    out = _empty_scan(n)
+    if n == 0:
+        return out
+    lengths = np.fromiter((len(s) for s in seqs), dtype=np.int64, count=n)
+    order = np.argsort(lengths, kind="stable")
+    lengths = lengths[order]
+    # Sorted by length, each block is a contiguous slice of one encoded buffer
+    buf = _ascii_upper("".join([seqs[i] for i in order]))
+    ends = np.cumsum(lengths)
+    padded = lengths + _PAD
+    start = 0
+    while start < n:
+        # Largest block whose rows x longest row (the last one) fits the budget
+        cells = np.arange(1, n - start + 1) * padded[start:]
+        stop = start + max(1, int(np.searchsorted(cells, block_cells, side="right")))
+        first = int(ends[start - 1]) if start else 0
+        block_lengths = lengths[start:stop]
+        matrix = _fill(buf[first:int(ends[stop - 1])], block_lengths)
+        block = _scan_block(matrix, block_lengths, gap_min, gap_max)
+        for field, values in zip(out, block):
+            field[order[start:stop]] = values
+        start = stop
+    return out
+
+
+def scan_point_mutants(
+    seq: str, positions: np.ndarray, residues: np.ndarray, gap_min: int = 3, gap_max: int = 6,
+    block_cells: int = DEFAULT_BLOCK_CELLS,
+) -> MotifScan:
+    """Motif positions of every single-point variant of `seq` (residues[k] at positions[k]).
+
+    Variants are written straight into copies of the encoded sequence, so no
+    mutant string is ever built; `residues` are ASCII codes (uint8).
+    Raises ValueError unless 0 <= gap_min <= gap_max.
+    """
+    check_gap_range(gap_min, gap_max)
+    wt = _ascii_upper(seq)
+    positions = np.asarray(positions, dtype=np.intp)
+    residues = np.asarray(residues, dtype=np.uint8)
+    n = len(positions)
+    out = _empty_scan(n)
+    rows = max(1, block_cells // (len(wt) + _PAD))
+    for start in range(0, n, rows):
+        stop = min(n, start + rows)
+        matrix = np.zeros((stop - start, len(wt) + _PAD), dtype=np.uint8)
+        matrix[:, :len(wt)] = wt
+        matrix[np.arange(stop - start), positions[start:stop]] = residues[start:stop]
+        block = _scan_block(matrix, np.full(stop - start, len(wt), dtype=np.int64), gap_min, gap_max)
+        for field, values in zip(out, block):
+            field[start:stop] = values
+    return out
+
+
+def scan_hits(
+    rows: Sequence[Row], gap_min: int = 3, gap_max: int = 6, require_pair: bool = False
+) -> List[Dict[str, Any]]:
+    """Hit dicts identical to `toxins_filter.scan_rows` for the given rows."""
+    scan = scan_motifs([r.seq for r in rows], gap_min, gap_max)
+    hits: List[Dict[str, Any]] = []
+    for k in np.flatnonzero(scan.ok):
+        r = rows[k]
+        s = r.seq.upper()
+        pair_idx = int(scan.pair_start[k]) if scan.pair_start[k] >= 0 else None
+        pair_flag = pair_idx is not None
+        if require_pair and not pair_flag:
+            continue
+        i_s, i_w = int(scan.i_s[k]), int(scan.i_w[k])
+        hits.append({
+            "peptide_id": r.id,
+            "name": r.name,
+            "sequence": r.seq,
+            "score": 2 + 2 + 2 + 2 + (1 if pair_flag else 0),
+            "iC5": int(scan.i_c5[k]),
+            "iS": i_s,
+            "iW": i_w,
+            "iK": i_w + 2,
+            "iX3": i_w + 3,
+            "X3": s[i_w + 3],
+            "has_hydrophobic_pair": pair_flag,
+            "hydrophobic_pair": s[pair_idx:pair_idx + 2] if pair_flag else None,
+            "hydrophobic_pair_start": pair_idx,
+            "hydrophobic_pair_score": float(scan.pair_score[k]) if pair_flag else None,
+            "iHP1": pair_idx,
+            "iHP2": (pair_idx + 1) if pair_flag else None,
+            "gap": i_w - i_s,
+            "length": len(s),
+        })
+    hits.sort(key=lambda d: d["score"], reverse=True)
+    return hits
+
+
+def scan_table(
+    db_path: str = DB_PATH,
+    table: str = "Proteins",
+    id_col: str = "accession_number",
+    name_col: str = "name",
+    seq_col: str = "sequence",
+    gap_min: int = 3,
+    gap_max: int = 6,
+    require_pair: bool = False,
+) -> List[Dict[str, Any]]:
+    """Scan any table with (id, name, sequence) columns, e.g. the full Proteins set.
+
+    Uses `scan_rows`: few precursors contain a WCK triplet, so the regex
+    prefilter beats encoding the whole table.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = [
+            Row(*r)
+            for r in conn.execute(
+                f"SELECT {id_col}, {name_col}, {seq_col} FROM {table} WHERE {seq_col} IS NOT NULL"
+            )
+        ]
+    finally:
+        conn.close()
+    return scan_rows(rows, gap_min, gap_max, require_pair)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Barrido vectorizado del motivo NaSpTx sobre una tabla de secuencias.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--table", default="Proteins")
+    parser.add_argument("--id-col", default="accession_number")
+    parser.add_argument("--name-col", default="name")
+    parser.add_argument("--gap-min", type=int, default=3)
+    parser.add_argument("--gap-max", type=int, default=6)
+    parser.add_argument("--require-pair", action="store_true")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    hits = scan_table(
+        args.db, args.table, args.id_col, args.name_col,
+        gap_min=args.gap_min, gap_max=args.gap_max, require_pair=args.require_pair,
+    )
+    print(f"{len(hits)} hits en {args.table} ({time.perf_counter() - t0:.2f}s)")
+    for h in hits:
+        print(f"{h['peptide_id']}\t{h['name']}\tscore={h['score']}\tgap={h['gap']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
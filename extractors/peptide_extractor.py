@@ -8,6 +8,7 @@ import tempfile
 from typing import Dict, List, Tuple, Optional, Union
 from Bio.PDB import PDBParser, PPBuilder
 from .cortar_pdb import PDBHandler
+from .motif_features import sync_motif_features
 
 class PeptideExtractor:
     """
@@ -530,6 +531,13 @@ class PeptideExtractor:
                 print(f"Error guardando péptido en la base de datos: {str(e)}")
         
         print(f"Guardados {len(peptide_ids)} péptidos en la base de datos")
+
+        # Índice de rasgos del motivo (Cys, C5, sitios WCK) para search_toxins
+        try:
+            indexed = sync_motif_features(self.db_path)
+            print(f"Rasgos de motivo indexados: {indexed} péptidos")
+        except sqlite3.Error as e:
+            print(f"No se pudo actualizar peptide_motif_features: {e}")
         return peptide_ids
 
 # Función auxiliar para ejecución fácil desde la línea de comandos
@@ -0,0 +1,202 @@
+"""Process-parallel motif scan over the full precursor sequences in Proteins.
+
+The table is split into rowid ranges of at most `chunk_rows` rows; each
+worker process opens its own read-only connection, reads one range and
+scans it, so no process ever holds more than one chunk of sequences. Two
+kinds of scan are supported:
+
+- the NaSpTx-like motif (`toxins_filter.scan_rows`, same gap/pair options as
+  `search_toxins`);
+- motif-language patterns (`motif_dsl.compile_motifs`), e.g. ``C-X3-7-C``.
+
+Positions in the results (iC5/iS/iW/... or match start/end) are offsets in
+the precursor, ready for cutting the mature peptide before any structure is
+fetched. Chunk results are merged as they complete and sorted at the end:
+
+    python -m extractors.proteome_scan --workers 4 --gap-min 3 --gap-max 6
+    python -m extractors.proteome_scan --motif 'ick=C-X3-7-C-X3-8-CC' --json hits.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from extractors.toxins_filter import DB_PATH, Row, scan_rows
+
+DEFAULT_CHUNK_ROWS = 5000
+
+# (chunks_done, chunks_total, sequences_scanned)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def id_ranges(
+    db_path: str = DB_PATH, table: str = "Proteins", chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> List[Tuple[int, int]]:
+    """Half-open rowid ranges covering `table`, each with at most `chunk_rows` rows."""
+    conn = _connect_ro(db_path)
+    try:
+        lo, hi = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    finally:
+        conn.close()
+    if lo is None:
+        return []
+    step = max(1, int(chunk_rows))
+    return [(start, min(start + step, hi + 1)) for start in range(lo, hi + 1, step)]
+
+
+def _connect_ro(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, timeout=30)
+
+
+def scan_range(
+    db_path: str,
+    id_range: Tuple[int, int],
+    table: str = "Proteins",
+    id_col: str = "accession_number",
+    name_col: str = "name",
+    seq_col: str = "sequence",
+    gap_min: int = 3,
+    gap_max: int = 6,
+    require_pair: bool = False,
+    patterns: Optional[Sequence[Tuple[str, str]]] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Hits of one rowid range and the number of sequences read (runs in the workers)."""
+    conn = _connect_ro(db_path)
+    try:
+        rows = [
+            Row(*r)
+            for r in conn.execute(
+                f"SELECT {id_col}, {name_col}, {seq_col} FROM {table} "
+                f"WHERE rowid >= ? AND rowid < ? AND {seq_col} IS NOT NULL ORDER BY rowid",
+                id_range,
+            )
+        ]
+    finally:
+        conn.close()
+    if patterns:
+        from extractors.motif_dsl import compile_motifs, search_motif_rows
+
+        return search_motif_rows(rows, compile_motifs(list(patterns))), len(rows)
+    return scan_rows(rows, gap_min, gap_max, require_pair), len(rows)
+
+
+def scan_proteome(
+    db_path: str = DB_PATH,
+    table: str = "Proteins",
+    id_col: str = "accession_number",
+    name_col: str = "name",
+    seq_col: str = "sequence",
+    gap_min: int = 3,
+    gap_max: int = 6,
+    require_pair: bool = False,
+    patterns: Optional[Sequence[Tuple[str, str]]] = None,
+    workers: Optional[int] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Scan every sequence of `table` in chunks; returns {hits, count, scanned, chunks, workers, seconds}.
+
+    `patterns` are (name, pattern) pairs of the motif language; without them
+    the NaSpTx-like motif is used. They are compiled here first, so a syntax
+    error (MotifSyntaxError) surfaces before any worker starts. NaSpTx hits
+    come by score desc, then id; pattern hits by id.
+    """
+    if patterns:
+        from extractors.motif_dsl import compile_motifs
+
+        compile_motifs(list(patterns))
+        patterns = [tuple(p) for p in patterns]
+    started = time.perf_counter()
+    ranges = id_ranges(db_path, table, chunk_rows)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(int(workers), len(ranges) or 1))
+    args = (table, id_col, name_col, seq_col, gap_min, gap_max, require_pair, patterns)
+
+    hits: List[Dict[str, Any]] = []
+    scanned = 0
+    done = 0
+
+    def _merge(result: Tuple[List[Dict[str, Any]], int]) -> None:
+        nonlocal scanned, done
+        hits.extend(result[0])
+        scanned += result[1]
+        done += 1
+        if progress is not None:
+            progress(done, len(ranges), scanned)
+
+    if workers <= 1:
+        for id_range in ranges:
+            _merge(scan_range(db_path, id_range, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(scan_range, db_path, id_range, *args) for id_range in ranges]
+            for fut in as_completed(futures):
+                _merge(fut.result())
+
+    if patterns:
+        hits.sort(key=lambda h: h["peptide_id"])
+    else:
+        hits.sort(key=lambda h: (-h["score"], h["peptide_id"]))
+    return {
+        "hits": hits,
+        "count": len(hits),
+        "scanned": scanned,
+        "chunks": len(ranges),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _parse_motif_arg(value: str, index: int) -> Tuple[str, str]:
+    name, sep, pattern = value.partition("=")
+    return (name, pattern) if sep else (f"m{index + 1}", value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Barrido paralelo de motivos sobre las secuencias precursoras (Proteins).")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--table", default="Proteins")
+    parser.add_argument("--id-col", default="accession_number")
+    parser.add_argument("--name-col", default="name")
+    parser.add_argument("--seq-col", default="sequence")
+    parser.add_argument("--gap-min", type=int, default=3)
+    parser.add_argument("--gap-max", type=int, default=6)
+    parser.add_argument("--require-pair", action="store_true")
+    parser.add_argument("--motif", action="append", help="Patrón del lenguaje de motivos, opcionalmente nombre=patrón (repetible)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo (1 = secuencial)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--json", help="Escribe el resultado completo en este archivo JSON")
+    args = parser.parse_args(argv)
+
+    def _report(done: int, total: int, scanned: int) -> None:
+        print(f"\r{done}/{total} bloques, {scanned} secuencias", end="", file=sys.stderr, flush=True)
+
+    result = scan_proteome(
+        args.db, args.table, args.id_col, args.name_col, args.seq_col,
+        gap_min=args.gap_min, gap_max=args.gap_max, require_pair=args.require_pair,
+        patterns=[_parse_motif_arg(m, i) for i, m in enumerate(args.motif or [])] or None,
+        workers=args.workers, chunk_rows=args.chunk_rows, progress=_report,
+    )
+    print(file=sys.stderr)
+    print(f"{result['count']} hits en {result['scanned']} secuencias de {args.table} "
+          f"({result['chunks']} bloques, {result['workers']} procesos, {result['seconds']:.2f}s)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, ensure_ascii=False, indent=2)
+    else:
+        for h in result["hits"]:
+            detail = ",".join(h["motifs"]) if "motifs" in h else f"score={h['score']}\tiS={h['iS']}\tiW={h['iW']}"
+            print(f"{h['peptide_id']}\t{h['name']}\t{detail}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
@@ -2,12 +2,27 @@
 
 Provides a pure function `search_motifs` returning scored motif hits
 ready to be serialized by a Flask controller.
+
+`search_toxins` memoizes its hits per (db, gap_min, gap_max, require_pair)
+plus a database version token: a `meta` counter bumped by triggers on
+every write to the peptides table, and a per-database epoch so a rebuilt
+file never reuses an old token. Misses are answered from the feature
+tables in `motif_features`; `scan_toxins` is the original sequence scan.
+
+Hits always come in `hit_order` (score desc, then peptide_id). `iter_toxins`
+walks that order lazily from an opaque cursor and `count_toxins` only counts,
+so paginated callers never build the full hit list.
 """
 from __future__ import annotations
 
+import base64
+import bisect
+import json
+import os
 import sqlite3, re
-from collections import namedtuple
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from collections import OrderedDict, namedtuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 
 # Default configuration (can be overridden via function arguments)
 DB_PATH = "database/toxins.db"
@@ -31,6 +46,32 @@ PAT_S_BEFORE_WCKX3 = rf"S[A-Z]*WCK[{HYDRO}]"
 
 Row = namedtuple("Row", "id name seq")
 
+# Version token for the peptides table. PRAGMA data_version is per connection
+# and also moves on writes to unrelated tables (dipole/superposition caches in
+# the same file), so a trigger-maintained counter is used instead.
+PEPTIDES_VERSION_KEY = "peptides_version"
+DB_EPOCH_KEY = "db_epoch"
+PEPTIDES_VERSION_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('{PEPTIDES_VERSION_KEY}', '0');
+INSERT OR IGNORE INTO meta (key, value) VALUES ('{DB_EPOCH_KEY}', lower(hex(randomblob(8))));
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS {TABLE}_version_{op.lower()} AFTER {op} ON {TABLE}
+BEGIN
+    UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = '{PEPTIDES_VERSION_KEY}';
+END;
+"""
+    for op in ("INSERT", "UPDATE", "DELETE")
+)
+
+SEARCH_CACHE_SIZE = 32
+# Rows per keyset query in iter_toxins
+ITER_BATCH_SIZE = 500
+
 
 # ---- Metadata helpers ----
 def pick_name_column(cur) -> str:
@@ -48,6 +89,16 @@ def has_at_least_six_c(seq: str) -> bool:
     return seq.upper().count("C") >= 6
 
 
+def check_gap_range(gap_min: int, gap_max: int) -> None:
+    """Raise ValueError unless 0 <= gap_min <= gap_max.
+
+    Outside that range the loop slices from the end of the string and the
+    vectorized scanner does not, so callers reject such queries up front.
+    """
+    if gap_min < 0 or gap_max < gap_min:
+        raise ValueError(f"gap inválido: se requiere 0 <= gap_min <= gap_max (recibido {gap_min}..{gap_max})")
+
+
 def link_c5_S_to_WCK_gap(seq: str, gap_min=3, gap_max=6):
     """Locate motif with constraints: S immediately after 5th C, WCKX3 at gap in [gap_min..gap_max].
 
@@ -109,8 +160,228 @@ def fetch_rows(db_path=DB_PATH) -> List[Row]:
     return rows
 
 
+# ---- Database version token ----
+def database_version(db_path=DB_PATH) -> Tuple[Any, ...]:
+    """Token that changes whenever the peptides table changes.
+
+    Creates the `meta` counter and its triggers on first use. A database that
+    cannot be written (read-only file, missing table) falls back to the file's
+    inode/mtime/size, which is coarser but still safe.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        for attempt in range(2):
+            try:
+                rows = dict(conn.execute(
+                    "SELECT key, value FROM meta WHERE key IN (?, ?)", (DB_EPOCH_KEY, PEPTIDES_VERSION_KEY)
+                ).fetchall())
+                if len(rows) == 2:
+                    return ("meta", rows[DB_EPOCH_KEY], int(rows[PEPTIDES_VERSION_KEY]))
+            except sqlite3.OperationalError:
+                pass
+            if attempt == 0:
+                # All or nothing: a counter without its triggers would never move
+                try:
+                    conn.executescript("BEGIN;" + PEPTIDES_VERSION_SCHEMA + "COMMIT;")
+                except sqlite3.Error:
+                    conn.rollback()
+                    break
+    finally:
+        conn.close()
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return ("missing",)
+    return ("stat", st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class SearchCache:
+    """Thread-safe LRU of search results keyed by parameters + database version.
+
+    The lock only guards the dict; the search itself runs outside it, so a
+    slow miss never blocks hits (threads or gevent greenlets alike). Two
+    concurrent misses on the same key may both compute; the last one wins.
+    """
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[Tuple[Any, ...], List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple[Any, ...], version: Tuple[Any, ...]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self.invalidations += 1
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[Any, ...], version: Tuple[Any, ...], hits: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = (version, hits)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+            }
+
+
+_SEARCH_CACHE = SearchCache()
+
+
+def search_cache_stats() -> Dict[str, Any]:
+    return _SEARCH_CACHE.stats()
+
+
+def clear_search_cache() -> None:
+    _SEARCH_CACHE.clear()
+
+
 # ---- Public search function ----
-def search_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH) -> List[Dict[str, Any]]:
+def search_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH, use_cache=True) -> List[Dict[str, Any]]:
+    """Motif search with results memoized until the peptides table changes.
+
+    Each call returns fresh dict copies, so callers may mutate them. See
+    `_search_toxins_uncached` for the scoring.
+    """
+    if not use_cache:
+        return _search_toxins_uncached(gap_min, gap_max, require_pair, db_path)
+    key = (os.path.abspath(str(db_path)), int(gap_min), int(gap_max), bool(require_pair))
+    version = database_version(db_path)
+    hits = _SEARCH_CACHE.get(key, version)
+    if hits is None:
+        hits = _search_toxins_uncached(gap_min, gap_max, require_pair, db_path)
+        _SEARCH_CACHE.put(key, version, hits)
+    return [dict(h) for h in hits]
+
+
+def _search_toxins_uncached(gap_min, gap_max, require_pair, db_path) -> List[Dict[str, Any]]:
+    """Answer from the precomputed feature index, rescanning sequences if it cannot be built."""
+    from extractors.motif_features import query_motif_hits, sync_motif_features  # imports this module
+
+    try:
+        sync_motif_features(db_path)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            return query_motif_hits(conn, gap_min, gap_max, require_pair)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        hits = scan_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=db_path)
+        hits.sort(key=hit_order)
+        return hits
+
+
+# ---- Cursor pagination ----
+def hit_order(hit: Dict[str, Any]) -> Tuple[int, Any]:
+    """Sort key of the stable result order: score desc, then peptide_id."""
+    return (-hit["score"], hit["peptide_id"])
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Opaque URL-safe token for a sort key (e.g. `hit_order` of the last hit returned)."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: Optional[int] = None) -> Tuple[Any, ...]:
+    """Sort key stored in `token`; ValueError if it is malformed or not `size` long."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {token!r}") from e
+    if not isinstance(key, list) or not key or (size is not None and len(key) != size):
+        raise ValueError(f"invalid cursor: {token!r}")
+    return tuple(key)
+
+
+def iter_toxins(
+    *,
+    gap_min=3,
+    gap_max=6,
+    require_pair=False,
+    db_path=DB_PATH,
+    cursor: Optional[str] = None,
+    exclude_ids: Iterable[int] = (),
+    batch_size: int = ITER_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Hits in `hit_order` after `cursor`, skipping `exclude_ids`.
+
+    Reads the feature index with keyset queries of `batch_size` rows, so a
+    consumer that stops after one page only pays for that page. The cursor is
+    checked here (ValueError), before the first hit is requested.
+    """
+    after = decode_cursor(cursor, size=2) if cursor else None
+    if after is not None and not all(isinstance(v, int) for v in after):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return _iter_toxins(gap_min, gap_max, require_pair, db_path, after, {int(i) for i in exclude_ids}, batch_size)
+
+
+def _iter_toxins(gap_min, gap_max, require_pair, db_path, after, exclude, batch_size) -> Iterator[Dict[str, Any]]:
+    from extractors.motif_features import query_motif_hits, sync_motif_features  # imports this module
+
+    try:
+        sync_motif_features(db_path)
+    except sqlite3.Error:
+        # No index: resume inside the memoized scan instead
+        hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=db_path)
+        start = bisect.bisect_right(hits, after, key=hit_order) if after is not None else 0
+        yield from (h for h in hits[start:] if h["peptide_id"] not in exclude)
+        return
+    while True:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            batch = query_motif_hits(
+                conn, gap_min, gap_max, require_pair, after=after, limit=batch_size, exclude_ids=exclude
+            )
+        finally:
+            conn.close()
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        after = hit_order(batch[-1])
+
+
+def count_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH, exclude_ids: Iterable[int] = ()) -> int:
+    """Number of hits `iter_toxins` would yield from the start, without building them."""
+    from extractors.motif_features import count_motif_hits, sync_motif_features  # imports this module
+
+    exclude = {int(i) for i in exclude_ids}
+    try:
+        sync_motif_features(db_path)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            return count_motif_hits(conn, gap_min, gap_max, require_pair, exclude_ids=exclude)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=db_path)
+        return sum(1 for h in hits if h["peptide_id"] not in exclude)
+
+
+def scan_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH) -> List[Dict[str, Any]]:
     """Execute motif search returning list of dict hits sorted by score desc.
 
     Scoring (current heuristic):
@@ -120,7 +391,15 @@ def search_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH)
       +2 S after 5th C
       +1 hydrophobic pair before S (optional, can also be enforced with require_pair)
     """
-    rows = fetch_rows(db_path)
+    return scan_rows(fetch_rows(db_path), gap_min, gap_max, require_pair)
+
+
+def scan_rows(rows: List[Row], gap_min=3, gap_max=6, require_pair=False) -> List[Dict[str, Any]]:
+    """Per-sequence regex/loop scan of `rows`.
+
+    The regex prefilter runs in C and rejects most rows, so on sparse sets
+    (peptide tables, proteomes) this beats the vectorized `motif_scan`.
+    """
     rx_core = re.compile(PAT_WCKX3)
     rx_s_before = re.compile(PAT_S_BEFORE_WCKX3)
     # Step 1: require S...WCKX3 (broad, no distance constraint)
@@ -166,8 +445,19 @@ def search_toxins(*, gap_min=3, gap_max=6, require_pair=False, db_path=DB_PATH)
 
 __all__ = [
     "search_toxins",
+    "iter_toxins",
+    "count_toxins",
+    "hit_order",
+    "encode_cursor",
+    "decode_cursor",
+    "scan_toxins",
+    "scan_rows",
+    "search_cache_stats",
+    "clear_search_cache",
+    "database_version",
     "fetch_rows",
     "has_at_least_six_c",
+    "check_gap_range",
     "link_c5_S_to_WCK_gap",
     "has_hydrophobic_pair_before_S",
 ]
@@ -17,7 +17,7 @@ CLI:
     python run_full_pipeline.py [--query "..."] [--gap-min 3 --gap-max 6 --require-pair]
                                                             [--no-psf] [--no-ai] [--overwrite]
 
-Requisitos: requests, aiohttp, biopython, mdanalysis, certifi, VMD/psfgen (para PSF), configuración IA.
+Requisitos: requests, aiohttp, biopython, mdanalysis, certifi, configuración IA (VMD/psfgen sólo con el motor PSF "vmd").
 """
 
 import os
@@ -202,11 +202,12 @@ def main(argv: Optional[List[str]] = None):
                 ok, _log = gen.generate_psf_for_peptide_subprocess(pdata, verbose=False)
                 if ok:
                     ok_count += 1
+            gen.close()
 
             timings['generate_filtered_psfs'] = time.perf_counter() - t7
             print(f"[PSF] OK={ok_count} SKIP={skipped} TOTAL={total}")
         except Exception as e:
-            print(f"[PSF][ERROR] Generación PSF/PDB falló: {e} (verifica VMD/psfgen y resources/*)")
+            print(f"[PSF][ERROR] Generación PSF/PDB falló: {e} (verifica resources/top_all36_prot.rtf)")
             timings['generate_filtered_psfs'] = time.perf_counter() - t7
 
     # 9. Construir JSON con análisis IA de accessions filtrados
@@ -8,5 +8,21 @@ class GraphServicePort(Protocol):
         and normalize to primitives before calling this port.
         """
 
-    def compute_metrics(self, G: Any) -> Dict[str, Any]:
-        ...
+    def compute_metrics(self, G: Any, budget: Any = None, weighted: bool = False, warm_start: Any = None) -> Dict[str, Any]:
+        """Compute graph metrics.
+
+        ``budget`` is an optional time budget / cancellation token; when it runs
+        out, implementations return approximate values flagged with
+        ``approximate`` and ``approximation``. ``weighted`` adds
+        distance-weighted ``betweenness_weighted``/``closeness_weighted``.
+        ``warm_start`` holds previous ``eigenvector``/``pagerank`` vectors used
+        as starting points for the power iteration.
+        """
+
+    def compute_gnm(self, G: Any, n_modes: int = 20) -> Dict[str, Any]:
+        """Gaussian network model on a CA graph.
+
+        Returns ``node_ids``, the lowest non-zero ``eigenvalues`` of the
+        Kirchhoff matrix, their ``eigenvectors`` (modes x nodes) and the
+        per-node mean-square fluctuations ``msf``.
+        """
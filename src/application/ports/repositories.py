@@ -1,4 +1,4 @@
-from typing import Protocol, List, Tuple, Optional, Dict, Any
+from typing import Protocol, List, Tuple, Optional, Dict, Any, Iterable
 
 class ToxinRepository(Protocol):
     def list_toxins(self) -> List[Tuple[int, str]]: ...
@@ -20,3 +20,22 @@ class MetadataRepository(Protocol):
     def get_family_toxins(self, family_prefix: str) -> List[Tuple[int, str, Optional[float], Optional[str]]]: ...
     def get_family_peptides(self, family_prefix: str) -> List[Dict[str, Any]]: ...
     def get_wt_toxin_data(self, peptide_code: str) -> Optional[Dict[str, Any]]: ...
+
+class GraphMetricsRepository(Protocol):
+    def get(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str] = None) -> Optional[Dict[str, Any]]: ...
+    def get_centrality(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str] = None, nodes: Optional[Iterable[Any]] = None) -> Optional[Dict[str, Dict[str, float]]]: ...
+    def save(self, structure_hash: str, granularity: Any, threshold: Any, properties: Dict[str, Any], metric_version: Optional[str] = None) -> None: ...
+    def get_nearest_centrality(self, structure_hash: str, granularity: Any, threshold: Any, max_delta: float = 1.0) -> Optional[Dict[str, Dict[str, float]]]: ...
+
+class GnmRepository(Protocol):
+    def get(self, structure_hash: str, threshold: Any, n_modes: int) -> Optional[Dict[str, Any]]: ...
+    def save(self, structure_hash: str, threshold: Any, n_modes: int, result: Dict[str, Any]) -> None: ...
+
+class SuperpositionRepository(Protocol):
+    def get_many(self, reference_hash: str, structure_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]: ...
+    def save_many(self, reference_hash: str, rows: Iterable[Tuple[str, Dict[str, Any]]]) -> int: ...
+
+class PeptideDipoleRepository(Protocol):
+    def get(self, peptide_id: int, pdb_hash: str, psf_hash: Optional[str]) -> Optional[Dict[str, Any]]: ...
+    def get_many(self, keys: Iterable[Tuple[int, str, Optional[str]]]) -> Dict[Tuple[int, str, str], Dict[str, Any]]: ...
+    def save(self, peptide_id: int, pdb_hash: str, psf_hash: Optional[str], dipole: Dict[str, Any], source: Optional[str] = None) -> None: ...
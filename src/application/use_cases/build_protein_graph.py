@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Dict, Any, Union
+from typing import Dict, Any, Union, Optional
 from src.application.ports.graph_service_port import GraphServicePort
+from src.application.ports.repositories import GraphMetricsRepository
 from src.domain.models.value_objects import (
     Granularity,
     DistanceThreshold,
@@ -12,11 +13,22 @@ class BuildProteinGraphInput:
     pdb_path: str
     granularity: Union[str, Granularity]
     distance_threshold: Union[float, DistanceThreshold]
+    # Hash del contenido PDB; habilita la tabla materializada graph_metrics
+    structure_hash: Optional[str] = None
+    # Presupuesto de tiempo / cancelación para el cálculo de métricas (MetricBudget)
+    budget: Optional[Any] = None
+    # Añade betweenness/closeness ponderadas por distancia de arista
+    weighted: bool = False
+
+
+# Diferencia máxima de umbral (Å) para reutilizar vectores en caché como warm start
+WARM_START_MAX_DELTA = 1.0
 
 
 class BuildProteinGraph:
-    def __init__(self, graph_port: GraphServicePort):
+    def __init__(self, graph_port: GraphServicePort, metrics_repo: Optional[GraphMetricsRepository] = None):
         self.graph_port = graph_port
+        self.metrics_repo = metrics_repo
 
     def execute(self, inp: BuildProteinGraphInput) -> Dict[str, Any]:
         # Normalize VO inputs to primitives when needed
@@ -28,5 +40,53 @@ class BuildProteinGraph:
             granularity,
             distance_threshold,
         )
-        props = self.graph_port.compute_metrics(G)
-        return {"graph": G, "properties": props}
+
+        props = self._load_cached(inp.structure_hash, granularity, distance_threshold)
+        if props is not None and inp.weighted and "betweenness_weighted" not in (props.get("centrality") or {}):
+            # La fila materializada no trae las variantes ponderadas: se recalcula y se amplía
+            props = None
+        cached = props is not None
+        if not cached:
+            kwargs: Dict[str, Any] = {}
+            if inp.budget is not None:
+                kwargs["budget"] = inp.budget
+            if inp.weighted:
+                kwargs["weighted"] = True
+            warm_start = self._warm_start(inp.structure_hash, granularity, distance_threshold)
+            if warm_start:
+                kwargs["warm_start"] = warm_start
+            props = self.graph_port.compute_metrics(G, **kwargs)
+            self._store(inp.structure_hash, granularity, distance_threshold, props)
+        return {"graph": G, "properties": props, "metrics_cached": cached}
+
+    # --- caché materializada (best-effort: un fallo nunca rompe la petición) ---
+    def _load_cached(self, structure_hash: Optional[str], granularity: str, threshold: float) -> Optional[Dict[str, Any]]:
+        if self.metrics_repo is None or not structure_hash:
+            return None
+        try:
+            return self.metrics_repo.get(structure_hash, granularity, threshold)
+        except Exception:
+            return None
+
+    def _warm_start(self, structure_hash: Optional[str], granularity: str, threshold: float) -> Optional[Dict[str, Any]]:
+        # Mismo PDB con un umbral cercano: sus vectores eigenvector/pagerank aceleran la convergencia
+        finder = getattr(self.metrics_repo, "get_nearest_centrality", None)
+        if finder is None or not structure_hash:
+            return None
+        try:
+            centrality = finder(structure_hash, granularity, threshold, max_delta=WARM_START_MAX_DELTA)
+        except Exception:
+            return None
+        if not centrality:
+            return None
+        warm = {name: centrality[name] for name in ("eigenvector", "pagerank") if centrality.get(name)}
+        return warm or None
+
+    def _store(self, structure_hash: Optional[str], granularity: str, threshold: float, props: Dict[str, Any]) -> None:
+        # Nunca se materializan resultados degradados por presupuesto
+        if self.metrics_repo is None or not structure_hash or not props or props.get("error") or props.get("approximate"):
+            return
+        try:
+            self.metrics_repo.save(structure_hash, granularity, threshold, props)
+        except Exception:
+            pass
@@ -0,0 +1,28 @@
+from typing import Any, Dict, Optional, Union
+
+from src.application.ports.repositories import GraphMetricsRepository
+from src.utils.structure_hash import structure_hash
+
+
+def cached_centrality_kwargs(
+    metrics_repo: Optional[GraphMetricsRepository],
+    pdb_data: Union[bytes, str, None],
+    granularity: Any,
+    threshold: Any,
+    G: Any,
+    weighted: bool = False,
+) -> Dict[str, Any]:
+    """``{'centrality': ...}`` materializado en graph_metrics si cubre todos los nodos de ``G``; ``{}`` si no.
+
+    Con ``weighted`` sólo sirve una fila que ya tenga ``betweenness_weighted``.
+    Un fallo del repositorio nunca rompe la exportación: se recalcula sobre el grafo.
+    """
+    if metrics_repo is None:
+        return {}
+    try:
+        centrality = metrics_repo.get_centrality(structure_hash(pdb_data), granularity, threshold, nodes=G.nodes())
+    except Exception:
+        return {}
+    if not centrality or (weighted and 'betweenness_weighted' not in centrality):
+        return {}
+    return {'centrality': centrality}
@@ -9,6 +9,9 @@ from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
 class CalculateDipoleInput:
     source: str
     pid: int
+    # Blobs ya leídos por el llamador (p. ej. para calcular el ETag); None = leerlos del repositorio
+    pdb_data: Optional[bytes] = None
+    psf_data: Optional[bytes] = None
 
 
 class CalculateDipole:
@@ -20,8 +23,11 @@ class CalculateDipole:
 
     def execute(self, inp: CalculateDipoleInput) -> Dict[str, Any]:
         # Obtener datos binarios prioritariamente desde repositories
-        pdb_bytes = self.structures.get_pdb(inp.source, inp.pid)
-        psf_bytes = self.structures.get_psf(inp.source, inp.pid)
+        if inp.pdb_data is not None:
+            pdb_bytes, psf_bytes = inp.pdb_data, inp.psf_data
+        else:
+            pdb_bytes = self.structures.get_pdb(inp.source, inp.pid)
+            psf_bytes = self.structures.get_psf(inp.source, inp.pid)
         if not pdb_bytes:
             return {"success": False, "error": "No encontrado"}
 
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Union, Optional
+from src.application.ports.graph_service_port import GraphServicePort
+from src.application.ports.repositories import GnmRepository
+from src.domain.models.value_objects import DistanceThreshold
+from src.infrastructure.graph.gnm import DEFAULT_GNM_CUTOFF, DEFAULT_N_MODES, cross_correlations
+
+
+@dataclass
+class ComputeGnmInput:
+    pdb_path: str
+    distance_threshold: Union[float, DistanceThreshold] = DEFAULT_GNM_CUTOFF
+    n_modes: int = DEFAULT_N_MODES
+    # Hash del contenido PDB; habilita la caché gnm_results
+    structure_hash: Optional[str] = None
+    with_correlations: bool = True
+
+
+class ComputeGnm:
+    """GNM sobre el grafo CA: autopares, MSF por residuo y correlaciones cruzadas."""
+
+    def __init__(self, graph_port: GraphServicePort, gnm_repo: Optional[GnmRepository] = None):
+        self.graph_port = graph_port
+        self.gnm_repo = gnm_repo
+
+    def execute(self, inp: ComputeGnmInput) -> Dict[str, Any]:
+        distance_threshold = float(inp.distance_threshold.value) if isinstance(inp.distance_threshold, DistanceThreshold) else float(inp.distance_threshold)
+        n_modes = max(1, int(inp.n_modes))
+
+        gnm = self._load_cached(inp.structure_hash, distance_threshold, n_modes)
+        cached = gnm is not None
+        if not cached:
+            G = self.graph_port.build_graph(inp.pdb_path, "CA", distance_threshold)
+            gnm = self.graph_port.compute_gnm(G, n_modes=n_modes)
+            self._store(inp.structure_hash, distance_threshold, n_modes, gnm)
+
+        result: Dict[str, Any] = {"gnm": gnm, "cached": cached, "distance_threshold": distance_threshold, "n_modes": n_modes}
+        if inp.with_correlations:
+            result["cross_correlation"] = cross_correlations(gnm["eigenvalues"], gnm["eigenvectors"])
+        return result
+
+    # --- caché (best-effort: un fallo nunca rompe la petición) ---
+    def _load_cached(self, structure_hash: Optional[str], threshold: float, n_modes: int) -> Optional[Dict[str, Any]]:
+        if self.gnm_repo is None or not structure_hash:
+            return None
+        try:
+            return self.gnm_repo.get(structure_hash, threshold, n_modes)
+        except Exception:
+            return None
+
+    def _store(self, structure_hash: Optional[str], threshold: float, n_modes: int, gnm: Dict[str, Any]) -> None:
+        if self.gnm_repo is None or not structure_hash:
+            return
+        try:
+            self.gnm_repo.save(structure_hash, threshold, n_modes, gnm)
+        except Exception:
+            pass
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple, Union
-from src.application.ports.repositories import StructureRepository, MetadataRepository
+from typing import Dict, Any, Tuple, Union, Optional
+from src.application.ports.repositories import StructureRepository, MetadataRepository, GraphMetricsRepository
 def _graph_api():
     try:
         import importlib
@@ -18,6 +18,7 @@ from src.infrastructure.exporters.excel_export_adapter import ExcelExportAdapter
 import pandas as pd
 import networkx as nx
 from src.domain.models.value_objects import Granularity, DistanceThreshold
+from src.application.use_cases.cached_metrics import cached_centrality_kwargs
 
 
 @dataclass
@@ -35,12 +36,14 @@ class ExportAtomicSegments:
             pdb: PDBPreprocessorAdapter,
             tmp: TempFileService,
             exporter: ExcelExportAdapter = None,
+            metrics_repo: Optional[GraphMetricsRepository] = None,
     ) -> None:
         self.structures = structures
         self.metadata = metadata
         self.pdb = pdb
         self.tmp = tmp
         self.exporter = exporter or ExcelExportAdapter()
+        self.metrics_repo = metrics_repo
 
     def execute(self, inp: ExportAtomicSegmentsInput) -> Tuple[bytes, str, Dict[str, Any]]:
         gran = inp.granularity.value if isinstance(inp.granularity, Granularity) else inp.granularity
@@ -65,7 +68,9 @@ class ExportAtomicSegments:
             if G.number_of_nodes() == 0:
                 raise RuntimeError('El grafo no tiene nodos')
 
-            df_segmentos = agrupar_por_segmentos_atomicos(G, gran)
+            # Métricas materializadas (graph_metrics) si cubren este grafo
+            metric_kwargs = cached_centrality_kwargs(self.metrics_repo, pdb_bytes, gran, dist_thr, G)
+            df_segmentos = agrupar_por_segmentos_atomicos(G, gran, **metric_kwargs)
             if df_segmentos.empty:
                 raise RuntimeError('No se generaron segmentos')
             df_segmentos.insert(0, 'Toxina', toxin_name)
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple, Union
-from src.application.ports.repositories import MetadataRepository, StructureRepository
+from typing import Dict, Any, Tuple, Union, Optional
+from src.application.ports.repositories import MetadataRepository, StructureRepository, GraphMetricsRepository
 from src.infrastructure.graphein.graph_export_service import GraphExportService as GraphAnalyzer
 from src.infrastructure.exporters.export_service_v2 import ExportService, ExportUtilsV2
 from src.infrastructure.exporters.excel_export_adapter import ExcelExportAdapter
@@ -9,6 +9,7 @@ from src.domain.services.segmentation_service import agrupar_por_segmentos_atomi
 import pandas as pd
 import networkx as nx
 from src.domain.models.value_objects import Granularity, DistanceThreshold
+from src.application.use_cases.cached_metrics import cached_centrality_kwargs
 
 
 @dataclass
@@ -20,11 +21,13 @@ class ExportFamilyInput:
 
 
 class ExportFamilyReports:
-    def __init__(self, metadata: MetadataRepository, structures: StructureRepository, exporter: ExcelExportAdapter, pdb: PDBPreprocessorAdapter = None) -> None:
+    def __init__(self, metadata: MetadataRepository, structures: StructureRepository, exporter: ExcelExportAdapter, pdb: PDBPreprocessorAdapter = None,
+                 metrics_repo: Optional[GraphMetricsRepository] = None) -> None:
         self.metadata = metadata
         self.structures = structures
         self.exporter = exporter
         self.pdb = pdb or PDBPreprocessorAdapter()
+        self.metrics_repo = metrics_repo
 
     def execute(self, inp: ExportFamilyInput) -> Tuple[bytes, str, Dict[str, Any]]:
         family_toxins = self.metadata.get_family_toxins(inp.family_prefix)
@@ -53,8 +56,10 @@ class ExportFamilyReports:
             try:
                 config = GraphAnalyzer.create_graph_config(gran, dist_thr)
                 G = GraphAnalyzer.construct_protein_graph(pdb_path, config)
+                # Métricas materializadas (graph_metrics) si cubren este grafo
+                metric_kwargs = cached_centrality_kwargs(self.metrics_repo, pdb_data, gran, dist_thr, G)
                 if inp.export_type == 'segments_atomicos':
-                    df_segmentos = agrupar_por_segmentos_atomicos(G, gran)
+                    df_segmentos = agrupar_por_segmentos_atomicos(G, gran, **metric_kwargs)
                     if not df_segmentos.empty:
                         df_segmentos.insert(0, 'Toxina', peptide_code)
                         df_segmentos['IC50_Value'] = ic50_value
@@ -64,7 +69,7 @@ class ExportFamilyReports:
                 else:
                     # Use module-level ExportService alias (monkeypatchable in tests)
                     ES = ExportService
-                    residue_data = ES.prepare_residue_export_data(G, peptide_code, ic50_value, ic50_unit, gran)
+                    residue_data = ES.prepare_residue_export_data(G, peptide_code, ic50_value, ic50_unit, gran, **metric_kwargs)
                     if residue_data:
                         df = pd.DataFrame(residue_data)
                         toxin_dataframes[ExportUtilsV2.clean_filename(peptide_code)] = df
@@ -1,12 +1,15 @@
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple, Union
-from src.application.ports.repositories import StructureRepository, MetadataRepository
+from typing import Dict, Any, Tuple, Union, Optional
+from src.application.ports.repositories import StructureRepository, MetadataRepository, GraphMetricsRepository, GnmRepository
 from src.infrastructure.graphein.graph_export_service import GraphExportService as GraphAnalyzer
 from src.infrastructure.exporters.export_service_v2 import ExportService
 from src.infrastructure.exporters.excel_export_adapter import ExcelExportAdapter
 from src.infrastructure.pdb.pdb_preprocessor_adapter import PDBPreprocessorAdapter
 from src.infrastructure.fs.temp_file_service import TempFileService
+from src.infrastructure.graph.gnm import DEFAULT_N_MODES, gnm_analysis
 from src.domain.models.value_objects import Granularity, DistanceThreshold
+from src.utils.structure_hash import structure_hash
+from src.application.use_cases.cached_metrics import cached_centrality_kwargs
 
 
 @dataclass
@@ -15,6 +18,9 @@ class ExportResidueReportInput:
     pid: int
     granularity: Union[str, Granularity] = 'CA'
     distance_threshold: Union[float, DistanceThreshold] = 10.0
+    weighted: bool = False
+    # Añade la fluctuación GNM por residuo (solo granularidad CA)
+    gnm: bool = False
 
 
 class ExportResidueReport:
@@ -25,12 +31,16 @@ class ExportResidueReport:
         pdb: PDBPreprocessorAdapter,
         tmp: TempFileService,
         metadata_repo: MetadataRepository,
+        metrics_repo: Optional[GraphMetricsRepository] = None,
+        gnm_repo: Optional[GnmRepository] = None,
     ) -> None:
         self.structures = structures
         self.exporter = exporter
         self.pdb = pdb
         self.tmp = tmp
         self.metadata_repo = metadata_repo
+        self.metrics_repo = metrics_repo
+        self.gnm_repo = gnm_repo
 
     def execute(self, inp: ExportResidueReportInput) -> Tuple[bytes, str, Dict[str, Any]]:
         toxin = self.metadata_repo.get_complete_toxin_data(inp.source, inp.pid)
@@ -48,7 +58,14 @@ class ExportResidueReport:
             dist_thr = float(inp.distance_threshold.value) if isinstance(inp.distance_threshold, DistanceThreshold) else float(inp.distance_threshold)
             cfg = GraphAnalyzer.create_graph_config(gran, dist_thr)
             G = GraphAnalyzer.construct_protein_graph(tmp_path, cfg)
-            residue_data = ExportService.prepare_residue_export_data(G, toxin_name, ic50_value, ic50_unit, gran)
+            # Métricas materializadas (graph_metrics) si cubren este grafo
+            metric_kwargs = cached_centrality_kwargs(self.metrics_repo, pdb_bytes, gran, dist_thr, G, weighted=inp.weighted)
+            if inp.weighted:
+                metric_kwargs['weighted'] = True
+            use_gnm = inp.gnm and str(gran).lower() in {'ca', 'residue'}
+            if use_gnm:
+                metric_kwargs['gnm_msf'] = self._gnm_msf(G, structure_hash(pdb_bytes), dist_thr)
+            residue_data = ExportService.prepare_residue_export_data(G, toxin_name, ic50_value, ic50_unit, gran, **metric_kwargs)
             metadata = ExportService.create_metadata(
                 toxin_name,
                 inp.source,
@@ -59,9 +76,31 @@ class ExportResidueReport:
                 ic50_value,
                 ic50_unit,
             )
+            if inp.weighted:
+                metadata['Centralidades_Ponderadas'] = 'Sí (distancia de arista, Å)'
+            if use_gnm:
+                metadata['GNM'] = f'MSF relativa, {DEFAULT_N_MODES} modos no nulos, contactos CA ≤ {dist_thr} Å'
+            elif inp.gnm:
+                metadata['GNM'] = 'Solo disponible con granularidad CA'
             excel_data, excel_filename = self.exporter.generate_single_toxin_excel(
                 residue_data, metadata, toxin_name, inp.source
             )
             return excel_data, excel_filename, metadata
         finally:
             self.tmp.cleanup([tmp_path])
+
+    def _gnm_msf(self, G, content_hash: Optional[str], dist_thr: float) -> Dict[str, float]:
+        gnm = None
+        if self.gnm_repo is not None:
+            try:
+                gnm = self.gnm_repo.get(content_hash, dist_thr, DEFAULT_N_MODES)
+            except Exception:
+                gnm = None
+        if gnm is None or not {str(n) for n in G.nodes()}.issubset(gnm['node_ids']):
+            gnm = gnm_analysis(G, n_modes=DEFAULT_N_MODES)
+            if self.gnm_repo is not None:
+                try:
+                    self.gnm_repo.save(content_hash, dist_thr, DEFAULT_N_MODES, gnm)
+                except Exception:
+                    pass
+        return {node: float(v) for node, v in zip(gnm['node_ids'], gnm['msf'])}
@@ -4,13 +4,14 @@ import os
 import pandas as pd
 import networkx as nx
 
-from src.application.ports.repositories import MetadataRepository, StructureRepository
+from src.application.ports.repositories import MetadataRepository, StructureRepository, GraphMetricsRepository
 from src.infrastructure.exporters.excel_export_adapter import ExcelExportAdapter
 from src.infrastructure.pdb.pdb_preprocessor_adapter import PDBPreprocessorAdapter
 from src.domain.services.segmentation_service import agrupar_por_segmentos_atomicos
 from src.domain.models.value_objects import Granularity, DistanceThreshold
 from src.infrastructure.graphein.graph_export_service import GraphExportService as GraphAnalyzer
 from src.infrastructure.exporters.export_service_v2 import ExportService
+from src.application.use_cases.cached_metrics import cached_centrality_kwargs
 
 
 @dataclass
@@ -23,11 +24,13 @@ class ExportWTComparisonInput:
 
 
 class ExportWTComparison:
-    def __init__(self, metadata: MetadataRepository, structures: StructureRepository, exporter: ExcelExportAdapter) -> None:
+    def __init__(self, metadata: MetadataRepository, structures: StructureRepository, exporter: ExcelExportAdapter,
+                 metrics_repo: Optional[GraphMetricsRepository] = None) -> None:
         self.metadata = metadata
         self.structures = structures
         self.exporter = exporter
         self.pdb = PDBPreprocessorAdapter()
+        self.metrics_repo = metrics_repo
 
     def _process_single(self, pdb_data, toxin_name: str, ic50_value: Optional[float], ic50_unit: Optional[str],
                          granularity: str, distance_threshold: float, toxin_type: str,
@@ -36,8 +39,10 @@ class ExportWTComparison:
         try:
             cfg = GraphAnalyzer.create_graph_config(granularity, distance_threshold)
             G = GraphAnalyzer.construct_protein_graph(pdb_path, cfg)
+            # Métricas materializadas (graph_metrics) si cubren este grafo
+            metric_kwargs = cached_centrality_kwargs(self.metrics_repo, pdb_data, granularity, distance_threshold, G)
             if export_type == 'segments_atomicos':
-                df = agrupar_por_segmentos_atomicos(G, granularity)
+                df = agrupar_por_segmentos_atomicos(G, granularity, **metric_kwargs)
                 if df is None or df.empty:
                     return None, G
                 df.insert(0, 'Toxina', toxin_name)
@@ -51,7 +56,7 @@ class ExportWTComparison:
                 return df, G
             else:
                 residue_data = ExportService.prepare_residue_export_data(
-                    G, toxin_name, ic50_value, ic50_unit, granularity
+                    G, toxin_name, ic50_value, ic50_unit, granularity, **metric_kwargs
                 )
                 if not residue_data:
                     return None, G
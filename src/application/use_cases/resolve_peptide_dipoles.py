@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.application.ports.repositories import PeptideDipoleRepository
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
+from src.utils.structure_hash import structure_hash
+
+
+@dataclass
+class PeptideDipoleInput:
+    peptide_id: int
+    # Archivos en disco (p. ej. pdbs/filtered_psfs) ...
+    pdb_path: Optional[Union[str, Path]] = None
+    psf_path: Optional[Union[str, Path]] = None
+    # ... o contenido en memoria (blobs de la BD)
+    pdb_data: Optional[Union[bytes, str]] = None
+    psf_data: Optional[Union[bytes, str]] = None
+    source: Optional[str] = None
+
+
+class ResolvePeptideDipoles:
+    """Dipolo por péptido leído de ``peptide_dipoles``; se calcula y guarda en el primer fallo."""
+
+    def __init__(self, dipole: DipoleAdapter, repo: Optional[PeptideDipoleRepository] = None) -> None:
+        self.dipole = dipole
+        self.repo = repo
+
+    def execute(self, inp: PeptideDipoleInput) -> Dict[str, Any]:
+        result = self.execute_many([inp])[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
+
+    def execute_many(self, inputs: List[PeptideDipoleInput]) -> List[Dict[str, Any]]:
+        """Resultados en el orden de entrada: ``{'dipole', 'cached'}`` o ``{'error'}`` por elemento."""
+        results: List[Dict[str, Any]] = [{} for _ in inputs]
+        keys: List[Optional[Tuple[int, str, str]]] = []
+        for i, inp in enumerate(inputs):
+            try:
+                keys.append(self._key(inp))
+            except Exception as e:
+                keys.append(None)
+                results[i] = {"error": str(e)}
+
+        stored: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        if self.repo is not None:
+            try:
+                stored = self.repo.get_many([k for k in keys if k is not None])
+            except Exception:
+                stored = {}
+
+        # Claves repetidas en la entrada se calculan una sola vez
+        misses: Dict[Tuple[int, str, str], List[int]] = {}
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            if key in stored:
+                results[i] = {"dipole": stored[key], "cached": True}
+            else:
+                misses.setdefault(key, []).append(i)
+
+        fresh = []
+        computed = self._compute_many([inputs[idx[0]] for idx in misses.values()])
+        for (key, idx), outcome in zip(misses.items(), computed):
+            for i in idx:
+                results[i] = outcome if "error" in outcome else {"dipole": outcome["dipole"], "cached": False}
+            if "error" not in outcome:
+                fresh.append((*key, outcome["dipole"], inputs[idx[0]].source))
+        self._store(fresh)
+        return results
+
+    @staticmethod
+    def _read(data: Optional[Union[bytes, str]], path: Optional[Union[str, Path]]) -> Optional[bytes]:
+        if data is not None:
+            return data if isinstance(data, (bytes, bytearray)) else str(data).encode("utf-8")
+        if path is not None and Path(path).exists():
+            return Path(path).read_bytes()
+        return None
+
+    def _key(self, inp: PeptideDipoleInput) -> Tuple[int, str, str]:
+        pdb_bytes = self._read(inp.pdb_data, inp.pdb_path)
+        if not pdb_bytes:
+            raise FileNotFoundError("No se encontraron datos PDB")
+        psf_bytes = self._read(inp.psf_data, inp.psf_path)
+        return int(inp.peptide_id), structure_hash(pdb_bytes), structure_hash(psf_bytes) if psf_bytes else ""
+
+    def _compute_many(self, inputs: List[PeptideDipoleInput]) -> List[Dict[str, Any]]:
+        """``{'dipole'}`` o ``{'error'}`` por entrada; usa el cálculo por lotes si el adapter lo ofrece."""
+        batch = getattr(self.dipole, "calculate_dipoles_batch", None)
+        if batch is not None and len(inputs) > 1:
+            outcomes = batch([self._pair(inp) for inp in inputs])
+            return [{"dipole": o["dipole"]} if o.get("success") else {"error": o.get("error", "Error desconocido en cálculo dipolar")}
+                    for o in outcomes]
+        computed: List[Dict[str, Any]] = []
+        for inp in inputs:
+            try:
+                computed.append({"dipole": self._compute(inp)})
+            except Exception as e:
+                computed.append({"error": str(e)})
+        return computed
+
+    @staticmethod
+    def _pair(inp: PeptideDipoleInput) -> Tuple[Union[str, bytes], Optional[Union[str, bytes]]]:
+        if inp.pdb_data is not None:
+            pdb = inp.pdb_data if isinstance(inp.pdb_data, (bytes, bytearray)) else str(inp.pdb_data).encode("utf-8")
+            psf = inp.psf_data if inp.psf_data is None or isinstance(inp.psf_data, (bytes, bytearray)) else str(inp.psf_data).encode("utf-8")
+            return pdb, psf
+        psf_path = str(inp.psf_path) if inp.psf_path is not None and Path(inp.psf_path).exists() else None
+        return str(inp.pdb_path), psf_path
+
+    def _compute(self, inp: PeptideDipoleInput) -> Dict[str, Any]:
+        if inp.pdb_path is not None and inp.pdb_data is None:
+            psf_path = str(inp.psf_path) if inp.psf_path is not None and Path(inp.psf_path).exists() else None
+            return self.dipole.calculate_dipole_from_files(str(inp.pdb_path), psf_path)
+        result = self.dipole.process_dipole_calculation(inp.pdb_data, inp.psf_data)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "Error desconocido en cálculo dipolar"))
+        return result["dipole"]
+
+    def _store(self, rows: List[Tuple[Any, ...]]) -> None:
+        # Best-effort: un fallo al escribir nunca rompe la petición
+        if self.repo is None or not rows:
+            return
+        try:
+            save_many = getattr(self.repo, "save_many", None)
+            if save_many is not None:
+                save_many(rows)
+            else:
+                for row in rows:
+                    self.repo.save(*row)
+        except Exception:
+            pass
@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from src.infrastructure.pdb.mutant_dipoles import AMINO_ACIDS, mutant_dipole_deltas, point_mutants, residue_dipole_terms
+
+# (secuencia, posiciones, residuos uint8, gap_min, gap_max) → MotifScan (``extractors.motif_scan``)
+MotifScanner = Callable[[str, np.ndarray, np.ndarray, int, int], Any]
+
+RANK_KEYS = ("score", "motif_score", "charge_delta", "abs_charge_delta", "dipole_delta", "dipole_shift", "dipole_angle_deg")
+DEFAULT_WEIGHTS = {"motif": 1.0, "charge": 1.0, "dipole": 1.0}
+
+
+@dataclass
+class ScanMutantsInput:
+    pdb: Union[str, Path, bytes]
+    # Residuos destino: "A" = barrido de alaninas, "DEKR" = cambios de carga
+    targets: str = AMINO_ACIDS
+    # Posiciones 1-based en la secuencia de la estructura; None = todas
+    positions: Optional[List[int]] = None
+    gap_min: int = 3
+    gap_max: int = 6
+    rank_by: str = "score"
+    ascending: bool = False
+    top_k: int = 20
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+
+
+class ScanMutants:
+    """Ranking de todas las sustituciones puntuales por retención del motivo, cambio de carga y de dipolo.
+
+    ``score = w_motif * retiene_motivo + w_charge * |Δq| + w_dipole * |Δμ| / |μ_WT|``,
+    con ``Δμ`` el desplazamiento del vector dipolar aproximado.
+    """
+
+    def __init__(self, motif_scanner: MotifScanner) -> None:
+        self.motif_scanner = motif_scanner
+
+    def execute(self, inp: ScanMutantsInput) -> Dict[str, Any]:
+        if inp.rank_by not in RANK_KEYS:
+            raise ValueError(f"rank_by debe ser uno de {RANK_KEYS}")
+        pdb = inp.pdb if isinstance(inp.pdb, (bytes, bytearray)) else str(inp.pdb)
+        terms = residue_dipole_terms(pdb)
+        sequence = terms.sequence
+        positions = None if inp.positions is None else [p - 1 for p in inp.positions]
+        pos, residues = point_mutants(sequence, inp.targets, positions)
+
+        # WT = "mutante" idéntico en la posición 0
+        wt_scan = self.motif_scanner(sequence, np.array([0]), np.frombuffer(sequence[:1].encode(), dtype=np.uint8),
+                                     inp.gap_min, inp.gap_max)
+        scan = self.motif_scanner(sequence, pos, residues, inp.gap_min, inp.gap_max)
+        wt_motif = _motif_score(wt_scan)[0]
+        motif = _motif_score(scan)
+        deltas = mutant_dipole_deltas(terms, pos, residues)
+
+        weights = {**DEFAULT_WEIGHTS, **(inp.weights or {})}
+        wt_magnitude = float(np.linalg.norm(terms.dipole))
+        retained = (motif > 0) & (motif >= wt_motif)
+        columns = {
+            "motif_score": motif,
+            "charge_delta": deltas["charge_delta"],
+            "abs_charge_delta": np.abs(deltas["charge_delta"]),
+            "dipole_delta": deltas["dipole_delta"],
+            "dipole_shift": deltas["dipole_shift"],
+            "dipole_angle_deg": deltas["dipole_angle_deg"],
+        }
+        columns["score"] = (
+            weights["motif"] * retained
+            + weights["charge"] * columns["abs_charge_delta"]
+            + weights["dipole"] * deltas["dipole_shift"] / max(wt_magnitude, 1e-12)
+        )
+
+        key = columns[inp.rank_by] if inp.ascending else -columns[inp.rank_by]
+        k = max(0, min(int(inp.top_k), len(pos)))
+        # Orden estable: empates por posición y residuo (orden de generación)
+        top = np.argsort(key, kind="stable")[:k]
+        return {
+            "wild_type": {
+                "sequence": sequence,
+                "net_charge": float(terms.charge.sum()),
+                "dipole": terms.dipole,
+                "dipole_magnitude": wt_magnitude,
+                "motif_score": int(wt_motif),
+            },
+            "residue_keys": terms.residue_keys,
+            "total": int(len(pos)),
+            "rank_by": inp.rank_by,
+            "weights": weights,
+            "positions": pos[top],
+            "residues": residues[top],
+            "motif_retained": retained[top],
+            "dipole": deltas["dipole"][top],
+            "dipole_magnitude": deltas["dipole_magnitude"][top],
+            **{name: values[top] for name, values in columns.items()},
+        }
+
+
+def _motif_score(scan: Any) -> np.ndarray:
+    # Mismo puntaje que search_toxins: 8 por el motivo + 1 con par hidrofóbico; 0 sin motivo
+    return np.where(scan.ok, 8 + (scan.pair_start >= 0), 0).astype(np.int64)
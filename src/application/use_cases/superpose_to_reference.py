@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.application.ports.repositories import SuperpositionRepository
+from src.infrastructure.pdb.superposition import superpose_on_cysteines
+from src.utils.structure_hash import structure_hash
+
+StructureSource = Union[str, Path, bytes]
+
+
+class SuperposeToReference:
+    """Rotaciones Kabsch de cada estructura sobre una referencia, cacheadas por hash de estructura."""
+
+    def __init__(self, repo: Optional[SuperpositionRepository] = None) -> None:
+        self.repo = repo
+
+    @staticmethod
+    def _read(source: StructureSource) -> bytes:
+        if isinstance(source, (bytes, bytearray)):
+            return bytes(source)
+        return Path(source).read_bytes()
+
+    def execute_many(self, reference: StructureSource, structures: List[StructureSource]) -> List[Dict[str, Any]]:
+        """En el orden de entrada: ``{'rotation', 'translation', 'rmsd', ..., 'cached'}`` o ``{'error'}``."""
+        reference_bytes = self._read(reference)
+        reference_hash = structure_hash(reference_bytes)
+        results: List[Dict[str, Any]] = [{} for _ in structures]
+        contents: List[Optional[bytes]] = []
+        hashes: List[Optional[str]] = []
+        for i, source in enumerate(structures):
+            try:
+                data = self._read(source)
+            except OSError as e:
+                data = None
+                results[i] = {"error": str(e)}
+            contents.append(data)
+            hashes.append(structure_hash(data) if data is not None else None)
+
+        stored: Dict[str, Dict[str, Any]] = {}
+        if self.repo is not None:
+            try:
+                stored = self.repo.get_many(reference_hash, [h for h in hashes if h])
+            except Exception:
+                stored = {}
+
+        # Hashes repetidos se superponen una sola vez
+        pending: Dict[str, List[int]] = {}
+        for i, h in enumerate(hashes):
+            if h is None:
+                continue
+            if h in stored:
+                results[i] = {**stored[h], "cached": True}
+            else:
+                pending.setdefault(h, []).append(i)
+
+        fresh = []
+        if pending:
+            computed = superpose_on_cysteines(reference_bytes, [contents[idx[0]] for idx in pending.values()])
+            for (h, idx), outcome in zip(pending.items(), computed):
+                if outcome is None:
+                    for i in idx:
+                        results[i] = {"error": "Cisteínas insuficientes para superponer sobre la referencia"}
+                    continue
+                for i in idx:
+                    results[i] = {**outcome, "cached": False}
+                fresh.append((h, outcome))
+        self._store(reference_hash, fresh)
+        return results
+
+    def _store(self, reference_hash: Optional[str], rows: List[Any]) -> None:
+        # Best-effort: un fallo al escribir nunca rompe la petición
+        if self.repo is None or not rows or not reference_hash:
+            return
+        try:
+            self.repo.save_many(reference_hash, rows)
+        except Exception:
+            pass
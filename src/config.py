@@ -12,6 +12,8 @@ class AppConfig:
     psf_dir: str
     wt_reference_path: str
     wt_reference_psf_path: Optional[str]
+    metrics_time_budget: Optional[float] = None
+    shared_cache_path: str = 'cache/shared_cache.db'
 
 
 def _resolve(base: Optional[str], path: str) -> str:
@@ -31,6 +33,8 @@ def load_app_config(project_root: Optional[str] = None) -> AppConfig:
             - PSF_DIR: directory where PSF files live (default: psfs)
             - WT_REFERENCE_PATH: default WT reference PDB (default: pdbs/WT/generated/hwt4_Hh2a_WT.pdb)
             - WT_REFERENCE_PSF_PATH: default WT reference PSF (default: same folder with .psf extension)
+            - METRICS_TIME_BUDGET: default seconds allowed for graph metrics per request (default: 30; 0 = unlimited)
+            - SHARED_CACHE_PATH: SQLite cache shared by all workers (default: cache/shared_cache.db)
     """
     db_path = os.getenv('TOXINS_DB_PATH', 'database/toxins.db')
     pdb_dir = os.getenv('PDB_DIR', 'pdbs')
@@ -39,6 +43,14 @@ def load_app_config(project_root: Optional[str] = None) -> AppConfig:
     wt_reference_path = os.getenv('WT_REFERENCE_PATH', default_wt_pdb)
     default_wt_psf = os.path.splitext(default_wt_pdb)[0] + '.psf'
     wt_reference_psf_path = os.getenv('WT_REFERENCE_PSF_PATH', default_wt_psf)
+    try:
+        metrics_time_budget: Optional[float] = float(os.getenv('METRICS_TIME_BUDGET', '30'))
+    except ValueError:
+        metrics_time_budget = 30.0
+    if metrics_time_budget is not None and metrics_time_budget <= 0:
+        metrics_time_budget = None
+
+    shared_cache_path = os.getenv('SHARED_CACHE_PATH', os.path.join('cache', 'shared_cache.db'))
 
     base = project_root or os.getenv('PROJECT_ROOT')
     return AppConfig(
@@ -47,4 +59,6 @@ def load_app_config(project_root: Optional[str] = None) -> AppConfig:
         psf_dir=_resolve(base, psf_dir),
         wt_reference_path=_resolve(base, wt_reference_path),
         wt_reference_psf_path=_resolve(base, wt_reference_psf_path) if wt_reference_psf_path else None,
+        metrics_time_budget=metrics_time_budget,
+        shared_cache_path=_resolve(base, shared_cache_path),
     )
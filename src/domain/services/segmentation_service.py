@@ -64,19 +64,27 @@ def _residue_seq_index(value: Any) -> Optional[int]:
         return None
 
 
-def agrupar_por_segmentos_atomicos(G: Any, granularity: str = "atom") -> pd.DataFrame:
+def agrupar_por_segmentos_atomicos(G: Any, granularity: str = "atom",
+                                   centrality: Optional[Dict[str, Dict[Any, float]]] = None) -> pd.DataFrame:
     """
     Agrupa átomos en segmentos basados en residuos.
     Mantiene compatibilidad de columnas con la implementación legacy.
+    ``centrality`` (opcional) reutiliza métricas por nodo ya calculadas.
     """
     if granularity != "atom":
         return pd.DataFrame()
 
     # Métricas sobre el grafo completo (reutilizadas para promedios por residuo)
-    degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
-    closeness_centrality = nx.closeness_centrality(G)
-    clustering_coeff = nx.clustering(G)
+    if centrality:
+        degree_centrality = centrality.get('degree', {})
+        betweenness_centrality = centrality.get('betweenness', {})
+        closeness_centrality = centrality.get('closeness', {})
+        clustering_coeff = centrality.get('clustering', {})
+    else:
+        degree_centrality = nx.degree_centrality(G)
+        betweenness_centrality = nx.betweenness_centrality(G)
+        closeness_centrality = nx.closeness_centrality(G)
+        clustering_coeff = nx.clustering(G)
 
     # Agrupar átomos por residuo (parseando ID del nodo o usando atributos)
     residuos_atomicos: Dict[str, dict] = {}
@@ -0,0 +1,101 @@
+from typing import Optional, Dict, Any
+import json
+import sqlite3
+import zlib
+
+import numpy as np
+
+from src.infrastructure.graph.gnm import GNM_VERSION
+
+
+GNM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gnm_results (
+    structure_hash TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    n_modes INTEGER NOT NULL,
+    gnm_version TEXT NOT NULL,
+    node_ids BLOB NOT NULL,
+    eigenvalues BLOB NOT NULL,
+    eigenvectors BLOB NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (structure_hash, threshold, n_modes, gnm_version)
+);
+"""
+
+
+class SqliteGnmRepository:
+    """Modos GNM por (hash de estructura, umbral CA, nº de modos, versión).
+
+    Solo se guardan los autopares (float64 comprimidos con zlib); las MSF y las
+    correlaciones cruzadas se derivan de ellos al leer.
+    """
+
+    def __init__(self, db_path: str = "database/toxins.db", gnm_version: str = GNM_VERSION) -> None:
+        self.db_path = db_path
+        self.gnm_version = gnm_version
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ready:
+            conn.executescript(GNM_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _key(self, structure_hash: str, threshold: Any, n_modes: int):
+        value = getattr(threshold, 'value', threshold)
+        return (structure_hash, round(float(value), 3), int(n_modes), self.gnm_version)
+
+    def get(self, structure_hash: str, threshold: Any, n_modes: int) -> Optional[Dict[str, Any]]:
+        if not structure_hash:
+            return None
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                SELECT node_ids, eigenvalues, eigenvectors FROM gnm_results
+                WHERE structure_hash = ? AND threshold = ? AND n_modes = ? AND gnm_version = ?
+                """,
+                self._key(structure_hash, threshold, n_modes),
+            )
+            row = cur.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        node_ids = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        eigenvalues = np.frombuffer(zlib.decompress(row[1]), dtype='<f8')
+        eigenvectors = np.frombuffer(zlib.decompress(row[2]), dtype='<f8').reshape((len(eigenvalues), len(node_ids)))
+        msf = (eigenvectors ** 2 / eigenvalues[:, None]).sum(axis=0) if len(eigenvalues) else np.zeros(len(node_ids))
+        return {
+            'node_ids': node_ids,
+            'eigenvalues': eigenvalues,
+            'eigenvectors': eigenvectors,
+            'msf': msf,
+            'version': self.gnm_version,
+        }
+
+    def save(self, structure_hash: str, threshold: Any, n_modes: int, result: Dict[str, Any]) -> None:
+        if not structure_hash:
+            return
+        node_ids = [str(n) for n in result.get('node_ids', [])]
+        eigenvalues = np.ascontiguousarray(result.get('eigenvalues', []), dtype='<f8')
+        eigenvectors = np.ascontiguousarray(result.get('eigenvectors', np.zeros((0, len(node_ids)))), dtype='<f8')
+        conn = self._conn()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO gnm_results
+                    (structure_hash, threshold, n_modes, gnm_version, node_ids, eigenvalues, eigenvectors)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    *self._key(structure_hash, threshold, n_modes),
+                    zlib.compress(json.dumps(node_ids, ensure_ascii=False).encode('utf-8')),
+                    zlib.compress(eigenvalues.tobytes()),
+                    zlib.compress(eigenvectors.tobytes()),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
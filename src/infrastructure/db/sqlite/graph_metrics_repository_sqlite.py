@@ -0,0 +1,223 @@
+from typing import Optional, Dict, Any, List, Iterable
+import json
+import sqlite3
+import zlib
+
+import numpy as np
+
+from src.infrastructure.graph.graph_metrics import METRICS_VERSION
+
+
+GRAPH_METRICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_metrics (
+    structure_hash TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    metric_version TEXT NOT NULL,
+    properties_json TEXT NOT NULL,
+    node_ids BLOB NOT NULL,
+    metric_names TEXT NOT NULL,
+    metrics_blob BLOB NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (structure_hash, granularity, threshold, metric_version)
+);
+"""
+
+
+def _normalize_granularity(granularity: Any) -> str:
+    value = getattr(granularity, 'value', granularity)
+    return str(value).strip().lower()
+
+
+def _normalize_threshold(threshold: Any) -> float:
+    value = getattr(threshold, 'value', threshold)
+    return round(float(value), 3)
+
+
+def _to_builtin(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+class SqliteGraphMetricsRepository:
+    """Métricas de grafo materializadas por (hash de estructura, granularidad, umbral, versión).
+
+    Las propiedades globales se guardan como JSON y las métricas por nodo como una
+    matriz float64 (nodos × métricas) comprimida con zlib. Cambiar el blob PDB o
+    ``METRICS_VERSION`` produce otra clave, por lo que la invalidación es implícita.
+    """
+
+    def __init__(self, db_path: str = "database/toxins.db", metric_version: str = METRICS_VERSION) -> None:
+        self.db_path = db_path
+        self.metric_version = metric_version
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ready:
+            conn.executescript(GRAPH_METRICS_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _key(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str]):
+        return (
+            structure_hash,
+            _normalize_granularity(granularity),
+            _normalize_threshold(threshold),
+            metric_version or self.metric_version,
+        )
+
+    def has(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str] = None) -> bool:
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                SELECT 1 FROM graph_metrics
+                WHERE structure_hash = ? AND granularity = ? AND threshold = ? AND metric_version = ?
+                """,
+                self._key(structure_hash, granularity, threshold, metric_version),
+            )
+            return cur.fetchone() is not None
+        finally:
+            conn.close()
+
+    def get(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Devuelve el diccionario de propiedades (incluye ``centrality`` por nodo) o None."""
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                SELECT properties_json, node_ids, metric_names, metrics_blob
+                FROM graph_metrics
+                WHERE structure_hash = ? AND granularity = ? AND threshold = ? AND metric_version = ?
+                """,
+                self._key(structure_hash, granularity, threshold, metric_version),
+            )
+            row = cur.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        properties = json.loads(row[0])
+        properties['centrality'] = self._unpack_centrality(row[1], row[2], row[3])
+        return properties
+
+    def get_centrality(self, structure_hash: str, granularity: Any, threshold: Any, metric_version: Optional[str] = None,
+                       nodes: Optional[Iterable[Any]] = None) -> Optional[Dict[str, Dict[str, float]]]:
+        """Métricas por nodo materializadas.
+
+        Si se pasa ``nodes`` solo se devuelven cuando cubren todos esos nodos para
+        degree/betweenness/closeness/clustering; así un grafo construido de otra
+        forma nunca recibe valores ajenos.
+        """
+        if not structure_hash:
+            return None
+        props = self.get(structure_hash, granularity, threshold, metric_version)
+        centrality = props.get('centrality') if props else None
+        if not centrality or nodes is None:
+            return centrality
+        wanted = {str(n) for n in nodes}
+        for name in ('degree', 'betweenness', 'closeness', 'clustering'):
+            values = centrality.get(name)
+            if values is None or not wanted.issubset(values.keys()):
+                return None
+        return centrality
+
+    def get_nearest_centrality(self, structure_hash: str, granularity: Any, threshold: Any,
+                               max_delta: float = 1.0) -> Optional[Dict[str, Dict[str, float]]]:
+        """Métricas por nodo de la fila con el umbral más cercano (|Δ| ≤ ``max_delta``, distinto del pedido).
+
+        Sirve de punto de partida (warm start) para las iteraciones de potencias.
+        """
+        if not structure_hash:
+            return None
+        key = self._key(structure_hash, granularity, threshold, None)
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                SELECT node_ids, metric_names, metrics_blob FROM graph_metrics
+                WHERE structure_hash = ? AND granularity = ? AND metric_version = ?
+                  AND threshold != ? AND ABS(threshold - ?) <= ?
+                ORDER BY ABS(threshold - ?) LIMIT 1
+                """,
+                (key[0], key[1], key[3], key[2], key[2], float(max_delta), key[2]),
+            )
+            row = cur.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        return self._unpack_centrality(row[0], row[1], row[2])
+
+    def save(self, structure_hash: str, granularity: Any, threshold: Any, properties: Dict[str, Any], metric_version: Optional[str] = None) -> None:
+        centrality = properties.get('centrality') or {}
+        global_props = {k: v for k, v in properties.items() if k != 'centrality'}
+        node_ids_blob, metric_names, metrics_blob = self._pack_centrality(centrality)
+        conn = self._conn()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO graph_metrics
+                    (structure_hash, granularity, threshold, metric_version,
+                     properties_json, node_ids, metric_names, metrics_blob)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._key(structure_hash, granularity, threshold, metric_version) + (
+                    json.dumps(global_props, default=_to_builtin, ensure_ascii=False),
+                    node_ids_blob,
+                    json.dumps(metric_names),
+                    metrics_blob,
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete_stale(self, metric_version: Optional[str] = None) -> int:
+        """Elimina filas de versiones de métricas distintas a la vigente."""
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                "DELETE FROM graph_metrics WHERE metric_version != ?",
+                (metric_version or self.metric_version,),
+            )
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _pack_centrality(centrality: Dict[str, Dict[Any, float]]):
+        metric_names: List[str] = sorted(centrality.keys())
+        node_ids: List[str] = []
+        seen = set()
+        for name in metric_names:
+            for node in centrality[name].keys():
+                if node not in seen:
+                    seen.add(node)
+                    node_ids.append(node)
+        index = {node: i for i, node in enumerate(node_ids)}
+        matrix = np.full((len(node_ids), len(metric_names)), np.nan, dtype='<f8')
+        for j, name in enumerate(metric_names):
+            for node, value in centrality[name].items():
+                matrix[index[node], j] = float(value)
+        node_ids_blob = zlib.compress(json.dumps([str(n) for n in node_ids], ensure_ascii=False).encode('utf-8'))
+        return node_ids_blob, metric_names, zlib.compress(matrix.tobytes())
+
+    @staticmethod
+    def _unpack_centrality(node_ids_blob: bytes, metric_names_json: str, metrics_blob: bytes) -> Dict[str, Dict[str, float]]:
+        node_ids = json.loads(zlib.decompress(node_ids_blob).decode('utf-8'))
+        metric_names = json.loads(metric_names_json)
+        matrix = np.frombuffer(zlib.decompress(metrics_blob), dtype='<f8')
+        matrix = matrix.reshape((len(node_ids), len(metric_names))) if node_ids else matrix.reshape((0, len(metric_names)))
+        centrality: Dict[str, Dict[str, float]] = {}
+        for j, name in enumerate(metric_names):
+            column = matrix[:, j]
+            centrality[name] = {
+                node: float(column[i]) for i, node in enumerate(node_ids) if not np.isnan(column[i])
+            }
+        return centrality
@@ -0,0 +1,134 @@
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+import json
+import math
+import sqlite3
+
+from src.infrastructure.graphein.dipole_adapter import DIPOLE_VERSION
+
+
+PEPTIDE_DIPOLES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS peptide_dipoles (
+    peptide_id INTEGER NOT NULL,
+    pdb_hash TEXT NOT NULL,
+    psf_hash TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    dipole_version TEXT NOT NULL,
+    magnitude REAL,
+    vector_x REAL, vector_y REAL, vector_z REAL,
+    com_x REAL, com_y REAL, com_z REAL,
+    angle_x_deg REAL, angle_y_deg REAL, angle_z_deg REAL,
+    method TEXT,
+    dipole_json TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (peptide_id, pdb_hash, psf_hash)
+);
+"""
+
+# SQLite limita los parámetros por sentencia; se consulta en bloques
+_CHUNK = 300
+
+
+def _axis_angles(normalized: Optional[Iterable[float]]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    try:
+        comps = [float(c) for c in (normalized or [])][:3]
+    except (TypeError, ValueError):
+        comps = []
+    if len(comps) < 3 or not any(comps):
+        return None, None, None
+    return tuple(math.degrees(math.acos(max(-1.0, min(1.0, c)))) for c in comps)  # type: ignore[return-value]
+
+
+def _xyz(values: Any) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    try:
+        x, y, z = (float(v) for v in list(values)[:3])
+        return x, y, z
+    except (TypeError, ValueError):
+        return None, None, None
+
+
+class SqlitePeptideDipoleRepository:
+    """Dipolos por péptido materializados por (peptide_id, hash PDB, hash PSF).
+
+    Cambiar el PDB o el PSF produce otra clave; una fila con ``dipole_version``
+    distinta de la actual se trata como ausente y se sobrescribe al guardar.
+    """
+
+    def __init__(self, db_path: str = "database/toxins.db", dipole_version: str = DIPOLE_VERSION) -> None:
+        self.db_path = db_path
+        self.dipole_version = dipole_version
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ready:
+            conn.executescript(PEPTIDE_DIPOLES_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _key(peptide_id: int, pdb_hash: str, psf_hash: Optional[str]) -> Tuple[int, str, str]:
+        return int(peptide_id), str(pdb_hash), psf_hash or ''
+
+    def get(self, peptide_id: int, pdb_hash: str, psf_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Devuelve el dict de dipolo guardado (mismo formato que DipoleAdapter) o None."""
+        return self.get_many([(peptide_id, pdb_hash, psf_hash)]).get(self._key(peptide_id, pdb_hash, psf_hash))
+
+    def get_many(self, keys: Iterable[Tuple[int, str, Optional[str]]]) -> Dict[Tuple[int, str, str], Dict[str, Any]]:
+        wanted = list({self._key(*k) for k in keys})
+        found: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        if not wanted:
+            return found
+        conn = self._conn()
+        try:
+            for start in range(0, len(wanted), _CHUNK):
+                chunk = wanted[start:start + _CHUNK]
+                ids = sorted({k[0] for k in chunk})
+                placeholders = ",".join("?" for _ in ids)
+                cur = conn.execute(
+                    f"""
+                    SELECT peptide_id, pdb_hash, psf_hash, dipole_json FROM peptide_dipoles
+                    WHERE dipole_version = ? AND peptide_id IN ({placeholders})
+                    """,
+                    (self.dipole_version, *ids),
+                )
+                chunk_set = set(chunk)
+                for pid, pdb_hash, psf_hash, payload in cur.fetchall():
+                    key = (int(pid), pdb_hash, psf_hash or '')
+                    if key in chunk_set:
+                        found[key] = json.loads(payload)
+        finally:
+            conn.close()
+        return found
+
+    def save(self, peptide_id: int, pdb_hash: str, psf_hash: Optional[str], dipole: Dict[str, Any], source: Optional[str] = None) -> None:
+        self.save_many([(peptide_id, pdb_hash, psf_hash, dipole, source)])
+
+    def save_many(self, rows: Iterable[Tuple[int, str, Optional[str], Dict[str, Any], Optional[str]]]) -> int:
+        values: List[Tuple[Any, ...]] = []
+        for peptide_id, pdb_hash, psf_hash, dipole, source in rows:
+            vx, vy, vz = _xyz(dipole.get('vector'))
+            cx, cy, cz = _xyz(dipole.get('center_of_mass'))
+            ax, ay, az = _axis_angles(dipole.get('normalized'))
+            values.append((
+                *self._key(peptide_id, pdb_hash, psf_hash), source, self.dipole_version,
+                dipole.get('magnitude'), vx, vy, vz, cx, cy, cz, ax, ay, az,
+                dipole.get('method'), json.dumps(dipole, ensure_ascii=False),
+            ))
+        if not values:
+            return 0
+        conn = self._conn()
+        try:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO peptide_dipoles
+                    (peptide_id, pdb_hash, psf_hash, source, dipole_version, magnitude,
+                     vector_x, vector_y, vector_z, com_x, com_y, com_z,
+                     angle_x_deg, angle_y_deg, angle_z_deg, method, dipole_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                values,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(values)
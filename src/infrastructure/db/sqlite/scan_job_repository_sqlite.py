@@ -0,0 +1,172 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+import sqlite3
+import uuid
+from pathlib import Path
+
+
+SCAN_JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued | running | done | error
+    params TEXT NOT NULL,          -- JSON
+    progress TEXT,                 -- JSON
+    result TEXT,                   -- JSON
+    error TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Sin latido durante este tiempo, un trabajo en cola o en curso se da por muerto
+DEFAULT_STALE_AFTER = 120.0
+
+
+class SqliteScanJobRepository:
+    """Estado de trabajos en segundo plano (barridos de proteoma) en un SQLite.
+
+    El trabajo corre en un proceso aparte que renueva ``updated_at`` (``touch``)
+    mientras vive; estado y resultado quedan en la base, así que cualquier
+    worker de gunicorn puede responder la consulta. ``get`` marca como ``error``
+    los trabajos sin latido durante ``stale_after`` segundos.
+    """
+
+    def __init__(self, db_path: str, stale_after: float = DEFAULT_STALE_AFTER) -> None:
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            conn.executescript(SCAN_JOBS_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT INTO scan_jobs (job_id, kind, status, params) VALUES (?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params, sort_keys=True)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self, kind: str, params: Dict[str, Any], max_active: int) -> Optional[Tuple[str, bool]]:
+        """Reutiliza o crea un trabajo en una sola transacción.
+
+        Devuelve ``(job_id, False)`` si ya hay uno en cola o en curso con los mismos
+        parámetros, ``(job_id, True)`` si lo crea y ``None`` si ya hay ``max_active``
+        trabajos activos de ``kind``. Los trabajos sin latido no cuentan.
+        """
+        encoded = json.dumps(params, sort_keys=True)
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_stale(conn)
+            active = conn.execute(
+                "SELECT job_id, params FROM scan_jobs WHERE kind = ? AND status IN ('queued', 'running')",
+                (kind,),
+            ).fetchall()
+            for job_id, job_params in active:
+                if job_params == encoded:
+                    conn.commit()
+                    return job_id, False
+            if len(active) >= max_active:
+                conn.commit()
+                return None
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO scan_jobs (job_id, kind, status, params) VALUES (?, ?, 'queued', ?)",
+                (job_id, kind, encoded),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return job_id, True
+
+    def update(
+        self,
+        job_id: str,
+        status: Optional[str] = None,
+        progress: Optional[Dict[str, Any]] = None,
+        result: Optional[Any] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Actualiza sólo los campos dados (None = sin cambios)."""
+        fields = {"status": status, "error": error}
+        fields["progress"] = None if progress is None else json.dumps(progress)
+        fields["result"] = None if result is None else json.dumps(result)
+        changes = {k: v for k, v in fields.items() if v is not None}
+        if not changes:
+            return
+        sets = ", ".join(f"{k} = ?" for k in changes)
+        conn = self._conn()
+        try:
+            conn.execute(
+                f"UPDATE scan_jobs SET {sets}, updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
+                (*changes.values(), job_id),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def touch(self, job_id: str) -> None:
+        """Latido del proceso que ejecuta el trabajo."""
+        conn = self._conn()
+        try:
+            conn.execute("UPDATE scan_jobs SET updated_at = CURRENT_TIMESTAMP WHERE job_id = ?", (job_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _expire_stale(self, conn: sqlite3.Connection, job_id: Optional[str] = None) -> None:
+        # Trabajos en cola o en curso sin latido reciente: su proceso ya no existe
+        conn.execute(
+            """
+            UPDATE scan_jobs SET status = 'error', error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE (? IS NULL OR job_id = ?) AND status IN ('queued', 'running')
+              AND updated_at < datetime('now', ?)
+            """,
+            (
+                f"stale: sin latido en {self.stale_after:g}s (el proceso del trabajo terminó)",
+                job_id,
+                job_id,
+                f"-{self.stale_after:g} seconds",
+            ),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        try:
+            self._expire_stale(conn, job_id)
+            conn.commit()
+            row = conn.execute(
+                """
+                SELECT job_id, kind, status, params, progress, result, error, created_at, updated_at
+                FROM scan_jobs WHERE job_id = ?
+                """,
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "params": json.loads(row[3]),
+            "progress": json.loads(row[4]) if row[4] else None,
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
@@ -0,0 +1,255 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+
+SHARED_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_cache (
+    namespace TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (namespace, cache_key)
+);
+CREATE TABLE IF NOT EXISTS file_fingerprints (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+DEFAULT_SHARED_CACHE_PATH = "cache/shared_cache.db"
+
+_MISSING = "missing"
+_HASH_BLOCK = 1 << 20
+
+PathLike = Union[str, Path]
+
+
+class TableSource:
+    """Fuente "consulta sobre un SQLite": su huella es el hash de las filas devueltas.
+
+    Sirve para bases que se escriben a menudo por otros motivos (cachés de
+    dipolos, superposiciones): el mtime del archivo sólo decide cuándo volver a
+    ejecutar ``sql``; la entrada se invalida únicamente si cambian esas filas.
+    ``params`` se enlazan a los ``?`` de ``sql`` (p. ej. una sola fila por clave).
+    """
+
+    def __init__(self, db_path: PathLike, sql: str, params: Tuple[Any, ...] = ()) -> None:
+        self.db_path = os.path.abspath(str(db_path))
+        self.sql = sql
+        self.params = tuple(params)
+
+    def __repr__(self) -> str:
+        if self.params:
+            return f"TableSource({self.db_path!r}, {self.sql!r}, {self.params!r})"
+        return f"TableSource({self.db_path!r}, {self.sql!r})"
+
+
+class SqliteSharedCache:
+    """Caché JSON compartida entre procesos (workers de gunicorn) en un SQLite de ``cache/``.
+
+    Cada entrada ``(namespace, key)`` guarda la huella de sus archivos fuente
+    (SHA-256 del contenido, recalculado sólo cuando cambian mtime o tamaño);
+    una huella distinta se trata como ausente, así que los cambios en disco se
+    detectan sin reiniciar. El hash de cada archivo también se comparte: un
+    archivo modificado se hashea una vez para todos los workers. Los errores de
+    SQLite degradan a recalcular sin guardar.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_SHARED_CACHE_PATH) -> None:
+        self.db_path = db_path
+        self._schema_ready = False
+        # Memo por proceso: evita decodificar JSON mientras la huella no cambie
+        self._memo: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._queries: Dict[Tuple[str, str, Tuple[Any, ...]], Tuple[Tuple[int, ...], str]] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SHARED_CACHE_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    # -------------------------------------------------------------- huellas
+    def file_hash(self, path: PathLike) -> str:
+        """SHA-256 del archivo (``"missing"`` si no existe), reutilizado mientras no cambien mtime/tamaño."""
+        key = os.path.abspath(str(path))
+        try:
+            st = os.stat(key)
+        except OSError:
+            return _MISSING
+        stamp = (st.st_mtime_ns, st.st_size)
+        known = self._hashes.get(key)
+        if known and known[:2] == stamp:
+            return known[2]
+
+        digest = None
+        try:
+            conn = self._conn()
+            try:
+                row = conn.execute(
+                    "SELECT mtime_ns, size, sha256 FROM file_fingerprints WHERE path = ?", (key,)
+                ).fetchone()
+                if row and (row[0], row[1]) == stamp:
+                    digest = row[2]
+                else:
+                    digest = _sha256_file(key)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO file_fingerprints (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                        (key, stamp[0], stamp[1], digest),
+                    )
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            digest = digest or _sha256_file(key)
+        self._hashes[key] = (stamp[0], stamp[1], digest)
+        return digest
+
+    def table_hash(self, source: TableSource) -> str:
+        """SHA-256 de las filas de ``source.sql``; la consulta se repite sólo si cambia el archivo."""
+        stamp = _db_stamp(source.db_path)
+        if stamp is None:
+            return _MISSING
+        key = (source.db_path, source.sql, source.params)
+        known = self._queries.get(key)
+        if known and known[0] == stamp:
+            return known[1]
+        h = hashlib.sha256()
+        try:
+            conn = sqlite3.connect(f"file:{source.db_path}?mode=ro", uri=True, timeout=30)
+            try:
+                for row in conn.execute(source.sql, source.params):
+                    h.update(repr(row).encode())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            h.update(f"error:{e}".encode())
+        digest = h.hexdigest()
+        self._queries[key] = (stamp, digest)
+        return digest
+
+    def fingerprint(self, sources: Iterable[Optional[Union[PathLike, TableSource]]], extra: Iterable[Any] = ()) -> str:
+        """Huella combinada de archivos o ``TableSource`` (None se ignora) y valores extra (p. ej. versiones)."""
+        h = hashlib.sha256()
+        for src in sources:
+            if src is None:
+                continue
+            if isinstance(src, TableSource):
+                h.update(f"{src!r}={self.table_hash(src)}\n".encode())
+                continue
+            h.update(f"{os.path.abspath(str(src))}={self.file_hash(src)}\n".encode())
+        for value in extra:
+            h.update(f"{value!r}\n".encode())
+        return h.hexdigest()
+
+    # -------------------------------------------------------------- entradas
+    def get(self, namespace: str, key: str, fingerprint: str) -> Optional[Any]:
+        memo = self._memo.get((namespace, key))
+        if memo and memo[0] == fingerprint:
+            return memo[1]
+        try:
+            conn = self._conn()
+            try:
+                row = conn.execute(
+                    "SELECT fingerprint, value FROM shared_cache WHERE namespace = ? AND cache_key = ?",
+                    (namespace, key),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        if not row or row[0] != fingerprint:
+            return None
+        value = json.loads(row[1])
+        self._memo[(namespace, key)] = (fingerprint, value)
+        return value
+
+    def put(self, namespace: str, key: str, fingerprint: str, value: Any) -> None:
+        self._memo[(namespace, key)] = (fingerprint, value)
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            # No serializable: queda sólo en la memoria de este proceso
+            return
+        try:
+            conn = self._conn()
+            try:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO shared_cache (namespace, cache_key, fingerprint, value)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (namespace, key, fingerprint, payload),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        sources: Iterable[Optional[Union[PathLike, TableSource]]],
+        compute: Callable[[], Any],
+        extra: Iterable[Any] = (),
+    ) -> Any:
+        """Valor vigente para las fuentes actuales o ``compute()``; un None calculado no se guarda."""
+        fp = self.fingerprint(sources, extra)
+        value = self.get(namespace, key, fp)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(namespace, key, fp, value)
+        return value
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        self._memo = {k: v for k, v in self._memo.items() if namespace is not None and k[0] != namespace}
+        conn = self._conn()
+        try:
+            if namespace is None:
+                cur = conn.execute("DELETE FROM shared_cache")
+            else:
+                cur = conn.execute("DELETE FROM shared_cache WHERE namespace = ?", (namespace,))
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+
+def _db_stamp(path: str) -> Optional[Tuple[int, ...]]:
+    # mtime/tamaño del SQLite y de su WAL (las escrituras en WAL no tocan el archivo principal)
+    stamp = []
+    for candidate in (path, path + "-wal"):
+        try:
+            st = os.stat(candidate)
+        except OSError:
+            if candidate == path:
+                return None
+            continue
+        stamp += [st.st_mtime_ns, st.st_size]
+    return tuple(stamp)
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+                h.update(block)
+    except OSError:
+        return _MISSING
+    return h.hexdigest()
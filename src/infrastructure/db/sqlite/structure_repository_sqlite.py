@@ -37,6 +37,28 @@ class SqliteStructureRepository:
         finally:
             conn.close()
 
+    def get_structures_many(self, source: str, peptide_ids: List[int]) -> Dict[int, Tuple[Optional[bytes], Optional[bytes]]]:
+        """{id: (pdb, psf)} para varios péptidos con una consulta por bloque de ids."""
+        if source == 'toxinas':
+            sql = "SELECT peptide_id, pdb_file, NULL FROM Peptides WHERE peptide_id IN ({})"
+        elif source == 'nav1_7':
+            sql = "SELECT id, pdb_blob, psf_blob FROM Nav1_7_InhibitorPeptides WHERE id IN ({})"
+        else:
+            return {}
+        ids = sorted({int(i) for i in peptide_ids})
+        found: Dict[int, Tuple[Optional[bytes], Optional[bytes]]] = {}
+        conn = self._conn()
+        try:
+            # SQLite limita los parámetros por sentencia
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cur = conn.execute(sql.format(",".join("?" for _ in chunk)), chunk)
+                for pid, pdb, psf in cur.fetchall():
+                    found[int(pid)] = (pdb, psf or None)
+        finally:
+            conn.close()
+        return found
+
     # Convenience queries to support family/WT flows
     def list_family_members(self, family_prefix: str) -> List[Tuple[int, str, Optional[float], Optional[str]]]:
         conn = self._conn()
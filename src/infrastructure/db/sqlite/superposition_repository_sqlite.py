@@ -0,0 +1,105 @@
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+import sqlite3
+
+import numpy as np
+
+from src.infrastructure.pdb.superposition import SUPERPOSITION_VERSION
+
+
+SUPERPOSITIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS superpositions (
+    structure_hash TEXT NOT NULL,
+    reference_hash TEXT NOT NULL,
+    superposition_version TEXT NOT NULL,
+    rotation BLOB NOT NULL,
+    translation BLOB NOT NULL,
+    rmsd REAL,
+    n_anchor_cysteines INTEGER,
+    n_anchor_atoms INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (structure_hash, reference_hash, superposition_version)
+);
+"""
+
+# SQLite limita los parámetros por sentencia; se consulta en bloques
+_CHUNK = 300
+
+
+class SqliteSuperpositionRepository:
+    """Rotaciones Kabsch (estructura → referencia) por hash de ambas estructuras.
+
+    La rotación (3x3) y la traslación se guardan como float64; una fila con otra
+    ``superposition_version`` se trata como ausente.
+    """
+
+    def __init__(self, db_path: str = "database/toxins.db", superposition_version: str = SUPERPOSITION_VERSION) -> None:
+        self.db_path = db_path
+        self.superposition_version = superposition_version
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ready:
+            conn.executescript(SUPERPOSITIONS_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def get_many(self, reference_hash: str, structure_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        wanted = sorted({h for h in structure_hashes if h})
+        found: Dict[str, Dict[str, Any]] = {}
+        if not wanted or not reference_hash:
+            return found
+        conn = self._conn()
+        try:
+            for start in range(0, len(wanted), _CHUNK):
+                chunk = wanted[start:start + _CHUNK]
+                placeholders = ",".join("?" for _ in chunk)
+                cur = conn.execute(
+                    f"""
+                    SELECT structure_hash, rotation, translation, rmsd, n_anchor_cysteines, n_anchor_atoms
+                    FROM superpositions
+                    WHERE reference_hash = ? AND superposition_version = ? AND structure_hash IN ({placeholders})
+                    """,
+                    (reference_hash, self.superposition_version, *chunk),
+                )
+                for structure_hash, rotation, translation, rmsd, n_cys, n_atoms in cur.fetchall():
+                    found[structure_hash] = {
+                        'rotation': np.frombuffer(rotation, dtype='<f8').reshape(3, 3),
+                        'translation': np.frombuffer(translation, dtype='<f8'),
+                        'rmsd': rmsd,
+                        'n_anchor_cysteines': n_cys,
+                        'n_anchor_atoms': n_atoms,
+                    }
+        finally:
+            conn.close()
+        return found
+
+    def save_many(self, reference_hash: str, rows: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        values: List[Tuple[Any, ...]] = []
+        for structure_hash, result in rows:
+            values.append((
+                structure_hash, reference_hash, self.superposition_version,
+                np.ascontiguousarray(result['rotation'], dtype='<f8').tobytes(),
+                np.ascontiguousarray(result['translation'], dtype='<f8').tobytes(),
+                result.get('rmsd'), result.get('n_anchor_cysteines'), result.get('n_anchor_atoms'),
+            ))
+        if not values:
+            return 0
+        conn = self._conn()
+        try:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO superpositions
+                    (structure_hash, reference_hash, superposition_version, rotation, translation,
+                     rmsd, n_anchor_cysteines, n_anchor_atoms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                values,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(values)
+
+    def get(self, reference_hash: str, structure_hash: str) -> Optional[Dict[str, Any]]:
+        return self.get_many(reference_hash, [structure_hash]).get(structure_hash)
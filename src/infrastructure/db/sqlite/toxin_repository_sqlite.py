@@ -1,7 +1,36 @@
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterable
 import sqlite3
 import importlib
 
+_CHUNK = 500
+_NAV_CODE_COLUMNS = ("peptide_name", "accession_number")
+
+# Un SELECT por bloque de ids: Peptides + Proteins + primer Nav1.7 coincidente.
+# Los blobs sólo se consultan con length(), que SQLite resuelve sin leer su contenido.
+_ENRICH_SQL = """
+SELECT p.peptide_id, p.accession_number, p.peptide_name, p.sequence, p.model_source,
+       length(p.pdb_file) IS NOT NULL AS has_pdb,
+       pr.description,
+       n.id, n.peptide_code, n.ic50_value, n.ic50_unit,
+       length(n.pdb_blob) IS NOT NULL, length(n.psf_blob) IS NOT NULL
+FROM Peptides p
+LEFT JOIN Proteins pr ON pr.accession_number = p.accession_number
+LEFT JOIN Nav1_7_InhibitorPeptides n ON n.id = (
+    SELECT n2.id FROM Nav1_7_InhibitorPeptides n2
+    WHERE n2.accession_number = p.accession_number OR n2.peptide_code = p.{code}
+    LIMIT 1
+)
+WHERE p.peptide_id IN ({marks})
+"""
+# Bases sin Proteins / Nav1_7_InhibitorPeptides (p. ej. sólo péptidos)
+_ENRICH_SQL_PEPTIDES_ONLY = """
+SELECT p.peptide_id, p.accession_number, p.peptide_name, p.sequence, p.model_source,
+       length(p.pdb_file) IS NOT NULL AS has_pdb,
+       NULL, NULL, NULL, NULL, NULL, 0, 0
+FROM Peptides p
+WHERE p.peptide_id IN ({marks})
+"""
+
 class SqliteToxinRepository:
     """Lightweight read-only repository for peptide listings and PDB fetch.
 
@@ -110,3 +139,70 @@ class SqliteToxinRepository:
             return None
         finally:
             conn.close()
+
+    def peptide_ids_by_accession(self, accessions: Iterable[str]) -> List[int]:
+        """Ids de los péptidos con alguno de esos accession (p. ej. para excluirlos de una búsqueda)."""
+        accs = sorted(set(accessions))
+        if not accs:
+            return []
+        conn = self._conn()
+        try:
+            ids: List[int] = []
+            for start in range(0, len(accs), _CHUNK):
+                chunk = accs[start:start + _CHUNK]
+                marks = ",".join("?" for _ in chunk)
+                ids += [r[0] for r in conn.execute(
+                    f"SELECT peptide_id FROM Peptides WHERE accession_number IN ({marks})", chunk
+                )]
+            return ids
+        finally:
+            conn.close()
+
+    def enrich_hits(self, peptide_ids: Iterable[int], nav_code_column: str = "peptide_name") -> Dict[int, Dict[str, Any]]:
+        """Datos de enriquecimiento de varios hits en una consulta por bloque de 500 ids.
+
+        Devuelve ``{peptide_id: {...}}`` con accession, nombre, secuencia,
+        descripción de Proteins, la fila Nav1.7 coincidente (por accession o
+        ``peptide_code`` = ``nav_code_column`` del péptido, la primera como en
+        las consultas por hit) y banderas de presencia de PDB/PSF, sin bytes de blobs.
+        """
+        if nav_code_column not in _NAV_CODE_COLUMNS:
+            raise ValueError(f"nav_code_column debe ser uno de {_NAV_CODE_COLUMNS}")
+        ids = list(dict.fromkeys(int(i) for i in peptide_ids if i is not None))
+        out: Dict[int, Dict[str, Any]] = {}
+        if not ids:
+            return out
+        conn = self._conn()
+        try:
+            sql = _ENRICH_SQL
+            for start in range(0, len(ids), _CHUNK):
+                chunk = ids[start:start + _CHUNK]
+                marks = ",".join("?" for _ in chunk)
+                try:
+                    rows = conn.execute(sql.format(code=nav_code_column, marks=marks), chunk).fetchall()
+                except sqlite3.OperationalError:
+                    if sql is _ENRICH_SQL_PEPTIDES_ONLY:
+                        raise
+                    sql = _ENRICH_SQL_PEPTIDES_ONLY
+                    rows = conn.execute(sql.format(marks=marks), chunk).fetchall()
+                for row in rows:
+                    out[row[0]] = {
+                        "peptide_id": row[0],
+                        "accession_number": row[1],
+                        "peptide_name": row[2],
+                        "sequence": row[3],
+                        "model_source": row[4],
+                        "has_pdb": bool(row[5]),
+                        "description": row[6],
+                        "nav1_7": None if row[7] is None else {
+                            "id": row[7],
+                            "peptide_code": row[8],
+                            "ic50_value": row[9],
+                            "ic50_unit": row[10],
+                            "has_pdb": bool(row[11]),
+                            "has_psf": bool(row[12]),
+                        },
+                    }
+            return out
+        finally:
+            conn.close()
@@ -59,11 +59,42 @@ class ExportUtilsV2:
 
 class ExportService:
     @staticmethod
-    def extract_residue_data(G, granularity: str) -> List[Dict[str, Any]]:
-        degree_centrality = nx.degree_centrality(G) if G.number_of_nodes() else {}
-        betweenness_centrality = nx.betweenness_centrality(G) if G.number_of_nodes() else {}
-        closeness_centrality = nx.closeness_centrality(G) if G.number_of_nodes() else {}
-        clustering_coefficient = nx.clustering(G) if G.number_of_nodes() else {}
+    def extract_residue_data(G, granularity: str, centrality: Optional[Dict[str, Dict[Any, float]]] = None,
+                             weighted: bool = False, gnm_msf: Optional[Dict[Any, float]] = None) -> List[Dict[str, Any]]:
+        # ``centrality`` permite reutilizar métricas materializadas (tabla graph_metrics)
+        # ``weighted`` añade betweenness/closeness ponderadas por distancia de arista
+        # ``gnm_msf`` añade la fluctuación cuadrática media GNM por nodo (solo grafo CA)
+        weighted_betweenness: Dict[Any, float] = {}
+        weighted_closeness: Dict[Any, float] = {}
+        if weighted:
+            if centrality and 'betweenness_weighted' in centrality:
+                weighted_betweenness = centrality.get('betweenness_weighted', {})
+                weighted_closeness = centrality.get('closeness_weighted', {})
+            elif G.number_of_nodes():
+                from src.infrastructure.graph.csr_centrality import weighted_path_centralities
+                paths = weighted_path_centralities(G, weight='weight')
+                weighted_betweenness = paths['betweenness']
+                weighted_closeness = paths['closeness']
+        if centrality:
+            degree_centrality = centrality.get('degree', {})
+            betweenness_centrality = centrality.get('betweenness', {})
+            closeness_centrality = centrality.get('closeness', {})
+            clustering_coefficient = centrality.get('clustering', {})
+        else:
+            degree_centrality = nx.degree_centrality(G) if G.number_of_nodes() else {}
+            betweenness_centrality = nx.betweenness_centrality(G) if G.number_of_nodes() else {}
+            closeness_centrality = nx.closeness_centrality(G) if G.number_of_nodes() else {}
+            clustering_coefficient = nx.clustering(G) if G.number_of_nodes() else {}
+        if centrality and 'eigenvector' in centrality and 'pagerank' in centrality:
+            eigenvector_centrality = centrality.get('eigenvector', {})
+            pagerank = centrality.get('pagerank', {})
+        elif G.number_of_nodes():
+            from src.infrastructure.graph.csr_centrality import power_iteration_centralities
+            spectral = power_iteration_centralities(G)
+            eigenvector_centrality = spectral['eigenvector']
+            pagerank = spectral['pagerank']
+        else:
+            eigenvector_centrality, pagerank = {}, {}
 
         residue_data: List[Dict[str, Any]] = []
         for node in G.nodes():
@@ -151,6 +182,17 @@ class ExportService:
                 'Centralidad_Intermediacion': round(betweenness_centrality.get(node, 0), 6) if betweenness_centrality else 0,
                 'Centralidad_Cercania': round(closeness_centrality.get(node, 0), 6) if closeness_centrality else 0,
                 'Coeficiente_Agrupamiento': round(clustering_coefficient.get(node, 0), 6) if clustering_coefficient else 0,
+                'Centralidad_Vector_Propio': round(eigenvector_centrality.get(node, 0), 6),
+                'PageRank': round(pagerank.get(node, 0), 6),
+            })
+            if weighted:
+                data_dict.update({
+                    'Centralidad_Intermediacion_Ponderada': round(weighted_betweenness.get(node, 0), 6),
+                    'Centralidad_Cercania_Ponderada': round(weighted_closeness.get(node, 0), 6),
+                })
+            if gnm_msf is not None:
+                data_dict['Fluctuacion_GNM'] = round(gnm_msf.get(str(node), 0), 6)
+            data_dict.update({
                 'Numero_Conexiones': G.degree(node),
                 'Distancia_Secuencial_Promedio': avg_seq_distance,
                 'Residuos_Vecinos': ', '.join(neighbor_list) if neighbor_list else 'Ninguno'
@@ -161,8 +203,11 @@ class ExportService:
 
     @staticmethod
     def prepare_residue_export_data(G, toxin_name: str, ic50_value: Optional[float] = None,
-                                    ic50_unit: Optional[str] = None, granularity: str = 'CA') -> List[Dict[str, Any]]:
-        rows = ExportService.extract_residue_data(G, granularity)
+                                    ic50_unit: Optional[str] = None, granularity: str = 'CA',
+                                    centrality: Optional[Dict[str, Dict[Any, float]]] = None,
+                                    weighted: bool = False,
+                                    gnm_msf: Optional[Dict[Any, float]] = None) -> List[Dict[str, Any]]:
+        rows = ExportService.extract_residue_data(G, granularity, centrality=centrality, weighted=weighted, gnm_msf=gnm_msf)
         for r in rows:
             r['Toxina'] = toxin_name
             if ic50_value is not None and ic50_unit:
@@ -0,0 +1,426 @@
+"""
+Centralidades de caminos mínimos sobre matrices CSR con presupuesto de tiempo.
+
+Implementa Brandes por niveles (BFS sincrónico) procesando lotes de fuentes a la
+vez con productos matriz dispersa × matriz densa. Cada nivel del BFS es un punto
+de control cooperativo: si el presupuesto se agota se detiene y se devuelven
+valores aproximados a partir de las fuentes ya procesadas (muestra uniforme);
+si el cliente se desconecta se aborta con ``MetricsCancelled``.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+
+class MetricsCancelled(Exception):
+    """El cálculo se abortó porque la petición fue cancelada (cliente desconectado)."""
+
+
+class MetricBudget:
+    """Presupuesto de tiempo y cancelación para el cálculo de métricas.
+
+    ``seconds=None`` significa sin límite. ``is_cancelled`` es un callable opcional
+    que se consulta en cada punto de control (p. ej. socket del cliente cerrado).
+    """
+
+    def __init__(self, seconds: Optional[float] = None, is_cancelled: Optional[Callable[[], bool]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.seconds = float(seconds) if seconds is not None and float(seconds) > 0 else None
+        self.is_cancelled = is_cancelled
+        self._clock = clock
+        self.started = clock()
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return None if self.seconds is None else self.started + self.seconds
+
+    def remaining(self) -> Optional[float]:
+        if self.seconds is None:
+            return None
+        return max(0.0, self.deadline - self._clock())
+
+    def expired(self) -> bool:
+        return self.seconds is not None and self._clock() >= self.deadline
+
+    def checkpoint(self) -> None:
+        """Punto de control: cede el control (con gevent parcheado) y aborta si hay cancelación."""
+        time.sleep(0)
+        if self.is_cancelled is not None:
+            try:
+                cancelled = bool(self.is_cancelled())
+            except Exception:
+                cancelled = False
+            if cancelled:
+                raise MetricsCancelled("metric computation cancelled")
+
+
+def graph_to_csr(G, weight: Optional[str] = None) -> Tuple[List[Any], sparse.csr_matrix]:
+    """Convierte un grafo networkx no dirigido a (orden de nodos, matriz de adyacencia CSR).
+
+    Sin ``weight`` la matriz es binaria (conteo de caminos); con ``weight`` guarda
+    el atributo de arista indicado (por defecto 1.0 si falta).
+    """
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    rows: List[int] = []
+    cols: List[int] = []
+    vals: List[float] = []
+    for u, v, data in G.edges(data=True):
+        if u == v:
+            continue
+        w = float(data.get(weight, 1.0)) if weight else 1.0
+        i, j = index[u], index[v]
+        rows.extend((i, j))
+        cols.extend((j, i))
+        vals.extend((w, w))
+    n = len(nodes)
+    A = sparse.csr_matrix((np.asarray(vals, dtype=float), (rows, cols)), shape=(n, n))
+    A.sum_duplicates()
+    return nodes, A
+
+
+def _closeness_from_totals(totsp: np.ndarray, reach: np.ndarray, n: int) -> np.ndarray:
+    """Fórmula de networkx (wf_improved): (r-1)/totsp · (r-1)/(n-1)."""
+    out = np.zeros(n, dtype=float)
+    if n <= 1:
+        return out
+    ok = totsp > 0
+    out[ok] = ((reach[ok] - 1) / totsp[ok]) * ((reach[ok] - 1) / (n - 1))
+    return out
+
+
+def _rescale_betweenness(bc: np.ndarray, n: int, processed: int) -> np.ndarray:
+    """Normalización de networkx para grafos no dirigidos, con escala n/k si hubo muestreo."""
+    if n <= 2 or processed == 0:
+        return bc * 0.0 if n <= 2 else bc
+    scale = 1.0 / ((n - 1) * (n - 2))
+    if processed < n:
+        scale *= n / processed
+    return bc * scale
+
+
+def _estimate_pending_closeness(closeness: np.ndarray, is_source_done: np.ndarray, sampled_sum: np.ndarray,
+                                sampled_cnt: np.ndarray, comp_size: np.ndarray, n: int) -> np.ndarray:
+    """Closeness de nodos no procesados: inversa de su distancia media a las fuentes muestreadas."""
+    pending = ~is_source_done & (sampled_cnt > 0)
+    mean_d = np.divide(sampled_sum, sampled_cnt, out=np.zeros(n), where=sampled_cnt > 0)
+    est = np.zeros(n, dtype=float)
+    if n > 1:
+        est[pending] = (1.0 / mean_d[pending]) * ((comp_size[pending] - 1) / (n - 1))
+    return np.where(is_source_done, closeness, est)
+
+
+def shortest_path_centralities(
+    G,
+    budget: Optional[MetricBudget] = None,
+    batch_size: int = 32,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Betweenness y closeness (no ponderadas) en una sola pasada de Brandes.
+
+    Devuelve ``{'betweenness': {nodo: v}, 'closeness': {nodo: v}, 'info': {...}}``.
+    Con presupuesto agotado, ``info['approximate']`` es True: la betweenness se
+    estima con las fuentes procesadas (escala n/k) y la closeness de los nodos no
+    procesados a partir de su distancia media a esas fuentes.
+    """
+    nodes, A = graph_to_csr(G)
+    n = len(nodes)
+    info: Dict[str, Any] = {'approximate': False, 'sources_processed': n, 'sources_total': n, 'method': 'exact'}
+    if n == 0:
+        return {'betweenness': {}, 'closeness': {}, 'info': info}
+
+    A.data[:] = 1.0
+    A_T = A.T.tocsr()
+    n_comp, labels = connected_components(A, directed=False)
+    comp_size = np.bincount(labels)[labels].astype(float)
+
+    order = np.random.default_rng(seed).permutation(n) if budget is not None and budget.seconds is not None else np.arange(n)
+
+    bc = np.zeros(n, dtype=float)
+    totsp = np.zeros(n, dtype=float)       # suma de distancias desde cada fuente procesada
+    reach = np.zeros(n, dtype=float)       # nodos alcanzables (incluida la fuente)
+    sampled_sum = np.zeros(n, dtype=float)  # suma de distancias de v a fuentes procesadas
+    sampled_cnt = np.zeros(n, dtype=float)
+    is_source_done = np.zeros(n, dtype=bool)
+    processed = 0
+
+    for start in range(0, n, batch_size):
+        sources = order[start:start + batch_size]
+        b = len(sources)
+        cols = np.arange(b)
+        dist = np.full((n, b), -1, dtype=np.int32)
+        sigma = np.zeros((n, b), dtype=float)
+        dist[sources, cols] = 0
+        sigma[sources, cols] = 1.0
+        frontier = sigma.copy()
+        levels = [dist == 0]
+        depth = 0
+        aborted = False
+        while True:
+            if budget is not None:
+                budget.checkpoint()
+                if processed > 0 and budget.expired():
+                    aborted = True
+                    break
+            nxt = A_T @ frontier
+            mask = (nxt > 0) & (dist < 0)
+            if not mask.any():
+                break
+            depth += 1
+            sigma[mask] = nxt[mask]
+            dist[mask] = depth
+            frontier = np.where(mask, nxt, 0.0)
+            levels.append(mask)
+        if aborted:
+            break
+
+        delta = np.zeros((n, b), dtype=float)
+        for lvl in range(len(levels) - 1, 0, -1):
+            if budget is not None:
+                budget.checkpoint()
+            cur = levels[lvl]
+            coeff = np.where(cur, (1.0 + delta) / np.where(cur, sigma, 1.0), 0.0)
+            prev = levels[lvl - 1]
+            delta += np.where(prev, sigma * (A @ coeff), 0.0)
+        delta[sources, cols] = 0.0
+        bc += delta.sum(axis=1)
+
+        reached = dist >= 0
+        totsp[sources] = np.where(dist > 0, dist, 0).sum(axis=0)
+        reach[sources] = reached.sum(axis=0)
+        positive = dist > 0
+        sampled_sum += np.where(positive, dist, 0).sum(axis=1)
+        sampled_cnt += positive.sum(axis=1)
+        is_source_done[sources] = True
+        processed += b
+
+    betweenness = _rescale_betweenness(bc, n, processed)
+    closeness = _closeness_from_totals(totsp, reach, n)
+    if processed < n:
+        info.update({'approximate': True, 'sources_processed': int(processed), 'method': 'sampled_sources'})
+        closeness = _estimate_pending_closeness(closeness, is_source_done, sampled_sum, sampled_cnt, comp_size, n)
+
+    return {
+        'betweenness': {node: float(betweenness[i]) for i, node in enumerate(nodes)},
+        'closeness': {node: float(closeness[i]) for i, node in enumerate(nodes)},
+        'info': info,
+    }
+
+
+def weighted_path_centralities(
+    G,
+    weight: str = 'weight',
+    budget: Optional[MetricBudget] = None,
+    batch_size: int = 32,
+    seed: int = 0,
+    rtol: float = 1e-12,
+) -> Dict[str, Any]:
+    """Betweenness y closeness ponderadas por distancia en una sola pasada.
+
+    Las distancias salen de Dijkstra con montículo sobre la matriz CSR
+    (``scipy.sparse.csgraph.dijkstra``) para un lote de fuentes; las aristas
+    "tensas" (d[u] + w == d[v]) forman el DAG de caminos mínimos, sobre el que
+    se acumulan σ y las dependencias de Brandes con productos dispersos hasta el
+    punto fijo. Equivale a ``nx.betweenness_centrality(G, weight=...)`` y
+    ``nx.closeness_centrality(G, distance=...)``. Mismo contrato de presupuesto
+    y formato de salida que :func:`shortest_path_centralities`.
+    """
+    nodes, W = graph_to_csr(G, weight=weight)
+    n = len(nodes)
+    info: Dict[str, Any] = {'approximate': False, 'sources_processed': n, 'sources_total': n,
+                            'method': 'exact', 'weight': weight}
+    if n == 0:
+        return {'betweenness': {}, 'closeness': {}, 'info': info}
+
+    coo = W.tocoo()
+    arc_u, arc_v, arc_w = coo.row, coo.col, coo.data
+    _, labels = connected_components(W, directed=False)
+    comp_size = np.bincount(labels)[labels].astype(float)
+    order = np.random.default_rng(seed).permutation(n) if budget is not None and budget.seconds is not None else np.arange(n)
+
+    bc = np.zeros(n, dtype=float)
+    totsp = np.zeros(n, dtype=float)
+    reach = np.zeros(n, dtype=float)
+    sampled_sum = np.zeros(n, dtype=float)
+    sampled_cnt = np.zeros(n, dtype=float)
+    is_source_done = np.zeros(n, dtype=bool)
+    processed = 0
+
+    for start in range(0, n, batch_size):
+        if budget is not None:
+            budget.checkpoint()
+            if processed > 0 and budget.expired():
+                break
+        sources = order[start:start + batch_size]
+        b = len(sources)
+        D = dijkstra(W, directed=False, indices=sources)  # (b, n), inf si no alcanzable
+
+        # DAG de caminos mínimos de todas las fuentes del lote como un bloque diagonal
+        du = D[:, arc_u]
+        dv = D[:, arc_v]
+        with np.errstate(invalid='ignore'):
+            tight = np.isfinite(du) & (np.abs(du + arc_w - dv) <= rtol * np.maximum(1.0, dv))
+        rows, arcs = np.nonzero(tight)
+        gu = rows * n + arc_u[arcs]
+        gv = rows * n + arc_v[arcs]
+        size = b * n
+        T = sparse.csr_matrix((np.ones(len(arcs)), (gu, gv)), shape=(size, size))
+        T_T = T.T.tocsr()
+
+        seed_vec = np.zeros(size, dtype=float)
+        seed_vec[np.arange(b) * n + sources] = 1.0
+        sigma = seed_vec.copy()
+        for _ in range(n + 1):
+            if budget is not None:
+                budget.checkpoint()
+            nxt = seed_vec + T_T @ sigma
+            if np.array_equal(nxt, sigma):
+                break
+            sigma = nxt
+
+        delta = np.zeros(size, dtype=float)
+        for _ in range(n + 1):
+            if budget is not None:
+                budget.checkpoint()
+            coeff = np.divide(1.0 + delta, sigma, out=np.zeros(size), where=sigma > 0)
+            nxt = sigma * (T @ coeff)
+            if np.array_equal(nxt, delta):
+                break
+            delta = nxt
+        delta = delta.reshape(b, n)
+        delta[np.arange(b), sources] = 0.0
+        bc += delta.sum(axis=0)
+
+        finite = np.isfinite(D)
+        positive = finite & (D > 0)
+        Dz = np.where(positive, D, 0.0)
+        totsp[sources] = Dz.sum(axis=1)
+        reach[sources] = finite.sum(axis=1)
+        sampled_sum += Dz.sum(axis=0)
+        sampled_cnt += positive.sum(axis=0)
+        is_source_done[sources] = True
+        processed += b
+
+    betweenness = _rescale_betweenness(bc, n, processed)
+    closeness = _closeness_from_totals(totsp, reach, n)
+    if processed < n:
+        info.update({'approximate': True, 'sources_processed': int(processed), 'method': 'sampled_sources'})
+        closeness = _estimate_pending_closeness(closeness, is_source_done, sampled_sum, sampled_cnt, comp_size, n)
+
+    return {
+        'betweenness': {node: float(betweenness[i]) for i, node in enumerate(nodes)},
+        'closeness': {node: float(closeness[i]) for i, node in enumerate(nodes)},
+        'info': info,
+    }
+
+
+def clustering_coefficients(G) -> Dict[Any, float]:
+    """Coeficiente de agrupamiento no ponderado (equivalente a ``nx.clustering``).
+
+    Cuenta triángulos con ``(A·A) ∘ A`` sobre la matriz dispersa: 2T / (k(k-1)).
+    """
+    nodes, A = graph_to_csr(G)
+    if not nodes:
+        return {}
+    A.data[:] = 1.0
+    deg = np.asarray(A.sum(axis=1)).ravel()
+    tri2 = np.asarray((A @ A).multiply(A).sum(axis=1)).ravel()  # 2·triángulos por nodo
+    denom = deg * (deg - 1)
+    coeff = np.divide(tri2, denom, out=np.zeros(len(nodes)), where=denom > 0)
+    return {node: float(coeff[i]) for i, node in enumerate(nodes)}
+
+
+def _initial_vector(nodes: List[Any], warm: Optional[Dict[Any, float]]) -> Tuple[np.ndarray, bool]:
+    """Vector inicial positivo: valores en caché (warm start) o uniforme."""
+    n = len(nodes)
+    if not warm:
+        return np.full(n, 1.0 / n), False
+    x = np.array([warm.get(str(node), warm.get(node, np.nan)) for node in nodes], dtype=float)
+    known = np.isfinite(x) & (x > 0)
+    if not known.any():
+        return np.full(n, 1.0 / n), False
+    # Nodos nuevos (o con valor nulo) reciben la media; la iteración exige x > 0
+    x[~known] = x[known].mean()
+    return x / x.sum(), True
+
+
+def _power_iterate(step: Callable[[np.ndarray], np.ndarray], x: np.ndarray, tol: float, max_iter: int,
+                   budget: Optional[MetricBudget]) -> Tuple[np.ndarray, Dict[str, Any]]:
+    n = len(x)
+    converged = False
+    iterations = 0
+    err = 0.0
+    for iterations in range(1, max_iter + 1):
+        x_new = step(x)
+        err = float(np.abs(x_new - x).sum())
+        x = x_new
+        if err < n * tol:
+            converged = True
+            break
+        if budget is not None and iterations % 16 == 0:
+            budget.checkpoint()
+            if budget.expired():
+                break
+    # residual = Σ|x_k − x_{k−1}| / n, comparable con ``tolerance``
+    return x, {'iterations': iterations, 'converged': converged, 'tolerance': tol, 'residual': err / n}
+
+
+def power_iteration_centralities(
+    G,
+    budget: Optional[MetricBudget] = None,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+    alpha: float = 0.85,
+    warm_start: Optional[Dict[str, Dict[Any, float]]] = None,
+) -> Dict[str, Any]:
+    """Eigenvector y PageRank (no ponderados) por iteración de potencias sobre CSR.
+
+    Mismas definiciones que ``nx.eigenvector_centrality`` (iteración sobre A + I,
+    norma L2) y ``nx.pagerank(weight=None)`` (nodos colgantes repartidos de forma
+    uniforme). Convergencia: Σ|x_k − x_{k−1}| < n·tol, con ``max_iter`` como tope.
+    ``warm_start`` = {'eigenvector': {...}, 'pagerank': {...}} arranca desde vectores
+    en caché (p. ej. el mismo PDB con un umbral cercano), lo que reduce iteraciones.
+    Los resultados sin converger se marcan en ``info[métrica]['converged']``, junto
+    con las iteraciones hechas, la tolerancia pedida y el residuo final.
+    """
+    nodes, A = graph_to_csr(G)
+    n = len(nodes)
+    empty_info = {'iterations': 0, 'converged': True, 'tolerance': tol, 'residual': 0.0, 'warm_start': False}
+    if n == 0:
+        return {'eigenvector': {}, 'pagerank': {}, 'info': {'eigenvector': dict(empty_info), 'pagerank': dict(empty_info)}}
+    A.data[:] = 1.0
+    warm_start = warm_start or {}
+
+    # Eigenvector: el desplazamiento A + I evita la oscilación en grafos bipartitos
+    x0, warm_ev = _initial_vector(nodes, warm_start.get('eigenvector'))
+
+    def ev_step(x):
+        y = x + A @ x
+        norm = np.linalg.norm(y)
+        return y / norm if norm > 0 else y
+
+    ev, ev_info = _power_iterate(ev_step, x0, tol, max_iter, budget)
+    ev_info['warm_start'] = warm_ev
+
+    # PageRank: P fila-estocástica; la masa de los nodos sin aristas se reparte uniforme
+    deg = np.asarray(A.sum(axis=1)).ravel()
+    inv_deg = np.divide(1.0, deg, out=np.zeros(n), where=deg > 0)
+    PT = (sparse.diags(inv_deg) @ A).T.tocsr()
+    dangling = deg == 0
+    p0, warm_pr = _initial_vector(nodes, warm_start.get('pagerank'))
+
+    def pr_step(x):
+        return alpha * (PT @ x + x[dangling].sum() / n) + (1.0 - alpha) / n
+
+    pr, pr_info = _power_iterate(pr_step, p0, tol, max_iter, budget)
+    pr = pr / pr.sum()
+    pr_info['warm_start'] = warm_pr
+
+    return {
+        'eigenvector': {node: float(ev[i]) for i, node in enumerate(nodes)},
+        'pagerank': {node: float(pr[i]) for i, node in enumerate(nodes)},
+        'info': {'eigenvector': ev_info, 'pagerank': pr_info},
+    }
@@ -15,14 +15,38 @@ def _import_numpy():
 
 from src.utils.disulfide import count_disulfide_bridges_from_pdb
 
+# Versión del código de métricas. Incrementar cuando cambie cualquier cálculo:
+# invalida automáticamente las filas materializadas en la tabla graph_metrics.
+METRICS_VERSION = "2"
 
-def calculate_centrality_metrics(G):
+# Tope de la iteración de potencias (eigenvector/PageRank); si se alcanza, la
+# métrica se lista en ``approximation`` con sus iteraciones, tolerancia y residuo
+POWER_ITERATION_TOL = 1e-10
+POWER_ITERATION_MAX_ITER = 1000
+
+
+def calculate_centrality_metrics(G, budget=None, approximation=None, weighted=False, warm_start=None):
     """
     Calcula métricas de centralidad de manera eficiente.
     Retorna diccionarios con valores por nodo.
-    Ahora incluye: degree, betweenness, closeness, clustering, seq_distance_avg, long_contacts_prop
+    Ahora incluye: degree, betweenness, closeness, clustering, eigenvector, pagerank,
+    seq_distance_avg, long_contacts_prop
+
+    Betweenness y closeness se calculan juntas con Brandes sobre CSR (csr_centrality).
+    ``budget`` (MetricBudget) limita el tiempo; si se agota, ambas quedan aproximadas
+    y el detalle se escribe en el dict ``approximation`` cuando se proporciona.
+    ``weighted=True`` añade betweenness_weighted/closeness_weighted (caminos
+    mínimos por distancia, atributo de arista ``weight``).
+    Eigenvector y PageRank usan iteración de potencias sobre CSR; ``warm_start``
+    ({'eigenvector': {...}, 'pagerank': {...}}) parte de vectores en caché.
     """
     nx = _import_networkx()
+    from src.infrastructure.graph.csr_centrality import (
+        shortest_path_centralities,
+        weighted_path_centralities,
+        clustering_coefficients,
+        power_iteration_centralities,
+    )
     
     if len(G) == 0:
         return {
@@ -30,15 +54,33 @@ def calculate_centrality_metrics(G):
             'betweenness': {},
             'closeness': {},
             'clustering': {},
+            'eigenvector': {},
+            'pagerank': {},
             'seq_distance_avg': {},
             'long_contacts_prop': {}
         }
 
     # Calcular centralidades tradicionales
     degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
-    closeness_centrality = nx.closeness_centrality(G)
-    clustering_coefficient = nx.clustering(G)
+    paths = shortest_path_centralities(G, budget=budget)
+    betweenness_centrality = paths['betweenness']
+    closeness_centrality = paths['closeness']
+    clustering_coefficient = clustering_coefficients(G)
+    if approximation is not None and paths['info']['approximate']:
+        approximation['betweenness'] = dict(paths['info'])
+        approximation['closeness'] = dict(paths['info'])
+    weighted_paths = None
+    if weighted:
+        weighted_paths = weighted_path_centralities(G, weight='weight', budget=budget)
+        if approximation is not None and weighted_paths['info']['approximate']:
+            approximation['betweenness_weighted'] = dict(weighted_paths['info'])
+            approximation['closeness_weighted'] = dict(weighted_paths['info'])
+    spectral = power_iteration_centralities(G, budget=budget, tol=POWER_ITERATION_TOL,
+                                            max_iter=POWER_ITERATION_MAX_ITER, warm_start=warm_start)
+    if approximation is not None:
+        for name in ('eigenvector', 'pagerank'):
+            if not spectral['info'][name]['converged']:
+                approximation[name] = dict(spectral['info'][name], method='power_iteration')
     
     # Nuevas métricas: distancia secuencial promedio y proporción de contactos largos
     seq_distance_avg = {}
@@ -94,17 +136,25 @@ def calculate_centrality_metrics(G):
     nx.set_node_attributes(G, betweenness_centrality, 'betweenness_centrality')
     nx.set_node_attributes(G, closeness_centrality, 'closeness_centrality')
     nx.set_node_attributes(G, clustering_coefficient, 'clustering_coefficient')
+    nx.set_node_attributes(G, spectral['eigenvector'], 'eigenvector_centrality')
+    nx.set_node_attributes(G, spectral['pagerank'], 'pagerank')
     nx.set_node_attributes(G, seq_distance_avg, 'seq_distance_avg')
     nx.set_node_attributes(G, long_contacts_prop, 'long_contacts_prop')
 
-    return {
+    result = {
         'degree': degree_centrality,
         'betweenness': betweenness_centrality,
         'closeness': closeness_centrality,
         'clustering': clustering_coefficient,
+        'eigenvector': spectral['eigenvector'],
+        'pagerank': spectral['pagerank'],
         'seq_distance_avg': seq_distance_avg,
         'long_contacts_prop': long_contacts_prop
     }
+    if weighted_paths is not None:
+        result['betweenness_weighted'] = weighted_paths['betweenness']
+        result['closeness_weighted'] = weighted_paths['closeness']
+    return result
 
 
 def calculate_summary_statistics(centrality_dict):
@@ -156,6 +206,7 @@ def calculate_basic_graph_properties(G):
     Calcula propiedades básicas del grafo.
     """
     nx = _import_networkx()
+    from src.infrastructure.graph.csr_centrality import clustering_coefficients
     
     if len(G) == 0:
         return {
@@ -165,11 +216,12 @@ def calculate_basic_graph_properties(G):
             'avg_clustering': 0.0
         }
 
+    clustering = clustering_coefficients(G)
     return {
         'num_nodes': G.number_of_nodes(),
         'num_edges': G.number_of_edges(),
         'density': float(nx.density(G)),
-        'avg_clustering': float(nx.average_clustering(G))
+        'avg_clustering': float(sum(clustering.values()) / len(clustering))
     }
 
 
@@ -215,14 +267,20 @@ def calculate_surface_properties(G):
     }
 
 
-def calculate_community_metrics(G):
+def calculate_community_metrics(G, budget=None, approximation=None):
     """
     Calcula métricas de comunidades.
+    Con el presupuesto agotado usa propagación de etiquetas (rápida, aproximada).
     """
     nx = _import_networkx()
     
     try:
-        communities = list(nx.algorithms.community.greedy_modularity_communities(G))
+        if budget is not None and budget.expired():
+            communities = list(nx.algorithms.community.label_propagation_communities(G))
+            if approximation is not None:
+                approximation['community_count'] = {'approximate': True, 'method': 'label_propagation'}
+        else:
+            communities = list(nx.algorithms.community.greedy_modularity_communities(G))
         community_count = len(communities)
         modularity = nx.algorithms.community.modularity(G, communities)
     except Exception:
@@ -243,10 +301,14 @@ def calculate_pharmacophore_count(G):
     return len(pharm_nodes)
 
 
-def compute_comprehensive_metrics(G):
+def compute_comprehensive_metrics(G, budget=None, weighted=False, warm_start=None):
     """
     Función principal que calcula todas las métricas necesarias.
     Retorna formato compatible con el frontend.
+    ``budget`` (MetricBudget opcional) activa la degradación por tiempo; las
+    métricas aproximadas se listan en ``approximation``. ``weighted`` añade las
+    centralidades ponderadas por distancia. ``warm_start`` son vectores
+    eigenvector/pagerank previos para acelerar la iteración de potencias.
     """
     if len(G) == 0:
         return {
@@ -259,7 +321,8 @@ def compute_comprehensive_metrics(G):
                 'dipole_magnitude': 0.0
             },
             'summary_statistics': {},
-            'top_5_residues': {}
+            'top_5_residues': {},
+            'approximation': {}
         }
 
     # Propiedades básicas
@@ -280,7 +343,9 @@ def compute_comprehensive_metrics(G):
     properties['dipole_magnitude'] = float(G.graph.get('dipole_magnitude', 0))
 
     # Métricas de centralidad
-    centrality = calculate_centrality_metrics(G)
+    approximation = {}
+    centrality = calculate_centrality_metrics(G, budget=budget, approximation=approximation, weighted=weighted,
+                                              warm_start=warm_start)
 
     # Estadísticas resumen
     summary_stats = calculate_summary_statistics(centrality)
@@ -296,7 +361,7 @@ def compute_comprehensive_metrics(G):
     # Estadísticas adicionales (carga, hidrofobicidad, etc.)
     charge_stats = calculate_charge_and_hydrophobicity_stats(G)
     surface_stats = calculate_surface_properties(G)
-    community_stats = calculate_community_metrics(G)
+    community_stats = calculate_community_metrics(G, budget=budget, approximation=approximation)
     pharmacophore_count = calculate_pharmacophore_count(G)
 
     # Combinar todo
@@ -309,5 +374,6 @@ def compute_comprehensive_metrics(G):
         'properties': properties,
         'summary_statistics': summary_stats,
         'top_5_residues': top_5,
-        'centrality': centrality  # Agregado para compatibilidad con adaptador
+        'centrality': centrality,  # Agregado para compatibilidad con adaptador
+        'approximation': approximation
     }
\ No newline at end of file
@@ -1,12 +1,126 @@
-from typing import Optional, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
 import os
-from graphs.graph_analysis2D import Nav17ToxinGraphAnalyzer
+from pathlib import Path
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import read_pdb_positions, read_psf_atoms
+from src.infrastructure.pdb.rtf_charges import topology_arrays
+
+# Incrementar si cambia el cálculo del dipolo: invalida la tabla peptide_dipoles
+DIPOLE_VERSION = "2"
+
+# Por debajo de este tamaño de lote el arranque del pool cuesta más que el parseo
+# (sólo con ``workers > 1``: ``tools/populate_peptide_dipoles.py --workers N``)
+BATCH_POOL_MIN_ITEMS = 32
+
+Source = Union[str, bytes]
+
+
+def _dipole_result(dipole_vector: np.ndarray, center_of_mass: np.ndarray, method: str = 'PSF') -> Dict[str, Any]:
+    magnitude = np.linalg.norm(dipole_vector)
+    normalized = dipole_vector / magnitude if magnitude > 0 else np.zeros(3)
+    angle_radians = np.arccos(np.clip(normalized[2], -1.0, 1.0))
+    return {
+        'vector': dipole_vector.tolist(),
+        'magnitude': float(magnitude),
+        'normalized': normalized.tolist(),
+        'center_of_mass': center_of_mass.tolist(),
+        'end_point': (center_of_mass + normalized * 20).tolist(),
+        'angle_with_z_axis': {
+            'degrees': float(np.degrees(angle_radians)),
+            'radians': float(angle_radians),
+        },
+        'method': method,
+    }
+
+
+def dipole_from_arrays(
+    charges: np.ndarray, positions: np.ndarray, masses: np.ndarray, method: str = 'PSF'
+) -> Dict[str, Any]:
+    """Dipolo ``sum(q * (r - com))`` con el centro de masas ponderado por masa.
+
+    Devuelve el mismo dict que ``Nav17ToxinGraphAnalyzer.calculate_dipole_moment_with_psf``.
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    center_of_mass = (positions * masses[:, np.newaxis]).sum(axis=0) / masses.sum()
+    dipole_vector = np.sum(np.asarray(charges)[:, np.newaxis] * (positions - center_of_mass), axis=0)
+    return _dipole_result(dipole_vector, center_of_mass, method)
+
+
+def dipoles_from_segments(
+    charges: np.ndarray, positions: np.ndarray, masses: np.ndarray, counts: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mismo kernel que ``dipole_from_arrays`` para varias estructuras concatenadas.
+
+    ``counts[i]`` es el número de átomos de la estructura i (todos > 0). Devuelve
+    (vectores dipolares (k, 3), centros de masas (k, 3)) con una sola pasada por
+    segmento vía ``np.add.reduceat``.
+    """
+    counts = np.asarray(counts, dtype=np.intp)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    masses = np.asarray(masses, dtype=np.float64)
+    total_mass = np.add.reduceat(masses, offsets)
+    centers = np.add.reduceat(positions * masses[:, np.newaxis], offsets, axis=0) / total_mass[:, np.newaxis]
+    relative = positions - np.repeat(centers, counts, axis=0)
+    vectors = np.add.reduceat(np.asarray(charges)[:, np.newaxis] * relative, offsets, axis=0)
+    return vectors, centers
+
+
+def _protein_arrays(pdb: Source, psf: Source) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(cargas, posiciones, masas) de los átomos de la selección "protein"."""
+    atoms = read_psf_atoms(psf)
+    positions = read_pdb_positions(pdb)
+    if len(positions) != len(atoms.charges):
+        raise ValueError(f"El PDB tiene {len(positions)} átomos y el PSF {len(atoms.charges)}")
+    mask = atoms.protein_mask()
+    if not mask.any():
+        raise ValueError("No protein atoms found")
+    if mask.all():
+        return atoms.charges, positions, atoms.masses
+    return atoms.charges[mask], positions[mask], atoms.masses[mask]
+
+
+def _parse_job(pdb: Source, psf: Optional[Source]):
+    # Trabajo del pool: devuelve (arrays, None) o (None, error) para no abortar el lote
+    try:
+        return (_protein_arrays(pdb, psf) if psf else topology_arrays(pdb)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def dipole_from_psf(pdb: Source, psf: Source) -> Dict[str, Any]:
+    """Dipolo con cargas del PSF y coordenadas del PDB (rutas o contenido), sin MDAnalysis.
+
+    Reproduce la selección "protein" de la ruta basada en Universe.
+    """
+    return dipole_from_arrays(*_protein_arrays(pdb, psf))
+
+
+def dipole_from_topology(pdb: Source) -> Dict[str, Any]:
+    """Dipolo sin PSF: cargas parciales CHARMM36 asignadas desde la topología (``method: 'RTF'``)."""
+    return dipole_from_arrays(*topology_arrays(pdb), method='RTF')
 
 
 class DipoleAdapter:
     """Adapter to compute dipole using graphs analyzer, no legacy dependency."""
 
     def calculate_dipole_from_files(self, pdb_path: str, psf_path: Optional[str] = None) -> Dict[str, Any]:
+        if psf_path and os.path.exists(psf_path):
+            try:
+                return dipole_from_psf(pdb_path, psf_path)
+            except ValueError:
+                # PSF/PDB que el lector ligero no entiende: ruta MDAnalysis
+                pass
+        else:
+            try:
+                return dipole_from_topology(pdb_path)
+            except (KeyError, ValueError):
+                # Residuos fuera de la topología CHARMM: cargas formales sobre CA
+                pass
+        from graphs.graph_analysis2D import Nav17ToxinGraphAnalyzer
+
         analyzer = Nav17ToxinGraphAnalyzer(pdb_folder="")
         if psf_path and os.path.exists(psf_path):
             return analyzer.calculate_dipole_moment_with_psf(pdb_path, psf_path)
@@ -14,6 +128,16 @@ class DipoleAdapter:
         return analyzer.calculate_dipole_moment(structure)
 
     def process_dipole_calculation(self, pdb_data: bytes, psf_data: Optional[bytes] = None) -> Dict[str, Any]:
+        if psf_data:
+            try:
+                return {"success": True, "dipole": dipole_from_psf(self._as_bytes(pdb_data), self._as_bytes(psf_data))}
+            except ValueError:
+                pass
+        else:
+            try:
+                return {"success": True, "dipole": dipole_from_topology(self._as_bytes(pdb_data))}
+            except (KeyError, ValueError):
+                pass
         # Accept raw in-memory data (legacy-style), writing to temp files transiently
         import tempfile
         pdb_fd, pdb_path = tempfile.mkstemp(suffix=".pdb")
@@ -39,3 +163,78 @@ class DipoleAdapter:
                     os.remove(psf_path)
                 except Exception:
                     pass
+
+    def calculate_dipoles_batch(
+        self,
+        pairs: Sequence[Tuple[Union[str, bytes], Optional[Union[str, bytes]]]],
+        workers: int = 1,
+    ) -> List[Dict[str, Any]]:
+        """Dipolos de muchas estructuras en una llamada.
+
+        ``pairs`` son tuplas (pdb, psf) con rutas (str) o contenido (bytes); psf puede ser None.
+        Los pares se parsean (cargas del PSF o, si no hay PSF, de la topología
+        CHARMM) y el kernel se evalúa una sola vez sobre los arrays concatenados.
+        El parseo corre en el proceso que llama: en los endpoints no se abre un
+        pool por petición dentro del worker de gunicorn. Con ``workers > 1``
+        (``tools/populate_peptide_dipoles.py --workers N``) y lotes de al menos
+        ``BATCH_POOL_MIN_ITEMS`` se reparte en un pool de procesos creado para
+        esa llamada. Devuelve, en el
+        orden de entrada, ``{'success': True, 'dipole'}`` o ``{'success': False,
+        'error'}`` por elemento: un fallo no aborta el lote.
+        """
+        pairs = list(pairs)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+
+        # Sin PSF también entra al kernel: cargas desde la topología CHARMM
+        fast = [i for i, (_, psf) in enumerate(pairs)
+                if not psf or isinstance(psf, (bytes, bytearray)) or os.path.exists(psf)]
+        if workers > 1 and len(fast) >= BATCH_POOL_MIN_ITEMS:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(fast) // (workers * 4))
+                parsed = list(pool.map(_parse_job, [pairs[i][0] for i in fast], [pairs[i][1] for i in fast], chunksize=chunksize))
+        else:
+            parsed = [_parse_job(*pairs[i]) for i in fast]
+
+        ok = [(i, arrays) for i, (arrays, error) in zip(fast, parsed) if arrays is not None]
+        if ok:
+            vectors, centers = dipoles_from_segments(
+                np.concatenate([a[0] for _, a in ok]),
+                np.concatenate([a[1] for _, a in ok]),
+                np.concatenate([a[2] for _, a in ok]),
+                [len(a[0]) for _, a in ok],
+            )
+            for k, (i, _) in enumerate(ok):
+                method = 'PSF' if pairs[i][1] else 'RTF'
+                results[i] = {"success": True, "dipole": _dipole_result(vectors[k], centers[k], method)}
+
+        # PSF ilegible para el lector ligero o PDB fuera de la topología: ruta clásica, elemento a elemento
+        for i, (pdb, psf) in enumerate(pairs):
+            if results[i] is not None:
+                continue
+            try:
+                if isinstance(pdb, (bytes, bytearray)):
+                    if isinstance(psf, str):
+                        psf = Path(psf).read_bytes() if os.path.exists(psf) else None
+                    results[i] = self.process_dipole_calculation(pdb, psf)
+                else:
+                    psf_path = psf if isinstance(psf, str) else None
+                    results[i] = {"success": True, "dipole": self.calculate_dipole_from_files(pdb, psf_path)}
+            except Exception as e:
+                results[i] = {"success": False, "error": str(e) or type(e).__name__}
+        return results  # type: ignore[return-value]
+
+    def calculate_dipole_time_series(
+        self,
+        psf_path: str,
+        trajectory_path: str,
+        chunk_frames: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Dipolo por fotograma de una trayectoria DCD/XTC (ver ``dipole_trajectory``)."""
+        from src.infrastructure.graphein.dipole_trajectory import DEFAULT_CHUNK_FRAMES, dipole_time_series
+
+        return dipole_time_series(psf_path, trajectory_path, chunk_frames or DEFAULT_CHUNK_FRAMES, **kwargs)
+
+    @staticmethod
+    def _as_bytes(data: Union[bytes, str]) -> bytes:
+        return data if isinstance(data, (bytes, bytearray)) else data.encode("utf-8")
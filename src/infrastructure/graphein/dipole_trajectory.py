@@ -0,0 +1,182 @@
+"""
+Serie temporal del dipolo sobre trayectorias de MD (DCD/XTC).
+
+Las cargas y masas se leen una sola vez del PSF (``read_psf_atoms``); las
+coordenadas se recorren con los lectores de MDAnalysis en bloques de
+``chunk_frames`` fotogramas copiados a un búfer fijo (frames × átomos × 3), y
+el dipolo de cada bloque se evalúa de forma vectorizada. La memoria depende
+del tamaño del bloque y del número de átomos, no de la longitud de la
+trayectoria; lo único que crece con ella son los vectores por fotograma.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import Source, read_psf_atoms
+
+DEFAULT_CHUNK_FRAMES = 256
+
+
+def dipoles_from_frames(
+    charges: np.ndarray, masses: np.ndarray, frames: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Dipolo ``sum(q * (r - com))`` de cada fotograma de un bloque (F, N, 3).
+
+    Devuelve (vectores (F, 3), centros de masas (F, 3)); usa
+    ``sum(q r) - Q com`` para no materializar ``r - com``.
+    """
+    charges = np.asarray(charges, dtype=np.float64)
+    masses = np.asarray(masses, dtype=np.float64)
+    centers = np.einsum('fni,n->fi', frames, masses) / masses.sum()
+    vectors = np.einsum('fni,n->fi', frames, charges) - charges.sum() * centers
+    return vectors, centers
+
+
+def iter_frame_chunks(
+    trajectory: str,
+    n_atoms: int,
+    mask: Optional[np.ndarray] = None,
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+    step: Optional[int] = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Recorre la trayectoria en bloques ``(tiempos (f,), coordenadas (f, n, 3))``.
+
+    El búfer se reutiliza entre bloques: copiar lo que haya que conservar.
+    """
+    from MDAnalysis.coordinates.core import get_reader_for
+
+    if chunk_frames < 1:
+        raise ValueError("chunk_frames debe ser >= 1")
+    reader = get_reader_for(trajectory)(trajectory)
+    try:
+        if reader.n_atoms != n_atoms:
+            raise ValueError(f"La trayectoria tiene {reader.n_atoms} átomos y el PSF {n_atoms}")
+        width = int(mask.sum()) if mask is not None else n_atoms
+        block = np.empty((chunk_frames, width, 3), dtype=np.float32)
+        times = np.empty(chunk_frames, dtype=np.float64)
+        filled = 0
+        for ts in reader[start:stop:step]:
+            block[filled] = ts.positions[mask] if mask is not None else ts.positions
+            times[filled] = ts.time
+            filled += 1
+            if filled == chunk_frames:
+                yield times, block
+                filled = 0
+        if filled:
+            yield times[:filled], block[:filled]
+    finally:
+        reader.close()
+
+
+def autocorrelation(series: np.ndarray, max_lag: Optional[int] = None) -> np.ndarray:
+    """Autocorrelación normalizada ``<v(t)·v(t+τ)> / <v·v>`` de una serie (F, 3), vía FFT."""
+    series = np.asarray(series, dtype=np.float64)
+    n = len(series)
+    if n == 0:
+        return np.zeros(0)
+    size = 1 << int(2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(series, n=size, axis=0)
+    raw = np.fft.irfft((spectrum * spectrum.conj()).real, n=size, axis=0)[:n].sum(axis=1)
+    raw /= np.arange(n, 0, -1)
+    if raw[0] > 0:
+        raw /= raw[0]
+    return raw[: (max_lag + 1 if max_lag is not None else n)]
+
+
+def dipole_time_series(
+    psf: Source,
+    trajectory: str,
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+    start: Optional[int] = None,
+    stop: Optional[int] = None,
+    step: Optional[int] = None,
+    max_lag: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Dipolo por fotograma (selección "protein") y sus autocorrelaciones.
+
+    ``autocorrelation.vector`` usa el vector dipolar completo y
+    ``autocorrelation.orientation`` el vector unitario (P1 de la orientación).
+    """
+    atoms = read_psf_atoms(psf)
+    protein = atoms.protein_mask()
+    if not protein.any():
+        raise ValueError("No protein atoms found")
+    mask = None if protein.all() else protein
+    charges, masses = atoms.charges[protein], atoms.masses[protein]
+
+    vectors: List[np.ndarray] = []
+    centers: List[np.ndarray] = []
+    times: List[np.ndarray] = []
+    for chunk_times, block in iter_frame_chunks(
+        trajectory, len(atoms.charges), mask, chunk_frames, start, stop, step
+    ):
+        v, c = dipoles_from_frames(charges, masses, block)
+        vectors.append(v)
+        centers.append(c)
+        times.append(chunk_times.copy())
+    if not vectors:
+        raise ValueError("La trayectoria no tiene fotogramas en el rango pedido")
+
+    vectors_arr = np.concatenate(vectors)
+    times_arr = np.concatenate(times)
+    magnitudes = np.linalg.norm(vectors_arr, axis=1)
+    safe = np.where(magnitudes > 0, magnitudes, 1.0)[:, np.newaxis]
+    normalized = np.where(magnitudes[:, np.newaxis] > 0, vectors_arr / safe, 0.0)
+    angles = np.degrees(np.arccos(np.clip(normalized[:, 2], -1.0, 1.0)))
+    vector_acf = autocorrelation(vectors_arr, max_lag)
+    dt = float(times_arr[1] - times_arr[0]) if len(times_arr) > 1 else 0.0
+
+    return {
+        'n_frames': int(len(vectors_arr)),
+        'n_atoms': int(len(charges)),
+        'chunk_frames': int(chunk_frames),
+        'times': times_arr.tolist(),
+        'vectors': vectors_arr.tolist(),
+        'magnitudes': magnitudes.tolist(),
+        'normalized': normalized.tolist(),
+        'center_of_mass': np.concatenate(centers).tolist(),
+        'angle_with_z_axis_degrees': angles.tolist(),
+        'mean_magnitude': float(magnitudes.mean()),
+        'std_magnitude': float(magnitudes.std()),
+        'autocorrelation': {
+            'lag_frames': list(range(len(vector_acf))),
+            'lag_time': (np.arange(len(vector_acf)) * dt).tolist(),
+            'vector': vector_acf.tolist(),
+            'orientation': autocorrelation(normalized, max_lag).tolist(),
+        },
+        'method': 'PSF',
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serie temporal del dipolo sobre una trayectoria DCD/XTC.")
+    parser.add_argument("psf", help="Topología PSF (cargas y masas).")
+    parser.add_argument("trajectory", help="Trayectoria DCD/XTC con los mismos átomos que el PSF.")
+    parser.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                        help=f"Fotogramas por bloque (default: {DEFAULT_CHUNK_FRAMES}).")
+    parser.add_argument("--start", type=int, default=None)
+    parser.add_argument("--stop", type=int, default=None)
+    parser.add_argument("--step", type=int, default=None)
+    parser.add_argument("--max-lag", type=int, default=None, help="Retardo máximo de la autocorrelación (fotogramas).")
+    parser.add_argument("--out", default=None, help="Archivo JSON de salida (default: stdout).")
+    args = parser.parse_args(argv)
+
+    series = dipole_time_series(
+        args.psf, args.trajectory, args.chunk_frames, args.start, args.stop, args.step, args.max_lag
+    )
+    text = json.dumps(series)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        sys.stdout.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -208,8 +208,15 @@ class GrapheinGraphAdapter:
 
         return G
 
-    def compute_metrics(self, G: Any) -> Dict[str, Any]:
-        """Calcula métricas de grafo usando el módulo común para evitar duplicación"""
+    def compute_metrics(self, G: Any, budget: Any = None, weighted: bool = False,
+                        warm_start: Any = None) -> Dict[str, Any]:
+        """Calcula métricas de grafo usando el módulo común para evitar duplicación.
+
+        ``budget`` (MetricBudget) limita el tiempo; el resultado indica con
+        ``approximate``/``approximation`` qué métricas se degradaron.
+        ``weighted`` añade betweenness/closeness ponderadas por distancia.
+        ``warm_start`` son vectores eigenvector/pagerank previos (umbral cercano).
+        """
         if not isinstance(G, nx.Graph):
             raise TypeError("Expected a networkx.Graph")
 
@@ -224,6 +231,8 @@ class GrapheinGraphAdapter:
                     "betweenness": {},
                     "closeness": {},
                     "clustering": {},
+                    "eigenvector": {},
+                    "pagerank": {},
                     "seq_distance_avg": {},
                     "long_contacts_prop": {},
                 },
@@ -232,37 +241,54 @@ class GrapheinGraphAdapter:
 
         # Usar el módulo común para métricas
         from src.infrastructure.graph.graph_metrics import compute_comprehensive_metrics
-        result = compute_comprehensive_metrics(G)
+        result = compute_comprehensive_metrics(G, budget=budget, weighted=weighted, warm_start=warm_start)
 
         # Adaptar al formato esperado por el controlador Flask
         centrality_data = result.get('centrality', {})
 
+        centrality = {
+            "degree": centrality_data.get('degree', {}),
+            "betweenness": centrality_data.get('betweenness', {}),
+            "closeness": centrality_data.get('closeness', {}),
+            "clustering": centrality_data.get('clustering', {}),
+            "eigenvector": centrality_data.get('eigenvector', {}),
+            "pagerank": centrality_data.get('pagerank', {}),
+            "seq_distance_avg": centrality_data.get('seq_distance_avg', {}),
+            "long_contacts_prop": centrality_data.get('long_contacts_prop', {}),
+        }
+        for key in ('betweenness_weighted', 'closeness_weighted'):
+            if key in centrality_data:
+                centrality[key] = centrality_data[key]
+
         return {
             "num_nodes": result['properties']['num_nodes'],
             "num_edges": result['properties']['num_edges'],
             "density": result['properties']['density'],
             "avg_clustering": result['properties']['avg_clustering'],
-            "centrality": {
-                "degree": centrality_data.get('degree', {}),
-                "betweenness": centrality_data.get('betweenness', {}),
-                "closeness": centrality_data.get('closeness', {}),
-                "clustering": centrality_data.get('clustering', {}),
-                "seq_distance_avg": centrality_data.get('seq_distance_avg', {}),
-                "long_contacts_prop": centrality_data.get('long_contacts_prop', {}),
-            },
+            "centrality": centrality,
             # Métricas adicionales
             "disulfide_count": result['properties'].get('disulfide_count', 0),
             "dipole_magnitude": result['properties'].get('dipole_magnitude', 0.0),
             "avg_degree_centrality": result['summary_statistics'].get('degree', {}).get('mean', 0.0),
             "avg_betweenness_centrality": result['summary_statistics'].get('betweenness', {}).get('mean', 0.0),
             "avg_closeness_centrality": result['summary_statistics'].get('closeness', {}).get('mean', 0.0),
+            "avg_eigenvector_centrality": result['summary_statistics'].get('eigenvector', {}).get('mean', 0.0),
             "total_charge": result['properties'].get('total_charge', 0.0),
             "avg_hydrophobicity": result['properties'].get('avg_hydrophobicity', 0.0),
             "surface_charge": result['properties'].get('surface_charge', 0.0),
             "pharmacophore_count": result['properties'].get('pharmacophore_count', 0),
             "community_count": result['properties'].get('community_count', 0),
+            "approximate": bool(result.get('approximation')),
+            "approximation": result.get('approximation', {}),
         }
 
+    def compute_gnm(self, G: Any, n_modes: int = 20) -> Dict[str, Any]:
+        """Modelo de red gaussiana (GNM) sobre el grafo CA: modos lentos y fluctuaciones."""
+        if not isinstance(G, nx.Graph):
+            raise TypeError("Expected a networkx.Graph")
+        from src.infrastructure.graph.gnm import gnm_analysis
+        return gnm_analysis(G, n_modes=n_modes)
+
     def _prepare_graph_attributes(self, G: Any) -> None:
         """Prepara el grafo con atributos básicos necesarios (simplificado)"""
         # El módulo común graph_metrics maneja la preparación de atributos
@@ -0,0 +1,92 @@
+"""
+Proceso aparte que ejecuta un barrido de proteoma registrado en ``scan_jobs``.
+
+El endpoint ``/v2/proteome_scan`` sólo crea el trabajo y lanza
+``python -m src.infrastructure.jobs.proteome_scan_worker <jobs_db> <job_id> <db>``:
+el worker web (gevent) nunca hace fork de un pool de procesos ni mantiene un
+hilo largo. Este proceso reparte los bloques con ``scan_proteome``, publica el
+progreso y renueva el latido del trabajo; si muere, el latido se detiene y
+``SqliteScanJobRepository.get`` lo marca como ``error``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from extractors.proteome_scan import scan_proteome
+from src.infrastructure.db.sqlite.scan_job_repository_sqlite import SqliteScanJobRepository
+
+HEARTBEAT_SECONDS = 10.0
+# Raíz del repo: el worker se ejecuta con -m desde aquí
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+
+def launch(jobs_db: str, job_id: str, db_path: str, workers: int) -> subprocess.Popen:
+    """Arranca el proceso del trabajo, desacoplado del worker web (sesión propia, sin pipes)."""
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "src.infrastructure.jobs.proteome_scan_worker",
+            os.path.abspath(jobs_db), job_id, os.path.abspath(db_path), "--workers", str(workers),
+        ],
+        cwd=ROOT_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run_job(jobs: SqliteScanJobRepository, job_id: str, db_path: str, workers: int) -> None:
+    job = jobs.get(job_id)
+    if job is None or job["status"] != "queued":
+        return
+    params = job["params"]
+
+    def _progress(done: int, total: int, scanned: int) -> None:
+        jobs.update(job_id, progress={"chunks_done": done, "chunks_total": total, "scanned": scanned})
+
+    stop = threading.Event()
+
+    def _heartbeat() -> None:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            jobs.touch(job_id)
+
+    jobs.update(job_id, status="running")
+    beat = threading.Thread(target=_heartbeat, daemon=True)
+    beat.start()
+    try:
+        result = scan_proteome(
+            db_path,
+            gap_min=params["gap_min"],
+            gap_max=params["gap_max"],
+            require_pair=params["require_pair"],
+            patterns=params.get("motifs"),
+            workers=workers,
+            chunk_rows=params["chunk_rows"],
+            progress=_progress,
+        )
+    except Exception as e:
+        jobs.update(job_id, status="error", error=str(e))
+        return
+    finally:
+        stop.set()
+        beat.join()
+    jobs.update(job_id, status="done", result=result)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ejecuta un barrido de proteoma encolado en scan_jobs.")
+    parser.add_argument("jobs_db")
+    parser.add_argument("job_id")
+    parser.add_argument("db")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    run_job(SqliteScanJobRepository(args.jobs_db), args.job_id, args.db, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
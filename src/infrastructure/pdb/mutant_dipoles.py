@@ -0,0 +1,111 @@
+"""
+Cambios aproximados de carga neta y dipolo para mutantes puntuales, sin reconstruir estructuras.
+
+El dipolo WT es el de ``rtf_charges`` (cargas CHARMM, ``sum q (r - com)``).
+En CHARMM el esqueleto (N, HN, CA, HA, C, O) es neutro y la cadena lateral
+lleva la carga formal, así que cada residuo aporta, en primera aproximación,
+su carga formal situada en el centro de carga de su cadena lateral (centroide
+de los átomos pesados; CA en Gly). Un mutante cambia sólo ese término:
+``μ' = μ_WT + (q_nuevo - q_WT) * (centro - com)``, con el centro de masas del
+WT. Las sustituciones neutras no mueven el dipolo en este modelo. Todo se
+evalúa como operaciones de arrays sobre los 19×L mutantes.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import Source
+from src.infrastructure.pdb.rtf_charges import topology_residue_atoms
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+# Residuos CHARMM (tras alias) → una letra
+THREE_TO_ONE = {
+    "ALA": "A", "ARG": "R", "ASN": "N", "ASP": "D", "CYS": "C", "GLN": "Q", "GLU": "E", "GLY": "G",
+    "HSD": "H", "HSE": "H", "HSP": "H", "ILE": "I", "LEU": "L", "LYS": "K", "MET": "M", "PHE": "F",
+    "PRO": "P", "SER": "S", "THR": "T", "TRP": "W", "TYR": "Y", "VAL": "V",
+}
+# Carga formal de la cadena lateral; His nueva entra como HSE (neutra), igual que el alias HIS→HSE
+RESIDUE_CHARGE = {"ASP": -1, "GLU": -1, "LYS": 1, "ARG": 1, "HSP": 1}
+_FORMAL_LUT = np.zeros(256, dtype=np.float64)
+for _aa, _q in (("D", -1), ("E", -1), ("K", 1), ("R", 1)):
+    _FORMAL_LUT[ord(_aa)] = _q
+
+# Esqueleto y parches terminales: no cuentan para el centro de carga de la cadena lateral
+BACKBONE_ATOMS = frozenset({"N", "HN", "HT1", "HT2", "HT3", "CA", "HA", "HA1", "HA2", "C", "O", "OT1", "OT2"})
+
+
+@dataclass
+class ResidueDipoleTerms:
+    sequence: str
+    residue_keys: List[Tuple[str, str]]  # (cadena, resSeq + iCode)
+    charge: np.ndarray                   # carga formal por residuo
+    center: np.ndarray                   # (L, 3) centro de carga de la cadena lateral
+    center_of_mass: np.ndarray
+    dipole: np.ndarray                   # (3,) dipolo WT
+
+
+def residue_dipole_terms(pdb: Source, rtf_path: Optional[str] = None) -> ResidueDipoleTerms:
+    """Dipolo WT y centro de carga de cada residuo (PDB por ruta o contenido)."""
+    atoms = topology_residue_atoms(pdb, rtf_path)
+    n_res = len(atoms.resnames)
+    positions = atoms.positions.astype(np.float64)
+    com = (positions * atoms.masses[:, np.newaxis]).sum(axis=0) / atoms.masses.sum()
+    contrib = atoms.charges.astype(np.float64)[:, np.newaxis] * (positions - com)
+
+    names = np.array(atoms.atom_names)
+    side = ~np.isin(names, list(BACKBONE_ATOMS))
+    heavy_side = side & ~np.char.startswith(np.char.lstrip(names, "0123456789"), "H")
+    counts = np.bincount(atoms.residue_index[heavy_side], minlength=n_res)
+    sums = np.zeros((n_res, 3))
+    np.add.at(sums, atoms.residue_index[heavy_side], positions[heavy_side])
+    ca = np.zeros((n_res, 3))
+    is_ca = names == "CA"
+    ca[atoms.residue_index[is_ca]] = positions[is_ca]
+    center = np.where(counts[:, np.newaxis] > 0, sums / np.maximum(counts, 1)[:, np.newaxis], ca)
+
+    return ResidueDipoleTerms(
+        sequence="".join(THREE_TO_ONE.get(r, "X") for r in atoms.resnames),
+        residue_keys=list(atoms.residue_keys),
+        charge=np.array([RESIDUE_CHARGE.get(r, 0) for r in atoms.resnames], dtype=np.float64),
+        center=center,
+        center_of_mass=com,
+        dipole=contrib.sum(axis=0),
+    )
+
+
+def point_mutants(
+    sequence: str, targets: str = AMINO_ACIDS, positions: Optional[Sequence[int]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(posiciones 0-based, residuos ASCII uint8) de cada sustitución simple hacia ``targets``.
+
+    Ordenadas por posición y luego por residuo; la identidad WT se omite.
+    """
+    wt = np.frombuffer(sequence.upper().encode("ascii", "replace"), dtype=np.uint8)
+    pos = np.arange(len(wt)) if positions is None else np.unique(np.asarray(positions, dtype=np.intp))
+    if len(pos) and (pos.min() < 0 or pos.max() >= len(wt)):
+        raise ValueError(f"Posiciones fuera de la secuencia (1..{len(wt)})")
+    alt = np.unique(np.frombuffer(targets.upper().encode("ascii", "replace"), dtype=np.uint8))
+    p_idx, a_idx = np.nonzero(alt[np.newaxis, :] != wt[pos][:, np.newaxis])
+    return pos[p_idx], alt[a_idx]
+
+
+def mutant_dipole_deltas(
+    terms: ResidueDipoleTerms, positions: np.ndarray, residues: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Carga y dipolo aproximados de cada mutante (arrays alineados con ``positions``)."""
+    charge_delta = _FORMAL_LUT[np.asarray(residues, dtype=np.uint8)] - terms.charge[positions]
+    offsets = terms.center[positions] - terms.center_of_mass
+    dipoles = terms.dipole + charge_delta[:, np.newaxis] * offsets
+    wt_magnitude = float(np.linalg.norm(terms.dipole))
+    magnitude = np.linalg.norm(dipoles, axis=1)
+    cos = (dipoles @ terms.dipole) / np.maximum(magnitude * wt_magnitude, 1e-12)
+    return {
+        "charge_delta": charge_delta,
+        "dipole": dipoles,
+        "dipole_magnitude": magnitude,
+        "dipole_delta": magnitude - wt_magnitude,
+        "dipole_shift": np.linalg.norm(dipoles - terms.dipole, axis=1),
+        "dipole_angle_deg": np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))),
+    }
@@ -0,0 +1,276 @@
+"""
+Trabajadores PSF de larga vida que hablan un protocolo de líneas por stdin/stdout.
+
+Protocolo (campos separados por tabulador, una línea por mensaje):
+
+- arranque: el trabajador imprime su marcador de listo (``@@WORKER_READY``).
+- trabajo: ``job <id> <pdb> <prefijo_salida> <segid> <cutoff>``; la respuesta
+  es el log del generador, ``PSF_OUT:``/``PDB_OUT:`` si terminó bien y
+  ``@@JOB_DONE <id> ok|error``.
+- cierre: ``quit`` (o EOF).
+
+``PSFWorkerSession`` es el cliente: arranca el proceso, envía trabajos y
+aplica el timeout por trabajo; si el proceso muere o se cuelga lo mata y el
+siguiente trabajo arranca otro. ``python -m src.infrastructure.pdb.psf_worker``
+es el servidor nativo (``psf_writer``); ``vmd_session.VMDSession`` es el
+mismo cliente sobre un bucle Tcl dentro de VMD.
+"""
+import argparse
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+READY_MARKER = "@@WORKER_READY"
+DONE_MARKER = "@@JOB_DONE"
+DEFAULT_JOB_TIMEOUT = 300.0
+DEFAULT_STARTUP_TIMEOUT = 60.0
+# Raíz del repo: el servidor nativo se ejecuta con -m desde aquí
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+
+class PSFWorkerError(RuntimeError):
+    """El trabajador no arrancó o no respondió al protocolo."""
+
+
+class PSFWorkerSession:
+    """Proceso trabajador de larga vida que procesa trabajos PSF por stdin.
+
+    No es thread-safe: usar una sesión por hilo.
+    """
+
+    ready_marker = READY_MARKER
+    name = "trabajador PSF"
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        *,
+        job_timeout: float = DEFAULT_JOB_TIMEOUT,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+        cwd: Optional[Union[str, Path]] = None,
+    ):
+        self.command = list(command)
+        self.job_timeout = job_timeout
+        self.startup_timeout = startup_timeout
+        self.cwd = cwd
+        self.restarts = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._next_id = 0
+        self._started_once = False
+
+    # ----------------------------------------------------------------- ciclo
+    def __enter__(self) -> "PSFWorkerSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self.alive else None
+
+    def _command(self) -> List[str]:
+        return list(self.command)
+
+    def start(self) -> str:
+        """Arranca el proceso (si no está vivo) y espera el marcador de listo; devuelve el log de arranque."""
+        if self.alive:
+            return ""
+        self._discard()
+        if self._started_once:
+            self.restarts += 1
+        self._started_once = True
+
+        self._lines = queue.Queue()
+        self._proc = subprocess.Popen(
+            self._command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd=self.cwd,
+        )
+        threading.Thread(target=self._pump, args=(self._proc, self._lines), daemon=True).start()
+
+        state, log = self._read_until(self.ready_marker, self.startup_timeout)
+        if state != "ok":
+            self._discard()
+            raise PSFWorkerError(f"{self.name} no completó el arranque:\n" + "\n".join(log))
+        return "\n".join(log)
+
+    def close(self) -> None:
+        """Envía ``quit`` y espera la salida; mata el proceso si no termina."""
+        if self.alive:
+            try:
+                self._proc.stdin.write("quit\n")
+                self._proc.stdin.flush()
+                self._proc.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+        self._discard()
+
+    # -------------------------------------------------------------- trabajos
+    def run(
+        self,
+        pdb_path: Union[str, Path],
+        out_prefix: Union[str, Path],
+        segid: str = "PROA",
+        disulfide_cutoff: float = 2.3,
+        timeout: Optional[float] = None,
+    ) -> Tuple[bool, str]:
+        """Ejecuta un trabajo; devuelve ``(ok, log)`` como los motores de ``FilteredPSFGenerator``.
+
+        Un fallo del proceso (caída o timeout) no se reintenta aquí: el
+        trabajo devuelve ``ok=False`` y el siguiente reinicia la sesión.
+        """
+        try:
+            startup = self.start()
+        except (OSError, PSFWorkerError) as e:
+            return False, f"ERROR arrancando {self.name}: {e}"
+
+        self._next_id += 1
+        job_id = str(self._next_id)
+        fields = ["job", job_id, str(pdb_path), str(out_prefix), segid, repr(float(disulfide_cutoff))]
+        try:
+            self._proc.stdin.write("\t".join(fields) + "\n")
+            self._proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            self._discard()
+            return False, f"ERROR enviando trabajo a {self.name}: {e}"
+
+        limit = self.job_timeout if timeout is None else timeout
+        state, log = self._read_until(f"{DONE_MARKER} {job_id} ", limit)
+        if startup:
+            log = [startup] + log
+        if state != "ok":
+            reason = "terminó inesperadamente" if state == "eof" else f"superó el timeout de {limit:g} s"
+            self._discard()
+            log.append(f"ERROR: {self.name} {reason}; se reiniciará para el siguiente trabajo")
+            return False, "\n".join(log)
+        status = log.pop().rsplit(" ", 1)[-1]
+        return status == "ok", "\n".join(log)
+
+    # --------------------------------------------------------------- interno
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        # Hilo lector: stdout del proceso -> cola; None marca EOF (proceso muerto)
+        try:
+            for line in proc.stdout:
+                lines.put(line.rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    def _read_until(self, marker: str, timeout: float) -> Tuple[str, List[str]]:
+        # Acumula líneas hasta la que empieza por marker; estado "ok", "eof" o "timeout"
+        deadline = time.monotonic() + timeout
+        log: List[str] = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timeout", log
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                return "timeout", log
+            if line is None:
+                return "eof", log
+            log.append(line)
+            if line == marker.rstrip() or line.startswith(marker):
+                return "ok", log
+
+    def _discard(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+
+
+def native_session(rtf_path: Optional[Union[str, Path]] = None, **kwargs) -> PSFWorkerSession:
+    """Sesión sobre el servidor nativo de este módulo (``psf_writer``, sin VMD)."""
+    command = [sys.executable, "-m", "src.infrastructure.pdb.psf_worker"]
+    if rtf_path:
+        command += ["--rtf", str(rtf_path)]
+    kwargs.setdefault("cwd", ROOT_DIR)
+    return PSFWorkerSession(command, **kwargs)
+
+
+def run_native_job(
+    pdb_path: Union[str, Path],
+    out_prefix: Union[str, Path],
+    segid: str = "PROA",
+    disulfide_cutoff: float = 2.3,
+    rtf_path: Optional[Union[str, Path]] = None,
+) -> Tuple[bool, str]:
+    """Genera PSF/PDB en proceso con ``psf_writer``; devuelve ``(ok, log)``."""
+    from src.infrastructure.pdb.psf_writer import generate_psf_pdb
+    from src.infrastructure.pdb.rtf_charges import DEFAULT_RTF_PATH
+
+    rtf = str(rtf_path or DEFAULT_RTF_PATH)
+    try:
+        psf, pdb, structure = generate_psf_pdb(
+            pdb_path, out_prefix, segid=segid, ss_cutoff=disulfide_cutoff, rtf_path=rtf,
+        )
+    except (OSError, ValueError, KeyError) as e:
+        return False, f"ERROR generando PSF nativo para {pdb_path}: {e}"
+    log = [f"Motor nativo (RTF: {rtf})"]
+    log += [f"REMARKS {r}" for r in structure.remarks]
+    log.append(f"Átomos: {len(structure.names)} (coordenadas adivinadas: {int(structure.guessed.sum())})")
+    log.append(f"PSF_OUT:{psf}")
+    log.append(f"PDB_OUT:{pdb}")
+    return True, "\n".join(log)
+
+
+def serve(rtf_path: Optional[str] = None, stdin=None, stdout=None) -> None:
+    """Bucle del servidor nativo: un trabajo por línea hasta ``quit``/EOF."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def emit(text: str) -> None:
+        stdout.write(text + "\n")
+        stdout.flush()
+
+    emit(READY_MARKER)
+    for line in stdin:
+        fields = line.rstrip("\r\n").split("\t")
+        if fields[0] != "job" or len(fields) != 6:
+            break
+        _, job_id, in_pdb, out_prefix, segid, cutoff = fields
+        try:
+            ok, log = run_native_job(in_pdb, out_prefix, segid, float(cutoff), rtf_path)
+        except Exception as e:  # un trabajo roto no debe tumbar el servidor
+            ok, log = False, f"ERROR: {type(e).__name__}: {e}"
+        emit(log)
+        emit(f"{DONE_MARKER} {job_id} {'ok' if ok else 'error'}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor PSF nativo (protocolo de líneas por stdin).")
+    parser.add_argument("--rtf", default=None, help="Topología CHARMM (default: resources/top_all36_prot.rtf).")
+    args = parser.parse_args(argv)
+    serve(args.rtf)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Generador nativo de PSF/PDB CHARMM a partir de ``top_all36_prot.rtf``, sin VMD ni psfgen.
+
+Reproduce ``build_psf_with_disulfides`` de ``resources/psf_gen.tcl``:
+elimina caps (NH2, PCA, NME, ACE), renumera resids, aplica los alias de
+residuo/átomo, los parches terminales por defecto (DEFA FIRS/LAST y PATCHING
+FIRS del residuo), DISU sobre los pares SG–SG < 2.3 Å, regenera ángulos y
+diedros desde los enlaces y completa las coordenadas que faltan con las
+tablas IC (equivalente a ``guesscoord``). Cargas, tipos, enlaces, ángulos,
+diedros, impropios y CMAP coinciden con la salida de psfgen.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import Source, iter_lines
+from src.infrastructure.pdb.rtf_charges import (
+    DEFAULT_RTF_PATH,
+    RESIDUE_ALIASES,
+    SSBOND_CUTOFF,
+    Block,
+    Topology,
+    disulfide_pairs,
+    load_topology,
+)
+
+DEFAULT_SEGID = "PROA"
+# Residuos que _sanitize_pdb_for_psfgen descarta antes de construir el segmento
+CAP_RESNAMES = frozenset({"NH2", "PCA", "NME", "ACE"})
+# pdbalias atom ... de resources/psf_gen.tcl
+PSFGEN_ATOM_ALIASES = {("ILE", "CD1"): "CD"}
+# guesscoord: valores usados cuando la entrada IC trae 0.0 (parches terminales)
+DEFAULT_BOND_LENGTH = 1.0
+DEFAULT_ANGLE_DEGREES = 109.0
+
+
+@dataclass
+class _Residue:
+    resname: str
+    chain: str
+    names: List[str]
+    params: Dict[str, Tuple[str, float]]
+    coords: Dict[str, Tuple[Tuple[float, float, float], str]]
+    # (bloque, residuos destino por prefijo "" / "1" / "2")
+    applied: List[Tuple[Block, Dict[str, int]]] = field(default_factory=list)
+
+
+@dataclass
+class PsfStructure:
+    """Estructura generada: átomos (índices 0-based) y listas de términos."""
+
+    segid: str
+    resids: List[int]
+    resnames: List[str]
+    chains: List[str]
+    names: List[str]
+    types: List[str]
+    charges: np.ndarray
+    masses: np.ndarray
+    positions: np.ndarray
+    guessed: np.ndarray
+    elements: List[str]
+    bonds: List[Tuple[int, int]]
+    angles: List[Tuple[int, int, int]]
+    dihedrals: List[Tuple[int, int, int, int]]
+    impropers: List[Tuple[int, int, int, int]]
+    cmaps: List[Tuple[int, ...]]
+    remarks: List[str]
+
+    def write_psf(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(format_psf(self), encoding="ascii")
+
+    def write_pdb(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(format_pdb(self), encoding="ascii")
+
+
+def _read_residues(pdb: Source, topology: Topology) -> List[_Residue]:
+    """Residuos del primer modelo en orden de archivo, con alias aplicados y caps descartados."""
+    residues: List[_Residue] = []
+    last_key = None
+    for line in iter_lines(pdb):
+        if line.startswith((b"ATOM", b"HETATM")):
+            if line[16:17] not in (b" ", b"A", b""):
+                continue
+            resname = line[17:21].strip().decode("ascii", errors="replace").upper()
+            if resname in CAP_RESNAMES:
+                continue
+            resname = RESIDUE_ALIASES.get(resname, resname)
+            if resname not in topology.residues:
+                raise ValueError(f"Residuo {resname} no definido en la topología CHARMM")
+            key = (line[21:22], line[22:27])
+            if key != last_key:
+                block = topology.residues[resname]
+                residues.append(_Residue(
+                    resname=resname,
+                    chain=line[21:22].decode("ascii", errors="replace"),
+                    names=list(block.atoms),
+                    params=dict(block.atoms),
+                    coords={},
+                ))
+                last_key = key
+            name = line[12:16].strip().decode("ascii", errors="replace").upper()
+            name = PSFGEN_ATOM_ALIASES.get((resname, name), name)
+            if name not in residues[-1].coords:
+                xyz = (float(line[30:38]), float(line[38:46]), float(line[46:54]))
+                residues[-1].coords[name] = (xyz, line[76:78].strip().decode("ascii", errors="replace"))
+        elif line.startswith((b"ENDMDL", b"END")) and residues:
+            break
+    if not residues:
+        raise ValueError("PDB sin residuos de proteína")
+    return residues
+
+
+def _split(name: str) -> Tuple[str, str]:
+    # "2SG" → ("2", "SG"); "SG" → ("", "SG")
+    if len(name) > 1 and name[0].isdigit():
+        return name[0], name[1:]
+    return "", name
+
+
+def _apply_patch(patch: Block, residues: List[_Residue], targets: Dict[str, int]) -> None:
+    """Borra/actualiza/inserta átomos como psfgen: los nuevos van tras el átomo previo del parche."""
+    for raw in patch.deletes:
+        prefix, name = _split(raw)
+        residue = residues[targets[prefix]]
+        if name in residue.params:
+            residue.names.remove(name)
+            del residue.params[name]
+    previous: Dict[str, Optional[str]] = {}
+    for raw, params in patch.atoms.items():
+        prefix, name = _split(raw)
+        residue = residues[targets[prefix]]
+        if name not in residue.params:
+            anchor = previous.get(prefix)
+            position = residue.names.index(anchor) + 1 if anchor in residue.params else len(residue.names)
+            residue.names.insert(position, name)
+        residue.params[name] = params
+        previous[prefix] = name
+    residues[targets[""] if "" in targets else targets["1"]].applied.append((patch, targets))
+
+
+def _resolver(residues: List[_Residue], offsets: Sequence[int]):
+    index = [{name: int(offsets[r]) + k for k, name in enumerate(res.names)} for r, res in enumerate(residues)]
+
+    def resolve(raw: str, r: int, targets: Optional[Dict[str, int]]) -> Optional[int]:
+        if targets is not None:
+            prefix, name = _split(raw)
+            r = targets.get(prefix, r)
+        elif raw[0] in "+-":
+            r, name = r + (1 if raw[0] == "+" else -1), raw[1:]
+        else:
+            name = raw
+        if not 0 <= r < len(residues):
+            return None
+        return index[r].get(name)
+    return resolve
+
+
+def _terms(residues, topology, resolve, attr):
+    """Resuelve una lista de términos (BOND/IMPR/CMAP/IC) de residuos y parches a índices globales."""
+    out = []
+    for r, residue in enumerate(residues):
+        sources = [(topology.residues[residue.resname], None)] + residue.applied
+        for block, targets in sources:
+            for entry in getattr(block, attr):
+                names = entry[0] if attr == "ics" else entry
+                idx = tuple(resolve(n, r, targets) for n in names)
+                if all(i is not None for i in idx):
+                    out.append((idx, entry) if attr == "ics" else idx)
+    return out
+
+
+def _angles_and_dihedrals(n_atoms: int, bonds: Sequence[Tuple[int, int]]):
+    """``regenerate angles dihedrals``: todos los ángulos y diedros del grafo de enlaces."""
+    neighbors: List[List[int]] = [[] for _ in range(n_atoms)]
+    for a, b in bonds:
+        neighbors[a].append(b)
+        neighbors[b].append(a)
+    angles = []
+    for j in range(n_atoms):
+        nb = sorted(neighbors[j])
+        angles.extend((nb[x], j, nb[y]) for x in range(len(nb)) for y in range(x + 1, len(nb)))
+    dihedrals = []
+    for j, k in bonds:
+        for i in sorted(neighbors[j]):
+            if i == k:
+                continue
+            dihedrals.extend((i, j, k, l) for l in sorted(neighbors[k]) if l != j and l != i)
+    return angles, dihedrals
+
+
+def _place(a: np.ndarray, b: np.ndarray, c: np.ndarray, bond: float, angle: float, torsion: float) -> np.ndarray:
+    """Átomo d enlazado a c con |cd| = bond, ángulo b-c-d y diedro a-b-c-d (grados)."""
+    bc = c - b
+    bc /= np.linalg.norm(bc)
+    n = np.cross(b - a, bc)
+    norm = np.linalg.norm(n)
+    if norm < 1e-8:
+        # a, b, c colineales: cualquier plano que contenga bc
+        n = np.cross(bc, [1.0, 0.0, 0.0] if abs(bc[0]) < 0.9 else [0.0, 1.0, 0.0])
+        norm = np.linalg.norm(n)
+    n /= norm
+    m = np.cross(n, bc)
+    theta, phi = np.radians(angle), np.radians(torsion)
+    return c - bond * np.cos(theta) * bc + bond * np.sin(theta) * (np.cos(phi) * m + np.sin(phi) * n)
+
+
+def _guess_coordinates(positions: np.ndarray, ics, bonds: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Completa posiciones NaN con las tablas IC, en pasadas hasta que no haya progreso (``guesscoord``)."""
+    known = ~np.isnan(positions).any(axis=1)
+    progress = True
+    while progress and not known.all():
+        progress = False
+        for (i, j, k, l), (_, improper, (r_ij, t_ijk, phi, t_jkl, r_kl)) in ics:
+            if not known[l] and known[i] and known[j] and known[k]:
+                positions[l] = _place(positions[i], positions[j], positions[k],
+                                      r_kl or DEFAULT_BOND_LENGTH, t_jkl or DEFAULT_ANGLE_DEGREES, phi)
+            elif not known[i] and known[j] and known[k] and known[l]:
+                if improper:
+                    # I enlazado a K: ángulo I-K-J y diedro I-J-K-L = -(L-J-K-I)
+                    positions[i] = _place(positions[l], positions[j], positions[k],
+                                          r_ij or DEFAULT_BOND_LENGTH, t_ijk or DEFAULT_ANGLE_DEGREES, -phi)
+                else:
+                    positions[i] = _place(positions[l], positions[k], positions[j],
+                                          r_ij or DEFAULT_BOND_LENGTH, t_ijk or DEFAULT_ANGLE_DEGREES, phi)
+            else:
+                continue
+            known[i] = known[l] = True
+            progress = True
+
+    # Sin IC utilizable: junto a un vecino ya ubicado (psfgen los marca como "poorly guessed")
+    while not known.all():
+        placed = False
+        for a, b in bonds:
+            for x, y in ((a, b), (b, a)):
+                if not known[x] and known[y]:
+                    positions[x] = positions[y] + (DEFAULT_BOND_LENGTH, 0.0, 0.0)
+                    known[x] = placed = True
+        if not placed:
+            raise ValueError(f"No se pudieron ubicar {int((~known).sum())} átomos sin vecinos con coordenadas")
+    return positions
+
+
+def build_psf(
+    pdb: Source,
+    segid: str = DEFAULT_SEGID,
+    ss_cutoff: float = SSBOND_CUTOFF,
+    rtf_path: Optional[str] = None,
+) -> PsfStructure:
+    """Construye el PSF (y coordenadas completas) de un PDB de proteína de un solo segmento."""
+    topology = load_topology(rtf_path)
+    residues = _read_residues(pdb, topology)
+    last = len(residues) - 1
+    first_patch = topology.first_patch(residues[0].resname)
+    last_patch = topology.last_patch(residues[last].resname)
+    _apply_patch(topology.patches[first_patch], residues, {"": 0})
+    _apply_patch(topology.patches[last_patch], residues, {"": last})
+    remarks = [
+        f"segment {segid} {{ first {first_patch}; last {last_patch}; auto angles dihedrals }}",
+        f"defaultpatch {last_patch} {segid}:{last + 1}",
+        f"defaultpatch {first_patch} {segid}:1",
+    ]
+
+    cys = [r for r, res in enumerate(residues) if res.resname == "CYS" and "SG" in res.coords]
+    sg = np.array([residues[r].coords["SG"][0] for r in cys], dtype=np.float64).reshape(-1, 3)
+    for a, b in disulfide_pairs(sg, ss_cutoff):
+        _apply_patch(topology.patches["DISU"], residues, {"1": cys[a], "2": cys[b]})
+        remarks.append(f"patch DISU {segid}:{cys[a] + 1} {segid}:{cys[b] + 1}")
+    remarks[0:0] = [
+        "original generated structure x-plor psf file",
+        f"{len(remarks) - 1} patches were applied to the molecule.",
+        f"topology {rtf_path or DEFAULT_RTF_PATH}",
+    ]
+
+    offsets = np.cumsum([0] + [len(res.names) for res in residues[:-1]])
+    resolve = _resolver(residues, offsets)
+    bonds: List[Tuple[int, int]] = []
+    seen = set()
+    for a, b in _terms(residues, topology, resolve, "bonds"):
+        if a != b and frozenset((a, b)) not in seen:
+            seen.add(frozenset((a, b)))
+            bonds.append((a, b))
+    angles, dihedrals = _angles_and_dihedrals(int(offsets[-1]) + len(residues[-1].names), bonds)
+
+    resids, resnames, chains, names, types, charges, masses, elements, xyz = [], [], [], [], [], [], [], [], []
+    for r, res in enumerate(residues):
+        for name in res.names:
+            atom_type, charge = res.params[name]
+            resids.append(r + 1)
+            resnames.append(res.resname)
+            chains.append(res.chain)
+            names.append(name)
+            types.append(atom_type)
+            charges.append(charge)
+            masses.append(topology.masses.get(atom_type, 0.0))
+            coord, element = res.coords.get(name, ((np.nan, np.nan, np.nan), ""))
+            xyz.append(coord)
+            elements.append(element)
+    positions = np.array(xyz, dtype=np.float64)
+    guessed = np.isnan(positions).any(axis=1)
+    if guessed.any():
+        positions = _guess_coordinates(positions, _terms(residues, topology, resolve, "ics"), bonds)
+
+    return PsfStructure(
+        segid=segid,
+        resids=resids,
+        resnames=resnames,
+        chains=chains,
+        names=names,
+        types=types,
+        charges=np.array(charges, dtype=np.float64),
+        masses=np.array(masses, dtype=np.float64),
+        positions=positions,
+        guessed=guessed,
+        elements=elements,
+        bonds=bonds,
+        angles=angles,
+        dihedrals=dihedrals,
+        impropers=_terms(residues, topology, resolve, "impropers"),
+        cmaps=_terms(residues, topology, resolve, "cmaps"),
+        remarks=remarks,
+    )
+
+
+def _index_section(lines: List[str], label: str, terms: Sequence[Tuple[int, ...]], per_line: int, width: int) -> None:
+    lines.append(f"{len(terms):{width}d} !{label}")
+    flat = [i + 1 for term in terms for i in term]
+    text = (f"%{width}d" * len(flat)) % tuple(flat)
+    step = per_line * width
+    lines.extend(text[start:start + step] for start in range(0, len(text), step))
+    if not flat:
+        lines.append("")
+    lines.append("")
+
+
+def format_psf(structure: PsfStructure) -> str:
+    """Texto PSF con el mismo formato de columnas que ``writepsf`` de psfgen (EXT si algún campo no cabe)."""
+    ext = (
+        len(structure.segid) > 4
+        or max(len(str(r)) for r in structure.resids) > 4
+        or any(len(v) > 4 for v in (*structure.names, *structure.types, *structure.resnames))
+    )
+    width = 10 if ext else 8
+    flags = ["PSF"] + (["EXT"] if ext else []) + (["CMAP"] if structure.cmaps else [])
+    lines = [" ".join(flags), "", f"{len(structure.remarks):{width}d} !NTITLE"]
+    lines += [f" REMARKS {r}" for r in structure.remarks]
+    lines += ["", f"{len(structure.names):{width}d} !NATOM"]
+    atom_fmt = (
+        "{:10d} {:<8s} {:<8s} {:<8s} {:<8s} {:<6s} {:10.6f} {:13.4f} {:11d}"
+        if ext else
+        "{:8d} {:<4s} {:<4s} {:<4s} {:<4s} {:<4s} {:10.6f} {:13.4f} {:11d}"
+    )
+    for k, name in enumerate(structure.names):
+        lines.append(atom_fmt.format(
+            k + 1, structure.segid, str(structure.resids[k]), structure.resnames[k], name,
+            structure.types[k], structure.charges[k], structure.masses[k], 0,
+        ))
+    lines.append("")
+    _index_section(lines, "NBOND: bonds", structure.bonds, 8, width)
+    _index_section(lines, "NTHETA: angles", structure.angles, 9, width)
+    _index_section(lines, "NPHI: dihedrals", structure.dihedrals, 8, width)
+    _index_section(lines, "NIMPHI: impropers", structure.impropers, 8, width)
+    _index_section(lines, "NDON: donors", [], 8, width)
+    _index_section(lines, "NACC: acceptors", [], 8, width)
+    # Sin exclusiones explícitas: lista vacía + un 0 por átomo
+    lines += [f"{0:{width}d} !NNB", ""]
+    n_atoms = len(structure.names)
+    lines += [f"{0:{width}d}" * min(8, n_atoms - start) for start in range(0, n_atoms, 8)]
+    lines += ["", f"{1:{width}d}{0:{width}d} !NGRP", f"{0:{width}d}{0:{width}d}{0:{width}d}", ""]
+    if structure.cmaps:
+        _index_section(lines, "NCRTERM: cross-terms", structure.cmaps, 8, width)
+    return "\n".join(lines) + "\n"
+
+
+def format_pdb(structure: PsfStructure) -> str:
+    """PDB como ``writepdb`` de psfgen: ocupación 0.00 en las coordenadas adivinadas."""
+    lines = ["REMARK original generated coordinate pdb file"]
+    for k, name in enumerate(structure.names):
+        x, y, z = structure.positions[k]
+        atom = f" {name:<3s}" if len(name) < 4 else name
+        lines.append(
+            f"ATOM  {k + 1:5d} {atom} {structure.resnames[k]:<4s}{structure.chains[k]:1s}{structure.resids[k]:4d}    "
+            f"{x:8.3f}{y:8.3f}{z:8.3f}{0.0 if structure.guessed[k] else 1.0:6.2f}{0.0:6.2f}      "
+            f"{structure.segid:<4s}{structure.elements[k]:>2s}"
+        )
+    lines.append("END")
+    return "\n".join(lines) + "\n"
+
+
+def generate_psf_pdb(
+    pdb: Source,
+    out_prefix: Union[str, Path],
+    segid: str = DEFAULT_SEGID,
+    ss_cutoff: float = SSBOND_CUTOFF,
+    rtf_path: Optional[str] = None,
+) -> Tuple[Path, Path, PsfStructure]:
+    """Escribe ``<out_prefix>.psf`` y ``<out_prefix>.pdb``; devuelve (psf, pdb, estructura)."""
+    structure = build_psf(pdb, segid=segid, ss_cutoff=ss_cutoff, rtf_path=rtf_path)
+    psf_path = Path(f"{out_prefix}.psf")
+    pdb_path = Path(f"{out_prefix}.pdb")
+    structure.write_psf(psf_path)
+    structure.write_pdb(pdb_path)
+    return psf_path, pdb_path, structure
@@ -0,0 +1,337 @@
+"""
+Cargas parciales CHARMM36 asignadas desde la topología (RTF), sin PSF.
+
+Reproduce lo que hace psfgen con ``resources/psf_gen.tcl``: alias de residuos
+(HIS→HSE, ...), parche N-terminal (NTER, o GLYP/PROP para Gly/Pro), CTER en el
+último residuo de cada cadena y DISU en los pares CYS con SG–SG < 2.3 Å. Si un
+residuo trae todos sus hidrógenos con nombres reconocibles se usan las cargas
+all-atom; si no, cada hidrógeno se pliega sobre su átomo pesado (carga y masa),
+de modo que la carga total del residuo se conserva aunque el PDB no tenga H.
+
+La topología se parsea una vez por proceso; las plantillas parcheadas se
+cachean por (residuo, parches) y la asignación por átomo es una búsqueda
+vectorizada sobre claves únicas.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import Source, iter_lines
+
+DEFAULT_RTF_PATH = Path(__file__).resolve().parents[3] / "resources" / "top_all36_prot.rtf"
+
+# Mismo cutoff que find_ssbonds en resources/psf_gen.tcl
+SSBOND_CUTOFF = 2.3
+
+# pdbalias residue ... de resources/psf_gen.tcl
+RESIDUE_ALIASES = {
+    "HIS": "HSE", "HID": "HSD", "HIE": "HSE", "HIP": "HSP",
+    "MSE": "MET", "SEC": "CYS", "CYX": "CYS",
+}
+# Nombres PDB/PDBv3 → CHARMM; "*" aplica a cualquier residuo
+ATOM_ALIASES = {
+    "*": {"H": "HN", "OXT": "OT2", "H1": "HT1", "H2": "HT2", "H3": "HT3"},
+    "ILE": {"CD1": "CD", "HD11": "HD1", "HD12": "HD2", "HD13": "HD3", "HG12": "HG11", "HG13": "HG12"},
+    "SER": {"HG": "HG1"},
+    "CYS": {"HG": "HG1"},
+    "MET": {"SE": "SD"},
+}
+# Si el RTF no declara DEFA FIRS/LAST
+DEFAULT_FIRST_PATCH = "NTER"
+DEFAULT_LAST_PATCH = "CTER"
+
+IC = Tuple[Tuple[str, str, str, str], bool, Tuple[float, float, float, float, float]]
+
+
+@dataclass
+class Block:
+    """RESI o PRES tal como aparece en el RTF.
+
+    Los nombres conservan los prefijos: ``+N``/``-C`` (residuo vecino) en
+    residuos y ``1SG``/``2SG`` (residuo del parche) en parches de dos residuos.
+    """
+
+    atoms: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+    deletes: List[str] = field(default_factory=list)
+    bonds: List[Tuple[str, str]] = field(default_factory=list)
+    impropers: List[Tuple[str, ...]] = field(default_factory=list)
+    cmaps: List[Tuple[str, ...]] = field(default_factory=list)
+    # (I, J, K, L), impropia (``*K``), (R(IJ|IK), T(IJK|IKJ), PHI, T(JKL), R(KL))
+    ics: List[IC] = field(default_factory=list)
+    first_patch: Optional[str] = None
+    last_patch: Optional[str] = None
+
+
+@dataclass
+class Topology:
+    masses: Dict[str, float]
+    residues: Dict[str, Block]
+    patches: Dict[str, Block]
+    default_first: str = DEFAULT_FIRST_PATCH
+    default_last: str = DEFAULT_LAST_PATCH
+
+    def first_patch(self, resname: str) -> str:
+        """Parche N-terminal: PATCHING FIRS del residuo (GLYP, PROP) o DEFA FIRS."""
+        return self.residues[resname].first_patch or self.default_first
+
+    def last_patch(self, resname: str) -> str:
+        return self.residues[resname].last_patch or self.default_last
+
+
+def strip_patch_prefix(name: str) -> str:
+    # DISU usa 1CB/2SG para los dos residuos; ambos lados tienen las mismas cargas
+    return name[1:] if len(name) > 1 and name[0].isdigit() else name
+
+
+def _terminal_patches(fields: List[str]) -> Dict[str, str]:
+    # "DEFA FIRS NTER LAST CTER" / "PATCHING FIRS GLYP"
+    return {key[:4]: value for key, value in zip(fields[1::2], fields[2::2])}
+
+
+def parse_rtf(source: Source) -> Topology:
+    """Parsea MASS, DEFA, RESI/PRES, ATOM, DELETE ATOM, BOND/DOUBLE, IMPR, CMAP, IC y PATCHING."""
+    masses: Dict[str, float] = {}
+    residues: Dict[str, Block] = {}
+    patches: Dict[str, Block] = {}
+    defaults: Dict[str, str] = {}
+    current: Optional[Block] = None
+    for raw in iter_lines(source):
+        line = raw.decode("ascii", errors="replace").split("!", 1)[0].strip()
+        if not line or line.startswith("*"):
+            continue
+        fields = line.upper().split()
+        keyword = fields[0][:4]
+        if keyword == "MASS" and len(fields) >= 4:
+            masses[fields[2]] = float(fields[3])
+        elif keyword == "DEFA":
+            defaults = _terminal_patches(fields)
+        elif keyword in ("RESI", "PRES") and len(fields) >= 2:
+            current = Block()
+            (patches if keyword == "PRES" else residues)[fields[1]] = current
+        elif current is None:
+            continue
+        elif keyword == "ATOM" and len(fields) >= 4:
+            current.atoms[fields[1]] = (fields[2], float(fields[3]))
+        elif keyword == "DELE" and len(fields) >= 3 and fields[1][:4] == "ATOM":
+            current.deletes.append(fields[2])
+        elif keyword in ("BOND", "DOUB"):
+            current.bonds.extend(zip(fields[1::2], fields[2::2]))
+        elif keyword in ("IMPR", "IMPH"):
+            current.impropers.extend(tuple(fields[k:k + 4]) for k in range(1, len(fields) - 3, 4))
+        elif keyword == "CMAP" and len(fields) >= 9:
+            current.cmaps.append(tuple(fields[1:9]))
+        elif keyword == "IC" and len(fields) >= 10:
+            improper = fields[3].startswith("*")
+            names = (fields[1], fields[2], fields[3].lstrip("*"), fields[4])
+            current.ics.append((names, improper, tuple(float(v) for v in fields[5:10])))
+        elif keyword == "PATC":
+            patching = _terminal_patches(fields)
+            current.first_patch = patching.get("FIRS")
+            current.last_patch = patching.get("LAST")
+        elif keyword == "END":
+            break
+    return Topology(
+        masses=masses,
+        residues=residues,
+        patches=patches,
+        default_first=defaults.get("FIRS", DEFAULT_FIRST_PATCH),
+        default_last=defaults.get("LAST", DEFAULT_LAST_PATCH),
+    )
+
+
+@lru_cache(maxsize=4)
+def load_topology(path: Optional[str] = None) -> Topology:
+    """Topología CHARMM parseada una sola vez por ruta."""
+    return parse_rtf(str(path or DEFAULT_RTF_PATH))
+
+
+def _is_hydrogen(name: str) -> bool:
+    return name.lstrip("0123456789").startswith("H")
+
+
+@dataclass
+class _Template:
+    """Plantilla parcheada: cargas/masas all-atom y con hidrógenos plegados (united-atom)."""
+
+    all_atom: Dict[str, Tuple[float, float]]
+    united: Dict[str, Tuple[float, float]]
+
+    def resolve(self, name: str, resname: str) -> Optional[str]:
+        if name in self.all_atom:
+            return name
+        for table in (ATOM_ALIASES.get(resname, {}), ATOM_ALIASES["*"]):
+            alias = table.get(name)
+            if alias in self.all_atom:
+                return alias
+        if name == "O" and "OT1" in self.all_atom:
+            return "OT1"
+        # PDBv3 numera los metilenos 2/3; CHARMM 1/2 (cargas idénticas)
+        if _is_hydrogen(name) and name.endswith("3") and name[:-1] + "1" in self.all_atom:
+            return name[:-1] + "1"
+        return None
+
+
+@lru_cache(maxsize=256)
+def _template(resname: str, patch_names: Tuple[str, ...], rtf_path: Optional[str] = None) -> _Template:
+    topology = load_topology(rtf_path)
+    residue = topology.residues[resname]
+    atoms = dict(residue.atoms)
+    bonds = list(residue.bonds)
+    for patch_name in patch_names:
+        patch = topology.patches[patch_name]
+        for name in patch.deletes:
+            atoms.pop(strip_patch_prefix(name), None)
+        atoms.update({strip_patch_prefix(n): v for n, v in patch.atoms.items()})
+        bonds.extend((strip_patch_prefix(a), strip_patch_prefix(b)) for a, b in patch.bonds)
+
+    all_atom = {name: (charge, topology.masses.get(atom_type, 0.0)) for name, (atom_type, charge) in atoms.items()}
+    united = {name: list(values) for name, values in all_atom.items() if not _is_hydrogen(name)}
+    for a, b in bonds:
+        # Enlaces con +N/-C apuntan al residuo vecino: no existen en all_atom
+        if a in all_atom and b in all_atom and _is_hydrogen(a) != _is_hydrogen(b):
+            hydrogen, heavy = (a, b) if _is_hydrogen(a) else (b, a)
+            united[heavy][0] += all_atom[hydrogen][0]
+            united[heavy][1] += all_atom[hydrogen][1]
+    return _Template(all_atom=all_atom, united={k: (v[0], v[1]) for k, v in united.items()})
+
+
+def _read_protein_atoms(pdb: Source, residues: Dict[str, Block]):
+    """Átomos del primer modelo cuyo residuo (tras alias) existe en la topología."""
+    names, resnames, res_keys, hydrogen, columns = [], [], [], [], []
+    for line in iter_lines(pdb):
+        if line.startswith((b"ATOM", b"HETATM")):
+            if line[16:17] not in (b" ", b"A", b""):
+                continue  # sólo la primera conformación alternativa
+            resname = line[17:21].strip().decode("ascii", errors="replace")
+            resname = RESIDUE_ALIASES.get(resname, resname)
+            if resname not in residues:
+                continue
+            name = line[12:16].strip().decode("ascii", errors="replace")
+            element = line[76:78].strip().upper()
+            names.append(name)
+            resnames.append(resname)
+            res_keys.append((line[21:22], line[22:27]))
+            hydrogen.append(element == b"H" if element else _is_hydrogen(name))
+            columns.append(line[30:54].ljust(24))
+        elif line.startswith((b"ENDMDL", b"END")) and columns:
+            break
+    if not columns:
+        raise ValueError("PDB sin residuos de proteína reconocidos por la topología")
+    positions = np.frombuffer(b"".join(columns), dtype="S8").astype(np.float64).reshape(-1, 3).astype(np.float32)
+    return names, resnames, res_keys, np.array(hydrogen, dtype=bool), positions
+
+
+def disulfide_pairs(sg_positions: np.ndarray, cutoff: float = SSBOND_CUTOFF) -> List[Tuple[int, int]]:
+    """Pares (i, j) de cisteínas (índices en sg_positions) con SG–SG < cutoff.
+
+    Emparejamiento greedy por distancia creciente sin reutilizar cisteínas, como
+    ``find_ssbonds`` en ``resources/psf_gen.tcl``.
+    """
+    if len(sg_positions) < 2:
+        return []
+    diff = sg_positions[:, np.newaxis, :] - sg_positions[np.newaxis, :, :]
+    distances = np.sqrt((diff.astype(np.float64) ** 2).sum(axis=2))
+    i, j = np.triu_indices(len(sg_positions), k=1)
+    close = distances[i, j] < cutoff
+    used: set = set()
+    pairs: List[Tuple[int, int]] = []
+    for a, b in sorted(zip(i[close], j[close]), key=lambda p: distances[p[0], p[1]]):
+        if a not in used and b not in used:
+            used.update((int(a), int(b)))
+            pairs.append((int(a), int(b)))
+    return pairs
+
+
+@dataclass
+class ResidueAtoms:
+    """Átomos de la proteína con su residuo: lo que ``topology_arrays`` descarta."""
+
+    charges: np.ndarray          # float32 por átomo
+    positions: np.ndarray        # float32 (n, 3)
+    masses: np.ndarray           # float64
+    residue_index: np.ndarray    # índice del residuo de cada átomo
+    atom_names: List[str]        # nombre CHARMM resuelto
+    resnames: List[str]          # por residuo, tras alias (HSE, HSD, ...)
+    residue_keys: List[Tuple[str, str]]  # por residuo: (cadena, resSeq + iCode)
+
+
+def topology_arrays(pdb: Source, rtf_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(cargas float32, posiciones float32, masas float64) de la proteína según la topología CHARMM.
+
+    Lanza ValueError si el PDB no tiene proteína reconocible o trae átomos pesados
+    que no existen en la plantilla de su residuo.
+    """
+    atoms = topology_residue_atoms(pdb, rtf_path)
+    return atoms.charges, atoms.positions, atoms.masses
+
+
+def topology_residue_atoms(pdb: Source, rtf_path: Optional[str] = None) -> ResidueAtoms:
+    """Igual que ``topology_arrays`` pero conservando residuo y nombre de cada átomo."""
+    topology = load_topology(rtf_path)
+    names, resnames, res_keys, hydrogen, positions = _read_protein_atoms(pdb, topology.residues)
+
+    # Residuos consecutivos: (cadena, resSeq + iCode)
+    starts = [0] + [k for k in range(1, len(res_keys)) if res_keys[k] != res_keys[k - 1]]
+    bounds = list(zip(starts, starts[1:] + [len(res_keys)]))
+    chains = [res_keys[s][0] for s, _ in bounds]
+    patches: List[List[str]] = [[] for _ in bounds]
+    for r, chain in enumerate(chains):
+        if r == 0 or chains[r - 1] != chain:
+            patches[r].append(topology.first_patch(resnames[bounds[r][0]]))
+        if r == len(chains) - 1 or chains[r + 1] != chain:
+            patches[r].append(topology.last_patch(resnames[bounds[r][0]]))
+
+    cys = [r for r, (s, e) in enumerate(bounds) if resnames[s] == "CYS" and "SG" in names[s:e]]
+    sg = np.array([positions[bounds[r][0] + names[bounds[r][0]:bounds[r][1]].index("SG")] for r in cys]).reshape(-1, 3)
+    for pair in disulfide_pairs(sg):
+        for k in pair:
+            patches[cys[k]].append("DISU")
+
+    # Clave por átomo "plantilla|modo|nombre": se resuelve una vez por clave única
+    keep = np.ones(len(names), dtype=bool)
+    keys: List[str] = []
+    kept_residue: List[int] = []
+    kept_names: List[str] = []
+    lookup: Dict[str, Tuple[float, float]] = {}
+    for r, (s, e) in enumerate(bounds):
+        resname = resnames[s]
+        tpl = _template(resname, tuple(patches[r]), rtf_path)
+        resolved = [tpl.resolve(n, resname) for n in names[s:e]]
+        complete_h = all(resolved) and len(set(resolved)) == e - s and set(resolved) == set(tpl.all_atom)
+        table = tpl.all_atom if complete_h else tpl.united
+        mode = "aa" if complete_h else "ua"
+        seen = set()
+        for k in range(s, e):
+            name = resolved[k - s]
+            if not complete_h and hydrogen[k]:
+                keep[k] = False
+                continue
+            if name is None or name not in table:
+                raise ValueError(f"Átomo {names[k]} no existe en la plantilla CHARMM de {resname}")
+            if name in seen:
+                keep[k] = False
+                continue
+            seen.add(name)
+            key = f"{resname}+{'+'.join(patches[r])}|{mode}|{name}"
+            lookup[key] = table[name]
+            keys.append(key)
+            kept_residue.append(r)
+            kept_names.append(name)
+
+    unique, inverse = np.unique(np.array(keys), return_inverse=True)
+    values = np.array([lookup[k] for k in unique], dtype=np.float64).reshape(-1, 2)
+    charges = values[inverse, 0].astype(np.float32)
+    masses = values[inverse, 1]
+    return ResidueAtoms(
+        charges=charges,
+        positions=positions[keep],
+        masses=masses,
+        residue_index=np.array(kept_residue, dtype=np.intp),
+        atom_names=kept_names,
+        resnames=[resnames[s] for s, _ in bounds],
+        residue_keys=[(res_keys[s][0].decode("ascii", errors="replace"),
+                       res_keys[s][1].strip().decode("ascii", errors="replace")) for s, _ in bounds],
+    )
@@ -0,0 +1,133 @@
+"""
+Superposición Kabsch por lotes anclada en las cisteínas conservadas.
+
+Las toxinas ICK comparten el andamiaje de cisteínas, así que la i-ésima
+cisteína de cada estructura se empareja con la i-ésima de la referencia y se
+usan sus átomos de backbone (N, CA, C) como puntos ancla. Las matrices de
+covarianza (N, 3, 3) se acumulan por segmento con ``np.add.reduceat`` y se
+descomponen con una sola llamada a ``np.linalg.svd``.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.infrastructure.pdb.psf_reader import Source, iter_lines
+
+# Incrementar si cambia el anclaje o el kernel: invalida la tabla superpositions
+SUPERPOSITION_VERSION = "1"
+
+BACKBONE_ATOMS = ("N", "CA", "C")
+CYSTEINE_RESNAMES = frozenset({"CYS", "CYX", "CYM", "CYS1", "CYS2"})
+# Andamiaje ICK: C1..C6
+MAX_ANCHOR_CYSTEINES = 6
+# Con menos cisteínas emparejadas la superposición no es fiable
+MIN_ANCHOR_CYSTEINES = 3
+
+
+def cysteine_backbone(source: Source) -> np.ndarray:
+    """(n_cys, 3, 3) con N, CA, C de cada cisteína en orden de secuencia; NaN si falta un átomo."""
+    residues: Dict[Tuple[bytes, bytes], Dict[bytes, Tuple[float, float, float]]] = {}
+    order: List[Tuple[bytes, bytes]] = []
+    for line in iter_lines(source):
+        if line.startswith((b"ATOM", b"HETATM")):
+            if line[17:21].strip().decode("ascii", errors="replace") not in CYSTEINE_RESNAMES:
+                continue
+            key = (line[21:22], line[22:27])  # cadena, resSeq + iCode
+            if key not in residues:
+                residues[key] = {}
+                order.append(key)
+            name = line[12:16].strip()
+            if name not in residues[key]:
+                residues[key][name] = (float(line[30:38]), float(line[38:46]), float(line[46:54]))
+        elif line.startswith(b"ENDMDL") and order:
+            break
+    coords = np.full((len(order), len(BACKBONE_ATOMS), 3), np.nan)
+    for i, key in enumerate(order):
+        for j, atom in enumerate(BACKBONE_ATOMS):
+            xyz = residues[key].get(atom.encode("ascii"))
+            if xyz is not None:
+                coords[i, j] = xyz
+    return coords
+
+
+def anchor_pairs(mobile_cys: np.ndarray, target_cys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Puntos ancla emparejados (m, 3) por ordinal de cisteína y nº de cisteínas usadas."""
+    k = min(len(mobile_cys), len(target_cys), MAX_ANCHOR_CYSTEINES)
+    mobile = mobile_cys[:k].reshape(-1, 3)
+    target = target_cys[:k].reshape(-1, 3)
+    complete = ~(np.isnan(mobile).any(axis=1) | np.isnan(target).any(axis=1))
+    return mobile[complete], target[complete], k
+
+
+def kabsch_batch(
+    mobile: np.ndarray, target: np.ndarray, counts: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rotaciones óptimas para varios pares de nubes de puntos concatenadas.
+
+    ``counts[i]`` es el nº de puntos del par i (todos > 0). Devuelve
+    (rotaciones (N, 3, 3), traslaciones (N, 3), RMSD (N,)) tales que
+    ``R @ x + t`` lleva la estructura móvil sobre la de referencia.
+    """
+    counts = np.asarray(counts, dtype=np.intp)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    n = counts[:, np.newaxis].astype(float)
+    mobile_centroid = np.add.reduceat(mobile, offsets, axis=0) / n
+    target_centroid = np.add.reduceat(target, offsets, axis=0) / n
+    p = mobile - np.repeat(mobile_centroid, counts, axis=0)
+    q = target - np.repeat(target_centroid, counts, axis=0)
+
+    covariance = np.add.reduceat(p[:, :, np.newaxis] * q[:, np.newaxis, :], offsets, axis=0)
+    u, _, vt = np.linalg.svd(covariance)
+    # Corrección de reflexión: det(R) = +1
+    d = np.sign(np.linalg.det(np.matmul(vt.transpose(0, 2, 1), u.transpose(0, 2, 1))))
+    d[d == 0] = 1.0
+    correction = np.tile(np.eye(3), (len(counts), 1, 1))
+    correction[:, 2, 2] = d
+    rotations = vt.transpose(0, 2, 1) @ correction @ u.transpose(0, 2, 1)
+    translations = target_centroid - np.einsum("nij,nj->ni", rotations, mobile_centroid)
+
+    rotated = np.einsum("nij,nj->ni", np.repeat(rotations, counts, axis=0), p)
+    rmsd = np.sqrt(np.add.reduceat(((rotated - q) ** 2).sum(axis=1), offsets) / counts)
+    return rotations, translations, rmsd
+
+
+def rotate_vectors(rotations: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Aplica R_i a v_i para cada fila (vectores libres: sin traslación)."""
+    return np.einsum("nij,nj->ni", rotations, vectors)
+
+
+def superpose_on_cysteines(
+    reference: Source, structures: Sequence[Source]
+) -> List[Optional[Dict[str, object]]]:
+    """Superpone cada estructura sobre la referencia; None donde no hay anclas suficientes.
+
+    Cada resultado: ``{'rotation', 'translation', 'rmsd', 'n_anchor_cysteines', 'n_anchor_atoms'}``.
+    """
+    target_cys = cysteine_backbone(reference)
+    mobiles, targets, counts, used, index = [], [], [], [], []
+    for i, source in enumerate(structures):
+        try:
+            p, q, k = anchor_pairs(cysteine_backbone(source), target_cys)
+        except (OSError, ValueError):
+            continue
+        if k < MIN_ANCHOR_CYSTEINES or len(p) < 3:
+            continue
+        mobiles.append(p)
+        targets.append(q)
+        counts.append(len(p))
+        used.append(k)
+        index.append(i)
+
+    results: List[Optional[Dict[str, object]]] = [None] * len(structures)
+    if not index:
+        return results
+    rotations, translations, rmsd = kabsch_batch(np.concatenate(mobiles), np.concatenate(targets), counts)
+    for j, i in enumerate(index):
+        results[i] = {
+            "rotation": rotations[j],
+            "translation": translations[j],
+            "rmsd": float(rmsd[j]),
+            "n_anchor_cysteines": used[j],
+            "n_anchor_atoms": counts[j],
+        }
+    return results
@@ -0,0 +1,111 @@
+"""
+Sesión persistente de VMD/psfgen para generar muchos PSF con un solo arranque.
+
+Lanzar ``vmd -dispdev text`` por péptido domina el tiempo del motor "vmd"
+de ``extractors/generate_filtered_psfs.py``. ``VMDSession`` arranca VMD una
+vez con un bucle Tcl que lee un trabajo por línea en stdin, llama a
+``build_psf_with_disulfides`` (``resources/psf_gen.tcl``, que ya reutiliza
+topologías y alias entre llamadas) e imprime un marcador de fin por trabajo.
+
+Protocolo (campos separados por tabulador, una línea por mensaje):
+
+- arranque: VMD imprime ``@@VMD_READY``.
+- trabajo: ``job <id> <pdb> <prefijo_salida> <segid> <cutoff>``; la respuesta
+  es el log de psfgen, ``PSF_OUT:``/``PDB_OUT:`` si terminó bien y
+  ``@@JOB_DONE <id> ok|error``.
+- cierre: ``quit``.
+
+Si VMD muere o un trabajo supera ``job_timeout`` el proceso se descarta y el
+siguiente trabajo arranca una sesión nueva (cliente común en
+``psf_worker.PSFWorkerSession``).
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from src.infrastructure.pdb.psf_worker import (
+    DEFAULT_JOB_TIMEOUT,
+    DEFAULT_STARTUP_TIMEOUT,
+    DONE_MARKER,
+    PSFWorkerSession,
+)
+
+READY_MARKER = "@@VMD_READY"
+
+_DRIVER_TCL = """package require psfgen
+source {{{script}}}
+fconfigure stdout -buffering line
+set topologies [list {topologies}]
+puts "{ready}"
+while {{[gets stdin line] >= 0}} {{
+    set fields [split $line "\\t"]
+    if {{[lindex $fields 0] ne "job"}} {{ break }}
+    lassign $fields cmd id in_pdb out_prefix segid cutoff
+    if {{[catch {{build_psf_with_disulfides $in_pdb $topologies $out_prefix $segid $cutoff}} res]}} {{
+        puts "ERROR: $res"
+        puts "{done} $id error"
+    }} else {{
+        puts "PSF_OUT:[lindex $res 0]"
+        puts "PDB_OUT:[lindex $res 1]"
+        puts "{done} $id ok"
+    }}
+    flush stdout
+}}
+exit
+"""
+
+
+class VMDSession(PSFWorkerSession):
+    """Proceso VMD de larga vida que procesa trabajos de psfgen por stdin.
+
+    ``vmd_command`` es el prefijo del ejecutable (``("vmd",)`` por defecto); se
+    le añaden ``-dispdev text -e <driver.tcl>``. No es thread-safe: usar una
+    sesión por hilo/proceso.
+    """
+
+    ready_marker = READY_MARKER
+    name = "VMD"
+
+    def __init__(
+        self,
+        tcl_script_path: Union[str, Path],
+        topology_files: Sequence[Union[str, Path]],
+        *,
+        vmd_command: Sequence[str] = ("vmd",),
+        job_timeout: float = DEFAULT_JOB_TIMEOUT,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    ):
+        super().__init__(vmd_command, job_timeout=job_timeout, startup_timeout=startup_timeout)
+        self.tcl_script_path = Path(tcl_script_path)
+        self.topology_files = [Path(t) for t in topology_files]
+        self._driver: Optional[Path] = None
+
+    @property
+    def vmd_command(self) -> List[str]:
+        return self.command
+
+    def _command(self) -> List[str]:
+        if self._driver is None:
+            self._driver = self._write_driver()
+        return self.command + ["-dispdev", "text", "-e", str(self._driver)]
+
+    def close(self) -> None:
+        """Cierra VMD y borra el driver Tcl temporal."""
+        super().close()
+        if self._driver is not None:
+            try:
+                self._driver.unlink(missing_ok=True)
+            except OSError:
+                pass
+            self._driver = None
+
+    def _write_driver(self) -> Path:
+        topologies = " ".join("{%s}" % t for t in self.topology_files)
+        body = _DRIVER_TCL.format(
+            script=self.tcl_script_path, topologies=topologies, ready=READY_MARKER, done=DONE_MARKER
+        )
+        fd, path = tempfile.mkstemp(suffix=".tcl", prefix="vmd_session_")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(body)
+        return Path(path)
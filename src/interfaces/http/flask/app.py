@@ -51,6 +51,7 @@ def create_app_v2() -> Flask:
             psf_dir = "psfs"
             wt_reference_path = os.path.join("pdbs", "WT", "generated", "hwt4_Hh2a_WT.pdb")
             wt_reference_psf_path = os.path.join("pdbs", "WT", "generated", "hwt4_Hh2a_WT.psf")
+            shared_cache_path = os.path.join("cache", "shared_cache.db")
         cfg = _CF()
     # Expose config for debugging/diagnostics
     try:
@@ -60,6 +61,8 @@ def create_app_v2() -> Flask:
             'psf_dir': getattr(cfg, 'psf_dir', None),
             'wt_reference_path': getattr(cfg, 'wt_reference_path', None),
             'wt_reference_psf_path': getattr(cfg, 'wt_reference_psf_path', None),
+            'metrics_time_budget': getattr(cfg, 'metrics_time_budget', None),
+            'shared_cache_path': getattr(cfg, 'shared_cache_path', None),
         }
     except Exception:
         pass
@@ -68,11 +71,22 @@ def create_app_v2() -> Flask:
     from src.infrastructure.db.sqlite.metadata_repository_sqlite import SqliteMetadataRepository
     from src.infrastructure.db.sqlite.family_repository_sqlite import SqliteFamilyRepository
     from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
+    from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+    from src.infrastructure.db.sqlite.gnm_repository_sqlite import SqliteGnmRepository
+    from src.infrastructure.db.sqlite.peptide_dipole_repository_sqlite import SqlitePeptideDipoleRepository
+    from src.infrastructure.db.sqlite.superposition_repository_sqlite import SqliteSuperpositionRepository
+    from src.infrastructure.db.sqlite.shared_cache_sqlite import SqliteSharedCache
 
     structures_repo = SqliteStructureRepository(db_path=cfg.db_path)
     metadata_repo = SqliteMetadataRepository(db_path=cfg.db_path)
     family_repo = SqliteFamilyRepository(db_path=cfg.db_path)
     toxin_repo = SqliteToxinRepository(db_path=cfg.db_path)
+    graph_metrics_repo = SqliteGraphMetricsRepository(db_path=cfg.db_path)
+    gnm_repo = SqliteGnmRepository(db_path=cfg.db_path)
+    peptide_dipole_repo = SqlitePeptideDipoleRepository(db_path=cfg.db_path)
+    superposition_repo = SqliteSuperpositionRepository(db_path=cfg.db_path)
+    # Caché compartida entre workers (referencias de motivos, mapas de IC50 de la IA)
+    shared_cache = SqliteSharedCache(db_path=getattr(cfg, 'shared_cache_path', os.path.join('cache', 'shared_cache.db')))
 
     # Infrastructure services / adapters
     from src.infrastructure.graphein.graphein_graph_adapter import GrapheinGraphAdapter
@@ -89,21 +103,29 @@ def create_app_v2() -> Flask:
 
     # Use cases
     from src.application.use_cases.build_protein_graph import BuildProteinGraph
+    from src.application.use_cases.compute_gnm import ComputeGnm
     from src.application.use_cases.calculate_dipole import CalculateDipole
+    from src.application.use_cases.resolve_peptide_dipoles import ResolvePeptideDipoles
+    from src.application.use_cases.superpose_to_reference import SuperposeToReference
     from src.application.use_cases.export_residue_report import ExportResidueReport
     from src.application.use_cases.export_atomic_segments import ExportAtomicSegments
     from src.application.use_cases.export_family_reports import ExportFamilyReports
+    from src.application.use_cases.export_wt_comparison import ExportWTComparison
     from src.application.use_cases.list_peptides import ListPeptides
 
     # Use new DipoleAdapter instead of legacy service
     from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
 
-    build_graph_uc = BuildProteinGraph(graphein_adapter)
+    build_graph_uc = BuildProteinGraph(graphein_adapter, graph_metrics_repo)
+    gnm_uc = ComputeGnm(graphein_adapter, gnm_repo)
     dipole_service = DipoleAdapter()
     calculate_dipole_uc = CalculateDipole(structures_repo, dipole_service, metadata_repo, pdb_preprocessor)
-    export_residues_uc = ExportResidueReport(structures_repo, excel_exporter, pdb_preprocessor, temp_files, metadata_repo)
-    export_segments_uc = ExportAtomicSegments(structures_repo, metadata_repo, pdb_preprocessor, temp_files)
-    export_family_uc = ExportFamilyReports(metadata_repo, structures_repo, excel_exporter, pdb_preprocessor)
+    peptide_dipoles_uc = ResolvePeptideDipoles(dipole_service, peptide_dipole_repo)
+    superpose_uc = SuperposeToReference(superposition_repo)
+    export_residues_uc = ExportResidueReport(structures_repo, excel_exporter, pdb_preprocessor, temp_files, metadata_repo, metrics_repo=graph_metrics_repo, gnm_repo=gnm_repo)
+    export_segments_uc = ExportAtomicSegments(structures_repo, metadata_repo, pdb_preprocessor, temp_files, metrics_repo=graph_metrics_repo)
+    export_family_uc = ExportFamilyReports(metadata_repo, structures_repo, excel_exporter, pdb_preprocessor, metrics_repo=graph_metrics_repo)
+    export_wt_uc = ExportWTComparison(metadata_repo, structures_repo, excel_exporter, metrics_repo=graph_metrics_repo)
     list_peptides_uc = ListPeptides  # class; instantiated per request where needed
 
     # Register only v2 blueprints from the new architecture. Routes already include /v2.
@@ -118,7 +140,7 @@ def create_app_v2() -> Flask:
             export_uc=export_residues_uc,
             segments_uc=export_segments_uc,
             family_uc=export_family_uc,
-            wt_uc=None,
+            wt_uc=export_wt_uc,
             default_reference_path=getattr(cfg, 'wt_reference_path', None),
         )
         app.register_blueprint(export_v2)
@@ -133,6 +155,7 @@ def create_app_v2() -> Flask:
             structures_repo=structures_repo,
             metadata_repo=metadata_repo,
             use_case=calculate_dipole_uc,
+            peptide_dipoles_uc=peptide_dipoles_uc,
         )
         app.register_blueprint(dipole_v2)
     except Exception as e:
@@ -155,6 +178,7 @@ def create_app_v2() -> Flask:
             families_repo=family_repo,
             structures_repo=structures_repo,
             dipole_service=dipole_service,
+            peptide_dipoles_uc=peptide_dipoles_uc,
         )
         app.register_blueprint(families_v2)
     except Exception as e:
@@ -174,6 +198,9 @@ def create_app_v2() -> Flask:
             dipole_adapter=dipole_service,
             reference_pdb=getattr(cfg, 'wt_reference_path', None),
             reference_psf=getattr(cfg, 'wt_reference_psf_path', None),
+            peptide_dipoles_uc=peptide_dipoles_uc,
+            superpose_uc=superpose_uc,
+            shared_cache=shared_cache,
         )
         app.register_blueprint(motif_dipoles_v2)
     except Exception as e:
@@ -187,6 +214,10 @@ def create_app_v2() -> Flask:
             temp_files=temp_files,
             visualizer=graph_visualizer,
             build_graph_uc=build_graph_uc,
+            metrics_repo=graph_metrics_repo,
+            gnm_uc=gnm_uc,
+            gnm_repo=gnm_repo,
+            default_time_budget=getattr(cfg, 'metrics_time_budget', None) or 0,
         )
         app.register_blueprint(graphs_v2)  # routes already start with /v2
     except Exception as e:
@@ -260,7 +291,10 @@ def create_app_v2() -> Flask:
     @app.after_request
     def add_cache_headers(response):
         """Add appropriate cache headers to responses"""
-        if response.content_type and 'text/html' in response.content_type:
+        if response.cache_control.private:
+            # Respuestas con ETag propio (grafo, estructura, dipolo): el endpoint ya fijó su política
+            pass
+        elif response.content_type and 'text/html' in response.content_type:
             # HTML: short cache for freshness
             response.headers['Cache-Control'] = 'public, max-age=3600'  # 1 hour
         elif response.content_type and any(ct in response.content_type for ct in ['text/css', 'application/javascript', 'image/']):
@@ -6,12 +6,25 @@ from src.application.use_cases.build_protein_graph import (
     BuildProteinGraph,
     BuildProteinGraphInput,
 )
+from src.application.use_cases.compute_gnm import ComputeGnm, ComputeGnmInput
+from src.application.use_cases.scan_mutants import RANK_KEYS, ScanMutants, ScanMutantsInput
+from extractors.motif_scan import scan_point_mutants
+from extractors.toxins_filter import check_gap_range
 from src.infrastructure.graphein.graphein_graph_adapter import GrapheinGraphAdapter
 from src.infrastructure.graphein.graph_visualizer_adapter import MolstarGraphVisualizerAdapter
 from src.infrastructure.pdb.pdb_preprocessor_adapter import PDBPreprocessorAdapter
 from src.infrastructure.fs.temp_file_service import TempFileService
 from src.interfaces.http.flask.presenters.graph_presenter import GraphPresenter
+from src.interfaces.http.flask.presenters.gnm_presenter import GnmPresenter
+from src.interfaces.http.flask.presenters.mutant_scan_presenter import MutantScanPresenter
 from src.domain.models.value_objects import Granularity, DistanceThreshold
+from src.utils.structure_hash import structure_hash
+from src.utils.http_cache import cache_headers, etag_matches, strong_etag
+from src.utils.client_connection import disconnect_checker
+from src.infrastructure.graph.csr_centrality import MetricBudget, MetricsCancelled
+from src.infrastructure.graph.gnm import DEFAULT_GNM_CUTOFF, DEFAULT_N_MODES
+from src.infrastructure.graph.graph_metrics import METRICS_VERSION
+from src.infrastructure.pdb.mutant_dipoles import AMINO_ACIDS
 
 
 graphs_v2 = Blueprint("graphs_v2", __name__)
@@ -25,13 +38,18 @@ except Exception:
         db_path = "database/toxins.db"
         pdb_dir = "pdbs"
         psf_dir = "psfs"
+        metrics_time_budget = 30.0
 
 _db = SqliteMetadataRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
 _graph = GrapheinGraphAdapter()
 _pdb = PDBPreprocessorAdapter(pdb_dir=getattr(_CFG, 'pdb_dir', None), psf_dir=getattr(_CFG, 'psf_dir', None))
 _tmp = TempFileService()
 _viz = MolstarGraphVisualizerAdapter()
+_metrics_repo = None  # type: ignore[var-annotated]
+_default_time_budget = getattr(_CFG, 'metrics_time_budget', None)
 _build_graph_uc = None  # type: ignore[var-annotated]
+_gnm_uc = None  # type: ignore[var-annotated]
+_gnm_repo = None  # type: ignore[var-annotated]
 
 
 def configure_graphs_dependencies(
@@ -42,8 +60,12 @@ def configure_graphs_dependencies(
     temp_files: TempFileService = None,
     visualizer: MolstarGraphVisualizerAdapter = None,
     build_graph_uc: BuildProteinGraph = None,
+    metrics_repo=None,
+    default_time_budget: float = None,
+    gnm_uc: ComputeGnm = None,
+    gnm_repo=None,
 ):
-    global _db, _graph, _pdb, _tmp, _viz, _build_graph_uc
+    global _db, _graph, _pdb, _tmp, _viz, _build_graph_uc, _metrics_repo, _default_time_budget, _gnm_uc, _gnm_repo
     if metadata_repo is not None:
         _db = metadata_repo
     if graph_adapter is not None:
@@ -56,6 +78,93 @@ def configure_graphs_dependencies(
         _viz = visualizer
     if build_graph_uc is not None:
         _build_graph_uc = build_graph_uc
+    if metrics_repo is not None:
+        _metrics_repo = metrics_repo
+    if default_time_budget is not None:
+        _default_time_budget = default_time_budget if default_time_budget > 0 else None
+    if gnm_uc is not None:
+        _gnm_uc = gnm_uc
+    if gnm_repo is not None:
+        _gnm_repo = gnm_repo
+
+
+def _structure_content(source: str, pdb_data):
+    """Devuelve (contenido PDB, ruta en disco) de la estructura guardada en la BD.
+
+    Para 'toxinas' la BD puede guardar un nombre de archivo en lugar del PDB; si el
+    archivo existe pero no se puede leer, el contenido es None y queda sólo la ruta.
+    """
+    if source == "toxinas":
+        try:
+            # Convert bytes to text if needed
+            text = pdb_data.decode("utf-8", errors="ignore") if isinstance(pdb_data, (bytes, bytearray)) else str(pdb_data)
+            text = text.strip()
+            # Heuristic: if looks like a .pdb filename/path, try to resolve on disk
+            if text.lower().endswith(".pdb") and len(text) < 256:
+                candidates = []
+                # Absolute path
+                if os.path.isabs(text):
+                    candidates.append(text)
+                # Relative to configured pdb_dir if available
+                base_dir = getattr(_pdb, 'pdb_dir', None) or getattr(_CFG, 'pdb_dir', None) or 'pdbs'
+                candidates.append(os.path.join(base_dir, text))
+                # As-is relative to CWD
+                candidates.append(text)
+                for c in candidates:
+                    if os.path.exists(c):
+                        try:
+                            with open(c, 'r', encoding='utf-8', errors='ignore') as f:
+                                return f.read(), c
+                        except Exception:
+                            return None, c
+        except Exception:
+            pass
+    # If we couldn't resolve a path, assume raw content
+    return pdb_data, None
+
+
+def _prepare_pdb_path(content, disk_path):
+    """Devuelve (ruta PDB, es_temporal): el contenido preprocesado en un temporal para Graphein."""
+    if content is None:
+        return disk_path, False
+    try:
+        return _pdb.prepare_temp_pdb(content), True
+    except Exception:
+        if disk_path is None:
+            raise
+        # If preprocessing fails, still pass original path as last resort
+        return disk_path, False
+
+
+def _resolve_pdb_path(source: str, pdb_data):
+    """Devuelve (ruta PDB, es_temporal, hash del contenido) para construir el grafo."""
+    content, disk_path = _structure_content(source, pdb_data)
+    pdb_path, created_temp = _prepare_pdb_path(content, disk_path)
+    return pdb_path, created_temp, structure_hash(content)
+
+
+def _with_cache_headers(response: Response, etag, cacheable: bool = True) -> Response:
+    if etag and cacheable:
+        response.headers.update(cache_headers(etag))
+    return response
+
+
+_WEIGHTED_KEYS = ("betweenness_weighted", "closeness_weighted")
+
+
+def _without_weighted(properties: dict) -> dict:
+    """Copia de ``properties`` sin las variantes ponderadas.
+
+    Una petición ``weighted=1`` amplía la fila compartida de graph_metrics; sin
+    quitarlas, la respuesta ``weighted=0`` cambiaría bajo el mismo ETag.
+    """
+    out = dict(properties)
+    for field in ("centrality", "approximation"):
+        if isinstance(out.get(field), dict):
+            out[field] = {k: v for k, v in out[field].items() if k not in _WEIGHTED_KEYS}
+    if isinstance(out.get("approximation"), dict):
+        out["approximate"] = bool(out["approximation"])
+    return out
 
 
 @graphs_v2.get("/v2/proteins/<string:source>/<int:pid>/graph")
@@ -65,51 +174,31 @@ def get_graph_v2(source: str, pid: int):
         distance_threshold = float(request.args.get("threshold", 10.0))
         granularity = request.args.get("granularity", "CA")
         raw = request.args.get("raw", "0") == "1"
+        weighted = request.args.get("weighted", "0") == "1"
         section = request.args.get("section")  # optional: 'props' | 'fig' | 'all'
+        # Presupuesto de métricas en segundos (0 = sin límite); por defecto el del servidor
+        time_budget = request.args.get("time_budget", type=float)
+        if time_budget is None:
+            time_budget = _default_time_budget
+        budget = MetricBudget(time_budget, is_cancelled=disconnect_checker(request.environ))
 
         # Get PDB from DB
         data = _db.get_complete_toxin_data(source, pid)
         if not data or not data.get("pdb_data"):
             return jsonify({"error": "PDB not found"}), 404
 
-        pdb_path = None
-        created_temp = False
-        pdb_data = data.get("pdb_data")
-        # For 'toxinas', DB may store a filename instead of raw PDB; resolve path
-        if source == "toxinas":
-            try:
-                # Convert bytes to text if needed
-                text = pdb_data.decode("utf-8", errors="ignore") if isinstance(pdb_data, (bytes, bytearray)) else str(pdb_data)
-                text = text.strip()
-                # Heuristic: if looks like a .pdb filename/path, try to resolve on disk
-                if text.lower().endswith(".pdb") and len(text) < 256:
-                    candidates = []
-                    # Absolute path
-                    if os.path.isabs(text):
-                        candidates.append(text)
-                    # Relative to configured pdb_dir if available
-                    base_dir = getattr(_pdb, 'pdb_dir', None) or getattr(_CFG, 'pdb_dir', None) or 'pdbs'
-                    candidates.append(os.path.join(base_dir, text))
-                    # As-is relative to CWD
-                    candidates.append(text)
-                    for c in candidates:
-                        if os.path.exists(c):
-                            # Read and preprocess content into a temp file for Graphein
-                            try:
-                                with open(c, 'r', encoding='utf-8', errors='ignore') as f:
-                                    content = f.read()
-                                pdb_path = _pdb.prepare_temp_pdb(content)
-                                created_temp = True
-                            except Exception:
-                                # If preprocessing fails, still pass original path as last resort
-                                pdb_path = c
-                            break
-            except Exception:
-                pass
-        # If we couldn't resolve a path, assume raw content and write temp file
-        if not pdb_path:
-            pdb_path = _pdb.prepare_temp_pdb(pdb_data)
-            created_temp = True
+        content, disk_path = _structure_content(source, data.get("pdb_data"))
+        content_hash = structure_hash(content)
+        # ETag a partir del blob y de los parámetros: un If-None-Match que coincide no construye nada
+        etag = None
+        if content_hash is not None:
+            etag = strong_etag(
+                "graph", source, pid, content_hash, granularity, distance_threshold,
+                section, raw, weighted, METRICS_VERSION,
+            )
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status=304, headers=cache_headers(etag))
+        pdb_path, created_temp = _prepare_pdb_path(content, disk_path)
 
         try:
             # Wrap in domain value objects for validation and typing
@@ -117,27 +206,42 @@ def get_graph_v2(source: str, pid: int):
                 pdb_path=pdb_path,
                 granularity=Granularity.from_string(granularity),
                 distance_threshold=DistanceThreshold(distance_threshold),
+                structure_hash=content_hash,
+                budget=budget,
+                weighted=weighted,
             )
-            uc = _build_graph_uc if _build_graph_uc is not None else BuildProteinGraph(_graph)
-            result = uc.execute(inp)
+            uc = _build_graph_uc if _build_graph_uc is not None else BuildProteinGraph(_graph, _metrics_repo)
+            try:
+                result = uc.execute(inp)
+            except MetricsCancelled:
+                # El cliente ya no escucha: se corta el trabajo y no se serializa nada
+                return jsonify({"error": "client disconnected"}), 499
+            properties = result["properties"] if weighted else _without_weighted(result["properties"])
+            # Sólo lo que fija el ETag: si las métricas salieron de graph_metrics o se
+            # recalcularon no cambia el resultado, y un ETag fuerte exige el mismo cuerpo
+            metrics_meta = {
+                "approximate": bool(properties.get("approximate")),
+                "weighted": weighted,
+            }
 
             if raw:
                 # Return minimal payload to isolate JSON issues
                 minimal = {
                     "ok": True,
-                    "meta": {"source": source, "id": pid, "granularity": granularity},
+                    "meta": {"source": source, "id": pid, "granularity": granularity, **metrics_meta},
                     "properties": {
-                        "num_nodes": result["properties"].get("num_nodes"),
-                        "num_edges": result["properties"].get("num_edges"),
+                        "num_nodes": properties.get("num_nodes"),
+                        "num_edges": properties.get("num_edges"),
                     },
                 }
                 import json
-                return Response(json.dumps(minimal, ensure_ascii=False), mimetype='application/json')
+                response = Response(json.dumps(minimal, ensure_ascii=False), mimetype='application/json')
+                return _with_cache_headers(response, etag, not metrics_meta["approximate"])
             # Build WebGL-optimized visualization data (nodes + edges)
             graph_data = _viz.create_complete_visualization(result["graph"], granularity, pid)
             payload = GraphPresenter.present(
-                properties=result["properties"],
-                meta={"source": source, "id": pid, "granularity": granularity},
+                properties=properties,
+                meta={"source": source, "id": pid, "granularity": granularity, **metrics_meta},
                 graph_data=_viz.convert_numpy_to_lists(graph_data)
             )
             # Optional: allow isolating sections to debug serialization
@@ -172,7 +276,8 @@ def get_graph_v2(source: str, pid: int):
                 return o
 
             body = json.dumps(normalize(obj), ensure_ascii=False)
-            return Response(body, mimetype='application/json')
+            # Sólo los resultados completos son inmutables; uno aproximado por presupuesto no se cachea
+            return _with_cache_headers(Response(body, mimetype='application/json'), etag, not metrics_meta["approximate"])
         finally:
             if created_temp and 'pdb_path' in locals() and pdb_path:
                 try:
@@ -181,3 +286,91 @@ def get_graph_v2(source: str, pid: int):
                     pass
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@graphs_v2.get("/v2/proteins/<string:source>/<int:pid>/gnm")
+def get_gnm_v2(source: str, pid: int):
+    try:
+        distance_threshold = float(request.args.get("threshold", DEFAULT_GNM_CUTOFF))
+        n_modes = int(request.args.get("modes", DEFAULT_N_MODES))
+        with_correlations = request.args.get("correlations", "1") != "0"
+        if n_modes < 1:
+            return jsonify({"error": "modes must be >= 1"}), 400
+
+        data = _db.get_complete_toxin_data(source, pid)
+        if not data or not data.get("pdb_data"):
+            return jsonify({"error": "PDB not found"}), 404
+
+        pdb_path, created_temp, content_hash = _resolve_pdb_path(source, data.get("pdb_data"))
+        try:
+            inp = ComputeGnmInput(
+                pdb_path=pdb_path,
+                distance_threshold=DistanceThreshold(distance_threshold),
+                n_modes=n_modes,
+                structure_hash=content_hash,
+                with_correlations=with_correlations,
+            )
+            uc = _gnm_uc if _gnm_uc is not None else ComputeGnm(_graph, _gnm_repo)
+            result = uc.execute(inp)
+            payload = GnmPresenter.present(
+                result,
+                meta={"source": source, "id": pid, "granularity": "CA", "threshold": distance_threshold, "modes": n_modes},
+            )
+            return jsonify(payload)
+        finally:
+            if created_temp and pdb_path:
+                try:
+                    _tmp.cleanup([pdb_path])
+                except Exception:
+                    pass
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _mutant_scan_input(pdb: bytes) -> ScanMutantsInput:
+    args = request.args
+    targets = args.get("targets", AMINO_ACIDS).upper()
+    if not targets or set(targets) - set(AMINO_ACIDS):
+        raise ValueError(f"targets debe contener sólo {AMINO_ACIDS}")
+    rank_by = args.get("rank_by", "score")
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by debe ser uno de {RANK_KEYS}")
+    positions = args.get("positions")
+    gap_min, gap_max = int(args.get("gap_min", 3)), int(args.get("gap_max", 6))
+    check_gap_range(gap_min, gap_max)
+    return ScanMutantsInput(
+        pdb=pdb,
+        targets=targets,
+        positions=[int(p) for p in positions.split(",") if p.strip()] if positions else None,
+        gap_min=gap_min,
+        gap_max=gap_max,
+        rank_by=rank_by,
+        ascending=args.get("order", "desc") == "asc",
+        top_k=max(1, min(1000, int(args.get("top_k", 20)))),
+        weights={k: float(args.get(f"w_{k}", 1.0)) for k in ("motif", "charge", "dipole")},
+    )
+
+
+@graphs_v2.get("/v2/proteins/<string:source>/<int:pid>/mutant_scan")
+def get_mutant_scan_v2(source: str, pid: int):
+    """Mutantes puntuales (19×L) ordenados por retención del motivo, Δcarga y Δdipolo aproximado.
+
+    ?targets=A (alaninas) o DEKR (cambios de carga), positions=1,4,33, top_k, rank_by,
+    order=asc|desc, pesos w_motif/w_charge/w_dipole del score y gap_min/gap_max del motivo.
+    """
+    try:
+        data = _db.get_complete_toxin_data(source, pid)
+        if not data or not data.get("pdb_data"):
+            return jsonify({"error": "PDB not found"}), 404
+        pdb = data["pdb_data"]
+        if isinstance(pdb, str):
+            pdb = pdb.encode("utf-8")
+        try:
+            inp = _mutant_scan_input(pdb)
+            result = ScanMutants(scan_point_mutants).execute(inp)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        payload = MutantScanPresenter.present(result, meta={"source": source, "id": pid, "name": data.get("name")})
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,13 +1,16 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response
 import os, importlib
 
 from src.infrastructure.pdb.pdb_preprocessor_adapter import PDBPreprocessorAdapter
 from src.infrastructure.fs.temp_file_service import TempFileService
 from src.interfaces.http.flask.presenters.dipole_presenter import DipolePresenter
 from src.application.use_cases.calculate_dipole import CalculateDipole, CalculateDipoleInput
+from src.application.use_cases.resolve_peptide_dipoles import PeptideDipoleInput, ResolvePeptideDipoles
 from src.infrastructure.db.sqlite.structure_repository_sqlite import SqliteStructureRepository
 from src.infrastructure.db.sqlite.metadata_repository_sqlite import SqliteMetadataRepository
-from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
+from src.infrastructure.graphein.dipole_adapter import DIPOLE_VERSION, DipoleAdapter
+from src.utils.http_cache import cache_headers, etag_matches, strong_etag
+from src.utils.structure_hash import structure_hash
 
 
 dipole_v2 = Blueprint("dipole_v2", __name__)
@@ -25,6 +28,10 @@ _tmp = TempFileService()
 _structures = SqliteStructureRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
 _metadata = SqliteMetadataRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
 _dipole_uc = CalculateDipole(_structures, _dip, _metadata)
+_batch_uc = ResolvePeptideDipoles(_dip)
+
+# Máximo de ids aceptados por POST /v2/dipoles/batch
+MAX_BATCH_IDS = 500
 
 
 def configure_dipole_dependencies(
@@ -35,8 +42,9 @@ def configure_dipole_dependencies(
     structures_repo: SqliteStructureRepository = None,
     metadata_repo: SqliteMetadataRepository = None,
     use_case: CalculateDipole = None,
+    peptide_dipoles_uc: ResolvePeptideDipoles = None,
 ):
-    global _dip, _pdb, _tmp, _structures, _metadata, _dipole_uc
+    global _dip, _pdb, _tmp, _structures, _metadata, _dipole_uc, _batch_uc
     if dipole_service is not None:
         _dip = dipole_service
     if pdb_preprocessor is not None:
@@ -49,18 +57,91 @@ def configure_dipole_dependencies(
         _metadata = metadata_repo
     if use_case is not None:
         _dipole_uc = use_case
+    if peptide_dipoles_uc is not None:
+        _batch_uc = peptide_dipoles_uc
+    elif dipole_service is not None:
+        _batch_uc = ResolvePeptideDipoles(_dip)
 
 
-@dipole_v2.post("/v2/dipole/<string:source>/<int:pid>")
+@dipole_v2.route("/v2/dipole/<string:source>/<int:pid>", methods=["GET", "POST"])
 def calculate_dipole_v2(source, pid):
+    """Dipolo de un péptido. Por GET admite If-None-Match: 304 sin calcular si PDB/PSF no cambiaron."""
     try:
         if source != 'nav1_7':
             return jsonify({"error": "Dipole solo disponible para nav1_7"}), 400
 
-        res = _dipole_uc.execute(CalculateDipoleInput(source=source, pid=pid))
+        pdb = _structures.get_pdb(source, pid)
+        psf = _structures.get_psf(source, pid) if pdb else None
+        etag = None
+        if pdb:
+            etag = strong_etag("dipole", source, pid, structure_hash(pdb), structure_hash(psf), DIPOLE_VERSION)
+            if request.method == "GET" and etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status=304, headers=cache_headers(etag))
+
+        res = _dipole_uc.execute(CalculateDipoleInput(source=source, pid=pid, pdb_data=pdb, psf_data=psf))
         if not res.get("success"):
             return jsonify({"error": res.get("error", "unknown")}), 404
         meta = {"source": source, "pid": pid}
-        return jsonify(DipolePresenter.present(res, meta))
+        response = jsonify(DipolePresenter.present(res, meta))
+        if etag:
+            response.headers.update(cache_headers(etag))
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _load_structures(source, ids):
+    many = getattr(_structures, 'get_structures_many', None)
+    if many is not None:
+        return many(source, ids)
+    found = {}
+    for pid in ids:
+        pdb = _structures.get_pdb(source, pid)
+        if pdb:
+            found[pid] = (pdb, _structures.get_psf(source, pid))
+    return found
+
+
+@dipole_v2.post("/v2/dipoles/batch")
+def calculate_dipoles_batch_v2():
+    """Body JSON: {"ids": [1, 2, ...], "source": "nav1_7" | "toxinas"}.
+
+    Devuelve un resultado por id, en el orden recibido; los fallos se informan por elemento.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        source = body.get('source', 'nav1_7')
+        if source not in ('nav1_7', 'toxinas'):
+            return jsonify({"error": "source debe ser 'nav1_7' o 'toxinas'"}), 400
+        raw_ids = body.get('ids')
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return jsonify({"error": "ids debe ser una lista no vacía de enteros"}), 400
+        if len(raw_ids) > MAX_BATCH_IDS:
+            return jsonify({"error": f"Máximo {MAX_BATCH_IDS} ids por petición"}), 400
+        try:
+            ids = [int(i) for i in raw_ids]
+        except (TypeError, ValueError):
+            return jsonify({"error": "ids debe ser una lista no vacía de enteros"}), 400
+
+        structures = _load_structures(source, ids)
+        inputs, positions = [], []
+        results = [{"id": pid, "error": "No encontrado"} for pid in ids]
+        for pos, pid in enumerate(ids):
+            if pid in structures and structures[pid][0]:
+                pdb, psf = structures[pid]
+                inputs.append(PeptideDipoleInput(pid, pdb_data=pdb, psf_data=psf, source=source))
+                positions.append(pos)
+        for pos, outcome in zip(positions, _batch_uc.execute_many(inputs)):
+            if "error" in outcome:
+                results[pos] = {"id": ids[pos], "error": outcome["error"]}
+            else:
+                results[pos] = {"id": ids[pos], "dipole": outcome["dipole"], "cached": outcome.get("cached", False)}
+
+        meta = {
+            "source": source,
+            "count": len(results),
+            "failed": sum(1 for r in results if "error" in r),
+        }
+        return jsonify(DipolePresenter.present(results, meta))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -66,6 +66,8 @@ def export_residues_v2(source, pid):
     try:
         distance_threshold = float(request.args.get('threshold', 10.0))
         granularity = request.args.get('granularity', 'CA')
+        weighted = request.args.get('weighted', '0') == '1'
+        gnm = request.args.get('gnm', '0') == '1'
 
         # Wrap into Value Objects
         granularity_vo = Granularity.from_string(granularity)
@@ -76,6 +78,8 @@ def export_residues_v2(source, pid):
             pid=pid,
             granularity=granularity_vo,
             distance_threshold=dist_vo,
+            weighted=weighted,
+            gnm=gnm,
         )
         try:
             excel_data, excel_filename, metadata = _export_uc.execute(inp)
@@ -5,6 +5,8 @@ from typing import Dict, Any
 from src.infrastructure.db.sqlite.family_repository_sqlite import SqliteFamilyRepository
 from src.infrastructure.db.sqlite.structure_repository_sqlite import SqliteStructureRepository
 from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
+from src.infrastructure.db.sqlite.peptide_dipole_repository_sqlite import SqlitePeptideDipoleRepository
+from src.application.use_cases.resolve_peptide_dipoles import ResolvePeptideDipoles, PeptideDipoleInput
 
 
 families_v2 = Blueprint("families_v2", __name__)
@@ -19,6 +21,9 @@ except Exception:
 _families = SqliteFamilyRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
 _structures = SqliteStructureRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
 _dipole = DipoleAdapter()
+_peptide_dipoles = ResolvePeptideDipoles(
+    _dipole, SqlitePeptideDipoleRepository(db_path=getattr(_CFG, 'db_path', 'database/toxins.db'))
+)
 
 
 def configure_families_dependencies(
@@ -26,14 +31,18 @@ def configure_families_dependencies(
     families_repo: SqliteFamilyRepository = None,
     structures_repo: SqliteStructureRepository = None,
     dipole_service: DipoleAdapter = None,
+    peptide_dipoles_uc: ResolvePeptideDipoles = None,
 ):
-    global _families, _structures, _dipole
+    global _families, _structures, _dipole, _peptide_dipoles
     if families_repo is not None:
         _families = families_repo
     if structures_repo is not None:
         _structures = structures_repo
     if dipole_service is not None:
         _dipole = dipole_service
+        _peptide_dipoles = ResolvePeptideDipoles(_dipole, _peptide_dipoles.repo)
+    if peptide_dipoles_uc is not None:
+        _peptide_dipoles = peptide_dipoles_uc
 
 
 @families_v2.get("/v2/families")
@@ -104,24 +113,35 @@ def get_family_dipoles_v2(family_name: str):
         dipole_results = []
         calculation_errors = []
 
+        ids = [peptide["id"] for peptide in peptides]
+        many = getattr(_structures, "get_structures_many", None)
+        if many is not None:
+            structures = many("nav1_7", ids)
+        else:
+            structures = {pid: (_structures.get_pdb("nav1_7", pid), _structures.get_psf("nav1_7", pid)) for pid in ids}
+
+        # Una sola llamada: lee de peptide_dipoles y calcula los que faltan con el kernel por lotes
+        pending = []
         for peptide in peptides:
+            pdb_data, psf_data = structures.get(peptide["id"], (None, None))
+            if not pdb_data:
+                calculation_errors.append({
+                    "peptide_code": peptide.get("peptide_code"),
+                    "error": "No se encontraron datos PDB",
+                })
+                continue
+            pending.append((peptide, pdb_data, psf_data))
+        outcomes = _peptide_dipoles.execute_many([
+            PeptideDipoleInput(peptide_id=peptide["id"], pdb_data=pdb_data, psf_data=psf_data, source="nav1_7")
+            for peptide, pdb_data, psf_data in pending
+        ])
+
+        for (peptide, pdb_data, psf_data), result in zip(pending, outcomes):
             try:
-                pid = peptide["id"]
-                pdb_data = _structures.get_pdb("nav1_7", pid)
-                psf_data = _structures.get_psf("nav1_7", pid)
-
-                if not pdb_data:
-                    calculation_errors.append({
-                        "peptide_code": peptide.get("peptide_code"),
-                        "error": "No se encontraron datos PDB",
-                    })
-                    continue
-
-                result = _dipole.process_dipole_calculation(pdb_data, psf_data)
-                if not result.get("success"):
+                if "error" in result:
                     calculation_errors.append({
                         "peptide_code": peptide.get("peptide_code"),
-                        "error": result.get("error", "Error desconocido en cálculo dipolar"),
+                        "error": result["error"],
                     })
                     continue
 
@@ -132,7 +152,7 @@ def get_family_dipoles_v2(family_name: str):
                     psf_text = psf_data.decode("utf-8") if isinstance(psf_data, (bytes, bytearray)) else psf_data
 
                 dipole_results.append({
-                    "peptide_id": pid,
+                    "peptide_id": peptide["id"],
                     "peptide_code": peptide.get("peptide_code"),
                     "ic50_value": peptide.get("ic50_value"),
                     "ic50_unit": peptide.get("ic50_unit"),
@@ -6,10 +6,19 @@ import os
 import sqlite3
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any, Iterable, Tuple, List
+from typing import Optional, Dict, Any, Iterable, Sequence, Tuple, List
 
-from extractors.toxins_filter import search_toxins
-from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
+import numpy as np
+
+from extractors.toxins_filter import check_gap_range, decode_cursor, encode_cursor, search_toxins
+from src.infrastructure.graphein.dipole_adapter import DIPOLE_VERSION, DipoleAdapter
+from src.infrastructure.db.sqlite.peptide_dipole_repository_sqlite import SqlitePeptideDipoleRepository
+from src.application.use_cases.resolve_peptide_dipoles import ResolvePeptideDipoles, PeptideDipoleInput
+from src.application.use_cases.superpose_to_reference import SuperposeToReference
+from src.infrastructure.db.sqlite.superposition_repository_sqlite import SqliteSuperpositionRepository
+from src.infrastructure.db.sqlite.shared_cache_sqlite import SqliteSharedCache, TableSource
+from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
+from src.infrastructure.pdb.superposition import rotate_vectors
 
 
 motif_dipoles_v2 = Blueprint("motif_dipoles_v2", __name__)
@@ -20,9 +29,10 @@ _FILTERED_DIR: Path = Path("pdbs/filtered_psfs").resolve()
 _DIP = None  # type: DipoleAdapter
 _REFERENCE_PDB: Optional[Path] = None
 _REFERENCE_PSF: Optional[Path] = None
-_REFERENCE_CACHE: Optional[Dict[str, Any]] = None
-_REFERENCE_DB_CACHE: Dict[str, Dict[str, Any]] = {}
-_REFERENCE_OPTIONS_CACHE: Optional[List[Dict[str, Any]]] = None
+# Referencias, opciones e IC50 de la IA: caché compartida entre workers (cache/shared_cache.db)
+_SHARED_CACHE: Optional[SqliteSharedCache] = None
+_PEPTIDE_DIPOLES: Optional[ResolvePeptideDipoles] = None
+_SUPERPOSE: Optional[SuperposeToReference] = None
 
 _AXES = ("x", "y", "z")
 _DEFAULT_DB_REFERENCE_CODE = "μ-TRTX-Cg4a"
@@ -36,14 +46,17 @@ def configure_motif_dipoles_dependencies(
     dipole_adapter: DipoleAdapter,
     reference_pdb: Optional[str] = None,
     reference_psf: Optional[str] = None,
+    peptide_dipoles_uc: Optional[ResolvePeptideDipoles] = None,
+    superpose_uc: Optional[SuperposeToReference] = None,
+    shared_cache: Optional[SqliteSharedCache] = None,
 ):
-    global _DB_PATH, _FILTERED_DIR, _DIP, _REFERENCE_PDB, _REFERENCE_PSF, _REFERENCE_CACHE, _REFERENCE_DB_CACHE, _REFERENCE_OPTIONS_CACHE
+    global _DB_PATH, _FILTERED_DIR, _DIP, _REFERENCE_PDB, _REFERENCE_PSF, _PEPTIDE_DIPOLES, _SUPERPOSE, _SHARED_CACHE
     _DB_PATH = db_path
     _FILTERED_DIR = Path(filtered_dir).resolve()
     _DIP = dipole_adapter
-    _REFERENCE_CACHE = None
-    _REFERENCE_DB_CACHE = {}
-    _REFERENCE_OPTIONS_CACHE = None
+    _PEPTIDE_DIPOLES = peptide_dipoles_uc
+    _SUPERPOSE = superpose_uc
+    _SHARED_CACHE = shared_cache
 
     if reference_pdb:
         ref_path = Path(reference_pdb)
@@ -68,6 +81,65 @@ def _compute_dipole_from_files(pdb_path: Path, psf_path: Path):
     return {"dipole": dip, "pdb_text": pdb_text}
 
 
+def _peptide_dipoles() -> ResolvePeptideDipoles:
+    """Dipolos de péptidos filtrados respaldados por la tabla peptide_dipoles."""
+    global _PEPTIDE_DIPOLES
+    if _PEPTIDE_DIPOLES is None:
+        if _DIP is None:
+            raise RuntimeError("Dipole service not configured")
+        _PEPTIDE_DIPOLES = ResolvePeptideDipoles(_DIP, SqlitePeptideDipoleRepository(db_path=_DB_PATH))
+    return _PEPTIDE_DIPOLES
+
+
+def _shared_cache() -> SqliteSharedCache:
+    global _SHARED_CACHE
+    if _SHARED_CACHE is None:
+        _SHARED_CACHE = SqliteSharedCache()
+    return _SHARED_CACHE
+
+
+def _inhibitors_source() -> TableSource:
+    # Lo que usa la lista de opciones; de los blobs basta su longitud (hashearlos
+    # todos releía cada estructura con cada escritura de caché en el mismo archivo).
+    # Otras tablas (p. ej. peptide_dipoles) no invalidan la caché
+    return TableSource(
+        _DB_PATH,
+        "SELECT id, peptide_code, sequence, ic50_value, ic50_unit, length(pdb_blob), length(psf_blob) "
+        "FROM Nav1_7_InhibitorPeptides ORDER BY id",
+    )
+
+
+def _reference_row_source(peptide_code: str) -> TableSource:
+    # La referencia depende del contenido de sus blobs: un PDB re-refinado suele
+    # conservar la longitud, así que aquí se hashean, pero sólo los de esa fila
+    return TableSource(
+        _DB_PATH,
+        "SELECT id, peptide_code, sequence, ic50_value, ic50_unit, pdb_blob, psf_blob "
+        "FROM Nav1_7_InhibitorPeptides WHERE peptide_code = ?",
+        (peptide_code,),
+    )
+
+
+def _superposer() -> SuperposeToReference:
+    """Superposición sobre la referencia respaldada por la tabla superpositions."""
+    global _SUPERPOSE
+    if _SUPERPOSE is None:
+        _SUPERPOSE = SuperposeToReference(SqliteSuperpositionRepository(db_path=_DB_PATH))
+    return _SUPERPOSE
+
+
+def _present_superposition(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not result:
+        return None
+    return {
+        "rotation": np.asarray(result["rotation"]).tolist(),
+        "translation": np.asarray(result["translation"]).tolist(),
+        "rmsd_angstrom": result.get("rmsd"),
+        "n_anchor_cysteines": result.get("n_anchor_cysteines"),
+        "n_anchor_atoms": result.get("n_anchor_atoms"),
+    }
+
+
 def _normalize_vector(seq: Iterable[float]) -> Optional[Tuple[float, float, float]]:
     try:
         values = [float(x) for x in seq]
@@ -82,7 +154,7 @@ def _normalize_vector(seq: Iterable[float]) -> Optional[Tuple[float, float, floa
     return (x / norm, y / norm, z / norm)
 
 
-def _get_normalized_vector(dipole: Dict[str, Any]) -> Optional[Tuple[float, float, float]]:
+def _raw_vector(dipole: Dict[str, Any]) -> Optional[Iterable[float]]:
     if not dipole:
         return None
     vec = dipole.get("normalized") or dipole.get("vector")
@@ -90,13 +162,16 @@ def _get_normalized_vector(dipole: Dict[str, Any]) -> Optional[Tuple[float, floa
         return None
     if isinstance(vec, dict):
         if all(ax in vec for ax in _AXES):
-            seq = [vec[ax] for ax in _AXES]
-        else:
-            seq = list(vec.values())
-    else:
-        seq = vec
-    normalized = _normalize_vector(seq)
-    return normalized
+            return [vec[ax] for ax in _AXES]
+        return list(vec.values())
+    return vec
+
+
+def _get_normalized_vector(dipole: Dict[str, Any]) -> Optional[Tuple[float, float, float]]:
+    seq = _raw_vector(dipole)
+    if seq is None:
+        return None
+    return _normalize_vector(seq)
 
 
 def _compute_axis_angles(vec: Optional[Tuple[float, float, float]]) -> Optional[Dict[str, float]]:
@@ -140,6 +215,87 @@ def _compute_orientation_metrics(
     return metrics
 
 
+def _stack_normalized_vectors(dipoles: List[Dict[str, Any]]) -> np.ndarray:
+    """(N, 3) con los vectores normalizados; NaN en las filas sin vector válido."""
+    raw = np.full((len(dipoles), 3), np.nan)
+    for i, dipole in enumerate(dipoles):
+        seq = _raw_vector(dipole)
+        if seq is None:
+            continue
+        try:
+            values = [float(x) for x in seq]
+        except (TypeError, ValueError):
+            continue
+        if len(values) >= 3:
+            raw[i] = values[:3]
+    # Misma secuencia de operaciones que _normalize_vector, sobre todas las filas
+    norm = np.sqrt(raw[:, 0] * raw[:, 0] + raw[:, 1] * raw[:, 1] + raw[:, 2] * raw[:, 2])
+    norm[norm == 0] = np.nan
+    return raw / norm[:, np.newaxis]
+
+
+def _axis_angles_matrix(vectors: np.ndarray) -> np.ndarray:
+    """Ángulos (grados) de cada vector con x, y, z: versión vectorizada de _compute_axis_angles."""
+    return np.degrees(np.arccos(np.clip(vectors, -1.0, 1.0)))
+
+
+def _orientation_matrix(
+    vectors: np.ndarray,
+    angles: np.ndarray,
+    ref_vec: Optional[Tuple[float, float, float]],
+    ref_angles: Optional[Dict[str, float]],
+) -> Dict[str, np.ndarray]:
+    """Métricas de _compute_orientation_metrics para todas las filas; NaN donde no aplican."""
+    n = len(vectors)
+    out = {
+        "vector_angle": np.full(n, np.nan),
+        "axis_diffs": np.full((n, 3), np.nan),
+        "l2": np.full(n, np.nan),
+        "l1": np.full(n, np.nan),
+    }
+    if ref_vec is None:
+        return out
+    ref = np.asarray(ref_vec, dtype=float)
+    dot = vectors[:, 0] * ref[0] + vectors[:, 1] * ref[1] + vectors[:, 2] * ref[2]
+    out["vector_angle"] = np.degrees(np.arccos(np.clip(dot, -1.0, 1.0)))
+    if ref_angles:
+        diffs = np.abs(angles - np.array([ref_angles[axis] for axis in _AXES], dtype=float))
+        out["axis_diffs"] = diffs
+        out["l2"] = np.sqrt(diffs[:, 0] * diffs[:, 0] + diffs[:, 1] * diffs[:, 1] + diffs[:, 2] * diffs[:, 2])
+        out["l1"] = diffs[:, 0] + diffs[:, 1] + diffs[:, 2]
+    return out
+
+
+def _page_indices(primary: np.ndarray, secondary: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Índices de las posiciones [start, end) del orden estable por (primary, secondary, índice).
+
+    ``np.argpartition`` acota los candidatos (todo lo que empata con el último
+    puesto de la página entra) y sólo ese subconjunto se ordena.
+    """
+    n = len(primary)
+    if end < n:
+        kth = primary[np.argpartition(primary, end - 1)[end - 1]]
+        candidates = np.flatnonzero(primary <= kth)
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.lexsort((candidates, secondary[candidates], primary[candidates]))]
+    return order[start:end]
+
+
+def _after_mask(columns: Sequence[np.ndarray], after: Sequence[Any]) -> np.ndarray:
+    """Filas cuya clave (columns[0][i], columns[1][i], ...) va después de ``after`` en orden lexicográfico."""
+    greater = np.zeros(len(columns[0]), dtype=bool)
+    equal = np.ones(len(columns[0]), dtype=bool)
+    for col, value in zip(columns, after):
+        greater |= equal & (col > value)
+        equal &= col == value
+    return greater
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
 def _convert_ic50_to_nm(value: Any, unit: Optional[str]) -> Optional[float]:
     try:
         numeric_value = float(value)
@@ -174,10 +330,13 @@ def _convert_ic50_to_nm(value: Any, unit: Optional[str]) -> Optional[float]:
 
 
 def _get_reference_options() -> List[Dict[str, Any]]:
-    global _REFERENCE_OPTIONS_CACHE
-    if _REFERENCE_OPTIONS_CACHE is not None:
-        return [dict(opt) for opt in _REFERENCE_OPTIONS_CACHE]
+    options = _shared_cache().get_or_compute(
+        "motif_reference_options", "all", [_inhibitors_source()], _build_reference_options
+    )
+    return [dict(opt) for opt in options]
+
 
+def _build_reference_options() -> List[Dict[str, Any]]:
     conn = sqlite3.connect(_DB_PATH)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
@@ -255,18 +414,20 @@ def _get_reference_options() -> List[Dict[str, Any]]:
             "ic50_nm": entry["ic50_nm"],
         })
 
-    _REFERENCE_OPTIONS_CACHE = options
-    return [dict(opt) for opt in options]
+    return options
 
 
 # Load AI-exported JSON map for ic50 detection (accession -> has_ic50)
 _EXPORTS_AI_PATH = os.path.join(os.getcwd(), "exports", "filtered_accessions_nav1_7_analysis.json")
-_AI_IC50_CACHE = None
+
 
 def _load_ai_ic50_map():
-    global _AI_IC50_CACHE
-    if _AI_IC50_CACHE is not None:
-        return _AI_IC50_CACHE
+    return _shared_cache().get_or_compute(
+        "motif_ai_ic50", _EXPORTS_AI_PATH, [_EXPORTS_AI_PATH], _build_ai_ic50_map
+    )
+
+
+def _build_ai_ic50_map():
     mapping = {}
     try:
         if os.path.exists(_EXPORTS_AI_PATH):
@@ -294,7 +455,6 @@ def _load_ai_ic50_map():
                     mapping[str(acc)] = has_ic50
     except Exception:
         mapping = {}
-    _AI_IC50_CACHE = mapping
     return mapping
 
 
@@ -308,6 +468,12 @@ def _convert_unit_to_nm(value: Any, unit: Optional[str]) -> Optional[float]:
 
 
 def _load_ai_ic50_details_map():
+    return _shared_cache().get_or_compute(
+        "motif_ai_ic50_details", _EXPORTS_AI_PATH, [_EXPORTS_AI_PATH], _build_ai_ic50_details_map
+    )
+
+
+def _build_ai_ic50_details_map():
     """Return accession -> dict with keys:
     {
       'value_nm': Optional[float],
@@ -372,34 +538,41 @@ def _lookup_option_by_code(peptide_code: str) -> Optional[Dict[str, Any]]:
 
 
 def _load_reference_from_files() -> Optional[Dict[str, Any]]:
-    global _REFERENCE_CACHE
     if _REFERENCE_PDB is None or _REFERENCE_PSF is None:
         return None
     if not _REFERENCE_PDB.exists() or not _REFERENCE_PSF.exists():
         return None
-    if _REFERENCE_CACHE is None:
-        cache = _compute_dipole_from_files(_REFERENCE_PDB, _REFERENCE_PSF)
-        cache.update({
-            "source": "filesystem",
-            "pdb_path": str(_REFERENCE_PDB),
-            "psf_path": str(_REFERENCE_PSF),
-            "peptide_code": "WT",
-            "sequence": _REFERENCE_WT_SEQUENCE,
-            "display_name": "Proteína WT",
-            "normalized_ic50": None,
-            "ic50_value": None,
-            "ic50_unit": None,
-            "ic50_value_nm": None,
-        })
-        vec = _get_normalized_vector(cache.get("dipole"))
-        if vec:
-            cache["normalized_vector"] = vec
-            angles = _compute_axis_angles(vec)
-            if angles:
-                cache["angles_deg"] = angles
-                cache["angle_with_z_deg"] = angles.get("z")
-        _REFERENCE_CACHE = cache
-    return _REFERENCE_CACHE
+    return _shared_cache().get_or_compute(
+        "motif_reference_wt",
+        f"{_REFERENCE_PDB}|{_REFERENCE_PSF}",
+        [_REFERENCE_PDB, _REFERENCE_PSF],
+        _build_reference_from_files,
+        extra=[DIPOLE_VERSION],
+    )
+
+
+def _build_reference_from_files() -> Dict[str, Any]:
+    cache = _compute_dipole_from_files(_REFERENCE_PDB, _REFERENCE_PSF)
+    cache.update({
+        "source": "filesystem",
+        "pdb_path": str(_REFERENCE_PDB),
+        "psf_path": str(_REFERENCE_PSF),
+        "peptide_code": "WT",
+        "sequence": _REFERENCE_WT_SEQUENCE,
+        "display_name": "Proteína WT",
+        "normalized_ic50": None,
+        "ic50_value": None,
+        "ic50_unit": None,
+        "ic50_value_nm": None,
+    })
+    vec = _get_normalized_vector(cache.get("dipole"))
+    if vec:
+        cache["normalized_vector"] = vec
+        angles = _compute_axis_angles(vec)
+        if angles:
+            cache["angles_deg"] = angles
+            cache["angle_with_z_deg"] = angles.get("z")
+    return cache
 
 
 def _fetch_reference_row(db_path: str, peptide_code: str = "μ-TRTX-Cg4a"):
@@ -420,10 +593,18 @@ def _fetch_reference_row(db_path: str, peptide_code: str = "μ-TRTX-Cg4a"):
 
 
 def _load_reference_from_db(peptide_code: str = "μ-TRTX-Cg4a") -> Optional[Dict[str, Any]]:
-    global _REFERENCE_DB_CACHE
-    if peptide_code in _REFERENCE_DB_CACHE:
-        return _REFERENCE_DB_CACHE[peptide_code]
+    if _DIP is None:
+        return None
+    return _shared_cache().get_or_compute(
+        "motif_reference_db",
+        peptide_code,
+        [_reference_row_source(peptide_code)],
+        lambda: _build_reference_from_db(peptide_code),
+        extra=[DIPOLE_VERSION],
+    )
 
+
+def _build_reference_from_db(peptide_code: str) -> Optional[Dict[str, Any]]:
     row = _fetch_reference_row(_DB_PATH, peptide_code=peptide_code)
     if not row:
         return None
@@ -476,7 +657,6 @@ def _load_reference_from_db(peptide_code: str = "μ-TRTX-Cg4a") -> Optional[Dict
     option_details = _lookup_option_by_code(code)
     if option_details:
         cache["normalized_ic50"] = option_details.get("normalized_ic50")
-    _REFERENCE_DB_CACHE[peptide_code] = cache
     return cache
 
 
@@ -580,12 +760,31 @@ def motif_item_download():
         pdb_bytes = pdb_path.read_bytes() if pdb_path.exists() else None
         psf_bytes = psf_path.read_bytes() if psf_path.exists() else None
 
+        # Dipolo materializado (peptide_dipoles) incluido junto a la estructura
+        dipole = None
+        if pdb_bytes:
+            try:
+                conn = sqlite3.connect(_DB_PATH)
+                try:
+                    row = conn.execute("SELECT peptide_id FROM Peptides WHERE accession_number = ? LIMIT 1", (accession,)).fetchone()
+                finally:
+                    conn.close()
+                if row:
+                    dipole = _peptide_dipoles().execute(PeptideDipoleInput(
+                        peptide_id=row[0], pdb_path=pdb_path, psf_path=psf_path,
+                        pdb_data=pdb_bytes, psf_data=psf_bytes, source="toxinas",
+                    ))["dipole"]
+            except Exception:
+                dipole = None
+
         zip_io = io.BytesIO()
         with zipfile.ZipFile(zip_io, 'w', zipfile.ZIP_DEFLATED) as zf:
             if pdb_bytes:
                 zf.writestr(f"{accession}.pdb", pdb_bytes)
             if psf_bytes:
                 zf.writestr(f"{accession}.psf", psf_bytes)
+            if dipole:
+                zf.writestr(f"{accession}_dipole.json", json.dumps(dipole, ensure_ascii=False, indent=2))
         zip_io.seek(0)
 
         return send_file(
@@ -674,6 +873,21 @@ def motif_page():
         gap_min = int(request.args.get("gap_min", 3))
         gap_max = int(request.args.get("gap_max", 6))
         require_pair = request.args.get("require_pair", "0") in ("1", "true", "True")
+        # Superponer cada hit sobre la referencia (cisteínas) antes de comparar orientaciones
+        align = request.args.get("align", "0") in ("1", "true", "True")
+        # limit/cursor: ventana tras el último elemento devuelto en lugar de página numerada
+        limit_arg = request.args.get("limit")
+        cursor = request.args.get("cursor") or None
+        cursor_mode = limit_arg is not None or cursor is not None
+        if limit_arg is not None:
+            page_size = max(1, min(24, int(limit_arg)))
+        try:
+            check_gap_range(gap_min, gap_max)
+            after = decode_cursor(cursor, size=4) if cursor else None
+            if after is not None and not all(isinstance(v, (int, float)) for v in after):
+                raise ValueError(f"invalid cursor: {cursor!r}")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=_DB_PATH)
         requested_reference_code = request.args.get("reference_code") or request.args.get("peptide_code")
@@ -691,62 +905,165 @@ def motif_page():
         else:
             ref_angle_z = None
 
-        # Enriquecer con accession_number/peptide_name
-        conn = sqlite3.connect(_DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
+        # Enriquecer con accession_number/peptide_name/Nav1.7 en una consulta por bloque de hits
+        info = SqliteToxinRepository(_DB_PATH).enrich_hits(
+            [h.get("peptide_id") if isinstance(h, dict) else h for h in hits]
+        )
         # Accessions to exclude from visualizers
         EXCLUDED_ACCESSIONS = {"P83303", "P84507", "P0DL84", "P84508", "D2Y1X8", "P0DL72", "P0CH54"}
         items = []
         # Preload AI details map once
         ai_details_map = _load_ai_ic50_details_map()
+        candidates = []
+        # Orden de search_toxins (score desc, peptide_id): desempate estable del cursor
+        hit_keys = []
         for h in hits:
             peptide_id = h.get("peptide_id") if isinstance(h, dict) else h
-            cur.execute("SELECT accession_number, peptide_name, sequence FROM Peptides WHERE peptide_id = ?", (peptide_id,))
-            row = cur.fetchone()
+            row = info.get(peptide_id)
             if not row:
                 continue
             acc = row["accession_number"]
             # Skip explicitly excluded accessions even if files exist
             if acc and acc in EXCLUDED_ACCESSIONS:
                 continue
-            name = row["peptide_name"]
-            sequence = row["sequence"] if "sequence" in row.keys() else ""
             pdb_path = _FILTERED_DIR / f"{acc}.pdb"
             psf_path = _FILTERED_DIR / f"{acc}.psf"
             if not pdb_path.exists() or not psf_path.exists():
                 # saltar si no está disponible aún
                 continue
-            comp = _compute_dipole_from_files(pdb_path, psf_path)
-            dipole = comp["dipole"]
-            vec = _get_normalized_vector(dipole)
-            angles = _compute_axis_angles(vec) if vec else None
-            metrics = _compute_orientation_metrics(vec, reference_vec, angles, reference_angles)
-            item_angle_z = angles.get("z") if angles else _get_angle_from_dipole(dipole)
+            candidates.append((peptide_id, row, pdb_path, psf_path))
+            hit_keys.append((-(h.get("score") or 0) if isinstance(h, dict) else 0, peptide_id))
+
+        # Dipolos desde peptide_dipoles; solo los ausentes se calculan (y se guardan)
+        resolved = _peptide_dipoles().execute_many([
+            PeptideDipoleInput(peptide_id=pid, pdb_path=pdb_path, psf_path=psf_path, source="toxinas")
+            for pid, _, pdb_path, psf_path in candidates
+        ])
+        dipoles = []
+        for res in resolved:
+            if "error" in res:
+                raise RuntimeError(res["error"])
+            dipoles.append(res["dipole"])
+
+        # Ángulos y métricas de orientación de todos los candidatos en una sola pasada
+        vectors = _stack_normalized_vectors(dipoles)
+        superpositions: List[Optional[Dict[str, Any]]] = [None] * len(dipoles)
+        reference_pdb = (reference or {}).get("pdb_text")
+        if align and reference_pdb and candidates:
+            outcomes = _superposer().execute_many(reference_pdb.encode("utf-8"), [c[2] for c in candidates])
+            superpositions = [None if "error" in o else o for o in outcomes]
+            aligned_idx = [i for i, o in enumerate(superpositions) if o is not None]
+            if aligned_idx:
+                rotations = np.stack([superpositions[i]["rotation"] for i in aligned_idx])
+                vectors[aligned_idx] = rotate_vectors(rotations, vectors[aligned_idx])
+        valid = ~np.isnan(vectors[:, 0])
+        angles = _axis_angles_matrix(vectors)
+        orientation = _orientation_matrix(vectors, angles, reference_vec, reference_angles)
+        angle_z = angles[:, 2].copy()
+        for i in np.flatnonzero(~valid):
+            fallback_z = _get_angle_from_dipole(dipoles[i])
+            angle_z[i] = np.nan if fallback_z is None else fallback_z
+        # Sin comparación vectorial: diferencia del ángulo con z respecto a la referencia
+        uses_z = ~valid if reference_vec is not None else np.ones(len(dipoles), dtype=bool)
+        z_delta = np.abs(angle_z - ref_angle_z) if ref_angle_z is not None else np.full(len(dipoles), np.nan)
+        score = np.where(uses_z, z_delta, orientation["vector_angle"])
+
+        # Claves de orden (None al final, empates por posición original, igual que sort estable)
+        if reference_vec is not None:
+            primary = np.where(np.isnan(score), np.inf, score)
+            secondary = np.where(np.isnan(orientation["l2"]), np.inf, orientation["l2"])
+        elif ref_angle_z is not None:
+            primary = np.where(np.isnan(z_delta), np.inf, z_delta)
+            secondary = np.zeros(len(dipoles))
+        else:
+            primary = secondary = np.zeros(len(dipoles))
+
+        total = len(candidates)
+        if total == 0:
+            return jsonify({
+                "count": 0,
+                "page": None if cursor_mode else 1,
+                "page_size": page_size,
+                "next_cursor": None,
+                "items": [],
+                "reference": {
+                    "angle_with_z_deg": ref_angle_z,
+                    "angles_deg": reference_angles,
+                    "source": reference.get("source") if reference else None,
+                    "pdb_path": reference.get("pdb_path") if reference else None,
+                    "psf_path": reference.get("psf_path") if reference else None,
+                    "normalized_vector": list(reference_vec) if reference_vec else None,
+                    "peptide_code": selected_reference_code if reference else None,
+                    "display_name": reference.get("display_name") if reference else None,
+                    "normalized_ic50": reference.get("normalized_ic50") if reference else None,
+                    "ic50_value": reference.get("ic50_value") if reference else None,
+                    "ic50_unit": reference.get("ic50_unit") if reference else None,
+                    "ic50_nm": reference.get("ic50_value_nm") if reference else None,
+                },
+                "reference_options": _get_reference_options(),
+            })
+
+        # Clave completa del orden: (primary, secondary, -score, peptide_id); las dos
+        # últimas reproducen el desempate por posición de _page_indices
+        sort_columns = (primary, secondary, np.array([k[0] for k in hit_keys]), np.array([k[1] for k in hit_keys]))
+        if cursor_mode:
+            page = None
+            pool = np.arange(total) if after is None else np.flatnonzero(_after_mask(sort_columns, after))
+            page_idx = pool[_page_indices(primary[pool], secondary[pool], 0, min(page_size, len(pool)))]
+            has_more = len(pool) > len(page_idx)
+        else:
+            max_page = max(1, math.ceil(total / page_size))
+            page = min(page, max_page)
+            start = (page - 1) * page_size
+            end = min(total, start + page_size)
+            page_idx = _page_indices(primary, secondary, start, end)
+            has_more = end < total
+        next_cursor = None
+        if has_more and len(page_idx):
+            last = page_idx[-1]
+            next_cursor = encode_cursor([float(sort_columns[0][last]), float(sort_columns[1][last]),
+                                         int(sort_columns[2][last]), int(sort_columns[3][last])])
+
+        # Solo los elementos de la página se enriquecen con metadatos
+        try:
+            ai_map = _load_ai_ic50_map()
+        except Exception:
+            ai_map = {}
+        paged_items = []
+        for i in page_idx:
+            peptide_id, row, pdb_path, psf_path = candidates[i]
+            acc = row["accession_number"]
+            name = row["peptide_name"]
+            sequence = row["sequence"] if "sequence" in row.keys() else ""
+            dipole = dipoles[i]
+            vec = tuple(float(c) for c in vectors[i]) if valid[i] else None
+            item_angles = {axis: float(angles[i, k]) for k, axis in enumerate(_AXES)} if valid[i] else None
+            item_angle_z = _optional_float(angle_z[i])
+            metrics: Dict[str, Any] = {
+                "angle_diff_vs_reference": None,
+                "orientation_score_deg": _optional_float(score[i]),
+                "vector_angle_vs_reference_deg": _optional_float(score[i]),
+                "angle_diff_l2_deg": None,
+                "angle_diff_l1_deg": None,
+            }
+            if not uses_z[i] and reference_angles:
+                metrics["angle_diff_vs_reference"] = {axis: float(orientation["axis_diffs"][i, k]) for k, axis in enumerate(_AXES)}
+                metrics["angle_diff_l2_deg"] = float(orientation["l2"][i])
+                metrics["angle_diff_l1_deg"] = float(orientation["l1"][i])
+            elif uses_z[i] and not math.isnan(z_delta[i]):
+                metrics["angle_diff_vs_reference"] = {"x": None, "y": None, "z": float(z_delta[i])}
             # Check Nav1.7 IC50 metadata (if present)
             nav1_7_has_ic50 = False
             nav1_7_ic50_value = None
             nav1_7_ic50_unit = None
-            try:
-                cur.execute(
-                    "SELECT ic50_value, ic50_unit FROM Nav1_7_InhibitorPeptides WHERE accession_number = ? OR peptide_code = ? LIMIT 1",
-                    (acc, name),
-                )
-                nrow = cur.fetchone()
-                if nrow:
-                    nav1_7_ic50_value = nrow["ic50_value"]
-                    nav1_7_ic50_unit = nrow["ic50_unit"] if "ic50_unit" in nrow.keys() else None
-                    nav1_7_has_ic50 = nav1_7_ic50_value is not None
-            except Exception:
-                # non-critical: absence of metadata shouldn't break rendering
-                pass
+            nrow = row.get("nav1_7")
+            if nrow:
+                nav1_7_ic50_value = nrow["ic50_value"]
+                nav1_7_ic50_unit = nrow["ic50_unit"]
+                nav1_7_has_ic50 = nav1_7_ic50_value is not None
             # Also consult AI-exported JSON cache for ic50 detection
-            try:
-                ai_map = _load_ai_ic50_map()
-                if acc and ai_map.get(str(acc)):
-                    nav1_7_has_ic50 = True
-            except Exception:
-                pass
+            if acc and ai_map.get(str(acc)):
+                nav1_7_has_ic50 = True
             # Convert to nM for plotting when possible
             nav1_7_ic50_value_nm = None
             try:
@@ -770,21 +1087,16 @@ def motif_page():
                     nav1_7_has_ic50 = True
             # (Already consulted ai_map above after DB read and before conversion)
 
-            if metrics.get("angle_diff_vs_reference") is None and ref_angle_z is not None and item_angle_z is not None:
-                z_delta = abs(item_angle_z - ref_angle_z)
-                metrics["angle_diff_vs_reference"] = {"x": None, "y": None, "z": z_delta}
-                metrics["orientation_score_deg"] = z_delta if metrics.get("orientation_score_deg") is None else metrics["orientation_score_deg"]
-                metrics["vector_angle_vs_reference_deg"] = metrics.get("vector_angle_vs_reference_deg") or z_delta
-
-            items.append({
+            item = {
                 "peptide_id": peptide_id,
                 "accession_number": acc,
                 "name": name,
                 "sequence": sequence,
                 "dipole": dipole,
-                "pdb_text": comp["pdb_text"],
+                # El PDB solo se lee para los elementos de la página devuelta
+                "pdb_text": pdb_path.read_text(encoding="utf-8", errors="ignore"),
                 "normalized_vector": list(vec) if vec else None,
-                "angles_deg": angles,
+                "angles_deg": item_angles,
                 "angle_with_z_deg": item_angle_z,
                 "angle_diff_vs_reference": metrics.get("angle_diff_vs_reference"),
                 "orientation_score_deg": metrics.get("orientation_score_deg"),
@@ -801,55 +1113,16 @@ def motif_page():
                 "ai_ic50_min_nm": ai_min_nm,
                 "ai_ic50_max_nm": ai_max_nm,
                 "ai_ic50_avg_nm": ai_avg_nm,
-            })
-        conn.close()
+            }
+            if align:
+                item["superposition"] = _present_superposition(superpositions[i])
+            paged_items.append(item)
 
-        if reference_vec is not None:
-            items.sort(key=lambda it: (
-                it.get("orientation_score_deg") is None,
-                it.get("orientation_score_deg", math.inf),
-                it.get("angle_diff_l2_deg", math.inf),
-            ))
-        elif ref_angle_z is not None:
-            items.sort(key=lambda it: (
-                it.get("angle_diff_vs_reference") is None,
-                (it.get("angle_diff_vs_reference") or {}).get("z", math.inf),
-            ))
-
-        total = len(items)
-        if total == 0:
-            return jsonify({
-                "count": 0,
-                "page": 1,
-                "page_size": page_size,
-                "items": [],
-                "reference": {
-                    "angle_with_z_deg": ref_angle_z,
-                    "angles_deg": reference_angles,
-                    "source": reference.get("source") if reference else None,
-                    "pdb_path": reference.get("pdb_path") if reference else None,
-                    "psf_path": reference.get("psf_path") if reference else None,
-                    "normalized_vector": list(reference_vec) if reference_vec else None,
-                    "peptide_code": selected_reference_code if reference else None,
-                    "display_name": reference.get("display_name") if reference else None,
-                    "normalized_ic50": reference.get("normalized_ic50") if reference else None,
-                    "ic50_value": reference.get("ic50_value") if reference else None,
-                    "ic50_unit": reference.get("ic50_unit") if reference else None,
-                    "ic50_nm": reference.get("ic50_value_nm") if reference else None,
-                },
-                "reference_options": _get_reference_options(),
-            })
-
-        max_page = max(1, math.ceil(total / page_size))
-        page = min(page, max_page)
-        start = (page - 1) * page_size
-        end = min(total, start + page_size)
-        paged_items = items[start:end]
-
-        return jsonify({
+        payload = {
             "count": total,
             "page": page,
             "page_size": page_size,
+            "next_cursor": next_cursor,
             "items": paged_items,
             "reference": {
                 "angle_with_z_deg": ref_angle_z,
@@ -866,6 +1139,10 @@ def motif_page():
                 "ic50_nm": reference.get("ic50_value_nm") if reference else None,
             },
             "reference_options": _get_reference_options(),
-        })
+        }
+        if align:
+            # Orientaciones en el marco de la referencia (hits superpuestos por cisteínas)
+            payload["aligned"] = bool(reference_pdb)
+        return jsonify(payload)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
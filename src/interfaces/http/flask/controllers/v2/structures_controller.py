@@ -1,7 +1,9 @@
-from flask import Blueprint, jsonify, Response
+from flask import Blueprint, jsonify, request, Response
 import os, importlib
 
 from src.infrastructure.db.sqlite.structure_repository_sqlite import SqliteStructureRepository
+from src.utils.http_cache import cache_headers, etag_matches, strong_etag
+from src.utils.structure_hash import structure_hash
 
 
 structures_v2 = Blueprint("structures_v2", __name__, url_prefix="/v2/structures")
@@ -22,17 +24,25 @@ def configure_structures_dependencies(*, structures_repo: SqliteStructureReposit
         _structures = structures_repo
 
 
+def _text_response(kind: str, source: str, pid: int, blob) -> Response:
+    """Blob como text/plain con ETag de su contenido; 304 si el cliente ya lo tiene."""
+    etag = strong_etag(kind, source, pid, structure_hash(blob))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers=cache_headers(etag))
+    if isinstance(blob, bytes):
+        text = blob.decode("utf-8", errors="replace")
+    else:
+        text = str(blob)
+    return Response(text, mimetype="text/plain", headers=cache_headers(etag))
+
+
 @structures_v2.get("/<string:source>/<int:pid>/pdb")
 def get_structure_pdb(source: str, pid: int):
     try:
         pdb_blob = _structures.get_pdb(source, pid)
         if not pdb_blob:
             return jsonify({"error": "PDB not found"}), 404
-        if isinstance(pdb_blob, bytes):
-            text = pdb_blob.decode("utf-8", errors="replace")
-        else:
-            text = str(pdb_blob)
-        return Response(text, mimetype="text/plain")
+        return _text_response("pdb", source, pid, pdb_blob)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -45,10 +55,6 @@ def get_structure_psf(source: str, pid: int):
         psf_blob = _structures.get_psf(source, pid)
         if not psf_blob:
             return jsonify({"error": "PSF not found"}), 404
-        if isinstance(psf_blob, bytes):
-            text = psf_blob.decode("utf-8", errors="replace")
-        else:
-            text = str(psf_blob)
-        return Response(text, mimetype="text/plain")
+        return _text_response("psf", source, pid, psf_blob)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,18 +1,46 @@
 from flask import Blueprint, jsonify, request, render_template
 import os, importlib, json
+from itertools import islice
 
-import sqlite3
-from extractors.toxins_filter import search_toxins
-from typing import List
+from extractors.motif_dsl import MotifSyntaxError, compile_motifs, search_motif_rows
+from extractors.proteome_scan import DEFAULT_CHUNK_ROWS
+from extractors.toxins_filter import (
+    check_gap_range,
+    count_toxins,
+    encode_cursor,
+    fetch_rows,
+    hit_order,
+    iter_toxins,
+    search_cache_stats,
+    search_toxins,
+)
+from typing import List, Optional
+
+from src.infrastructure.db.sqlite.scan_job_repository_sqlite import SqliteScanJobRepository
+from src.infrastructure.db.sqlite.shared_cache_sqlite import DEFAULT_SHARED_CACHE_PATH, SqliteSharedCache
+from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
+from src.infrastructure.jobs import proteome_scan_worker
 
 # Path to AI-exported JSON that may contain ic50 extraction results per accession
 _EXPORTS_AI_PATH = os.path.join(os.getcwd(), "exports", "filtered_accessions_nav1_7_analysis.json")
-_AI_IC50_CACHE = None
+# Caché compartida entre workers; se invalida sola cuando cambia el JSON
+_SHARED_CACHE: Optional[SqliteSharedCache] = None
+
+
+def _shared_cache() -> SqliteSharedCache:
+    global _SHARED_CACHE
+    if _SHARED_CACHE is None:
+        _SHARED_CACHE = SqliteSharedCache(_SHARED_CACHE_PATH)
+    return _SHARED_CACHE
+
 
 def _load_ai_ic50_map():
-    global _AI_IC50_CACHE
-    if _AI_IC50_CACHE is not None:
-        return _AI_IC50_CACHE
+    return _shared_cache().get_or_compute(
+        "toxin_filter_ai_ic50", _EXPORTS_AI_PATH, [_EXPORTS_AI_PATH], _build_ai_ic50_map
+    )
+
+
+def _build_ai_ic50_map():
     mapping = {}
     try:
         if os.path.exists(_EXPORTS_AI_PATH):
@@ -42,7 +70,6 @@ def _load_ai_ic50_map():
                     mapping[str(acc)] = has_ic50
     except Exception:
         mapping = {}
-    _AI_IC50_CACHE = mapping
     return mapping
 
 toxin_filter_v2 = Blueprint("toxin_filter", __name__)
@@ -52,77 +79,206 @@ try:
     _cfg_mod = importlib.import_module('src.config')
     _CFG = getattr(_cfg_mod, 'load_app_config')(os.getcwd())
     _DB_PATH = getattr(_CFG, 'db_path', 'database/toxins.db')
+    _SHARED_CACHE_PATH = getattr(_CFG, 'shared_cache_path', DEFAULT_SHARED_CACHE_PATH)
 except Exception:
     _DB_PATH = 'database/toxins.db'
+    _SHARED_CACHE_PATH = DEFAULT_SHARED_CACHE_PATH
+
+
+# Accessions to exclude from views and visualizers
+EXCLUDED_ACCESSIONS = {"P83303", "P84507", "P0DL84", "P84508", "D2Y1X8", "P0DL72", "P0CH54"}
+# Tamaño de página por defecto / máximo con limit+cursor
+_DEFAULT_LIMIT = 50
+_MAX_LIMIT = 500
+
+
+def _enrich_hits(hits: List[dict]) -> List[dict]:
+    # Enrich hits with accession_number and Nav1.7 flags and apply exclusions.
+    # One query per 500 hits; the hit name is the accession (see pick_name_column)
+    info = SqliteToxinRepository(_DB_PATH).enrich_hits(
+        [h.get("peptide_id") for h in hits], nav_code_column="accession_number"
+    )
+    # Also consult AI-exported JSON cache for ic50 detection
+    try:
+        ai_map = _load_ai_ic50_map()
+    except Exception:
+        ai_map = {}
+    enriched: List[dict] = []
+    for h in hits:
+        row = info.get(h.get("peptide_id")) or {}
+        accession = row.get("accession_number")
+
+        # Skip explicitly excluded accessions
+        if accession and accession in EXCLUDED_ACCESSIONS:
+            continue
+
+        # Nav1.7 table check: existence and IC50 presence
+        nav = row.get("nav1_7")
+        nav_exists = nav is not None
+        nav_has_ic50 = nav_exists and nav["ic50_value"] is not None
+        if accession and ai_map.get(str(accession)):
+            nav_has_ic50 = True
+            nav_exists = True
+
+        new_h = dict(h)
+        new_h["accession_number"] = accession
+        new_h["nav1_7_exists"] = nav_exists
+        new_h["nav1_7_has_ic50"] = nav_has_ic50
+        enriched.append(new_h)
+    return enriched
 
 
 @toxin_filter_v2.get("/v2/toxin_filter")
 def toxin_filter_api():
+    """Hits del filtro de motivo.
+
+    Sin ``limit``/``cursor`` devuelve todos (como siempre). Con ellos devuelve
+    una ventana en orden estable (score desc, peptide_id) y ``next_cursor``
+    para pedir la siguiente; sólo esa ventana se enriquece y ``count`` sale de
+    un conteo sobre el índice de motivos.
+    """
     try:
-        gap_min = int(request.args.get("gap_min", 3))
-        gap_max = int(request.args.get("gap_max", 6))
+        try:
+            gap_min = int(request.args.get("gap_min", 3))
+            gap_max = int(request.args.get("gap_max", 6))
+            check_gap_range(gap_min, gap_max)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         require_pair = request.args.get("require_pair", "0") in ("1", "true", "True")
-        # Accessions to exclude from views and visualizers
-        EXCLUDED_ACCESSIONS = {"P83303", "P84507", "P0DL84", "P84508", "D2Y1X8", "P0DL72", "P0CH54"}
-
-        hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=_DB_PATH)
-
-        # Enrich hits with accession_number and Nav1.7 flags and apply exclusions
-        enriched: List[dict] = []
-        conn = sqlite3.connect(_DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        for h in hits:
-            pid = h.get("peptide_id")
-            accession = None
-            try:
-                cur.execute("SELECT accession_number FROM Peptides WHERE peptide_id = ?", (pid,))
-                row = cur.fetchone()
-                if row:
-                    accession = row["accession_number"]
-            except Exception:
-                accession = None
-
-            # Skip explicitly excluded accessions
-            if accession and accession in EXCLUDED_ACCESSIONS:
-                continue
-
-            # Nav1.7 table check: existence and IC50 presence
-            nav_exists = False
-            nav_has_ic50 = False
-            try:
-                cur.execute(
-                    "SELECT ic50_value FROM Nav1_7_InhibitorPeptides WHERE accession_number = ? OR peptide_code = ? LIMIT 1",
-                    (accession, h.get("name")),
-                )
-                nrow = cur.fetchone()
-                if nrow:
-                    nav_exists = True
-                    # consider non-null ic50_value as having IC50
-                    nav_has_ic50 = nrow["ic50_value"] is not None
-            except Exception:
-                pass
-            # Also consult AI-exported JSON cache for ic50 detection
-            try:
-                ai_map = _load_ai_ic50_map()
-                if accession and ai_map.get(str(accession)):
-                    nav_has_ic50 = True
-                    nav_exists = True
-            except Exception:
-                pass
-
-            new_h = dict(h)
-            new_h["accession_number"] = accession
-            new_h["nav1_7_exists"] = nav_exists
-            new_h["nav1_7_has_ic50"] = nav_has_ic50
-            enriched.append(new_h)
-
-        conn.close()
-        return jsonify({"count": len(enriched), "results": enriched})
+        limit_arg = request.args.get("limit")
+        cursor = request.args.get("cursor") or None
+
+        if limit_arg is None and cursor is None:
+            hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=_DB_PATH)
+            enriched = _enrich_hits(hits)
+            return jsonify({"count": len(enriched), "results": enriched})
+
+        limit = max(1, min(_MAX_LIMIT, int(limit_arg or _DEFAULT_LIMIT)))
+        search = dict(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=_DB_PATH)
+        excluded_ids = SqliteToxinRepository(_DB_PATH).peptide_ids_by_accession(EXCLUDED_ACCESSIONS)
+        try:
+            hits_iter = iter_toxins(cursor=cursor, exclude_ids=excluded_ids, **search)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Un hit de más indica si hay página siguiente
+        window = list(islice(hits_iter, limit + 1))
+        has_more = len(window) > limit
+        window = window[:limit]
+        return jsonify({
+            "count": count_toxins(exclude_ids=excluded_ids, **search),
+            "limit": limit,
+            "next_cursor": encode_cursor(hit_order(window[-1])) if has_more else None,
+            "results": _enrich_hits(window),
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@toxin_filter_v2.get("/v2/toxin_filter/cache_stats")
+def toxin_filter_cache_stats():
+    # Aciertos/fallos de la memoización de search_toxins en este worker
+    return jsonify(search_cache_stats())
+
+
+def _motif_patterns(raw) -> List[tuple]:
+    # Acepta ["C-X3-7-C"], {"ick": "C-X3-7-C"} o [{"name": ..., "pattern": ...}]
+    if isinstance(raw, str):
+        raw = [raw]
+    if isinstance(raw, dict):
+        return [(str(k), str(v)) for k, v in raw.items()]
+    patterns = []
+    for i, item in enumerate(raw or []):
+        if isinstance(item, dict):
+            patterns.append((str(item.get("name") or f"m{i + 1}"), str(item.get("pattern") or "")))
+        else:
+            patterns.append((f"m{i + 1}", str(item)))
+    return patterns
+
+
+@toxin_filter_v2.route("/v2/motif_search", methods=["GET", "POST"])
+def motif_search_api():
+    """Búsqueda con el lenguaje de motivos (ver extractors/motif_dsl.py).
+
+    GET ?motif=C-X3-7-C-X3-8-CC&motif=... o POST {"motifs": {"ick": "C-X3-7-C-X3-8-CC"}}.
+    """
+    body = request.get_json(silent=True) or {}
+    raw = body.get("motifs") if body else request.args.getlist("motif")
+    try:
+        compiled = compile_motifs(_motif_patterns(raw))
+    except MotifSyntaxError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        results = search_motif_rows(fetch_rows(_DB_PATH), compiled)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"count": len(results), "motifs": compiled.describe(), "results": results})
+
+
+# Cada barrido corre en su propio proceso (proteome_scan_worker), que reparte los bloques
+_PROTEOME_SCAN_WORKERS = os.cpu_count() or 1
+# Bloques demasiado pequeños son una tarea por proteína; demasiado grandes, mucha memoria por proceso
+_CHUNK_ROWS_MIN, _CHUNK_ROWS_MAX = 500, 50_000
+# Cada barrido ya ocupa todos los núcleos: uno activo a la vez en todo el servidor
+_MAX_ACTIVE_SCANS = 1
+
+
+def _scan_jobs() -> SqliteScanJobRepository:
+    # Estado de los trabajos junto a la caché compartida: visible desde cualquier worker
+    return SqliteScanJobRepository(_SHARED_CACHE_PATH)
+
+
+@toxin_filter_v2.post("/v2/proteome_scan")
+def proteome_scan_start():
+    """Barrido de motivos sobre las secuencias precursoras completas (Proteins.sequence).
+
+    Cuerpo: ``{"gap_min": 3, "gap_max": 6, "require_pair": false}`` para el motivo
+    NaSpTx o ``{"motifs": {"ick": "C-X3-7-C"}}`` para el lenguaje de motivos.
+    ``chunk_rows`` se acota a [500, 50000]. Responde 202 con ``status_url``; el
+    resultado queda en ese recurso. Si ya hay un barrido activo con los mismos
+    parámetros se devuelve ese; si hay otro distinto en curso, 429.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        patterns = _motif_patterns(body.get("motifs")) or None
+        if patterns:
+            compile_motifs(patterns)
+        params = {
+            "gap_min": int(body.get("gap_min", 3)),
+            "gap_max": int(body.get("gap_max", 6)),
+            "require_pair": bool(body.get("require_pair", False)),
+            "motifs": patterns,
+            "chunk_rows": min(max(int(body.get("chunk_rows", DEFAULT_CHUNK_ROWS)), _CHUNK_ROWS_MIN), _CHUNK_ROWS_MAX),
+        }
+        check_gap_range(params["gap_min"], params["gap_max"])
+    except (TypeError, ValueError) as e:
+        # MotifSyntaxError y check_gap_range lanzan ValueError
+        return jsonify({"error": str(e)}), 400
+    jobs = _scan_jobs()
+    claimed = jobs.claim("proteome_scan", params, _MAX_ACTIVE_SCANS)
+    if claimed is None:
+        return jsonify({"error": "ya hay un barrido de proteoma en curso; reintentar más tarde"}), 429, {"Retry-After": "30"}
+    job_id, created = claimed
+    status = "queued"
+    if created:
+        try:
+            proteome_scan_worker.launch(_SHARED_CACHE_PATH, job_id, _DB_PATH, _PROTEOME_SCAN_WORKERS)
+        except OSError as e:
+            jobs.update(job_id, status="error", error=str(e))
+            return jsonify({"error": str(e)}), 500
+    else:
+        status = (jobs.get(job_id) or {}).get("status", status)
+    status_url = f"/v2/proteome_scan/{job_id}"
+    return jsonify({"job_id": job_id, "status": status, "status_url": status_url}), 202, {"Location": status_url}
+
+
+@toxin_filter_v2.get("/v2/proteome_scan/<job_id>")
+def proteome_scan_status(job_id: str):
+    job = _scan_jobs().get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+
 @toxin_filter_v2.get("/toxin_filter")
 def toxin_filter_page():
     return render_template("toxin_filter.html")
@@ -0,0 +1,36 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _round(values, ndigits: int = 6) -> List[Any]:
+    return np.round(np.asarray(values, dtype=float), ndigits).tolist()
+
+
+class GnmPresenter:
+    @staticmethod
+    def present(result: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        gnm = result["gnm"]
+        node_ids = list(gnm.get("node_ids", []))
+        msf = np.asarray(gnm.get("msf", []), dtype=float)
+        peak = float(msf.max()) if msf.size and msf.max() > 0 else 1.0
+
+        residues = []
+        for i, node in enumerate(node_ids):
+            parts = str(node).split(":")
+            entry: Dict[str, Any] = {"id": node, "msf": round(float(msf[i]), 6), "msf_normalized": round(float(msf[i]) / peak, 6)}
+            if len(parts) >= 3:
+                entry.update({"chain": parts[0], "residueName": parts[1], "residue": parts[2]})
+            residues.append(entry)
+
+        payload: Dict[str, Any] = {
+            "meta": {**meta, "cached": bool(result.get("cached")), "num_residues": len(node_ids),
+                     "num_modes": int(len(gnm.get("eigenvalues", [])))},
+            "residues": residues,
+            "eigenvalues": _round(gnm.get("eigenvalues", [])),
+            "modes": _round(gnm.get("eigenvectors", [])),
+        }
+        corr: Optional[np.ndarray] = result.get("cross_correlation")
+        if corr is not None:
+            payload["cross_correlation"] = {"residues": node_ids, "matrix": _round(corr, 4)}
+        return payload
@@ -68,6 +68,8 @@ class GraphPresenter:
                 "betweenness_centrality": summary_stats.get("betweenness", {}),
                 "closeness_centrality": summary_stats.get("closeness", {}),
                 "clustering_coefficient": summary_stats.get("clustering", {}),
+                "eigenvector_centrality": summary_stats.get("eigenvector", {}),
+                "pagerank": summary_stats.get("pagerank", {}),
                 "seq_distance_avg": summary_stats.get("seq_distance_avg", {}),
                 "long_contacts_prop": summary_stats.get("long_contacts_prop", {}),
             }
@@ -78,9 +80,16 @@ class GraphPresenter:
                 "betweenness_centrality": _top5(cent.get("betweenness", {})),
                 "closeness_centrality": _top5(cent.get("closeness", {})),
                 "clustering_coefficient": _top5(cent.get("clustering", {})),
+                "eigenvector_centrality": _top5(cent.get("eigenvector", {})),
+                "pagerank": _top5(cent.get("pagerank", {})),
                 "seq_distance_avg": _top5(cent.get("seq_distance_avg", {})),
                 "long_contacts_prop": _top5(cent.get("long_contacts_prop", {})),
             }
+            # Variantes ponderadas por distancia (?weighted=1)
+            for key in ("betweenness_weighted", "closeness_weighted"):
+                if key in cent:
+                    summary_stats_renamed[key] = calculate_summary_statistics({key: cent[key]}).get(key, {})
+                    top5_residues[key] = _top5(cent[key])
 
         except ImportError as e:
             # Fallback if import fails
@@ -105,6 +114,8 @@ class GraphPresenter:
                 "betweenness_centrality": _stats(cent.get("betweenness", {})),
                 "closeness_centrality": _stats(cent.get("closeness", {})),
                 "clustering_coefficient": _stats(cent.get("clustering", {})),
+                "eigenvector_centrality": _stats(cent.get("eigenvector", {})),
+                "pagerank": _stats(cent.get("pagerank", {})),
                 "seq_distance_avg": _stats(cent.get("seq_distance_avg", {})),
                 "long_contacts_prop": _stats(cent.get("long_contacts_prop", {})),
             }
@@ -115,6 +126,8 @@ class GraphPresenter:
                 "betweenness_centrality": _top5(cent.get("betweenness", {})),
                 "closeness_centrality": _top5(cent.get("closeness", {})),
                 "clustering_coefficient": _top5(cent.get("clustering", {})),
+                "eigenvector_centrality": _top5(cent.get("eigenvector", {})),
+                "pagerank": _top5(cent.get("pagerank", {})),
                 "seq_distance_avg": _top5(cent.get("seq_distance_avg", {})),
                 "long_contacts_prop": _top5(cent.get("long_contacts_prop", {})),
             }
@@ -125,6 +138,8 @@ class GraphPresenter:
             "betweenness_centrality": summary_stats_renamed.get("betweenness_centrality", {}).get("top_residues", "-"),
             "closeness_centrality": summary_stats_renamed.get("closeness_centrality", {}).get("top_residues", "-"),
             "clustering_coefficient": summary_stats_renamed.get("clustering_coefficient", {}).get("top_residues", "-"),
+            "eigenvector_centrality": summary_stats_renamed.get("eigenvector_centrality", {}).get("top_residues", "-"),
+            "pagerank": summary_stats_renamed.get("pagerank", {}).get("top_residues", "-"),
             "seq_distance_avg": summary_stats_renamed.get("seq_distance_avg", {}).get("top_residues", "-"),
             "long_contacts_prop": summary_stats_renamed.get("long_contacts_prop", {}).get("top_residues", "-"),
         }
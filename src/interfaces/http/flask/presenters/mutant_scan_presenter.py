@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+import numpy as np
+
+
+def _r(value: float, ndigits: int = 4) -> float:
+    return round(float(value), ndigits)
+
+
+class MutantScanPresenter:
+    @staticmethod
+    def present(result: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        wt = result["wild_type"]
+        sequence = wt["sequence"]
+        keys = result["residue_keys"]
+        mutants = []
+        for i, pos in enumerate(np.asarray(result["positions"]).tolist()):
+            chain, resseq = keys[pos]
+            mutant = chr(int(result["residues"][i]))
+            mutants.append({
+                # Notación de los mutantes en pdbs/: residuo WT + número PDB + residuo nuevo
+                "mutation": f"{sequence[pos]}{resseq}{mutant}",
+                "position": pos + 1,
+                "chain": chain,
+                "residue": resseq,
+                "wild_type": sequence[pos],
+                "mutant": mutant,
+                "score": _r(result["score"][i]),
+                "motif_retained": bool(result["motif_retained"][i]),
+                "motif_score": int(result["motif_score"][i]),
+                "charge_delta": _r(result["charge_delta"][i], 2),
+                "net_charge": _r(wt["net_charge"] + result["charge_delta"][i], 2),
+                "dipole_magnitude": _r(result["dipole_magnitude"][i]),
+                "dipole_delta": _r(result["dipole_delta"][i]),
+                "dipole_shift": _r(result["dipole_shift"][i]),
+                "dipole_angle_deg": _r(result["dipole_angle_deg"][i]),
+                "dipole_vector": [_r(c) for c in result["dipole"][i]],
+            })
+        return {
+            "meta": {**meta, "rank_by": result["rank_by"], "weights": result["weights"], "total_mutants": result["total"]},
+            "wild_type": {
+                "sequence": sequence,
+                "net_charge": _r(wt["net_charge"], 2),
+                "dipole_magnitude": _r(wt["dipole_magnitude"]),
+                "dipole_vector": [_r(c) for c in wt["dipole"]],
+                "motif_score": wt["motif_score"],
+            },
+            "mutants": mutants,
+        }
@@ -166,10 +166,8 @@ async function initializeViewerPage() {
         updateDipoleStatus("Calculando dipolo...", "calculating");
         
         try {
-            // Usar únicamente el endpoint v2 para el cálculo del dipolo
-            const response = await fetch(`/v2/dipole/${group}/${id}`, {
-                method: 'POST'
-            });
+            // Usar únicamente el endpoint v2 para el cálculo del dipolo (GET: el navegador revalida con ETag)
+            const response = await fetch(`/v2/dipole/${group}/${id}`);
             const payload = await response.json();
             const result = payload.result || payload; // v2 presenter returns {meta, result}
             if (result.success) {
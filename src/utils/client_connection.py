@@ -0,0 +1,43 @@
+"""Detección de desconexión del cliente HTTP a partir del entorno WSGI."""
+from __future__ import annotations
+
+import select
+import socket
+from typing import Any, Callable, Dict, Optional
+
+# Claves con las que los servidores WSGI exponen el socket del cliente
+_SOCKET_KEYS = ("gunicorn.socket", "werkzeug.socket")
+
+
+def _client_socket(environ: Dict[str, Any]) -> Optional[socket.socket]:
+    for key in _SOCKET_KEYS:
+        sock = environ.get(key)
+        if sock is None:
+            continue
+        sock = getattr(sock, "socket", sock)
+        if hasattr(sock, "recv") and hasattr(sock, "fileno"):
+            return sock
+    return None
+
+
+def disconnect_checker(environ: Dict[str, Any]) -> Callable[[], bool]:
+    """Devuelve un callable que indica si el cliente cerró la conexión.
+
+    Consulta el socket sin bloquear: si es legible y ``recv(MSG_PEEK)`` devuelve
+    b'' el par cerró la conexión. Si el servidor no expone el socket, el callable
+    siempre devuelve False (sin cancelación dura).
+    """
+    sock = _client_socket(environ or {})
+    if sock is None:
+        return lambda: False
+
+    def _is_disconnected() -> bool:
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return False
+            return sock.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    return _is_disconnected
@@ -0,0 +1,45 @@
+"""ETag fuertes y peticiones condicionales (If-None-Match) para respuestas derivadas de una estructura."""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Optional
+
+# Subir cuando cambie la forma de alguna respuesta cacheable (presenters, serialización)
+RESPONSE_VERSION = "1"
+
+# Caché sólo del navegador; pasado el minuto revalida con If-None-Match (304 si no cambió nada)
+PRIVATE_CACHE_CONTROL = "private, max-age=60, must-revalidate"
+
+
+def strong_etag(*parts: Any) -> str:
+    """ETag fuerte (entre comillas) a partir de las entradas que determinan la respuesta.
+
+    Las partes suelen ser el hash del blob de la estructura, los parámetros de la
+    petición y la versión del código que produce el resultado.
+    """
+    key = "\x1f".join("" if p is None else str(p) for p in (RESPONSE_VERSION, *parts))
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica si la cabecera ``If-None-Match`` contiene ``etag`` (comparación débil, RFC 9110).
+
+    Acepta el sufijo que añade Flask-Compress al comprimir (``"abc:gzip"``).
+    """
+    if not if_none_match:
+        return False
+    wanted = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"').split(":", 1)[0] == wanted:
+            return True
+    return False
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Cabeceras de una respuesta cacheable (también las del 304)."""
+    return {"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL}
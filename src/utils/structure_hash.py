@@ -0,0 +1,18 @@
+"""Hash estable del contenido de una estructura (blob PDB/PSF)."""
+from __future__ import annotations
+
+import hashlib
+from typing import Optional, Union
+
+
+def structure_hash(data: Optional[Union[bytes, bytearray, str]]) -> Optional[str]:
+    """Devuelve el SHA-256 hex del contenido recibido (bytes o texto).
+
+    Se usa como clave de caché: cuando el pipeline reescribe el blob cambia el
+    hash y las entradas materializadas asociadas quedan invalidadas solas.
+    """
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="ignore")
+    return hashlib.sha256(bytes(data)).hexdigest()
@@ -0,0 +1,73 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter, _protein_arrays, dipole_from_arrays
+from src.infrastructure.graphein.dipole_trajectory import autocorrelation, dipole_time_series, dipoles_from_frames
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))
+pytestmark = pytest.mark.skipif(not FILTERED, reason='estructuras filtradas no disponibles')
+
+
+def _write_trajectory(path, pdb, n_frames, seed=0):
+    # Fotogramas = estructura rotada alrededor de z y trasladada; el dipolo gira con ella
+    import MDAnalysis as mda
+
+    u = mda.Universe(pdb)
+    base = u.atoms.positions.copy()
+    rng = np.random.default_rng(seed)
+    frames = []
+    with mda.Writer(str(path), n_atoms=len(u.atoms)) as w:
+        for f in range(n_frames):
+            a = 0.3 * f
+            rot = np.array([[np.cos(a), -np.sin(a), 0], [np.sin(a), np.cos(a), 0], [0, 0, 1]])
+            u.atoms.positions = base @ rot.T + rng.normal(size=3)
+            frames.append(u.atoms.positions.copy())
+            w.write(u.atoms)
+    return np.stack(frames)
+
+
+def test_frame_block_kernel_matches_single_structure_kernel():
+    charges, positions, masses = _protein_arrays(FILTERED[0], FILTERED[0][:-4] + '.psf')
+    block = np.stack([positions, positions + 1.0])
+    vectors, centers = dipoles_from_frames(charges, masses, block)
+    ref = dipole_from_arrays(charges, positions, masses)
+    np.testing.assert_allclose(vectors[0], ref['vector'], atol=1e-6)
+    np.testing.assert_allclose(centers[1], np.add(ref['center_of_mass'], 1.0), atol=1e-6)
+
+
+@pytest.mark.parametrize('ext', ['dcd', 'xtc'])
+def test_time_series_is_chunk_invariant_and_tracks_rotation(tmp_path, ext):
+    pdb, psf = FILTERED[0], FILTERED[0][:-4] + '.psf'
+    traj = tmp_path / f'run.{ext}'
+    frames = _write_trajectory(traj, pdb, 11)
+    charges, _, masses = _protein_arrays(pdb, psf)
+
+    whole = dipole_time_series(psf, str(traj), chunk_frames=64)
+    small = DipoleAdapter().calculate_dipole_time_series(psf, str(traj), chunk_frames=3)
+    assert whole['n_frames'] == small['n_frames'] == 11
+    np.testing.assert_allclose(small['vectors'], whole['vectors'], atol=1e-9)
+
+    expected = [dipole_from_arrays(charges, f, masses)['vector'] for f in frames]
+    np.testing.assert_allclose(whole['vectors'], expected, atol=0.05 if ext == 'xtc' else 1e-3)
+    # Rotación rígida: módulo constante, ángulo con z constante
+    assert np.ptp(whole['magnitudes']) < 0.01 * whole['mean_magnitude']
+    assert np.ptp(whole['angle_with_z_axis_degrees']) < 0.5
+
+    acf = whole['autocorrelation']
+    assert acf['vector'][0] == pytest.approx(1.0) and acf['orientation'][0] == pytest.approx(1.0)
+    assert len(dipole_time_series(psf, str(traj), step=2, max_lag=3)['autocorrelation']['vector']) == 4
+
+
+def test_autocorrelation_matches_direct_average():
+    series = np.random.default_rng(1).normal(size=(40, 3))
+    direct = [np.mean(np.sum(series[: 40 - k] * series[k:], axis=1)) for k in range(40)]
+    np.testing.assert_allclose(autocorrelation(series), np.divide(direct, direct[0]), atol=1e-12)
+
+
+def test_trajectory_atom_count_must_match_psf(tmp_path):
+    traj = tmp_path / 'other.dcd'
+    _write_trajectory(traj, FILTERED[1], 2)
+    with pytest.raises(ValueError):
+        dipole_time_series(FILTERED[0][:-4] + '.psf', str(traj))
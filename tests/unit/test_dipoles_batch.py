@@ -0,0 +1,78 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.application.use_cases.resolve_peptide_dipoles import ResolvePeptideDipoles
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter, dipole_from_psf
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))[:5]
+pytestmark = pytest.mark.skipif(not FILTERED, reason='estructuras filtradas no disponibles')
+
+
+def _read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def test_batch_matches_single_calls_and_keeps_order():
+    pairs = [(p, p[:-4] + '.psf') for p in FILTERED]
+    pairs.insert(2, ('missing.pdb', 'missing.psf'))
+    pairs.append((_read(FILTERED[0]), _read(FILTERED[0][:-4] + '.psf')))
+    pairs.append((b'not a pdb', b'PSF\n'))
+
+    results = DipoleAdapter().calculate_dipoles_batch(pairs)
+    assert len(results) == len(pairs)
+    assert results[2]['success'] is False and results[-1]['success'] is False
+    for (pdb, psf), res in zip(pairs, results):
+        if res['success']:
+            ref = dipole_from_psf(pdb, psf)
+            np.testing.assert_allclose(res['dipole']['vector'], ref['vector'], atol=1e-9)
+            np.testing.assert_allclose(res['dipole']['center_of_mass'], ref['center_of_mass'], atol=1e-9)
+    assert results[-2]['dipole']['magnitude'] == pytest.approx(results[0]['dipole']['magnitude'])
+
+
+def test_request_path_batches_never_start_a_pool(monkeypatch):
+    from src.infrastructure.graphein import dipole_adapter
+
+    def _no_pool(*args, **kwargs):
+        raise AssertionError('pool de procesos en la ruta de petición')
+
+    monkeypatch.setattr(dipole_adapter, 'ProcessPoolExecutor', _no_pool)
+    pairs = [(p, p[:-4] + '.psf') for p in FILTERED] * 8
+    assert len(pairs) >= dipole_adapter.BATCH_POOL_MIN_ITEMS
+    results = DipoleAdapter().calculate_dipoles_batch(pairs)
+    assert all(r['success'] for r in results)
+
+
+class FakeStructures:
+    def __init__(self, blobs):
+        self.blobs = blobs
+
+    def get_pdb(self, source, pid):
+        return self.blobs.get(pid, (None, None))[0]
+
+    def get_psf(self, source, pid):
+        return self.blobs.get(pid, (None, None))[1]
+
+
+def test_batch_endpoint_reports_per_id_results(monkeypatch):
+    from src.interfaces.http.flask.app import create_app_v2
+    from src.interfaces.http.flask.controllers.v2 import dipole_controller as dctl
+
+    app = create_app_v2()
+    blobs = {i + 1: (_read(p), _read(p[:-4] + '.psf')) for i, p in enumerate(FILTERED[:2])}
+    # monkeypatch restaura los globales del controlador al terminar
+    monkeypatch.setattr(dctl, '_structures', FakeStructures(blobs))
+    monkeypatch.setattr(dctl, '_batch_uc', ResolvePeptideDipoles(DipoleAdapter()))
+    with app.test_client() as c:
+        r = c.post('/v2/dipoles/batch', json={'ids': [2, 99, 1, 2]})
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data['meta'] == {'source': 'nav1_7', 'count': 4, 'failed': 1}
+        assert [item['id'] for item in data['result']] == [2, 99, 1, 2]
+        assert data['result'][1]['error'] == 'No encontrado'
+        assert data['result'][0]['dipole'] == data['result'][3]['dipole']
+
+        assert c.post('/v2/dipoles/batch', json={'ids': []}).status_code == 400
+        assert c.post('/v2/dipoles/batch', json={'ids': [1], 'source': 'x'}).status_code == 400
@@ -0,0 +1,88 @@
+import time
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.application.use_cases.compute_gnm import ComputeGnm, ComputeGnmInput
+from src.infrastructure.db.sqlite.gnm_repository_sqlite import SqliteGnmRepository
+from src.infrastructure.graph.gnm import cross_correlations, gnm_analysis, kirchhoff_matrix
+
+
+def _contact_graph(n, seed=0):
+    # Cadena con contactos i→i+1 e i→i+3 más algunos de largo alcance
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    for i in range(n):
+        G.add_node(f"A:ALA:{i + 1}:CA")
+    nodes = list(G.nodes())
+    for i in range(n - 1):
+        G.add_edge(nodes[i], nodes[i + 1], weight=3.8)
+    for i in range(n - 3):
+        G.add_edge(nodes[i], nodes[i + 3], weight=6.0)
+    for _ in range(n // 4):
+        i, j = rng.integers(0, n, 2)
+        if i != j:
+            G.add_edge(nodes[i], nodes[j], weight=7.0)
+    return G
+
+
+@pytest.mark.parametrize('n', [40, 120])
+def test_gnm_matches_dense_pseudoinverse(n):
+    # n=120 ejercita eigsh (shift-invert); n=40 la descomposición densa
+    G = _contact_graph(n)
+    _, K = kirchhoff_matrix(G)
+    vals = np.linalg.eigvalsh(K.toarray())
+
+    res = gnm_analysis(G, n_modes=10)
+    assert np.allclose(res['eigenvalues'], vals[1:11], atol=1e-8)
+
+    full = gnm_analysis(G, n_modes=n)
+    pinv = np.linalg.pinv(K.toarray())
+    assert np.allclose(full['msf'], np.diag(pinv), atol=1e-8)
+    C = cross_correlations(full['eigenvalues'], full['eigenvectors'], normalized=False)
+    assert np.allclose(C, pinv, atol=1e-8)
+
+
+def test_gnm_skips_one_zero_mode_per_component():
+    G = _contact_graph(30)
+    G.add_edge('B:GLY:1:CA', 'B:GLY:2:CA')
+    res = gnm_analysis(G, n_modes=100)
+    assert len(res['eigenvalues']) == G.number_of_nodes() - 2
+    assert (res['eigenvalues'] > 1e-8).all()
+    corr = cross_correlations(res['eigenvalues'], res['eigenvectors'])
+    assert np.allclose(np.diag(corr), 1.0)
+
+
+def test_gnm_60_residues_is_fast():
+    G = _contact_graph(60)
+    started = time.perf_counter()
+    res = gnm_analysis(G)
+    cross_correlations(res['eigenvalues'], res['eigenvectors'])
+    assert time.perf_counter() - started < 0.5
+
+
+def test_compute_gnm_caches_by_structure_hash(tmp_path):
+    G = _contact_graph(25)
+
+    class Port:
+        builds = 0
+
+        def build_graph(self, pdb_path, granularity, threshold):
+            Port.builds += 1
+            assert granularity == 'CA'
+            return G
+
+        def compute_gnm(self, G, n_modes=20):
+            return gnm_analysis(G, n_modes=n_modes)
+
+    uc = ComputeGnm(Port(), SqliteGnmRepository(db_path=str(tmp_path / 'g.db')))
+    first = uc.execute(ComputeGnmInput('/tmp/x.pdb', 7.3, n_modes=8, structure_hash='h'))
+    second = uc.execute(ComputeGnmInput('/tmp/x.pdb', 7.3, n_modes=8, structure_hash='h'))
+    assert (first['cached'], second['cached']) == (False, True)
+    assert Port.builds == 1
+    assert second['gnm']['node_ids'] == first['gnm']['node_ids']
+    assert np.allclose(second['gnm']['msf'], first['gnm']['msf'])
+    assert np.allclose(second['cross_correlation'], first['cross_correlation'])
+    # Otro umbral u otro número de modos es otra clave
+    assert uc.execute(ComputeGnmInput('/tmp/x.pdb', 8.0, n_modes=8, structure_hash='h'))['cached'] is False
@@ -0,0 +1,123 @@
+import sqlite3
+from pathlib import Path
+
+from src.application.use_cases.build_protein_graph import BuildProteinGraph, BuildProteinGraphInput
+from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+from src.domain.models.value_objects import Granularity, DistanceThreshold
+
+
+PROPS = {
+    'num_nodes': 3,
+    'num_edges': 2,
+    'density': 0.6667,
+    'centrality': {
+        'degree': {'A:CYS:1': 0.5, 'A:GLY:2': 1.0, 'A:LYS:3': 0.5},
+        'betweenness': {'A:CYS:1': 0.0, 'A:GLY:2': 1.0, 'A:LYS:3': 0.0},
+        'closeness': {'A:CYS:1': 0.6667, 'A:GLY:2': 1.0, 'A:LYS:3': 0.6667},
+        'clustering': {'A:CYS:1': 0.0, 'A:GLY:2': 0.0, 'A:LYS:3': 0.0},
+    },
+}
+
+
+class CountingGraphPort:
+    def __init__(self):
+        self.metrics_calls = 0
+
+    def build_graph(self, pdb_path, granularity, distance_threshold):
+        return {'graph': True}
+
+    def compute_metrics(self, G):
+        self.metrics_calls += 1
+        return dict(PROPS)
+
+
+def test_repository_roundtrip_and_version_invalidation(tmp_path: Path):
+    db = str(tmp_path / 'm.db')
+    repo = SqliteGraphMetricsRepository(db_path=db)
+    repo.save('h1', Granularity.CA, DistanceThreshold(10.0), PROPS)
+
+    # Granularity/threshold are normalized (enum vs str, float rounding)
+    got = repo.get('h1', 'ca', 10.0)
+    assert got['num_nodes'] == 3
+    assert got['centrality']['betweenness']['A:GLY:2'] == 1.0
+    assert got['centrality']['closeness'] == PROPS['centrality']['closeness']
+
+    # Other hash / version / threshold -> miss
+    assert repo.get('h2', 'CA', 10.0) is None
+    assert repo.get('h1', 'CA', 8.0) is None
+    bumped = SqliteGraphMetricsRepository(db_path=db, metric_version='999')
+    assert bumped.get('h1', 'CA', 10.0) is None
+    assert bumped.delete_stale() == 1
+    assert repo.get('h1', 'CA', 10.0) is None
+
+
+def test_get_centrality_requires_node_coverage(tmp_path: Path):
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    repo.save('h1', 'CA', 10.0, PROPS)
+    assert repo.get_centrality('h1', 'CA', 10.0, nodes=['A:CYS:1', 'A:LYS:3']) is not None
+    assert repo.get_centrality('h1', 'CA', 10.0, nodes=['A:CYS:1', 'A:TRP:9']) is None
+    assert repo.get_centrality(None, 'CA', 10.0) is None
+
+
+def test_build_protein_graph_uses_materialized_metrics(tmp_path: Path):
+    port = CountingGraphPort()
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    uc = BuildProteinGraph(port, repo)
+    inp = BuildProteinGraphInput(pdb_path='/tmp/x.pdb', granularity='CA', distance_threshold=10.0, structure_hash='abc')
+
+    first = uc.execute(inp)
+    second = uc.execute(inp)
+    assert port.metrics_calls == 1
+    assert first['metrics_cached'] is False and second['metrics_cached'] is True
+    assert second['properties']['centrality']['degree'] == PROPS['centrality']['degree']
+
+    # Without hash the cache is bypassed
+    uc.execute(BuildProteinGraphInput(pdb_path='/tmp/x.pdb', granularity='CA', distance_threshold=10.0))
+    assert port.metrics_calls == 2
+
+
+def test_populate_cli_inline_skips_existing(tmp_path: Path):
+    from tools.populate_graph_metrics import populate
+
+    pdb_text = Path('pdbs/WT/generated/hwt4_Hh2a_WT.pdb').read_bytes()
+    db = str(tmp_path / 't.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE Nav1_7_InhibitorPeptides (id INTEGER PRIMARY KEY, peptide_code TEXT, pdb_blob BLOB)")
+    conn.execute("INSERT INTO Nav1_7_InhibitorPeptides VALUES (1, 'WT', ?)", (pdb_text,))
+    conn.execute("INSERT INTO Nav1_7_InhibitorPeptides VALUES (2, 'WT_copy', ?)", (pdb_text,))
+    conn.commit()
+    conn.close()
+
+    summary = populate(db_path=db, sources=['nav1_7'], granularities=['CA'], thresholds=[10.0], workers=1)
+    assert summary['computed'] == 1 and summary['failed'] == 0
+
+    repo = SqliteGraphMetricsRepository(db_path=db)
+    from src.utils.structure_hash import structure_hash
+    props = repo.get(structure_hash(pdb_text), 'CA', 10.0)
+    assert props['num_nodes'] > 0
+    assert len(props['centrality']['betweenness']) == props['num_nodes']
+
+    again = populate(db_path=db, sources=['nav1_7'], granularities=['CA'], thresholds=[10.0], workers=1)
+    assert again['computed'] == 0 and again['skipped'] == 2
+
+
+def test_cached_centrality_kwargs_shared_by_exports(tmp_path: Path):
+    import networkx as nx
+    from src.application.use_cases.cached_metrics import cached_centrality_kwargs
+    from src.utils.structure_hash import structure_hash
+
+    G = nx.Graph([('A:CYS:1', 'A:GLY:2'), ('A:GLY:2', 'A:LYS:3')])
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    repo.save(structure_hash(b'PDB'), 'CA', 10.0, PROPS)
+
+    assert cached_centrality_kwargs(repo, b'PDB', 'CA', 10.0, G) == {'centrality': repo.get_centrality(structure_hash(b'PDB'), 'CA', 10.0)}
+    # Sin betweenness_weighted la fila no sirve para una exportación ponderada
+    assert cached_centrality_kwargs(repo, b'PDB', 'CA', 10.0, G, weighted=True) == {}
+    assert cached_centrality_kwargs(repo, b'OTRO', 'CA', 10.0, G) == {}
+    assert cached_centrality_kwargs(None, b'PDB', 'CA', 10.0, G) == {}
+
+    class Broken:
+        def get_centrality(self, *args, **kwargs):
+            raise RuntimeError('db locked')
+
+    assert cached_centrality_kwargs(Broken(), b'PDB', 'CA', 10.0, G) == {}
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from extractors import toxins_filter as tf
+from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
+from src.interfaces.http.flask.controllers.v2 import toxins_filter_controller as ctrl
+
+MOTIF = 'CCCCAIVCSAAWCKLC'
+
+
+def _make_db(path, n_hits):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Proteins (accession_number TEXT PRIMARY KEY, description TEXT);
+        CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, accession_number TEXT, peptide_name TEXT,
+                               sequence TEXT, model_source TEXT, pdb_file BLOB);
+        CREATE TABLE Nav1_7_InhibitorPeptides (id INTEGER PRIMARY KEY, peptide_code TEXT, accession_number TEXT,
+                                               ic50_value REAL, ic50_unit TEXT, pdb_blob BLOB, psf_blob BLOB);
+    """)
+    for i in range(1, n_hits + 1):
+        acc = f'P{i:05d}'
+        conn.execute("INSERT INTO Peptides VALUES (?, ?, ?, ?, 'PDB', ?)",
+                     (i, acc, f'tox{i}', MOTIF, b'x' * 5000 if i % 2 else None))
+        conn.execute("INSERT INTO Proteins VALUES (?, ?)", (acc, f'desc {i}'))
+    conn.execute("INSERT INTO Peptides VALUES (?, 'P83303', 'excluida', ?, NULL, NULL)", (n_hits + 1, MOTIF))
+    conn.executemany("INSERT INTO Nav1_7_InhibitorPeptides VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (1, 'code1', 'P00001', 10.0, 'nM', b'pdb', None),
+        (2, 'dup', 'P00001', 99.0, 'nM', None, None),
+        (3, 'tox2', None, None, None, None, b'psf'),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_enrich_hits_returns_flags_without_blobs(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, 3)
+    info = SqliteToxinRepository(db).enrich_hits([1, 2, 3, 3, None, 999])
+    assert sorted(info) == [1, 2, 3]
+    assert info[1]['has_pdb'] and not info[2]['has_pdb'] and info[1]['description'] == 'desc 1'
+    assert info[1]['nav1_7'] == {'id': 1, 'peptide_code': 'code1', 'ic50_value': 10.0, 'ic50_unit': 'nM',
+                                 'has_pdb': True, 'has_psf': False}
+    # Por peptide_code = peptide_name (por defecto) o = accession
+    assert info[2]['nav1_7']['id'] == 3 and info[2]['nav1_7']['has_psf']
+    assert SqliteToxinRepository(db).enrich_hits([2], nav_code_column='accession_number')[2]['nav1_7'] is None
+    assert info[3]['nav1_7'] is None
+    with pytest.raises(ValueError):
+        SqliteToxinRepository(db).enrich_hits([1], nav_code_column='sequence; DROP')
+
+
+def test_enrich_hits_without_optional_tables(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, accession_number TEXT, peptide_name TEXT, "
+                 "sequence TEXT, model_source TEXT, pdb_file BLOB)")
+    conn.execute("INSERT INTO Peptides VALUES (1, 'P1', 'a', 'AC', NULL, NULL)")
+    conn.commit()
+    conn.close()
+    assert SqliteToxinRepository(db).enrich_hits([1])[1]['nav1_7'] is None
+
+
+@pytest.fixture
+def counted_statements(monkeypatch):
+    statements = []
+    real_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(sqlite3, 'connect', connect)
+    return statements
+
+
+@pytest.mark.parametrize('n_hits', [4, 120])
+def test_toxin_filter_statements_do_not_grow_with_hits(tmp_path, monkeypatch, counted_statements, n_hits):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, n_hits)
+    monkeypatch.setattr(ctrl, '_DB_PATH', db)
+    monkeypatch.setattr(ctrl, '_load_ai_ic50_map', lambda: {})
+    tf.clear_search_cache()
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.toxin_filter_v2)
+    client = app.test_client()
+
+    client.get('/v2/toxin_filter')  # calienta la memoización de search_toxins
+    counted_statements.clear()
+    data = client.get('/v2/toxin_filter').get_json()
+    tf.clear_search_cache()
+
+    assert data['count'] == n_hits
+    first = next(r for r in data['results'] if r['peptide_id'] == 1)
+    assert first['nav1_7_exists'] and first['nav1_7_has_ic50']
+    selects = [s for s in counted_statements if s.lstrip().upper().startswith('SELECT')]
+    # versión de la base + un SELECT de enriquecimiento, con 4 o con 120 hits
+    assert len(selects) == 2
+    assert sum('Nav1_7_InhibitorPeptides' in s for s in selects) == 1
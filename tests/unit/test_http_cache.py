@@ -0,0 +1,188 @@
+import pytest
+
+from src.interfaces.http.flask.app import create_app_v2
+from src.interfaces.http.flask.controllers import graphs_controller as gctl
+from src.interfaces.http.flask.controllers.v2 import dipole_controller as dctl
+from src.interfaces.http.flask.controllers.v2 import structures_controller as sctl
+from src.utils.http_cache import PRIVATE_CACHE_CONTROL, etag_matches, strong_etag
+
+PDB = b'ATOM      1  CA  GLY A   1       0.000   0.000   0.000  1.00  0.00           C\nEND\n'
+
+
+def test_etag_matching_rules():
+    tag = strong_etag('graph', 'abc', 'CA', 10.0)
+    assert tag.startswith('"') and tag == strong_etag('graph', 'abc', 'CA', 10.0)
+    assert tag != strong_etag('graph', 'abc', 'CA', 8.0)
+    assert etag_matches(tag, tag)
+    assert etag_matches(f'"other", W/{tag}', tag)
+    # Flask-Compress añade el algoritmo al ETag fuerte de la respuesta comprimida
+    assert etag_matches(tag[:-1] + ':gzip"', tag)
+    assert etag_matches('*', tag)
+    assert not etag_matches(None, tag) and not etag_matches('"other"', tag)
+
+
+class _Db:
+    def __init__(self):
+        self.pdb = PDB
+
+    def get_complete_toxin_data(self, source, pid):
+        return {'pdb_data': self.pdb}
+
+
+class _Pdb:
+    def __init__(self):
+        self.prepared = 0
+
+    def prepare_temp_pdb(self, content):
+        self.prepared += 1
+        return 'unused.pdb'
+
+
+class _Tmp:
+    def cleanup(self, paths):
+        pass
+
+
+class _GraphUc:
+    def __init__(self):
+        self.calls = 0
+        self.approximate = False
+
+    def execute(self, inp):
+        self.calls += 1
+        props = {'num_nodes': 1, 'num_edges': 0, 'approximate': self.approximate}
+        # La segunda construcción sale de graph_metrics: el cuerpo no debe cambiar
+        return {'properties': props, 'graph': None, 'metrics_cached': self.calls > 1}
+
+
+@pytest.fixture
+def graph_client(monkeypatch):
+    # La fábrica configura las dependencias de los controladores: los dobles van después
+    app = create_app_v2()
+    db, pdb, uc = _Db(), _Pdb(), _GraphUc()
+    monkeypatch.setattr(gctl, '_db', db)
+    monkeypatch.setattr(gctl, '_pdb', pdb)
+    monkeypatch.setattr(gctl, '_tmp', _Tmp())
+    monkeypatch.setattr(gctl, '_build_graph_uc', uc)
+    with app.test_client() as client:
+        yield client, db, pdb, uc
+
+
+def test_graph_304_skips_all_graph_work(graph_client):
+    client, db, pdb, uc = graph_client
+    url = '/v2/proteins/nav1_7/1/graph?raw=1&granularity=CA&threshold=10'
+    first = client.get(url)
+    assert first.status_code == 200 and uc.calls == 1
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == PRIVATE_CACHE_CONTROL
+
+    again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.headers['ETag'] == etag
+    assert again.headers['Cache-Control'] == PRIVATE_CACHE_CONTROL
+    assert uc.calls == 1 and pdb.prepared == 1
+
+    # Otro umbral u otro blob → otra clave y se recalcula
+    other = client.get(url.replace('threshold=10', 'threshold=8'), headers={'If-None-Match': etag})
+    assert other.status_code == 200 and other.headers['ETag'] != etag
+    db.pdb = PDB.replace(b'0.000  1.00', b'1.000  1.00')
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert uc.calls == 3
+
+
+def test_same_etag_means_same_body(graph_client):
+    client, _, _, uc = graph_client
+    url = '/v2/proteins/nav1_7/1/graph?raw=1'
+    first, second = client.get(url), client.get(url)
+    assert uc.calls == 2 and first.headers['ETag'] == second.headers['ETag']
+    assert first.get_data() == second.get_data()
+    assert 'metrics_cached' not in first.get_json()['meta']
+
+
+def test_approximate_graph_is_not_cacheable(graph_client):
+    client, _, _, uc = graph_client
+    uc.approximate = True
+    r = client.get('/v2/proteins/nav1_7/1/graph?raw=1')
+    assert r.status_code == 200
+    assert 'ETag' not in r.headers
+    assert 'no-store' in r.headers['Cache-Control']
+
+
+class _SharedRowUc:
+    """Como BuildProteinGraph con graph_metrics: weighted=1 amplía la fila que luego lee weighted=0."""
+
+    def __init__(self):
+        self.row = {'degree': {'A:GLY:1': 0.0}}
+
+    def execute(self, inp):
+        if inp.weighted:
+            self.row.update(betweenness_weighted={'A:GLY:1': 0.0}, closeness_weighted={'A:GLY:1': 0.0})
+        props = {'num_nodes': 1, 'num_edges': 0, 'centrality': dict(self.row), 'approximation': {}, 'approximate': False}
+        return {'properties': props, 'graph': None, 'metrics_cached': len(self.row) > 1}
+
+
+class _Viz:
+    def create_complete_visualization(self, G, granularity, pid):
+        return {}
+
+    def convert_numpy_to_lists(self, data):
+        return data
+
+
+def test_weighted_request_does_not_change_unweighted_body(graph_client, monkeypatch):
+    client, _, _, _ = graph_client
+    monkeypatch.setattr(gctl, '_build_graph_uc', _SharedRowUc())
+    monkeypatch.setattr(gctl, '_viz', _Viz())
+    url = '/v2/proteins/nav1_7/1/graph'
+    first = client.get(url)
+    weighted = client.get(url + '?weighted=1')
+    third = client.get(url)
+    assert 'betweenness_weighted' in weighted.get_json()['properties']['centrality']
+    assert first.headers['ETag'] == third.headers['ETag']
+    assert first.get_data() == third.get_data()
+    assert 'betweenness_weighted' not in third.get_json()['properties']['centrality']
+
+
+class _Structures:
+    def get_pdb(self, source, pid):
+        return PDB if pid == 1 else None
+
+    def get_psf(self, source, pid):
+        return b'PSF\n' if pid == 1 else None
+
+
+def test_structure_endpoints_answer_304(monkeypatch):
+    app = create_app_v2()
+    monkeypatch.setattr(sctl, '_structures', _Structures())
+    with app.test_client() as client:
+        for kind in ('pdb', 'psf'):
+            r = client.get(f'/v2/structures/nav1_7/1/{kind}')
+            assert r.status_code == 200 and r.headers['Cache-Control'] == PRIVATE_CACHE_CONTROL
+            again = client.get(f'/v2/structures/nav1_7/1/{kind}', headers={'If-None-Match': r.headers['ETag']})
+            assert again.status_code == 304 and again.get_data() == b''
+        assert client.get('/v2/structures/nav1_7/2/pdb').status_code == 404
+
+
+class _DipoleUc:
+    def __init__(self):
+        self.inputs = []
+
+    def execute(self, inp):
+        self.inputs.append(inp)
+        return {'success': True, 'dipole': {'magnitude': 1.0}}
+
+
+def test_dipole_get_is_conditional(monkeypatch):
+    app = create_app_v2()
+    uc = _DipoleUc()
+    monkeypatch.setattr(dctl, '_structures', _Structures())
+    monkeypatch.setattr(dctl, '_dipole_uc', uc)
+    with app.test_client() as client:
+        r = client.get('/v2/dipole/nav1_7/1')
+        assert r.status_code == 200 and uc.inputs[0].pdb_data == PDB and uc.inputs[0].psf_data == b'PSF\n'
+        etag = r.headers['ETag']
+        assert client.get('/v2/dipole/nav1_7/1', headers={'If-None-Match': etag}).status_code == 304
+        assert len(uc.inputs) == 1
+        # POST no es una petición condicional: siempre calcula
+        assert client.post('/v2/dipole/nav1_7/1', headers={'If-None-Match': etag}).status_code == 200
+        assert len(uc.inputs) == 2
@@ -0,0 +1,88 @@
+import socket
+
+import networkx as nx
+import pytest
+
+from src.application.use_cases.build_protein_graph import BuildProteinGraph, BuildProteinGraphInput
+from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+from src.infrastructure.graph.csr_centrality import MetricBudget, MetricsCancelled, shortest_path_centralities
+from src.infrastructure.graph.graph_metrics import compute_comprehensive_metrics
+from src.utils.client_connection import disconnect_checker
+
+
+class StepClock:
+    """Reloj falso: avanza ``step`` segundos en cada lectura."""
+
+    def __init__(self, step):
+        self.t = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.t += self.step
+        return self.t
+
+
+def test_csr_brandes_matches_networkx():
+    G = nx.karate_club_graph()
+    G.add_edge(100, 101)  # componente desconectada
+    res = shortest_path_centralities(G, batch_size=7)
+    bc = nx.betweenness_centrality(G)
+    cc = nx.closeness_centrality(G)
+    assert res['info']['approximate'] is False
+    for n in G:
+        assert res['betweenness'][n] == pytest.approx(bc[n], abs=1e-12)
+        assert res['closeness'][n] == pytest.approx(cc[n], abs=1e-12)
+
+
+def test_budget_exhaustion_returns_sampled_values():
+    G = nx.karate_club_graph()
+    budget = MetricBudget(1.0, clock=StepClock(0.3))
+    res = shortest_path_centralities(G, budget=budget, batch_size=4)
+    info = res['info']
+    assert info['approximate'] is True
+    assert 0 < info['sources_processed'] < G.number_of_nodes()
+    assert set(res['betweenness']) == set(G.nodes())
+    assert all(v >= 0 for v in res['closeness'].values())
+
+
+def test_cancellation_aborts_immediately():
+    G = nx.karate_club_graph()
+    with pytest.raises(MetricsCancelled):
+        shortest_path_centralities(G, budget=MetricBudget(None, is_cancelled=lambda: True))
+
+
+def test_degraded_metrics_are_flagged_and_not_cached(tmp_path):
+    G = nx.karate_club_graph()
+    expired = MetricBudget(1e-9)
+    result = compute_comprehensive_metrics(G, budget=expired)
+    assert result['approximation']['community_count']['method'] == 'label_propagation'
+
+    class Port:
+        calls = 0
+
+        def build_graph(self, *a):
+            return G
+
+        def compute_metrics(self, G, budget=None):
+            Port.calls += 1
+            return {'num_nodes': 34, 'centrality': {'degree': {}}, 'approximate': budget is not None}
+
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    uc = BuildProteinGraph(Port(), repo)
+    inp = BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h', budget=MetricBudget(5))
+    assert uc.execute(inp)['properties']['approximate'] is True
+    assert repo.get('h', 'CA', 10.0) is None
+    uc.execute(inp)
+    assert Port.calls == 2
+
+
+def test_disconnect_checker_detects_closed_peer():
+    server, client = socket.socketpair()
+    try:
+        check = disconnect_checker({'gunicorn.socket': server})
+        assert check() is False
+        client.close()
+        assert check() is True
+    finally:
+        server.close()
+    assert disconnect_checker({})() is False
@@ -0,0 +1,85 @@
+import random
+import re
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+
+from extractors.motif_dsl import MotifSyntaxError, compile_motifs, parse_motif
+from src.interfaces.http.flask.controllers.v2 import toxins_filter_controller as ctrl
+
+ICK = 'C-X3-7-C-X3-8-CC'
+
+
+def _to_regex(pattern):
+    # Traducción directa a regex para contrastar la existencia de coincidencias
+    elements, at_start, at_end = parse_motif(pattern)
+    parts = []
+    for e in elements:
+        cls = '.' if e.residues is None else '[' + ''.join(sorted(e.residues)) + ']'
+        parts.append(f'{cls}{{{e.min},{e.max}}}')
+    return re.compile(('^' if at_start else '') + ''.join(parts) + ('$' if at_end else ''))
+
+
+@pytest.mark.parametrize('pattern', [
+    ICK, 'C-X2-5-WCK-$hydro', '[FWY]2-{P}-x(1,2)-K', '<G-X2', 'CC-X(0,3)>', '[KR]-x(2,4)-[DE]', 'X2-C',
+    'C-X0-3-X0-3-X1-2-[KR]', '<X0-4-X0-4-C',
+])
+def test_automaton_agrees_with_regex(pattern):
+    rng = random.Random(pattern)
+    rx = _to_regex(pattern)
+    compiled = compile_motifs([('a', pattern), ('other', 'WCK')])
+    for _ in range(400):
+        seq = ''.join(rng.choice('CCCGKRDEFWYPSAWK') for _ in range(rng.randint(0, 40)))
+        hits = [h for h in compiled.search(seq) if h['motif'] == 'a']
+        assert bool(hits) == bool(rx.search(seq)), seq
+        for h in hits:
+            assert rx.fullmatch(seq[h['start']:h['end']]) or pattern.startswith('<') or pattern.endswith('>')
+
+
+def test_anchors_and_multiple_motifs_in_one_pass():
+    compiled = compile_motifs([('ick', ICK), ('nasp', 'c5=C-s=S-X2-5-w=WCK-$hydro')])
+    hits = compiled.search('gacaaaacaaaaccwCSAAWCKL')
+    assert [(h['motif'], h['start'], h['end']) for h in hits] == [('ick', 2, 14), ('nasp', 15, 23)]
+    assert hits[1]['anchors'] == {'c5': 15, 's': 16, 'w': 19}
+    assert compile_motifs([('ick', ICK), ('nasp', 'c5=C-s=S-X2-5-w=WCK-$hydro')]) is compiled
+
+
+def test_chained_wide_gaps_stay_polynomial():
+    compiled = compile_motifs([('m', 'W-X0-50-X0-50-X0-50-Y')])
+    t0 = time.perf_counter()
+    assert compiled.search('W' * 300) == []
+    hits = compiled.search('W' * 300 + 'Y')
+    assert time.perf_counter() - t0 < 2.0
+    assert hits and all(h['end'] == 301 for h in hits)
+
+
+@pytest.mark.parametrize('bad', ['', 'C--C', 'C-X3-', '[Z]', '$nope', 'C-X(9,2)', 'CC2', 'C-X99',
+                                 'W-X0-50-X0-50-X0-50-X0-50-Y', 'C' * 41])
+def test_syntax_errors(bad):
+    with pytest.raises(MotifSyntaxError):
+        compile_motifs([('m', bad)])
+
+
+def test_motif_search_endpoint(tmp_path, monkeypatch):
+    db = str(tmp_path / 'toxins.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, peptide_name TEXT, sequence TEXT)")
+    conn.executemany("INSERT INTO Peptides VALUES (?, ?, ?)",
+                     [(1, 'ick', 'GACAAAACAAAACCW'), (2, 'nada', 'GGGG')])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(ctrl, '_DB_PATH', db)
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.toxin_filter_v2)
+    client = app.test_client()
+
+    data = client.get('/v2/motif_search', query_string={'motif': ICK}).get_json()
+    assert data['count'] == 1 and data['results'][0]['name'] == 'ick'
+    assert data['motifs'][0]['seed'] == 'CC'
+
+    data = client.post('/v2/motif_search', json={'motifs': {'n': '<G-X2', 'w': 'CCW>'}}).get_json()
+    assert [r['motifs'] for r in data['results']] == [['n', 'w'], ['n']]
+    assert client.get('/v2/motif_search', query_string={'motif': 'C-X('}).status_code == 400
+    assert client.get('/v2/motif_search').status_code == 400
@@ -0,0 +1,91 @@
+import random
+import sqlite3
+
+from extractors import toxins_filter as tf
+from extractors.motif_features import extract_features, query_motif_hits, sync_motif_features
+
+MOTIFS = ['CCCCAIVCSAAWCKLC', 'CSGWCKF', 'WCKWCKL', 'CCCCCS', 'LIVCS']
+
+
+def _random_sequences(n, seed=0):
+    rng = random.Random(seed)
+    seqs = []
+    for _ in range(n):
+        parts = [rng.choice('ACDEFGHIKLMNPQRSTVWY') for _ in range(rng.randint(0, 12))]
+        for _ in range(rng.randint(1, 4)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(MOTIFS))
+        seqs.append(''.join(parts).lower() if rng.random() < 0.1 else ''.join(parts))
+    return seqs
+
+
+def _make_db(path, seqs):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, peptide_name TEXT, sequence TEXT)")
+    conn.executemany("INSERT INTO Peptides (peptide_name, sequence) VALUES (?, ?)",
+                     [(f'p{i}', s) for i, s in enumerate(seqs)] + [('vacío', None)])
+    conn.commit()
+    return conn
+
+
+def _indexed(db, **q):
+    conn = sqlite3.connect(db)
+    try:
+        return query_motif_hits(conn, **q)
+    finally:
+        conn.close()
+
+
+QUERIES = [dict(gap_min=a, gap_max=b, require_pair=p) for a, b in [(3, 6), (0, 2), (1, 12), (4, 4)] for p in (False, True)]
+
+
+def test_index_matches_sequence_scan_for_any_gap_range(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, _random_sequences(400)).close()
+    assert sync_motif_features(db) == 400
+    assert sync_motif_features(db) == 0
+
+    for q in QUERIES:
+        expected = tf.scan_toxins(db_path=db, **q)
+        assert _indexed(db, **q) == expected
+        assert tf.search_toxins(db_path=db, use_cache=False, **q) == expected
+    assert any(tf.scan_toxins(db_path=db, **q) for q in QUERIES)
+
+
+def test_sync_follows_inserts_edits_and_deletes(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    conn = _make_db(db, _random_sequences(50, seed=1))
+    sync_motif_features(db)
+
+    conn.execute("UPDATE Peptides SET sequence = 'GGGG' WHERE peptide_id IN (1, 2)")
+    conn.execute("DELETE FROM Peptides WHERE peptide_id = 3")
+    conn.execute("INSERT INTO Peptides (peptide_name, sequence) VALUES ('nuevo', 'CCCCAIVCSAAWCKLC')")
+    conn.commit()
+    assert sync_motif_features(db) == 3
+    assert conn.execute("SELECT count(*) FROM peptide_motif_features WHERE peptide_id = 3").fetchone() == (0,)
+    conn.close()
+    for q in QUERIES:
+        assert _indexed(db, **q) == tf.scan_toxins(db_path=db, **q)
+
+
+def test_features_of_one_sequence():
+    f = extract_features('ccccaivcsaawckLcWCKF')
+    assert f['cys_positions'] == [0, 1, 2, 3, 7, 12, 15, 17] and f['i_c5'] == 7 and f['i_s'] == 8
+    assert f['sites'] == [(11, 3, 'L'), (16, 8, 'F')]
+    assert (f['pair'], f['pair_start']) == ('IV', 5)
+    assert extract_features('CCCCCA')['i_s'] is None
+
+
+def test_unwritable_database_falls_back_to_scan(tmp_path, monkeypatch):
+    import extractors.motif_features as mf
+
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, _random_sequences(30, seed=2)).close()
+
+    def fail(*a, **k):
+        raise sqlite3.OperationalError('attempt to write a readonly database')
+
+    monkeypatch.setattr(mf, 'sync_motif_features', fail)
+    assert tf.search_toxins(db_path=db, use_cache=False) == tf.scan_toxins(db_path=db)
+    assert sqlite3.connect(db).execute(
+        "SELECT count(*) FROM sqlite_master WHERE name = 'peptide_motif_features'"
+    ).fetchone() == (0,)
@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+from src.interfaces.http.flask.controllers.v2 import motif_dipoles_controller as ctl
+
+
+def test_vectorized_metrics_match_scalar_helpers():
+    rng = np.random.default_rng(7)
+    dipoles = [{'normalized': list(v)} for v in rng.normal(size=(25, 3))]
+    dipoles += [{'vector': {'x': 0.0, 'y': 0.0, 'z': 0.0}}, {}, {'vector': [1, 2, 2]}]
+    ref_vec = ctl._normalize_vector([0.2, -0.4, 0.9])
+    ref_angles = ctl._compute_axis_angles(ref_vec)
+
+    vectors = ctl._stack_normalized_vectors(dipoles)
+    angles = ctl._axis_angles_matrix(vectors)
+    metrics = ctl._orientation_matrix(vectors, angles, ref_vec, ref_angles)
+    for i, dipole in enumerate(dipoles):
+        vec = ctl._get_normalized_vector(dipole)
+        if vec is None:
+            assert np.isnan(vectors[i]).all() and np.isnan(metrics['vector_angle'][i])
+            continue
+        expected = ctl._compute_orientation_metrics(vec, ref_vec, ctl._compute_axis_angles(vec), ref_angles)
+        np.testing.assert_allclose(vectors[i], vec, atol=1e-12)
+        assert math.isclose(metrics['vector_angle'][i], expected['vector_angle_vs_reference_deg'], abs_tol=1e-9)
+        assert math.isclose(metrics['l2'][i], expected['angle_diff_l2_deg'], abs_tol=1e-9)
+        assert math.isclose(metrics['l1'][i], expected['angle_diff_l1_deg'], abs_tol=1e-9)
+
+
+def test_page_selection_equals_stable_full_sort_with_ties():
+    rng = np.random.default_rng(3)
+    primary = rng.integers(0, 6, size=60).astype(float)
+    primary[[4, 9, 33]] = np.inf  # sin métrica: al final
+    secondary = rng.integers(0, 3, size=60).astype(float)
+    full = sorted(range(60), key=lambda i: (primary[i], secondary[i]))
+    for page_size in (1, 5, 7, 60):
+        for start in range(0, 60, page_size):
+            end = min(60, start + page_size)
+            assert ctl._page_indices(primary, secondary, start, end).tolist() == full[start:end]
+
+
+def test_cursor_windows_follow_the_full_order():
+    rng = np.random.default_rng(5)
+    primary = rng.integers(0, 4, size=40).astype(float)
+    primary[[2, 17]] = np.inf
+    secondary = rng.integers(0, 2, size=40).astype(float)
+    # Desempate por posición = orden de los hits (score desc, peptide_id)
+    neg_score = np.where(np.arange(40) < 25, -9, -8)
+    pids = np.arange(100, 140)
+    columns = (primary, secondary, neg_score, pids)
+    full = sorted(range(40), key=lambda i: (primary[i], secondary[i], i))
+
+    seen, after = [], None
+    while len(seen) < 40:
+        pool = np.arange(40) if after is None else np.flatnonzero(ctl._after_mask(columns, after))
+        page = pool[ctl._page_indices(primary[pool], secondary[pool], 0, min(6, len(pool)))]
+        seen += page.tolist()
+        after = tuple(col[page[-1]] for col in columns)
+    assert seen == full
+    assert not ctl._after_mask(columns, after).any()
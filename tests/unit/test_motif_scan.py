@@ -0,0 +1,63 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from extractors.motif_scan import encode_sequences, scan_hits, scan_motifs, scan_point_mutants
+from extractors.toxins_filter import Row, scan_rows
+
+MOTIFS = ['CCCCAIVCSAAWCKLC', 'CSGWCKF', 'WCKWCKL', 'CCCCCS', 'LIVCS', 'S-WCKL', 'SXWCKV']
+
+
+def _rows(n, seed=0, max_len=60):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        parts = [rng.choice('ACDEFGHIKLMNPQRSTVWY') for _ in range(rng.randint(0, max_len))]
+        for _ in range(rng.randint(0, 4)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(MOTIFS))
+        seq = ''.join(parts)
+        rows.append(Row(i, f'p{i}', seq.lower() if rng.random() < 0.1 else seq))
+    return rows
+
+
+@pytest.mark.parametrize('gap_min,gap_max', [(3, 6), (0, 2), (1, 12), (4, 4), (0, 0)])
+@pytest.mark.parametrize('require_pair', [False, True])
+def test_vectorized_scan_matches_per_sequence_scan(gap_min, gap_max, require_pair):
+    rows = _rows(3000)
+    expected = scan_rows(rows, gap_min, gap_max, require_pair)
+    assert scan_hits(rows, gap_min, gap_max, require_pair) == expected
+    if (gap_min, gap_max) == (3, 6):
+        assert len(expected) > 100
+
+
+@pytest.mark.parametrize('gap_min,gap_max', [(-1, 6), (6, 3)])
+def test_gap_ranges_where_scanners_could_differ_are_rejected(gap_min, gap_max):
+    with pytest.raises(ValueError):
+        scan_motifs(['CCCCAIVCSAAWCKLC'], gap_min, gap_max)
+    with pytest.raises(ValueError):
+        scan_point_mutants('CCCCAIVCSAAWCKLC', np.array([0]), np.array([65], dtype=np.uint8), gap_min, gap_max)
+
+
+def test_blocks_do_not_change_results():
+    seqs = [r.seq for r in _rows(500, seed=3, max_len=300)] + ['', 'C']
+    whole = scan_motifs(seqs)
+    tiny = scan_motifs(seqs, block_cells=64)
+    for a, b in zip(whole, tiny):
+        np.testing.assert_array_equal(a[whole.ok], b[whole.ok])
+    np.testing.assert_array_equal(whole.ok, tiny.ok)
+
+
+def test_encoding_pads_and_uppercases():
+    matrix, lengths = encode_sequences(['ab', 'Cñ', ''])
+    assert lengths.tolist() == [2, 2, 0] and matrix.shape == (3, 5)
+    assert bytes(matrix[0, :2]) == b'AB' and bytes(matrix[1, :2]) == b'C?' and not matrix[2].any()
+
+
+def test_hundred_thousand_sequences_in_seconds():
+    rows = _rows(100_000, seed=7)
+    t0 = time.perf_counter()
+    hits = scan_hits(rows)
+    assert time.perf_counter() - t0 < 10
+    assert hits and all(h['iW'] - h['iS'] == h['gap'] for h in hits)
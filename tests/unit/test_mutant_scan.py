@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from extractors.motif_scan import scan_motifs, scan_point_mutants
+from src.application.use_cases.scan_mutants import ScanMutants, ScanMutantsInput
+from src.infrastructure.graphein.dipole_adapter import dipole_from_topology
+from src.infrastructure.pdb.mutant_dipoles import AMINO_ACIDS, mutant_dipole_deltas, point_mutants, residue_dipole_terms
+from src.interfaces.http.flask.controllers import graphs_controller as ctrl
+
+WT_PDB = 'pdbs/WT/hwt4_Hh2a_WT.pdb'
+needs_wt = pytest.mark.skipif(not os.path.exists(WT_PDB), reason='estructura WT no disponible')
+
+
+def test_point_mutants_enumerates_19_per_position():
+    seq = 'ECLEIFKACNPS'
+    pos, res = point_mutants(seq)
+    assert len(pos) == 19 * len(seq)
+    assert not np.any(np.frombuffer(seq.encode(), dtype=np.uint8)[pos] == res)
+    pos, res = point_mutants(seq, 'A', [0, 4, 11])
+    assert pos.tolist() == [0, 4, 11] and bytes(res) == b'AAA'
+    with pytest.raises(ValueError):
+        point_mutants(seq, 'A', [12])
+
+
+def test_point_mutant_scan_matches_scanning_each_variant():
+    rng = np.random.default_rng(3)
+    seq = 'MKTG' + 'CCCCAIVCSAAWCKLC' + 'GKYA'
+    pos, res = point_mutants(seq)
+    pick = rng.choice(len(pos), size=300, replace=False)
+    pos, res = pos[pick], res[pick]
+    variants = [seq[:p] + chr(r) + seq[p + 1:] for p, r in zip(pos.tolist(), res.tolist())]
+    fast = scan_point_mutants(seq, pos, res, block_cells=2048)
+    slow = scan_motifs(variants)
+    for got, want in zip(fast, slow):
+        assert np.array_equal(got, want, equal_nan=True)
+    assert fast.ok.any() and not fast.ok.all()
+
+
+@needs_wt
+def test_wild_type_dipole_and_charge_deltas():
+    terms = residue_dipole_terms(WT_PDB)
+    ref = dipole_from_topology(WT_PDB)
+    assert terms.sequence == 'ECLEIFKACNPSNDQCCKSSKLVCSRKTRWCAYQI'
+    assert np.allclose(terms.dipole, ref['vector'], atol=1e-3)
+
+    pos = np.array([0, 0, 6, 2])
+    res = np.frombuffer(b'AKEV', dtype=np.uint8)
+    deltas = mutant_dipole_deltas(terms, pos, res)
+    # E1A pierde una carga negativa; E1K invierte el signo; K7E también; L3V es neutra
+    assert deltas['charge_delta'].tolist() == [1.0, 2.0, -2.0, 0.0]
+    assert deltas['dipole_shift'][3] == pytest.approx(0.0)
+    assert deltas['dipole_shift'][1] == pytest.approx(2 * deltas['dipole_shift'][0])
+
+
+@needs_wt
+def test_alanine_scan_ranks_charge_changes_first():
+    result = ScanMutants(scan_point_mutants).execute(
+        ScanMutantsInput(pdb=WT_PDB, targets='A', rank_by='abs_charge_delta', top_k=100)
+    )
+    # 35 residuos, dos de ellos ya alanina
+    assert result['total'] == 33
+    charged = sum(1 for aa in 'ECLEIFKACNPSNDQCCKSSKLVCSRKTRWCAYQI' if aa in 'DEKR')
+    assert (result['abs_charge_delta'][:charged] == 1).all()
+    assert (result['abs_charge_delta'][charged:] == 0).all()
+    assert set(result['motif_score'].tolist()) <= {0, 8, 9}
+
+
+class _StubDb:
+    def __init__(self, pdb_bytes):
+        self.pdb_bytes = pdb_bytes
+
+    def get_complete_toxin_data(self, source, pid):
+        return {'name': 'Hh2a', 'pdb_data': self.pdb_bytes} if pid == 1 else None
+
+
+@needs_wt
+def test_mutant_scan_endpoint(monkeypatch):
+    with open(WT_PDB, 'rb') as fh:
+        monkeypatch.setattr(ctrl, '_db', _StubDb(fh.read()))
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.graphs_v2)
+    client = app.test_client()
+
+    r = client.get('/v2/proteins/nav1_7/1/mutant_scan?targets=A&top_k=5&rank_by=dipole_shift')
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body['meta']['total_mutants'] == 33 and len(body['mutants']) == 5
+    shifts = [m['dipole_shift'] for m in body['mutants']]
+    assert shifts == sorted(shifts, reverse=True)
+    assert body['mutants'][0]['mutation'][-1] == 'A'
+
+    r = client.get('/v2/proteins/nav1_7/1/mutant_scan?positions=1&targets=' + AMINO_ACIDS)
+    assert [m['mutation'][:-1] for m in r.get_json()['mutants']] == ['E1'] * 19
+
+    assert client.get('/v2/proteins/nav1_7/1/mutant_scan?targets=AZ').status_code == 400
+    assert client.get('/v2/proteins/nav1_7/1/mutant_scan?positions=99').status_code == 400
+    # Fuera de 0 <= gap_min <= gap_max el escáner y scan_rows no coinciden: se rechaza
+    assert client.get('/v2/proteins/nav1_7/1/mutant_scan?gap_min=-2').status_code == 400
+    assert client.get('/v2/proteins/nav1_7/1/mutant_scan?gap_min=5&gap_max=4').status_code == 400
+    assert client.get('/v2/proteins/nav1_7/2/mutant_scan').status_code == 404
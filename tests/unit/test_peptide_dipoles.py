@@ -0,0 +1,138 @@
+import sqlite3
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.application.use_cases.resolve_peptide_dipoles import PeptideDipoleInput, ResolvePeptideDipoles
+from src.infrastructure.db.sqlite.peptide_dipole_repository_sqlite import SqlitePeptideDipoleRepository
+
+
+class FakeDipole:
+    def __init__(self):
+        self.calls = 0
+
+    def calculate_dipole_from_files(self, pdb_path, psf_path=None):
+        self.calls += 1
+        text = Path(pdb_path).read_text()
+        if 'BROKEN' in text:
+            raise ValueError('bad structure')
+        return {'vector': [0.0, 0.0, 2.0], 'magnitude': 2.0, 'normalized': [0.0, 0.0, 1.0],
+                'center_of_mass': [1.0, 2.0, 3.0], 'method': 'PSF' if psf_path else 'calculated'}
+
+    def process_dipole_calculation(self, pdb_data, psf_data=None):
+        self.calls += 1
+        return {'success': True, 'dipole': {'vector': [3.0, 0.0, 0.0], 'magnitude': 3.0, 'normalized': [1.0, 0.0, 0.0],
+                                            'center_of_mass': [0.0, 0.0, 0.0], 'method': 'PSF'}}
+
+
+def _files(tmp_path, name, pdb='ATOM', psf='PSF'):
+    pdb_path = tmp_path / f'{name}.pdb'
+    psf_path = tmp_path / f'{name}.psf'
+    pdb_path.write_text(pdb)
+    psf_path.write_text(psf)
+    return pdb_path, psf_path
+
+
+def test_dipoles_are_materialized_and_keyed_by_content(tmp_path):
+    db = str(tmp_path / 'd.db')
+    fake = FakeDipole()
+    uc = ResolvePeptideDipoles(fake, SqlitePeptideDipoleRepository(db_path=db))
+    pdb_path, psf_path = _files(tmp_path, 'P1')
+
+    first = uc.execute(PeptideDipoleInput(1, pdb_path=pdb_path, psf_path=psf_path, source='toxinas'))
+    second = uc.execute(PeptideDipoleInput(1, pdb_path=pdb_path, psf_path=psf_path))
+    assert (first['cached'], second['cached']) == (False, True)
+    assert second['dipole'] == first['dipole']
+    assert fake.calls == 1
+
+    row = sqlite3.connect(db).execute(
+        'SELECT magnitude, com_z, angle_z_deg, angle_x_deg, source FROM peptide_dipoles').fetchone()
+    assert row == (2.0, 3.0, 0.0, 90.0, 'toxinas')
+
+    # Otra versión del cálculo no reutiliza filas antiguas
+    key = uc._key(PeptideDipoleInput(1, pdb_path=pdb_path, psf_path=psf_path))
+    assert SqlitePeptideDipoleRepository(db_path=db, dipole_version='old').get(*key) is None
+
+    # Un PSF distinto es otra clave: se recalcula
+    psf_path.write_text('PSF v2')
+    assert uc.execute(PeptideDipoleInput(1, pdb_path=pdb_path, psf_path=psf_path))['cached'] is False
+    assert fake.calls == 2
+
+
+def test_batch_keeps_order_and_reports_per_item_errors(tmp_path):
+    fake = FakeDipole()
+    uc = ResolvePeptideDipoles(fake, SqlitePeptideDipoleRepository(db_path=str(tmp_path / 'd.db')))
+    good = _files(tmp_path, 'G')
+    bad = _files(tmp_path, 'B', pdb='BROKEN')
+    results = uc.execute_many([
+        PeptideDipoleInput(1, pdb_path=good[0], psf_path=good[1]),
+        PeptideDipoleInput(2, pdb_path=bad[0], psf_path=bad[1]),
+        PeptideDipoleInput(3, pdb_path=tmp_path / 'missing.pdb'),
+        PeptideDipoleInput(4, pdb_data=b'ATOM blob', psf_data=None),
+    ])
+    assert results[0]['dipole']['magnitude'] == 2.0
+    assert 'bad structure' in results[1]['error']
+    assert 'error' in results[2]
+    assert results[3]['dipole']['magnitude'] == 3.0
+    with pytest.raises(RuntimeError):
+        uc.execute(PeptideDipoleInput(2, pdb_path=bad[0], psf_path=bad[1]))
+
+
+def test_populate_cli_skips_existing_rows(tmp_path):
+    from tools.populate_peptide_dipoles import populate
+
+    src = Path('pdbs/filtered_psfs')
+    acc = 'B3EWN2'
+    if not (src / f'{acc}.pdb').exists():
+        pytest.skip('estructuras filtradas no disponibles')
+    filtered = tmp_path / 'filtered'
+    filtered.mkdir()
+    for ext in ('pdb', 'psf'):
+        shutil.copy(src / f'{acc}.{ext}', filtered / f'{acc}.{ext}')
+    db = str(tmp_path / 't.db')
+    conn = sqlite3.connect(db)
+    conn.execute('CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, accession_number TEXT)')
+    conn.execute('INSERT INTO Peptides VALUES (7, ?)', (acc,))
+    conn.commit()
+    conn.close()
+
+    first = populate(db_path=db, sources=['toxinas'], filtered_dir=str(filtered))
+    again = populate(db_path=db, sources=['toxinas'], filtered_dir=str(filtered))
+    assert (first['computed'], first['failed']) == (1, 0)
+    assert (again['computed'], again['skipped']) == (0, 1)
+
+
+def test_populate_workers_use_the_adapter_pool(tmp_path, monkeypatch):
+    from concurrent.futures import ProcessPoolExecutor
+
+    from src.infrastructure.graphein import dipole_adapter
+    from tools.populate_peptide_dipoles import populate
+
+    src = Path('pdbs/filtered_psfs')
+    acc = 'B3EWN2'
+    if not (src / f'{acc}.pdb').exists():
+        pytest.skip('estructuras filtradas no disponibles')
+    filtered = tmp_path / 'filtered'
+    filtered.mkdir()
+    n = dipole_adapter.BATCH_POOL_MIN_ITEMS
+    for k in range(n):
+        for ext in ('pdb', 'psf'):
+            shutil.copy(src / f'{acc}.{ext}', filtered / f'P{k}.{ext}')
+    db = str(tmp_path / 't.db')
+    conn = sqlite3.connect(db)
+    conn.execute('CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, accession_number TEXT)')
+    conn.executemany('INSERT INTO Peptides VALUES (?, ?)', [(k, f'P{k}') for k in range(n)])
+    conn.commit()
+    conn.close()
+
+    pools = []
+
+    class _Pool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(dipole_adapter, 'ProcessPoolExecutor', _Pool)
+    summary = populate(db_path=db, sources=['toxinas'], filtered_dir=str(filtered), workers=2)
+    assert (summary['computed'], summary['failed']) == (n, 0) and pools == [2]
@@ -0,0 +1,89 @@
+import networkx as nx
+import pytest
+
+from src.application.use_cases.build_protein_graph import BuildProteinGraph, BuildProteinGraphInput
+from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+from src.infrastructure.graph.csr_centrality import power_iteration_centralities
+from src.infrastructure.graph import graph_metrics
+from src.infrastructure.graph.graph_metrics import compute_comprehensive_metrics
+
+
+def _graph():
+    G = nx.Graph(nx.karate_club_graph())
+    G.add_edge(100, 101)  # componente aislada
+    G.add_node(200)       # nodo colgante para PageRank
+    return G
+
+
+def test_power_iteration_matches_networkx():
+    G = _graph()
+    res = power_iteration_centralities(G)
+    ev = nx.eigenvector_centrality(G, tol=1e-12, max_iter=10000)
+    pr = nx.pagerank(G, weight=None, tol=1e-12, max_iter=10000)
+    for n in G:
+        assert res['eigenvector'][n] == pytest.approx(ev[n], abs=1e-8)
+        assert res['pagerank'][n] == pytest.approx(pr[n], abs=1e-8)
+    assert res['info']['eigenvector']['converged'] and res['info']['pagerank']['converged']
+
+
+def test_warm_start_from_nearby_vectors_converges_faster():
+    G = _graph()
+    cold = power_iteration_centralities(G)
+    # Grafo ligeramente distinto (como un umbral algo mayor): una arista más
+    G.add_edge(0, 33)
+    warm = power_iteration_centralities(G, warm_start={'eigenvector': cold['eigenvector'], 'pagerank': cold['pagerank']})
+    fresh = power_iteration_centralities(G)
+    assert warm['info']['pagerank']['warm_start'] is True
+    assert warm['info']['eigenvector']['iterations'] < fresh['info']['eigenvector']['iterations']
+    assert warm['info']['pagerank']['iterations'] < fresh['info']['pagerank']['iterations']
+    for n in G:
+        assert warm['pagerank'][n] == pytest.approx(fresh['pagerank'][n], abs=1e-8)
+
+
+def test_iteration_cap_is_flagged_as_approximation(monkeypatch):
+    G = _graph()
+    res = power_iteration_centralities(G, max_iter=3, tol=1e-10)
+    info = res['info']['eigenvector']
+    assert (info['iterations'], info['converged'], info['tolerance'], info['warm_start']) == (3, False, 1e-10, False)
+    assert info['residual'] > info['tolerance']
+
+    # El tope alcanzado queda listado en approximation con sus iteraciones y tolerancia
+    monkeypatch.setattr(graph_metrics, 'POWER_ITERATION_MAX_ITER', 3)
+    result = compute_comprehensive_metrics(G)
+    for name in ('eigenvector', 'pagerank'):
+        flag = result['approximation'][name]
+        assert flag['method'] == 'power_iteration' and flag['converged'] is False
+        assert flag['iterations'] == 3 and flag['tolerance'] == graph_metrics.POWER_ITERATION_TOL
+        assert flag['residual'] > flag['tolerance']
+    assert 'eigenvector' in result['summary_statistics']
+    assert result['top_5_residues']['pagerank']
+
+    monkeypatch.undo()
+    converged = compute_comprehensive_metrics(nx.path_graph(4))
+    assert 'eigenvector' not in converged['approximation'] and 'pagerank' not in converged['approximation']
+
+
+def test_build_graph_warm_starts_from_nearest_threshold(tmp_path):
+    G = _graph()
+
+    class Port:
+        warm = []
+
+        def build_graph(self, *a):
+            return G
+
+        def compute_metrics(self, G, warm_start=None):
+            Port.warm.append(warm_start)
+            spectral = power_iteration_centralities(G, warm_start=warm_start)
+            return {'num_nodes': len(G), 'centrality': {'eigenvector': spectral['eigenvector'], 'pagerank': spectral['pagerank']}}
+
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    uc = BuildProteinGraph(Port(), repo)
+    uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h'))
+    uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.5, structure_hash='h'))
+    uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 14.0, structure_hash='h'))
+    assert Port.warm[0] is None
+    assert set(Port.warm[1]) == {'eigenvector', 'pagerank'}
+    assert Port.warm[2] is None  # demasiado lejos de 10.0 / 10.5
+    assert repo.get_nearest_centrality('h', 'CA', 10.4)['pagerank'] == pytest.approx(
+        repo.get_centrality('h', 'CA', 10.5)['pagerank'])
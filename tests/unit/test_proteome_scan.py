@@ -0,0 +1,157 @@
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from extractors.motif_dsl import MotifSyntaxError
+from extractors.motif_scan import scan_table
+from extractors.proteome_scan import id_ranges, main, scan_proteome
+from src.infrastructure.db.sqlite.scan_job_repository_sqlite import SqliteScanJobRepository
+from src.interfaces.http.flask.controllers.v2 import toxins_filter_controller as ctrl
+
+MOTIF = 'CCCCAIVCSAAWCKLC'
+N_PROTEINS = 100_000
+
+
+def _make_proteome(path, n, seed=0):
+    """n precursores aleatorios sin cisteínas; cada 997 uno lleva MOTIF en un desplazamiento conocido."""
+    rng = np.random.default_rng(seed)
+    alphabet = np.frombuffer(b'ADEFGHIKLMNPQRSTVWY', dtype=np.uint8)
+    lengths = rng.integers(30, 90, size=n)
+    letters = alphabet[rng.integers(0, len(alphabet), size=int(lengths.sum()))].tobytes().decode()
+    ends = np.cumsum(lengths)
+    planted = {}
+    rows = []
+    for i in range(n):
+        seq = letters[ends[i] - lengths[i]:ends[i]]
+        if i % 997 == 0:
+            offset = int(rng.integers(0, 20))
+            seq = seq[:offset] + MOTIF + seq[offset:]
+            planted[f'Q{i:06d}'] = offset
+        rows.append((f'Q{i:06d}', f'prot{i}', seq))
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Proteins (accession_number TEXT PRIMARY KEY, name TEXT, sequence TEXT)")
+    conn.executemany("INSERT INTO Proteins VALUES (?, ?, ?)", rows)
+    conn.execute("INSERT INTO Proteins VALUES ('SINSEQ', 'vacía', NULL)")
+    conn.commit()
+    conn.close()
+    return planted
+
+
+@pytest.fixture(scope='module')
+def proteome(tmp_path_factory):
+    db = str(tmp_path_factory.mktemp('proteome') / 'toxins.db')
+    return db, _make_proteome(db, N_PROTEINS)
+
+
+def test_parallel_chunks_match_single_pass_scan(proteome):
+    db, planted = proteome
+    expected = scan_table(db)
+    progress = []
+    result = scan_proteome(db, workers=2, chunk_rows=15_000, progress=lambda *p: progress.append(p))
+
+    assert result['scanned'] == N_PROTEINS and result['chunks'] == len(id_ranges(db, chunk_rows=15_000)) == 7
+    assert sorted(h['peptide_id'] for h in result['hits']) == sorted(h['peptide_id'] for h in expected)
+    assert {h['peptide_id']: h for h in result['hits']} == {h['peptide_id']: h for h in expected}
+    assert progress[-1] == (7, 7, N_PROTEINS)
+    # Desplazamientos en el precursor: C5 del motivo sembrado
+    assert {h['peptide_id']: h['iC5'] for h in result['hits']} == {
+        acc: offset + MOTIF.index('CS') for acc, offset in planted.items()
+    }
+
+
+def test_motif_language_patterns_and_single_worker(proteome):
+    db, planted = proteome
+    result = scan_proteome(db, patterns=[('core', 'S-X2-W-C-K')], workers=1, chunk_rows=40_000)
+    assert result['chunks'] == 3 and result['workers'] == 1
+    ids = [h['peptide_id'] for h in result['hits']]
+    assert ids == sorted(ids) and set(planted) <= set(ids)
+    first = next(h for h in result['hits'] if h['peptide_id'] in planted)
+    assert first['matches'][0]['start'] == planted[first['peptide_id']] + MOTIF.index('SAAW')
+    with pytest.raises(MotifSyntaxError):
+        scan_proteome(db, patterns=[('bad', 'C-X3-')])
+
+
+def test_cli_writes_summary(tmp_path, capsys):
+    db = str(tmp_path / 'toxins.db')
+    _make_proteome(db, 3000)
+    assert main(['--db', db, '--workers', '1', '--chunk-rows', '1000']) == 0
+    assert '3000 secuencias de Proteins (4 bloques' in capsys.readouterr().out
+
+
+def _wait(client, status_url, timeout=60):
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'error') or time.time() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_async_endpoint_reports_progress_and_result(tmp_path, monkeypatch):
+    db = str(tmp_path / 'toxins.db')
+    planted = _make_proteome(db, 5000)
+    monkeypatch.setattr(ctrl, '_DB_PATH', db)
+    monkeypatch.setattr(ctrl, '_SHARED_CACHE_PATH', str(tmp_path / 'cache' / 'shared.db'))
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.toxin_filter_v2)
+    client = app.test_client()
+
+    assert client.post('/v2/proteome_scan', json={'motifs': ['C-X3-']}).status_code == 400
+    resp = client.post('/v2/proteome_scan', json={'chunk_rows': 1000})
+    assert resp.status_code == 202 and resp.headers['Location'] == resp.get_json()['status_url']
+    job = _wait(client, resp.get_json()['status_url'])
+    assert job['status'] == 'done', job['error']
+    assert job['progress'] == {'chunks_done': 6, 'chunks_total': 6, 'scanned': 5000}
+    assert set(planted) <= {h['peptide_id'] for h in job['result']['hits']}
+    assert client.get('/v2/proteome_scan/nope').status_code == 404
+
+    # chunk_rows se acota: nunca una tarea por proteína
+    tiny = _wait(client, client.post('/v2/proteome_scan', json={'chunk_rows': 1}).get_json()['status_url'])
+    assert tiny['params']['chunk_rows'] == 500 and tiny['result']['chunks'] == 11
+
+
+def test_jobs_without_heartbeat_are_marked_stale(tmp_path):
+    jobs = SqliteScanJobRepository(str(tmp_path / 'jobs.db'), stale_after=60)
+    alive, dead = jobs.create('proteome_scan', {}), jobs.create('proteome_scan', {})
+    jobs.update(alive, status='running')
+    jobs.update(dead, status='running')
+    conn = sqlite3.connect(str(tmp_path / 'jobs.db'))
+    conn.execute("UPDATE scan_jobs SET updated_at = datetime('now', '-5 minutes')")
+    conn.commit()
+    conn.close()
+
+    jobs.touch(alive)
+    assert jobs.get(alive)['status'] == 'running'
+    job = jobs.get(dead)
+    assert job['status'] == 'error' and job['error'].startswith('stale')
+    # Un trabajo terminado no caduca
+    jobs.update(alive, status='done', result={'count': 0})
+    conn = sqlite3.connect(str(tmp_path / 'jobs.db'))
+    conn.execute("UPDATE scan_jobs SET updated_at = datetime('now', '-5 minutes')")
+    conn.commit()
+    conn.close()
+    assert jobs.get(alive)['status'] == 'done'
+
+
+def test_duplicate_scans_reuse_the_active_job_and_others_wait(tmp_path, monkeypatch):
+    launched = []
+    monkeypatch.setattr(ctrl, '_SHARED_CACHE_PATH', str(tmp_path / 'shared.db'))
+    monkeypatch.setattr(ctrl.proteome_scan_worker, 'launch', lambda *args: launched.append(args[1]))
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.toxin_filter_v2)
+    client = app.test_client()
+
+    first = client.post('/v2/proteome_scan', json={'gap_min': 3})
+    again = client.post('/v2/proteome_scan', json={'gap_max': 6, 'gap_min': 3})
+    assert first.status_code == again.status_code == 202
+    assert again.get_json()['job_id'] == first.get_json()['job_id'] and len(launched) == 1
+
+    busy = client.post('/v2/proteome_scan', json={'gap_min': 4})
+    assert busy.status_code == 429 and busy.headers['Retry-After'] == '30'
+
+    ctrl._scan_jobs().update(launched[0], status='done', result={'count': 0})
+    assert client.post('/v2/proteome_scan', json={'gap_min': 4}).status_code == 202
+    assert len(launched) == 2
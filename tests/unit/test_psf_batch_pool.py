@@ -0,0 +1,107 @@
+import glob
+import json
+import sys
+import textwrap
+
+import pytest
+
+from extractors.generate_filtered_psfs import MANIFEST_NAME, FilteredPSFGenerator
+from src.infrastructure.pdb.psf_writer import build_psf, format_psf
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))
+
+# Generador falso con el protocolo de psf_worker; una entrada con "HANG" no responde nunca
+STUB = textwrap.dedent('''
+    import os, sys, time
+    calls = sys.argv[1]
+    print("@@WORKER_READY", flush=True)
+    for line in sys.stdin:
+        fields = line.rstrip("\\n").split("\\t")
+        if fields[0] != "job":
+            break
+        _, job_id, pdb, prefix, segid, cutoff = fields
+        with open(calls, "a") as fh:
+            fh.write(os.path.basename(pdb) + "\\n")
+        if "HANG" in open(pdb).read():
+            time.sleep(60)
+        for ext in (".psf", ".pdb"):
+            with open(prefix + ext, "w") as fh:
+                fh.write(open(pdb).read())
+        print("PSF_OUT:%s.psf" % prefix, flush=True)
+        print("@@JOB_DONE %s ok" % job_id, flush=True)
+''')
+
+
+def _generator(tmp_path, **kwargs):
+    db = tmp_path / 'toxins.db'
+    db.touch()
+    return FilteredPSFGenerator(db_path=str(db), output_base=str(tmp_path / 'base'), **kwargs)
+
+
+def _calls(path):
+    return sorted(path.read_text().split()) if path.exists() else []
+
+
+def test_pool_times_out_hung_jobs_and_resumes_from_manifest(tmp_path, capsys):
+    stub, calls = tmp_path / 'fake_generator.py', tmp_path / 'calls.txt'
+    stub.write_text(STUB)
+    inputs, out = tmp_path / 'in', tmp_path / 'out'
+    inputs.mkdir()
+    for name in ('a', 'b', 'c', 'd', 'hang'):
+        (inputs / f'{name}.pdb').write_text(f'REMARK {name.upper() if name == "hang" else name}\n')
+
+    gen = _generator(tmp_path, worker_command=[sys.executable, str(stub), str(calls)], job_timeout=1.0, workers=2)
+    assert gen.process_batch_pdbs(inputs, out) == (4, 5)
+    report = capsys.readouterr().out
+    assert 'fallidos=1' in report and 'PDB/s con 2 workers' in report and 'FAIL hang' in report
+    assert (out / 'c.psf').read_text() == 'REMARK c\n'
+    manifest = json.loads((out / MANIFEST_NAME).read_text())['completed']
+    assert sorted(e['psf'] for e in manifest.values()) == ['a.psf', 'b.psf', 'c.psf', 'd.psf']
+    assert 'timeout' in (out / 'logs' / 'hang.log').read_text()
+
+    # Reanudar: sólo se repite lo fallido y lo que cambió de contenido
+    (inputs / 'hang.pdb').write_text('REMARK ya no cuelga\n')
+    (inputs / 'b.pdb').write_text('REMARK b v2\n')
+    calls.unlink()
+    assert gen.process_batch_pdbs(inputs, out, workers=1) == (5, 5)
+    assert _calls(calls) == ['b.pdb', 'hang.pdb']
+    assert (out / 'b.psf').read_text() == 'REMARK b v2\n'
+
+    # Otro cutoff es otra clave; --no-resume ignora el manifiesto
+    calls.unlink()
+    gen.process_batch_pdbs(inputs, out, disulfide_cutoff=2.5, resume=False)
+    assert len(_calls(calls)) == 5
+
+
+def test_duplicate_content_still_writes_each_stem(tmp_path):
+    stub, calls = tmp_path / 'fake_generator.py', tmp_path / 'calls.txt'
+    stub.write_text(STUB)
+    inputs, out = tmp_path / 'in', tmp_path / 'out'
+    inputs.mkdir()
+    for name in ('x', 'x_copy'):
+        (inputs / f'{name}.pdb').write_text('REMARK igual\n')
+
+    gen = _generator(tmp_path, worker_command=[sys.executable, str(stub), str(calls)], workers=1)
+    assert gen.process_batch_pdbs(inputs, out) == (2, 2)
+    assert _calls(calls) == ['x.pdb', 'x_copy.pdb']
+    assert (out / 'x_copy.psf').exists() and (out / 'x_copy.pdb').exists()
+
+    # Sin su salida en disco la entrada del manifiesto no basta para saltarla
+    (out / 'x.psf').unlink()
+    calls.unlink()
+    assert gen.process_batch_pdbs(inputs, out) == (2, 2)
+    assert _calls(calls) == ['x.pdb']
+
+
+@pytest.mark.skipif(len(FILTERED) < 2, reason='estructuras filtradas no disponibles')
+def test_native_pool_matches_in_process_writer(tmp_path):
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    for path in FILTERED[:2]:
+        (inputs / path.split('/')[-1]).write_bytes(open(path, 'rb').read())
+
+    gen = _generator(tmp_path, workers=2)
+    assert gen.process_batch_pdbs(inputs, tmp_path / 'out') == (2, 2)
+    for path in FILTERED[:2]:
+        name = path.split('/')[-1][:-4]
+        assert (tmp_path / 'out' / f'{name}.psf').read_text() == format_psf(build_psf(path))
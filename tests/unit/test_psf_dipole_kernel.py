@@ -0,0 +1,67 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter, dipole_from_psf
+from src.infrastructure.pdb.psf_reader import read_pdb_positions, read_psf_atoms
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))[:6]
+
+PSF = b"""PSF
+
+       1 !NTITLE
+ REMARKS test
+
+       3 !NATOM
+       1 PROA 1    LYS  NZ   NH3   -0.300000       14.0070           0
+       2 PROA 1    LYS  HZ1  HC     0.800000        1.0080           0
+       3 SOLV 2    TIP3 OH2  OT    -0.834000       15.9994           0
+
+       0 !NBOND: bonds
+"""
+
+PDB = b"""ATOM      1  NZ  LYS A   1       0.000   0.000   0.000  1.00  0.00      PROA N
+ATOM      2  HZ1 LYS A   1       0.000   0.000   1.000  1.00  0.00      PROA H
+ATOM      3  OH2 TIP3W   2      50.000  50.000  50.000  1.00  0.00      SOLV O
+END
+"""
+
+
+def test_reader_and_kernel_only_use_protein_atoms():
+    atoms = read_psf_atoms(PSF)
+    assert atoms.charges.tolist() == pytest.approx([-0.3, 0.8, -0.834])
+    assert atoms.protein_mask().tolist() == [True, True, False]
+    assert read_pdb_positions(PDB).shape == (3, 3)
+
+    dip = dipole_from_psf(PDB, PSF)
+    com_z = 1.008 / (14.007 + 1.008)
+    assert dip['center_of_mass'] == pytest.approx([0.0, 0.0, com_z])
+    assert dip['vector'] == pytest.approx([0.0, 0.0, -0.3 * -com_z + 0.8 * (1 - com_z)], abs=1e-6)
+    assert dip['method'] == 'PSF'
+
+
+def test_malformed_psf_is_rejected():
+    with pytest.raises(ValueError):
+        read_psf_atoms(b'PSF\n no atoms here\n')
+    with pytest.raises(ValueError):
+        dipole_from_psf(PDB.replace(b'ATOM      3', b'REMARK    3'), PSF)
+
+
+@pytest.mark.skipif(not FILTERED, reason='estructuras filtradas no disponibles')
+@pytest.mark.parametrize('pdb_path', FILTERED)
+def test_matches_mdanalysis_path(pdb_path):
+    pytest.importorskip('MDAnalysis')
+    from graphs.graph_analysis2D import Nav17ToxinGraphAnalyzer
+
+    psf_path = pdb_path[:-4] + '.psf'
+    ref = Nav17ToxinGraphAnalyzer(pdb_folder='').calculate_dipole_moment_with_psf(pdb_path, psf_path)
+    fast = DipoleAdapter().calculate_dipole_from_files(pdb_path, psf_path)
+    assert set(fast) == set(ref)
+    assert abs(fast['magnitude'] - ref['magnitude']) < 1e-6
+    np.testing.assert_allclose(fast['vector'], ref['vector'], atol=1e-6)
+    np.testing.assert_allclose(fast['center_of_mass'], ref['center_of_mass'], atol=1e-6)
+
+    with open(pdb_path, 'rb') as a, open(psf_path, 'rb') as b:
+        in_memory = DipoleAdapter().process_dipole_calculation(a.read(), b.read())['dipole']
+    assert in_memory['magnitude'] == fast['magnitude']
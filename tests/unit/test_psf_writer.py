@@ -0,0 +1,82 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.infrastructure.graphein.dipole_adapter import dipole_from_psf
+from src.infrastructure.pdb.psf_reader import read_psf_atoms
+from src.infrastructure.pdb.psf_writer import build_psf, format_psf, generate_psf_pdb
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))
+pytestmark = pytest.mark.skipif(not FILTERED, reason='estructuras filtradas no disponibles')
+
+TERMS = {'NBOND': 2, 'NTHETA': 3, 'NPHI': 4, 'NIMPHI': 4, 'NCRTERM': 8}
+
+
+def _sections(text):
+    lines = text.splitlines()
+    out = {}
+    i = 0
+    while i < len(lines):
+        fields = lines[i].split('!')
+        i += 1
+        if len(fields) < 2 or not fields[0].split():
+            continue
+        tag, n = fields[1].split(':')[0], int(fields[0].split()[0])
+        if tag == 'NATOM':
+            out[tag] = [tuple(l.split()[4:8]) for l in lines[i:i + n]]
+        elif tag in TERMS:
+            values = []
+            while len(values) < n * TERMS[tag]:
+                values += [int(v) for v in lines[i].split()]
+                i += 1
+            width = TERMS[tag]
+            out[tag] = [tuple(values[k:k + width]) for k in range(0, len(values), width)]
+    return out
+
+
+def _psfgen_input(path):
+    # Entrada de psfgen: sólo los átomos que no adivinó (ocupación 1.00)
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    return '\n'.join(l for l in lines if not (l.startswith('ATOM') and l[54:60].strip() == '0.00')).encode()
+
+
+def _canonical(terms):
+    return sorted(min(t, t[::-1]) for t in terms)
+
+
+@pytest.mark.parametrize('path', FILTERED[:6])
+def test_native_psf_matches_psfgen_topology(path):
+    structure = build_psf(_psfgen_input(path))
+    mine = _sections(format_psf(structure))
+    with open(path[:-4] + '.psf') as fh:
+        ref = _sections(fh.read())
+
+    # Nombre, tipo, carga y masa por posición; psfgen renumeraba resids (orden de texto)
+    assert [(a[0], a[1], float(a[2]), float(a[3])) for a in mine['NATOM']] == \
+        [(a[0], a[1], float(a[2]), float(a[3])) for a in ref['NATOM']]
+    for tag in ('NBOND', 'NTHETA', 'NPHI'):
+        assert _canonical(mine[tag]) == _canonical(ref[tag]), tag
+    assert sorted(mine['NIMPHI']) == sorted(ref['NIMPHI'])
+    assert sorted(mine['NCRTERM']) == sorted(ref['NCRTERM'])
+
+
+def test_guessed_coordinates_follow_ic_tables(tmp_path):
+    path = FILTERED[0]
+    psf, pdb, structure = generate_psf_pdb(_psfgen_input(path), tmp_path / 'out')
+    ref = np.array([[float(l[30:38]), float(l[38:46]), float(l[46:54])]
+                    for l in open(path) if l.startswith('ATOM')])
+    terminal = [k for k, name in enumerate(structure.names) if name in ('HT1', 'HT2', 'HT3', 'OT1', 'OT2')]
+    assert structure.guessed[terminal].all()
+    np.testing.assert_allclose(structure.positions[terminal], ref[terminal], atol=5e-3)
+
+    # El PSF escrito lo lee el lector ligero y el dipolo apenas cambia frente al de psfgen
+    assert len(read_psf_atoms(psf).charges) == len(structure.names)
+    mine, theirs = dipole_from_psf(str(pdb), str(psf)), dipole_from_psf(path, path[:-4] + '.psf')
+    assert np.linalg.norm(np.subtract(mine['vector'], theirs['vector'])) < 0.05 * theirs['magnitude']
+
+
+def test_unknown_residue_is_rejected():
+    with pytest.raises(ValueError):
+        build_psf(b'ATOM      1  C1  LIG A   1       0.000   0.000   0.000  1.00  0.00           C\n')
@@ -0,0 +1,54 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter, _protein_arrays, dipole_from_psf
+from src.infrastructure.pdb.rtf_charges import load_topology, topology_arrays
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))
+pytestmark = pytest.mark.skipif(not FILTERED, reason='estructuras filtradas no disponibles')
+
+
+def _without_hydrogens(path):
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    return '\n'.join(l for l in lines if not (l.startswith('ATOM') and l[12:16].strip().startswith('H'))).encode()
+
+
+def test_rtf_parser_reads_residues_patches_and_masses():
+    topo = load_topology()
+    assert topo.residues['HSE'].atoms['NE2'][1] == pytest.approx(-0.36)
+    assert topo.patches['DISU'].deletes == ['1HG1', '2HG1']
+    assert topo.first_patch('GLY') == 'GLYP' and topo.first_patch('ALA') == 'NTER' and topo.last_patch('ALA') == 'CTER'
+    assert topo.masses['HC'] == pytest.approx(1.008)
+
+
+@pytest.mark.parametrize('path', FILTERED[:8])
+def test_charges_match_psfgen_when_hydrogens_present(path):
+    charges, positions, masses = topology_arrays(path)
+    ref_charges, ref_positions, ref_masses = _protein_arrays(path, path[:-4] + '.psf')
+    np.testing.assert_array_equal(charges, ref_charges)
+    np.testing.assert_allclose(masses, ref_masses)
+    np.testing.assert_array_equal(positions, ref_positions)
+
+
+def test_heavy_atom_pdb_folds_hydrogens_and_stays_close_to_psf():
+    adapter = DipoleAdapter()
+    rel = []
+    for path in FILTERED[:10]:
+        heavy = _without_hydrogens(path)
+        charges, _, _ = topology_arrays(heavy)
+        ref = dipole_from_psf(path, path[:-4] + '.psf')
+        assert charges.sum() == pytest.approx(_protein_arrays(path, path[:-4] + '.psf')[0].sum(), abs=1e-4)
+        res = adapter.process_dipole_calculation(heavy)
+        assert res['dipole']['method'] == 'RTF'
+        rel.append(np.linalg.norm(np.subtract(res['dipole']['vector'], ref['vector'])) / ref['magnitude'])
+    assert max(rel) < 0.15 and np.median(rel) < 0.06
+
+
+def test_batch_without_psf_uses_topology_kernel():
+    pairs = [(FILTERED[0], None), (_without_hydrogens(FILTERED[1]), None), (FILTERED[2], FILTERED[2][:-4] + '.psf')]
+    results = DipoleAdapter().calculate_dipoles_batch(pairs)
+    assert [r['dipole']['method'] for r in results] == ['RTF', 'RTF', 'PSF']
+    np.testing.assert_allclose(results[0]['dipole']['vector'], dipole_from_psf(FILTERED[0], FILTERED[0][:-4] + '.psf')['vector'], atol=1e-9)
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+
+from src.infrastructure.db.sqlite.shared_cache_sqlite import SqliteSharedCache, TableSource
+from src.interfaces.http.flask.controllers.v2 import motif_dipoles_controller as motif
+
+
+class _Counter:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_workers_share_entries_and_detect_file_changes(tmp_path):
+    source = tmp_path / 'ai.json'
+    source.write_text('[1]')
+    db = str(tmp_path / 'cache' / 'shared.db')
+    first, second = SqliteSharedCache(db), SqliteSharedCache(db)
+    compute = _Counter({'a': [1, 2]})
+
+    assert first.get_or_compute('ns', 'k', [source], compute) == {'a': [1, 2]}
+    # Otro worker (otra instancia, sin memoria común) no recalcula
+    assert second.get_or_compute('ns', 'k', [source], compute) == {'a': [1, 2]}
+    assert compute.calls == 1
+
+    # Mismo contenido con otro mtime: se rehashea una vez, la entrada sigue vigente
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert second.get_or_compute('ns', 'k', [source], compute) == {'a': [1, 2]} and compute.calls == 1
+
+    source.write_text('[1, 2, 3]')
+    compute.value = {'a': [3]}
+    assert first.get_or_compute('ns', 'k', [source], compute) == {'a': [3]} and compute.calls == 2
+    assert second.get_or_compute('ns', 'k', [source], compute) == {'a': [3]} and compute.calls == 2
+
+    # Versiones en extra, archivos ausentes y None calculado
+    assert first.get_or_compute('ns', 'k', [source], compute, extra=['v2']) == {'a': [3]} and compute.calls == 3
+    missing = _Counter(None)
+    assert first.get_or_compute('ns', 'gone', [tmp_path / 'nope.json'], missing) is None
+    assert first.get_or_compute('ns', 'gone', [tmp_path / 'nope.json'], missing) is None and missing.calls == 2
+
+
+def test_table_source_ignores_writes_to_other_tables(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.execute("CREATE TABLE other (x)")
+    conn.execute("INSERT INTO t VALUES (1, 'a')")
+    conn.commit()
+    cache = SqliteSharedCache(str(tmp_path / 'shared.db'))
+    src = TableSource(db, "SELECT id, v FROM t ORDER BY id")
+    compute = _Counter(['a'])
+
+    cache.get_or_compute('ns', 'k', [src], compute)
+    conn.execute("INSERT INTO other VALUES (1)")
+    conn.commit()
+    cache.get_or_compute('ns', 'k', [src], compute)
+    assert compute.calls == 1
+
+    conn.execute("UPDATE t SET v = 'b'")
+    conn.commit()
+    cache.get_or_compute('ns', 'k', [src], compute)
+    assert compute.calls == 2
+    conn.close()
+
+
+def test_motif_reference_options_follow_database_changes(tmp_path):
+    db = str(tmp_path / 'toxins.db')
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE Nav1_7_InhibitorPeptides (id INTEGER PRIMARY KEY, peptide_code TEXT, sequence TEXT, "
+        "ic50_value REAL, ic50_unit TEXT, pdb_blob BLOB, psf_blob BLOB)"
+    )
+    conn.executemany(
+        "INSERT INTO Nav1_7_InhibitorPeptides (id, peptide_code, ic50_value, ic50_unit) VALUES (?, ?, ?, ?)",
+        [(1, 'A', 10.0, 'nM'), (2, 'B', 1.0, 'uM')],
+    )
+    conn.commit()
+    motif.configure_motif_dipoles_dependencies(
+        db_path=db, filtered_dir=str(tmp_path), dipole_adapter=None,
+        shared_cache=SqliteSharedCache(str(tmp_path / 'shared.db')),
+    )
+    options = motif._get_reference_options()
+    assert [o['peptide_code'] for o in options] == ['A', 'B']
+    options[0]['label'] = 'mutado'
+    assert motif._get_reference_options()[0]['label'] == 'A'
+
+    # Otro worker ve la misma entrada; un cambio en la tabla se detecta sin reiniciar
+    motif.configure_motif_dipoles_dependencies(
+        db_path=db, filtered_dir=str(tmp_path), dipole_adapter=None,
+        shared_cache=SqliteSharedCache(str(tmp_path / 'shared.db')),
+    )
+    conn.execute("UPDATE Nav1_7_InhibitorPeptides SET ic50_value = 100000 WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert [o['peptide_code'] for o in motif._get_reference_options()] == ['B', 'A']
+
+    # De los blobs sólo entra su longitud: una estructura nueva invalida sin releerlas todas
+    source = motif._inhibitors_source()
+    assert 'length(pdb_blob)' in source.sql and ' pdb_blob,' not in source.sql
+    calls = []
+
+    def probe():
+        return motif._shared_cache().get_or_compute('probe', 'k', [source], lambda: calls.append(1) or 1)
+
+    probe()
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE Nav1_7_InhibitorPeptides SET pdb_blob = ? WHERE id = 2", (b'ATOM\n',))
+    conn.commit()
+    conn.close()
+    probe()
+    probe()
+    assert len(calls) == 2
+
+
+class _Dipoles:
+    def __init__(self):
+        self.calls = 0
+
+    def process_dipole_calculation(self, pdb, psf):
+        self.calls += 1
+        return {'success': True, 'dipole': {'vector': [0.0, 0.0, 1.0], 'magnitude': 1.0}}
+
+
+def test_reference_dipole_follows_same_length_blob_edits(tmp_path, monkeypatch):
+    db = str(tmp_path / 'toxins.db')
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE Nav1_7_InhibitorPeptides (id INTEGER PRIMARY KEY, peptide_code TEXT, sequence TEXT, "
+        "ic50_value REAL, ic50_unit TEXT, pdb_blob BLOB, psf_blob BLOB)"
+    )
+    conn.executemany(
+        "INSERT INTO Nav1_7_InhibitorPeptides VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(1, 'REF', 'GCC', 10.0, 'nM', b'ATOM  1.000\n', b'PSF\n'), (2, 'OTRA', 'GG', 1.0, 'uM', b'ATOM\n', b'PSF\n')],
+    )
+    conn.commit()
+    dipoles = _Dipoles()
+    monkeypatch.setattr(motif, '_DB_PATH', db)
+    monkeypatch.setattr(motif, '_DIP', dipoles)
+    monkeypatch.setattr(motif, '_SHARED_CACHE', SqliteSharedCache(str(tmp_path / 'shared.db')))
+
+    assert motif._load_reference_from_db('REF')['pdb_text'] == 'ATOM  1.000\n'
+    motif._load_reference_from_db('REF')
+    assert dipoles.calls == 1
+
+    # Otra fila no invalida la referencia
+    conn.execute("UPDATE Nav1_7_InhibitorPeptides SET pdb_blob = ? WHERE id = 2", (b'HETATM\n',))
+    conn.commit()
+    motif._load_reference_from_db('REF')
+    assert dipoles.calls == 1
+
+    # Coordenadas re-refinadas con la misma longitud: se recalcula
+    conn.execute("UPDATE Nav1_7_InhibitorPeptides SET pdb_blob = ? WHERE id = 1", (b'ATOM  2.000\n',))
+    conn.commit()
+    conn.close()
+    assert motif._load_reference_from_db('REF')['pdb_text'] == 'ATOM  2.000\n'
+    assert dipoles.calls == 2
@@ -0,0 +1,72 @@
+import glob
+
+import numpy as np
+import pytest
+
+from src.application.use_cases.superpose_to_reference import SuperposeToReference
+from src.infrastructure.db.sqlite.superposition_repository_sqlite import SqliteSuperpositionRepository
+from src.infrastructure.pdb.superposition import cysteine_backbone, kabsch_batch, rotate_vectors
+
+FILTERED = sorted(glob.glob('pdbs/filtered_psfs/*.pdb'))
+
+
+def _rotation(seed):
+    q = np.random.default_rng(seed).normal(size=4)
+    a, b, c, d = q / np.linalg.norm(q)
+    return np.array([
+        [a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
+        [2 * (b * c + a * d), a * a - b * b + c * c - d * d, 2 * (c * d - a * b)],
+        [2 * (b * d - a * c), 2 * (c * d + a * b), a * a - b * b - c * c + d * d],
+    ])
+
+
+def _transform_pdb(text, rotation, shift):
+    out = []
+    for line in text.splitlines():
+        if line.startswith(('ATOM', 'HETATM')):
+            xyz = rotation @ np.array([float(line[30:38]), float(line[38:46]), float(line[46:54])]) + shift
+            line = f"{line[:30]}{xyz[0]:8.3f}{xyz[1]:8.3f}{xyz[2]:8.3f}{line[54:]}"
+        out.append(line)
+    return '\n'.join(out).encode()
+
+
+def test_kabsch_batch_recovers_rotations_per_segment():
+    rng = np.random.default_rng(0)
+    mobiles, targets, expected = [], [], []
+    for seed, n in ((1, 18), (2, 9), (3, 12)):
+        p = rng.normal(size=(n, 3)) * 5
+        r = _rotation(seed)
+        mobiles.append(p)
+        targets.append(p @ r.T + np.array([1.0, -2.0, 3.0]))
+        expected.append(r)
+    rotations, translations, rmsd = kabsch_batch(np.concatenate(mobiles), np.concatenate(targets), [18, 9, 12])
+    np.testing.assert_allclose(rotations, np.stack(expected), atol=1e-10)
+    np.testing.assert_allclose(translations, [[1.0, -2.0, 3.0]] * 3, atol=1e-10)
+    assert np.all(rmsd < 1e-10)
+    assert np.allclose(np.linalg.det(rotations), 1.0)
+    # Cada vector se rota con la matriz de su fila: R_n @ e_n es la columna n de R_n
+    np.testing.assert_allclose(rotate_vectors(rotations, np.eye(3)), [r[:, n] for n, r in enumerate(expected)], atol=1e-10)
+
+
+@pytest.mark.skipif(len(FILTERED) < 2, reason='estructuras filtradas no disponibles')
+def test_use_case_undoes_a_rigid_motion_and_caches_by_hash(tmp_path):
+    with open(FILTERED[0]) as fh:
+        reference = fh.read().encode()
+    rotation = _rotation(5)
+    moved = _transform_pdb(reference.decode(), rotation, np.array([10.0, 0.0, -4.0]))
+    assert cysteine_backbone(reference).shape[0] >= 6
+
+    uc = SuperposeToReference(SqliteSuperpositionRepository(db_path=str(tmp_path / 's.db')))
+    first = uc.execute_many(reference, [moved, FILTERED[1], b'ATOM  nothing here', moved])
+    np.testing.assert_allclose(first[0]['rotation'], rotation.T, atol=1e-3)
+    assert first[0]['rmsd'] < 1e-2 and first[0]['n_anchor_cysteines'] == 6
+    assert first[1]['rmsd'] < 3.0
+    assert 'error' in first[2]
+    assert first[3]['cached'] is False
+
+    again = uc.execute_many(reference, [moved, FILTERED[1]])
+    assert [r['cached'] for r in again] == [True, True]
+    np.testing.assert_allclose(again[0]['rotation'], first[0]['rotation'])
+
+    # Otra referencia es otra clave
+    assert uc.execute_many(moved, [FILTERED[1]])[0]['cached'] is False
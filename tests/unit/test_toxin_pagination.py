@@ -0,0 +1,102 @@
+import random
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from extractors import toxins_filter as tf
+from src.interfaces.http.flask.controllers.v2 import toxins_filter_controller as ctrl
+
+MOTIFS = ['CCCCAIVCSAAWCKLC', 'CCCCGGGCSAAWCKLC', 'CSGWCKF', 'GGGG']
+
+
+def _make_db(path, n, seed=0):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, accession_number TEXT, "
+                 "peptide_name TEXT, sequence TEXT, model_source TEXT, pdb_file BLOB)")
+    conn.executemany("INSERT INTO Peptides VALUES (?, ?, ?, ?, NULL, NULL)",
+                     [(i, f'A{i}', f'p{i}', rng.choice(MOTIFS)) for i in range(1, n + 1)])
+    conn.commit()
+    conn.close()
+
+
+def _walk(db, limit, **q):
+    pages, cursor = [], None
+    while True:
+        page = list(tf.iter_toxins(db_path=db, cursor=cursor, batch_size=7, **q))[:limit]
+        pages.append(page)
+        if len(page) < limit:
+            return pages
+        cursor = tf.encode_cursor(tf.hit_order(page[-1]))
+
+
+@pytest.mark.parametrize('require_pair', [False, True])
+def test_cursor_walk_matches_full_search(tmp_path, require_pair):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, 80)
+    full = tf.search_toxins(db_path=db, require_pair=require_pair, use_cache=False)
+    assert full == sorted(full, key=tf.hit_order) and any(h['score'] == 8 for h in full) != require_pair
+
+    pages = _walk(db, 6, require_pair=require_pair)
+    assert [h for p in pages for h in p] == full
+    assert tf.count_toxins(db_path=db, require_pair=require_pair) == len(full)
+
+    excluded = [h['peptide_id'] for h in full[:3]]
+    assert list(tf.iter_toxins(db_path=db, require_pair=require_pair, exclude_ids=excluded)) == full[3:]
+    assert tf.count_toxins(db_path=db, require_pair=require_pair, exclude_ids=excluded) == len(full) - 3
+
+
+def test_cursor_resumes_after_inserts_and_without_index(tmp_path, monkeypatch):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, 30)
+    first = list(tf.iter_toxins(db_path=db))[:5]
+    cursor = tf.encode_cursor(tf.hit_order(first[-1]))
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO Peptides VALUES (0, 'A0', 'p0', ?, NULL, NULL)", (MOTIFS[0],))
+    conn.commit()
+    conn.close()
+    rest = list(tf.iter_toxins(db_path=db, cursor=cursor))
+    # Lo insertado antes del cursor no reaparece ni desplaza la página siguiente
+    assert all(tf.hit_order(h) > tf.hit_order(first[-1]) for h in rest)
+    assert 0 not in [h['peptide_id'] for h in rest]
+
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError('read-only')
+
+    monkeypatch.setattr('extractors.motif_features.sync_motif_features', broken)
+    tf.clear_search_cache()
+    assert list(tf.iter_toxins(db_path=db, cursor=cursor)) == rest
+    assert tf.count_toxins(db_path=db) == len(tf.scan_toxins(db_path=db)) == len(first) + len(rest) + 1
+
+
+@pytest.mark.parametrize('token', ['%%%', tf.encode_cursor([1]), tf.encode_cursor(['a', 'b'])])
+def test_invalid_cursor_is_rejected_eagerly(token):
+    with pytest.raises(ValueError):
+        tf.iter_toxins(db_path='no-existe.db', cursor=token)
+
+
+def test_toxin_filter_endpoint_pages_with_cursor(tmp_path, monkeypatch):
+    db = str(tmp_path / 'toxins.db')
+    _make_db(db, 40)
+    monkeypatch.setattr(ctrl, '_DB_PATH', db)
+    monkeypatch.setattr(ctrl, '_load_ai_ic50_map', lambda: {})
+    monkeypatch.setattr(ctrl, 'EXCLUDED_ACCESSIONS', {'A1', 'A2'})
+    app = Flask(__name__)
+    app.register_blueprint(ctrl.toxin_filter_v2)
+    client = app.test_client()
+
+    everything = client.get('/v2/toxin_filter').get_json()
+    seen, cursor = [], None
+    while True:
+        data = client.get('/v2/toxin_filter', query_string={'limit': 4, **({'cursor': cursor} if cursor else {})}).get_json()
+        assert data['count'] == everything['count'] and len(data['results']) <= 4
+        seen += data['results']
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert seen == everything['results']
+    assert not {'A1', 'A2'} & {h['accession_number'] for h in seen}
+    assert client.get('/v2/toxin_filter?cursor=nope').status_code == 400
+    assert client.get('/v2/toxin_filter?gap_min=-1').status_code == 400
+    assert client.get('/v2/toxin_filter?gap_min=6&gap_max=3&limit=4').status_code == 400
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from extractors import toxins_filter as tf
+
+
+def _make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Peptides (peptide_id INTEGER PRIMARY KEY, peptide_name TEXT, sequence TEXT)")
+    conn.execute("CREATE TABLE peptide_dipoles (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany(
+        "INSERT INTO Peptides VALUES (?, ?, ?)",
+        [(1, 'uno', 'CCCCAIVCSAAWCKLC'), (2, 'dos', 'GGGGGGGG')],
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'toxins.db')
+    _make_db(path)
+    tf.clear_search_cache()
+    yield path
+    tf.clear_search_cache()
+
+
+def test_repeated_search_is_served_from_cache_and_copies_hits(db, monkeypatch):
+    calls = []
+    real = tf._search_toxins_uncached
+    monkeypatch.setattr(tf, '_search_toxins_uncached', lambda *a: calls.append(a) or real(*a))
+
+    first = tf.search_toxins(db_path=db)
+    first[0]['name'] = 'mutado'
+    second = tf.search_toxins(db_path=db)
+    assert len(calls) == 1
+    assert second == tf.search_toxins(db_path=db, use_cache=False)
+    assert second[0]['name'] != 'mutado'
+
+    tf.search_toxins(db_path=db, gap_min=2)
+    stats = tf.search_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+
+
+def test_peptide_writes_invalidate_but_other_tables_do_not(db):
+    before = tf.search_toxins(db_path=db)
+    token = tf.database_version(db)
+
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO peptide_dipoles (payload) VALUES ('x')")
+    conn.commit()
+    assert tf.database_version(db) == token
+    tf.search_toxins(db_path=db)
+    assert tf.search_cache_stats()['invalidations'] == 0
+
+    conn.execute("UPDATE Peptides SET sequence = 'GGGG' WHERE peptide_id = 1")
+    conn.commit()
+    conn.close()
+    assert tf.database_version(db) != token
+    assert tf.search_toxins(db_path=db) == [] != before
+    assert tf.search_cache_stats()['invalidations'] == 1
+
+
+def test_rebuilt_database_gets_a_new_token(db, tmp_path):
+    token = tf.database_version(db)
+    os.remove(db)
+    _make_db(db)
+    assert tf.database_version(db) != token
+
+    # Sin tabla de péptidos no se deja un contador huérfano
+    empty = str(tmp_path / 'empty.db')
+    sqlite3.connect(empty).close()
+    assert tf.database_version(empty)[0] == 'stat'
+    assert sqlite3.connect(empty).execute("SELECT count(*) FROM sqlite_master").fetchone() == (0,)
+
+
+def test_concurrent_searches_share_one_cache(db):
+    expected = tf.search_toxins(db_path=db, use_cache=False)
+    results, errors = [], []
+
+    def worker():
+        try:
+            for _ in range(20):
+                results.append(tf.search_toxins(db_path=db))
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and all(r == expected for r in results)
+    stats = tf.search_cache_stats()
+    assert stats['hits'] + stats['misses'] == 80 and stats['entries'] == 1
@@ -61,3 +61,38 @@ def test_family_dipoles_structure_v2():
         if dr:
             first = dr[0]
             assert set(['peptide_id', 'peptide_code', 'pdb_data', 'dipole_data']).issubset(first.keys())
+
+
+class _FakeFamilies:
+    def get_family_peptides(self, family_name):
+        return [{'id': i, 'peptide_code': f'P{i}'} for i in (1, 2, 3)]
+
+
+class _FakeStructures:
+    def get_structures_many(self, source, ids):
+        return {1: (b'PDB1', b'PSF1'), 3: (b'PDB3', None)}
+
+
+class _CountingDipoles:
+    def __init__(self):
+        self.calls = []
+
+    def execute_many(self, inputs):
+        self.calls.append([inp.peptide_id for inp in inputs])
+        return [{'dipole': {'magnitude': float(inp.peptide_id)}, 'cached': False} for inp in inputs]
+
+
+def test_family_dipoles_resolve_in_one_batch(monkeypatch):
+    from src.interfaces.http.flask.controllers.v2 import families_controller as fctl
+
+    app = create_app_v2()
+    uc = _CountingDipoles()
+    monkeypatch.setattr(fctl, '_families', _FakeFamilies())
+    monkeypatch.setattr(fctl, '_structures', _FakeStructures())
+    monkeypatch.setattr(fctl, '_peptide_dipoles', uc)
+    with app.test_client() as c:
+        payload = c.get('/v2/family-dipoles/x').get_json()['data']
+    assert uc.calls == [[1, 3]]
+    assert [r['peptide_id'] for r in payload['dipole_results']] == [1, 3]
+    assert payload['dipole_results'][0]['pdb_data'] == 'PDB1'
+    assert payload['errors'] == [{'peptide_code': 'P2', 'error': 'No se encontraron datos PDB'}]
@@ -0,0 +1,80 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from src.infrastructure.pdb.vmd_session import VMDSession
+
+# Imita el driver Tcl: @@VMD_READY, un trabajo por línea y @@JOB_DONE <id> ok|error.
+# Los nombres de PDB "crash"/"hang"/"bad" simulan caída, cuelgue y error de psfgen.
+STUB = textwrap.dedent('''
+    import os, sys, time
+    print("Info) VMD stub", flush=True)
+    print("@@VMD_READY", flush=True)
+    for line in sys.stdin:
+        fields = line.rstrip("\\n").split("\\t")
+        if fields[0] != "job":
+            break
+        _, job_id, pdb, prefix, segid, cutoff = fields
+        name = os.path.basename(pdb)
+        if name == "crash.pdb":
+            os._exit(3)
+        if name == "hang.pdb":
+            time.sleep(60)
+        if name == "bad.pdb":
+            print("ERROR: segment failed", flush=True)
+            print("@@JOB_DONE %s error" % job_id, flush=True)
+            continue
+        for ext in (".psf", ".pdb"):
+            with open(prefix + ext, "w") as fh:
+                fh.write("%s %s %s %d\\n" % (name, segid, cutoff, os.getpid()))
+        print("PSF_OUT:%s.psf" % prefix, flush=True)
+        print("PDB_OUT:%s.pdb" % prefix, flush=True)
+        print("@@JOB_DONE %s ok" % job_id, flush=True)
+''')
+
+
+@pytest.fixture
+def session(tmp_path):
+    stub = tmp_path / 'vmd_stub.py'
+    stub.write_text(STUB)
+    s = VMDSession(tmp_path / 'psf_gen.tcl', [tmp_path / 'top.rtf'],
+                   vmd_command=[sys.executable, str(stub)], job_timeout=10)
+    yield s
+    s.close()
+
+
+def test_one_process_serves_many_jobs(session, tmp_path):
+    pids = []
+    for k in range(4):
+        ok, log = session.run(tmp_path / f'p{k}.pdb', tmp_path / f'out{k}', 'PROA', 2.3)
+        assert ok and f'PSF_OUT:{tmp_path / f"out{k}"}.psf' in log
+        pids.append(int((tmp_path / f'out{k}.psf').read_text().split()[-1]))
+    assert len(set(pids)) == 1 and session.restarts == 0
+    assert (tmp_path / 'out0.pdb').read_text().split()[:3] == ['p0.pdb', 'PROA', '2.3']
+
+    ok, log = session.run(tmp_path / 'bad.pdb', tmp_path / 'bad')
+    assert not ok and 'segment failed' in log and session.pid == pids[0]
+
+
+def test_crash_and_timeout_restart_the_session(session, tmp_path):
+    assert session.run(tmp_path / 'a.pdb', tmp_path / 'a')[0]
+    first = session.pid
+
+    ok, log = session.run(tmp_path / 'crash.pdb', tmp_path / 'crash')
+    assert not ok and 'terminó inesperadamente' in log and not session.alive
+    assert session.run(tmp_path / 'b.pdb', tmp_path / 'b')[0]
+    assert session.pid != first and session.restarts == 1
+
+    ok, log = session.run(tmp_path / 'hang.pdb', tmp_path / 'hang', timeout=0.5)
+    assert not ok and 'timeout' in log and not session.alive
+    assert session.run(tmp_path / 'c.pdb', tmp_path / 'c')[0] and session.restarts == 2
+
+
+def test_close_removes_driver_and_stops_process(session, tmp_path):
+    session.start()
+    driver, proc = session._driver, session._proc
+    assert driver.exists() and 'build_psf_with_disulfides' in driver.read_text()
+    session.close()
+    assert proc.poll() is not None and not os.path.exists(driver)
@@ -0,0 +1,82 @@
+import random
+
+import networkx as nx
+import pytest
+
+from src.application.use_cases.build_protein_graph import BuildProteinGraph, BuildProteinGraphInput
+from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+from src.infrastructure.exporters.export_service_v2 import ExportService
+from src.infrastructure.graph.csr_centrality import MetricBudget, weighted_path_centralities
+
+
+def _weighted_graph(integer_weights: bool):
+    rng = random.Random(7)
+    G = nx.gnp_random_graph(60, 0.08, seed=3)
+    for u, v in G.edges():
+        G[u][v]['weight'] = rng.randint(1, 3) if integer_weights else rng.uniform(3.5, 10.0)
+    G.add_edge(200, 201, weight=4.2)  # componente aislada
+    return G
+
+
+@pytest.mark.parametrize('integer_weights', [True, False])
+def test_weighted_centralities_match_networkx(integer_weights):
+    # Pesos enteros fuerzan empates de caminos mínimos (σ > 1)
+    G = _weighted_graph(integer_weights)
+    res = weighted_path_centralities(G, batch_size=9)
+    bc = nx.betweenness_centrality(G, weight='weight')
+    cc = nx.closeness_centrality(G, distance='weight')
+    for n in G:
+        assert res['betweenness'][n] == pytest.approx(bc[n], abs=1e-12)
+        assert res['closeness'][n] == pytest.approx(cc[n], abs=1e-12)
+
+
+def test_weighted_centralities_degrade_under_budget():
+    G = _weighted_graph(False)
+    res = weighted_path_centralities(G, budget=MetricBudget(1e-9), batch_size=8)
+    assert res['info']['approximate'] is True
+    assert res['info']['sources_processed'] == 8
+
+
+def test_residue_export_adds_weighted_columns():
+    G = nx.Graph()
+    G.add_node('A:CYS:1', residue_name='CYS', residue_number=1, chain_id='A')
+    G.add_node('A:GLY:2', residue_name='GLY', residue_number=2, chain_id='A')
+    G.add_node('A:LYS:3', residue_name='LYS', residue_number=3, chain_id='A')
+    G.add_edge('A:CYS:1', 'A:GLY:2', weight=3.8)
+    G.add_edge('A:GLY:2', 'A:LYS:3', weight=3.8)
+    G.add_edge('A:CYS:1', 'A:LYS:3', weight=9.0)
+
+    plain = ExportService.extract_residue_data(G, 'CA')
+    assert 'Centralidad_Intermediacion_Ponderada' not in plain[0]
+
+    rows = {r['Identificador_Residuo']: r for r in ExportService.extract_residue_data(G, 'CA', weighted=True)}
+    # Por distancia el camino 1-2-3 (7.6 Å) es más corto que la arista directa (9 Å)
+    assert rows['A:GLY:2']['Centralidad_Intermediacion_Ponderada'] == 1.0
+    assert rows['A:GLY:2']['Centralidad_Intermediacion'] == 0.0
+
+
+def test_build_graph_recomputes_when_cached_row_lacks_weighted(tmp_path):
+    class Port:
+        calls = []
+
+        def build_graph(self, *a):
+            return object()
+
+        def compute_metrics(self, G, weighted=False):
+            Port.calls.append(weighted)
+            cent = {'degree': {'n': 1.0}}
+            if weighted:
+                cent['betweenness_weighted'] = {'n': 0.0}
+                cent['closeness_weighted'] = {'n': 0.0}
+            return {'num_nodes': 1, 'centrality': cent}
+
+    repo = SqliteGraphMetricsRepository(db_path=str(tmp_path / 'm.db'))
+    uc = BuildProteinGraph(Port(), repo)
+    uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h'))
+    res = uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h', weighted=True))
+    assert Port.calls == [False, True]
+    assert 'closeness_weighted' in res['properties']['centrality']
+    # Ahora la fila ampliada sirve a ambas variantes
+    assert uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h', weighted=True))['metrics_cached']
+    assert uc.execute(BuildProteinGraphInput('/tmp/x.pdb', 'CA', 10.0, structure_hash='h'))['metrics_cached']
+    assert len(Port.calls) == 2
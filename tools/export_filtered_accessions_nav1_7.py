@@ -1,6 +1,5 @@
 import argparse
 import json
-import sqlite3
 import sys
 import os
 from pathlib import Path
@@ -13,6 +12,7 @@ if str(PROJECT_ROOT) not in sys.path:
 
 try:
     from extractors.toxins_filter import search_toxins
+    from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
     from tools.few_shot2 import analyze_text_for_nav17
 except Exception as e:
     raise ImportError(
@@ -30,11 +30,9 @@ def process_filtered_hits(
     require_pair: bool = False,
     log_path: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
     hits = search_toxins(gap_min=gap_min, gap_max=gap_max, require_pair=require_pair, db_path=db_path)
+    # Peptides + descripción de Proteins + fila Nav1.7 de todos los hits, sin una consulta por hit
+    info = SqliteToxinRepository(db_path).enrich_hits(h.get("peptide_id") for h in hits)
     results: List[Dict[str, Any]] = []
     seen_accessions = set()
 
@@ -51,8 +49,7 @@ def process_filtered_hits(
     for idx, h in enumerate(hits, start=1):
         peptide_id = h.get("peptide_id")
         # Obtener accession/sequence desde Peptides
-        cur.execute("SELECT accession_number, peptide_name, sequence FROM Peptides WHERE peptide_id = ?", (peptide_id,))
-        prow = cur.fetchone()
+        prow = info.get(peptide_id)
         accession = None
         peptide_name = None
         sequence = None
@@ -84,27 +81,17 @@ def process_filtered_hits(
         # Recuperar descripción desde Proteins
         description = None
         description_present = False
-        if accession:
-            cur.execute("SELECT description FROM Proteins WHERE accession_number = ?", (accession,))
-            drow = cur.fetchone()
-            if drow and drow["description"]:
-                description = drow["description"]
-                description_present = True
+        if prow and prow["description"]:
+            description = prow["description"]
+            description_present = True
 
         log(f"  Descripción presente: {description_present}")
 
         # Buscar si ya hay IC50 en tabla Nav1_7_InhibitorPeptides (metadata existente en BD)
         nav_ic50_db: Optional[Dict[str, Any]] = None
-        try:
-            cur.execute(
-                "SELECT ic50_value, ic50_unit, peptide_code FROM Nav1_7_InhibitorPeptides WHERE accession_number = ? OR peptide_code = ? LIMIT 1",
-                (accession, peptide_name),
-            )
-            navrow = cur.fetchone()
-            if navrow:
-                nav_ic50_db = {"value": navrow["ic50_value"], "unit": navrow["ic50_unit"], "peptide_code": navrow["peptide_code"]}
-        except Exception as e:
-            log(f"  Warning: error consultando Nav1_7_InhibitorPeptides: {e}")
+        navrow = prow["nav1_7"] if prow else None
+        if navrow:
+            nav_ic50_db = {"value": navrow["ic50_value"], "unit": navrow["ic50_unit"], "peptide_code": navrow["peptide_code"]}
 
         # Analizar description con IA (solo si existe)
         ai_result = None
@@ -144,7 +131,6 @@ def process_filtered_hits(
             }
         })
 
-    conn.close()
     return results
 
 
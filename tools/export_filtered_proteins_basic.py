@@ -1,7 +1,6 @@
 import argparse
 import json
 import os
-import sqlite3
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
@@ -12,6 +11,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from extractors.toxins_filter import search_toxins
+from src.infrastructure.db.sqlite.toxin_repository_sqlite import SqliteToxinRepository
 
 DB_PATH_DEFAULT = "database/toxins.db"
 
@@ -34,10 +34,6 @@ def export_filtered_proteins_basic(
     Respeta el filtro de motivos (search_toxins) y omite los mismos accession
     excluidos que el resto de la aplicación.
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
     hits = search_toxins(
         gap_min=gap_min,
         gap_max=gap_max,
@@ -45,6 +41,9 @@ def export_filtered_proteins_basic(
         db_path=db_path,
     )
 
+    # Datos de Peptides para todos los hits en una consulta por bloque
+    info = SqliteToxinRepository(db_path).enrich_hits(h.get("peptide_id") for h in hits)
+
     results: List[Dict[str, Any]] = []
     seen_keys = set()
 
@@ -53,12 +52,7 @@ def export_filtered_proteins_basic(
         if peptide_id is None:
             continue
 
-        # Recuperar datos desde Peptides
-        cur.execute(
-            "SELECT accession_number, sequence, model_source FROM Peptides WHERE peptide_id = ?",
-            (peptide_id,),
-        )
-        row = cur.fetchone()
+        row = info.get(peptide_id)
         if not row:
             continue
 
@@ -85,7 +79,6 @@ def export_filtered_proteins_basic(
             }
         )
 
-    conn.close()
     return results
 
 
@@ -0,0 +1,186 @@
+"""
+Materializa métricas de grafo en la tabla ``graph_metrics``.
+
+Para cada estructura (Nav1_7_InhibitorPeptides.pdb_blob y/o Peptides.pdb_file),
+granularidad y umbral solicitados, construye el grafo y calcula las métricas en
+un pool de procesos. El proceso principal es el único que escribe en SQLite y
+omite las claves (hash, granularidad, umbral, versión) ya presentes, de modo que
+relanzar el script solo procesa lo nuevo o lo invalidado.
+
+Ejemplo:
+    python tools/populate_graph_metrics.py --source nav1_7 --granularity CA --threshold 10 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import sqlite3
+
+from src.infrastructure.db.sqlite.graph_metrics_repository_sqlite import SqliteGraphMetricsRepository
+from src.utils.structure_hash import structure_hash
+
+DB_PATH_DEFAULT = "database/toxins.db"
+PDB_DIR_DEFAULT = "pdbs"
+
+
+def _resolve_toxinas_content(pdb_data: Union[bytes, str], pdb_dir: str) -> Union[bytes, str]:
+    """Misma heurística que el endpoint de grafos: 'Peptides.pdb_file' puede ser un nombre de archivo."""
+    text = pdb_data.decode("utf-8", errors="ignore") if isinstance(pdb_data, (bytes, bytearray)) else str(pdb_data)
+    text = text.strip()
+    if text.lower().endswith(".pdb") and len(text) < 256:
+        for candidate in (text if os.path.isabs(text) else None, os.path.join(pdb_dir, text), text):
+            if candidate and os.path.exists(candidate):
+                with open(candidate, "r", encoding="utf-8", errors="ignore") as f:
+                    return f.read()
+    return pdb_data
+
+
+def iter_structures(db_path: str, sources: List[str], pdb_dir: str = PDB_DIR_DEFAULT) -> Iterator[Tuple[str, int, Union[bytes, str]]]:
+    """Genera (source, id, contenido PDB) para las fuentes indicadas."""
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    try:
+        if "nav1_7" in sources:
+            cur.execute("SELECT id, pdb_blob FROM Nav1_7_InhibitorPeptides WHERE pdb_blob IS NOT NULL")
+            for pid, blob in cur.fetchall():
+                yield "nav1_7", pid, blob
+        if "toxinas" in sources:
+            cur.execute("SELECT peptide_id, pdb_file FROM Peptides WHERE pdb_file IS NOT NULL")
+            for pid, blob in cur.fetchall():
+                yield "toxinas", pid, _resolve_toxinas_content(blob, pdb_dir)
+    finally:
+        conn.close()
+
+
+def compute_metrics_job(content: Union[bytes, str], granularity: str, threshold: float, weighted: bool = False) -> Dict[str, Any]:
+    """Trabajo ejecutado en el pool: mismo pipeline que BuildProteinGraph."""
+    from src.infrastructure.graphein.graphein_graph_adapter import GrapheinGraphAdapter
+    from src.infrastructure.pdb.pdb_preprocessor_adapter import PDBPreprocessorAdapter
+
+    pdb = PDBPreprocessorAdapter()
+    graph = GrapheinGraphAdapter()
+    path = pdb.prepare_temp_pdb(content)
+    try:
+        G = graph.build_graph(path, granularity, threshold)
+        return graph.compute_metrics(G, weighted=weighted)
+    finally:
+        pdb.cleanup([path])
+
+
+def _already_materialized(repo: SqliteGraphMetricsRepository, h: str, granularity: str, threshold: float, weighted: bool) -> bool:
+    if not weighted:
+        return repo.has(h, granularity, threshold)
+    centrality = repo.get_centrality(h, granularity, threshold)
+    return bool(centrality) and 'betweenness_weighted' in centrality
+
+
+def populate(
+    db_path: str = DB_PATH_DEFAULT,
+    sources: Optional[List[str]] = None,
+    granularities: Optional[List[str]] = None,
+    thresholds: Optional[List[float]] = None,
+    workers: int = 1,
+    force: bool = False,
+    prune: bool = False,
+    pdb_dir: str = PDB_DIR_DEFAULT,
+    weighted: bool = False,
+) -> Dict[str, Any]:
+    """Rellena graph_metrics y devuelve un resumen {computed, skipped, failed, pruned, seconds}."""
+    sources = sources or ["nav1_7"]
+    granularities = granularities or ["CA"]
+    thresholds = thresholds or [10.0]
+    repo = SqliteGraphMetricsRepository(db_path=db_path)
+    summary: Dict[str, Any] = {"computed": 0, "skipped": 0, "failed": 0, "pruned": 0, "errors": []}
+    started = time.perf_counter()
+
+    if prune:
+        summary["pruned"] = repo.delete_stale()
+
+    # Un mismo contenido puede aparecer en varias filas: se calcula una sola vez
+    jobs: Dict[Tuple[str, str, float], Tuple[Union[bytes, str], str]] = {}
+    for source, pid, content in iter_structures(db_path, sources, pdb_dir):
+        h = structure_hash(content)
+        for gran in granularities:
+            for thr in thresholds:
+                key = (h, gran, float(thr))
+                if key in jobs:
+                    continue
+                if not force and _already_materialized(repo, h, gran, thr, weighted):
+                    summary["skipped"] += 1
+                    continue
+                jobs[key] = (content, f"{source}:{pid}")
+
+    def _record(key, label, props=None, error=None):
+        if error is None and props and not props.get("error"):
+            repo.save(key[0], key[1], key[2], props)
+            summary["computed"] += 1
+        else:
+            summary["failed"] += 1
+            summary["errors"].append({"item": label, "granularity": key[1], "threshold": key[2],
+                                      "error": str(error or props.get("error"))})
+
+    if workers <= 1:
+        for key, (content, label) in jobs.items():
+            try:
+                _record(key, label, props=compute_metrics_job(content, key[1], key[2], weighted))
+            except Exception as e:
+                _record(key, label, error=e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(compute_metrics_job, content, key[1], key[2], weighted): (key, label)
+                for key, (content, label) in jobs.items()
+            }
+            for fut in as_completed(futures):
+                key, label = futures[fut]
+                try:
+                    _record(key, label, props=fut.result())
+                except Exception as e:
+                    _record(key, label, error=e)
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Materializa métricas de grafo en la tabla graph_metrics")
+    ap.add_argument("--db", default=DB_PATH_DEFAULT, help="Ruta a la base de datos SQLite")
+    ap.add_argument("--source", action="append", choices=["nav1_7", "toxinas"],
+                    help="Fuente(s) a procesar (repetible). Por defecto nav1_7")
+    ap.add_argument("--granularity", action="append", help="Granularidad(es): CA, atom (repetible). Por defecto CA")
+    ap.add_argument("--threshold", action="append", type=float, help="Umbral(es) de distancia en Å (repetible). Por defecto 10")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo (1 = secuencial)")
+    ap.add_argument("--pdb-dir", default=PDB_DIR_DEFAULT, help="Directorio base para Peptides.pdb_file con nombre de archivo")
+    ap.add_argument("--force", action="store_true", help="Recalcular aunque la clave exista")
+    ap.add_argument("--prune", action="store_true", help="Eliminar filas de versiones de métricas antiguas")
+    ap.add_argument("--weighted", action="store_true", help="Incluir betweenness/closeness ponderadas por distancia")
+    args = ap.parse_args(argv)
+
+    summary = populate(
+        db_path=args.db,
+        sources=args.source,
+        granularities=args.granularity,
+        thresholds=args.threshold,
+        workers=args.workers,
+        force=args.force,
+        prune=args.prune,
+        pdb_dir=args.pdb_dir,
+        weighted=args.weighted,
+    )
+    print(f"[✓] graph_metrics: {summary['computed']} calculadas, {summary['skipped']} ya presentes, "
+          f"{summary['failed']} con error, {summary['pruned']} obsoletas eliminadas ({summary['seconds']} s)")
+    for err in summary["errors"]:
+        print(f"[!] {err['item']} ({err['granularity']}, {err['threshold']}): {err['error']}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""
+Materializa dipolos de péptidos en la tabla ``peptide_dipoles``.
+
+Fuentes:
+  - toxinas: péptidos de ``Peptides`` con <accession>.pdb/.psf en pdbs/filtered_psfs
+    (los que muestra /v2/motif_dipoles/page).
+  - nav1_7: blobs pdb_blob/psf_blob de ``Nav1_7_InhibitorPeptides``
+    (los que usa /v2/family-dipoles/<familia>).
+
+Las claves (peptide_id, hash PDB, hash PSF) ya presentes con la versión actual
+se omiten. Los pendientes van en un solo lote a ``DipoleAdapter.calculate_dipoles_batch``,
+que con ``--workers N`` reparte el parseo en un pool de procesos; el proceso
+principal es el único que escribe en SQLite.
+
+Ejemplo:
+    python tools/populate_peptide_dipoles.py --source toxinas --source nav1_7 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import sqlite3
+
+from src.infrastructure.db.sqlite.peptide_dipole_repository_sqlite import SqlitePeptideDipoleRepository
+from src.infrastructure.graphein.dipole_adapter import DipoleAdapter
+from src.utils.structure_hash import structure_hash
+
+DB_PATH_DEFAULT = "database/toxins.db"
+FILTERED_DIR_DEFAULT = "pdbs/filtered_psfs"
+
+# (source, peptide_id, etiqueta, pdb, psf): rutas (toxinas) o bytes (nav1_7)
+Item = Tuple[str, int, str, Union[str, bytes], Optional[Union[str, bytes]]]
+
+
+def iter_items(db_path: str, sources: List[str], filtered_dir: str = FILTERED_DIR_DEFAULT) -> Iterator[Item]:
+    conn = sqlite3.connect(db_path)
+    try:
+        if "toxinas" in sources:
+            rows = conn.execute("SELECT peptide_id, accession_number FROM Peptides WHERE accession_number IS NOT NULL").fetchall()
+            for pid, acc in rows:
+                pdb_path = os.path.join(filtered_dir, f"{acc}.pdb")
+                psf_path = os.path.join(filtered_dir, f"{acc}.psf")
+                if os.path.exists(pdb_path) and os.path.exists(psf_path):
+                    yield "toxinas", pid, str(acc), pdb_path, psf_path
+        if "nav1_7" in sources:
+            rows = conn.execute(
+                "SELECT id, peptide_code, pdb_blob, psf_blob FROM Nav1_7_InhibitorPeptides WHERE pdb_blob IS NOT NULL"
+            ).fetchall()
+            for pid, code, pdb_blob, psf_blob in rows:
+                yield "nav1_7", pid, str(code), pdb_blob, psf_blob
+    finally:
+        conn.close()
+
+
+def _as_bytes(value: Union[str, bytes, None], is_path: bool) -> Optional[bytes]:
+    if value is None:
+        return None
+    if is_path:
+        return Path(value).read_bytes()
+    return value if isinstance(value, (bytes, bytearray)) else str(value).encode("utf-8")
+
+
+def populate(
+    db_path: str = DB_PATH_DEFAULT,
+    sources: Optional[List[str]] = None,
+    workers: int = 1,
+    force: bool = False,
+    filtered_dir: str = FILTERED_DIR_DEFAULT,
+) -> Dict[str, Any]:
+    """Rellena peptide_dipoles y devuelve un resumen {computed, skipped, failed, errors, seconds}."""
+    sources = sources or ["toxinas", "nav1_7"]
+    repo = SqlitePeptideDipoleRepository(db_path=db_path)
+    summary: Dict[str, Any] = {"computed": 0, "skipped": 0, "failed": 0, "errors": []}
+    started = time.perf_counter()
+
+    items = list(iter_items(db_path, sources, filtered_dir))
+    keys = []
+    for source, pid, _, pdb, psf in items:
+        is_path = source == "toxinas"
+        psf_bytes = _as_bytes(psf, is_path)
+        keys.append((pid, structure_hash(_as_bytes(pdb, is_path)), structure_hash(psf_bytes) if psf_bytes else ""))
+    present = {} if force else repo.get_many(keys)
+
+    jobs = []
+    for item, key in zip(items, keys):
+        if key in present:
+            summary["skipped"] += 1
+        else:
+            jobs.append((item, key))
+
+    # Mismo cálculo que los endpoints; rutas (toxinas) o bytes (nav1_7) en el mismo lote
+    results = DipoleAdapter().calculate_dipoles_batch([(item[3], item[4]) for item, _ in jobs], workers=workers)
+    for (item, key), res in zip(jobs, results):
+        if res.get("success"):
+            repo.save(key[0], key[1], key[2], res["dipole"], source=item[0])
+            summary["computed"] += 1
+        else:
+            summary["failed"] += 1
+            summary["errors"].append({"item": f"{item[0]}:{item[2]}", "error": str(res.get("error"))})
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Materializa dipolos de péptidos en la tabla peptide_dipoles")
+    ap.add_argument("--db", default=DB_PATH_DEFAULT, help="Ruta a la base de datos SQLite")
+    ap.add_argument("--source", action="append", choices=["toxinas", "nav1_7"],
+                    help="Fuente(s) a procesar (repetible). Por defecto ambas")
+    ap.add_argument("--filtered-dir", default=FILTERED_DIR_DEFAULT, help="Directorio con <accession>.pdb/.psf filtrados")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo (1 = secuencial)")
+    ap.add_argument("--force", action="store_true", help="Recalcular aunque la clave exista")
+    args = ap.parse_args(argv)
+
+    summary = populate(
+        db_path=args.db,
+        sources=args.source,
+        workers=args.workers,
+        force=args.force,
+        filtered_dir=args.filtered_dir,
+    )
+    print(f"[✓] peptide_dipoles: {summary['computed']} calculados, {summary['skipped']} ya presentes, "
+          f"{summary['failed']} con error ({summary['seconds']} s)")
+    for err in summary["errors"]:
+        print(f"[!] {err['item']}: {err['error']}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())